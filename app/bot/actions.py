@@ -4,6 +4,7 @@ import json
 import logging
 import secrets
 import time
+from collections import OrderedDict
 from dataclasses import dataclass
 from typing import Any
 
@@ -38,24 +39,38 @@ class ActionLookup:
 
 
 class ActionStore:
+    """Short-lived callback actions behind inline buttons.
+
+    Items are kept in insertion order, which is also expiry order because every
+    item gets the same TTL: expiry pops from the front and eviction of the oldest
+    item is O(1). Each (user, chat) keeps at most ``max_items_per_chat`` live
+    actions, so one busy chat evicts its own old buttons instead of everyone's.
+    """
+
     def __init__(
         self,
         *,
         ttl_seconds: int = DEFAULT_TTL_SECONDS,
         max_items: int = 2000,
+        max_items_per_chat: int = 200,
         max_payload_bytes: int = 2048,
     ) -> None:
         self._ttl_seconds = ttl_seconds
-        self._max_items = max_items
+        self._max_items = max(1, max_items)
+        self._max_items_per_chat = max(1, max_items_per_chat)
         self._max_payload_bytes = max_payload_bytes
-        self._items: dict[str, StoredAction] = {}
+        self._items: OrderedDict[str, StoredAction] = OrderedDict()
+        self._by_chat: dict[tuple[int, int], OrderedDict[str, None]] = {}
+
+    def __len__(self) -> int:
+        return len(self._items)
 
     def store_action(self, *, action: Action, user_id: int, chat_id: int) -> str:
-        self._cleanup()
         payload = action.payload or {}
         self._validate_payload(payload)
-        action_id = self._generate_token()
         now = time.monotonic()
+        self._expire(now)
+        action_id = self._generate_token()
         self._items[action_id] = StoredAction(
             user_id=user_id,
             chat_id=chat_id,
@@ -64,21 +79,28 @@ class ActionStore:
             created_at=now,
             expires_at=now + self._ttl_seconds,
         )
+        chat_tokens = self._by_chat.setdefault((user_id, chat_id), OrderedDict())
+        chat_tokens[action_id] = None
+        while len(chat_tokens) > self._max_items_per_chat:
+            self._remove(next(iter(chat_tokens)))
+        while len(self._items) > self._max_items:
+            self._remove(next(iter(self._items)))
         return action_id
 
     def get_action(self, *, user_id: int, chat_id: int, action_id: str) -> StoredAction | None:
-        self._cleanup()
+        now = time.monotonic()
+        self._expire(now)
         item = self._items.get(action_id)
         if item is None or item.user_id != user_id or item.chat_id != chat_id:
             return None
-        if item.expires_at < time.monotonic():
-            self._items.pop(action_id, None)
+        if item.expires_at < now:
+            self._remove(action_id)
             return None
         return item
 
     def lookup_action(self, *, user_id: int, chat_id: int, action_id: str) -> ActionLookup:
-        self._cleanup()
         now = time.monotonic()
+        self._expire(now)
         item = self._items.get(action_id)
         if item is None:
             return ActionLookup(action=None, status="missing", age_seconds=None, ttl_seconds=self._ttl_seconds)
@@ -87,7 +109,7 @@ class ActionStore:
         age = now - item.created_at
         ttl = item.expires_at - item.created_at
         if item.expires_at < now:
-            self._items.pop(action_id, None)
+            self._remove(action_id)
             return ActionLookup(action=None, status="expired", age_seconds=age, ttl_seconds=ttl)
         return ActionLookup(action=item, status="ok", age_seconds=age, ttl_seconds=ttl)
 
@@ -103,16 +125,24 @@ class ActionStore:
                 return token
         return secrets.token_urlsafe(12)
 
-    def _cleanup(self) -> None:
-        now = time.monotonic()
-        expired = [token for token, item in self._items.items() if item.expires_at < now]
-        for token in expired:
-            self._items.pop(token, None)
-        if len(self._items) > self._max_items:
-            overage = len(self._items) - self._max_items
-            items_by_age = sorted(self._items.items(), key=lambda entry: entry[1].created_at)
-            for token, _item in items_by_age[:overage]:
-                self._items.pop(token, None)
+    def _expire(self, now: float) -> None:
+        while self._items:
+            token, item = next(iter(self._items.items()))
+            if item.expires_at >= now:
+                return
+            self._remove(token)
+
+    def _remove(self, token: str) -> None:
+        item = self._items.pop(token, None)
+        if item is None:
+            return
+        key = (item.user_id, item.chat_id)
+        chat_tokens = self._by_chat.get(key)
+        if chat_tokens is None:
+            return
+        chat_tokens.pop(token, None)
+        if not chat_tokens:
+            del self._by_chat[key]
 
 
 def parse_callback_token(data: str | None) -> str | None:
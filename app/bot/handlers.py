@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import asyncio
+import contextlib
 import logging
 import math
 import re
@@ -8,6 +9,7 @@ import os
 import sys
 import time
 from collections.abc import Awaitable, Callable
+from contextlib import AbstractAsyncContextManager
 from dataclasses import replace
 from datetime import datetime, timedelta, timezone
 from functools import wraps
@@ -32,12 +34,16 @@ from app.core.calendar_nlp_ru import (
 )
 from app.core.calc import CalcError, parse_and_eval
 from app.core.dialog_memory import DialogMessage
-from app.core.document_qa import select_relevant_chunks
+from app.core.document_qa import DOCUMENT_INDEX_CACHE, DocumentIndex, save_document_index
+from app.core.document_summary import ChunkSummaryStore, summarize_document
+from app.core.error_messages import map_error_text
 from app.core.last_state_resolver import ResolutionResult, resolve_short_message
 from app.core.memory_layers import build_memory_layers_context
 from app.core.memory_manager import MemoryManager
 from app.core.orchestrator import Orchestrator
-from app.core.file_text_extractor import FileTextExtractor, OCRNotAvailableError
+from app.core.prompt_budget import PromptBlock, estimate_messages_tokens, plan_prompt, resolve_prompt_budget
+from app.core.extraction_executor import ExtractionBusyError, ExtractionExecutor, ExtractionTimeoutError
+from app.core.file_text_extractor import ExtractedText, FileTextExtractor, OCRNotAvailableError
 from app.core.user_profile import UserProfile
 from app.core.result import (
     Action,
@@ -56,10 +62,13 @@ from app.core.tools_llm import llm_check, llm_explain, llm_rewrite
 from app.infra.allowlist import AllowlistStore
 from app.infra.last_state_store import LastStateStore
 from app.infra.draft_store import DraftStore
+from app.infra.document_cache import DocumentCache, hash_file
 from app.infra.document_session_store import DocumentSessionStore
-from app.infra.messaging import safe_edit_text, safe_send_text
-from app.infra.llm import LLMClient, PerplexityClient, ensure_plain_text
+from app.infra.fair_limiter import QueueTimeoutError
+from app.infra.messaging import StreamingReply, safe_edit_text, safe_send_text
+from app.infra.llm import LLMClient, LLMRouter, PerplexityClient, client_models, ensure_plain_text
 from app.infra.llm.openai_client import OpenAIClient
+from app.infra.llm_cache import LLMResponseCache
 from app.infra.rate_limiter import RateLimiter
 from app.infra.resilience import RetryPolicy, TimeoutConfig
 from app.infra.request_context import (
@@ -85,6 +94,11 @@ def _get_orchestrator(context: ContextTypes.DEFAULT_TYPE) -> Orchestrator:
     return context.application.bot_data["orchestrator"]
 
 
+def _llm_slot(orchestrator: Any, user_id: int) -> AbstractAsyncContextManager[None]:
+    slot = getattr(orchestrator, "llm_slot", None)
+    return slot(user_id) if callable(slot) else contextlib.nullcontext()
+
+
 def _get_storage(context: ContextTypes.DEFAULT_TYPE) -> TaskStorage:
     return context.application.bot_data["storage"]
 
@@ -143,6 +157,20 @@ def _get_document_store(context: ContextTypes.DEFAULT_TYPE) -> DocumentSessionSt
     return None
 
 
+def _get_document_cache(context: ContextTypes.DEFAULT_TYPE) -> DocumentCache | None:
+    cache = context.application.bot_data.get("document_cache")
+    if isinstance(cache, DocumentCache):
+        return cache
+    return None
+
+
+def _get_extraction_executor(context: ContextTypes.DEFAULT_TYPE) -> ExtractionExecutor | None:
+    executor = context.application.bot_data.get("extraction_executor")
+    if isinstance(executor, ExtractionExecutor):
+        return executor
+    return None
+
+
 def _get_reminder_scheduler(context: ContextTypes.DEFAULT_TYPE):
     return context.application.bot_data.get("reminder_scheduler")
 
@@ -160,6 +188,9 @@ def _resolve_llm_model(context: ContextTypes.DEFAULT_TYPE) -> str | None:
     if settings is None:
         return None
     client = _get_llm_client(context)
+    if isinstance(client, LLMRouter):
+        # Same label as the orchestrator uses, so cache keys name the routes actually called.
+        return "+".join(client_models(client, ""))
     if isinstance(client, OpenAIClient):
         return settings.openai_model
     if isinstance(client, PerplexityClient):
@@ -236,6 +267,17 @@ def _menu_enabled(context: ContextTypes.DEFAULT_TYPE) -> bool:
     return bool(getattr(settings, "enable_menu", False))
 
 
+def _build_streaming_reply(update: Update, context: ContextTypes.DEFAULT_TYPE) -> StreamingReply | None:
+    settings = _get_settings(context)
+    if not getattr(settings, "llm_streaming_enabled", False):
+        return None
+    return StreamingReply(
+        update,
+        context,
+        interval_seconds=getattr(settings, "llm_stream_edit_interval_seconds", 1.0),
+    )
+
+
 def _strict_no_pseudo_sources(context: ContextTypes.DEFAULT_TYPE) -> bool:
     settings = _get_settings(context)
     return bool(getattr(settings, "strict_no_pseudo_sources", False))
@@ -995,18 +1037,13 @@ def _load_document_text(path: str) -> str:
         return ""
 
 
-def _trim_document_text(text: str, *, max_chars: int = 8000) -> str:
-    if len(text) <= max_chars:
-        return text
-    return text[:max_chars].rsplit("\n", 1)[0].strip() or text[:max_chars]
-
-
 async def _handle_document_summary(
     context: ContextTypes.DEFAULT_TYPE,
     *,
     user_id: int,
     chat_id: int,
     doc_id: str,
+    progress: StreamingReply | None = None,
 ) -> OrchestratorResult:
     document_store = _get_document_store(context)
     if document_store is None:
@@ -1029,18 +1066,51 @@ async def _handle_document_summary(
     )
     if facts_only:
         system_prompt += " Не добавляй домыслы. Если данных нет, так и скажи."
-    trimmed_text = _trim_document_text(text)
-    messages = [
-        {"role": "system", "content": system_prompt},
-        {"role": "user", "content": f"Текст документа:\n{trimmed_text}\n\nСделай резюме."},
-    ]
+    settings = _get_settings(context)
+
+    response_cache = context.application.bot_data.get("llm_response_cache")
+
+    async def generate(messages: list[dict[str, str]]) -> str:
+        async def call() -> str:
+            async with _llm_slot(orchestrator, user_id):
+                return ensure_plain_text(await llm_client.generate_text(model=model, messages=messages))
+
+        if not isinstance(response_cache, LLMResponseCache):
+            return await call()
+        return await response_cache.get_or_generate(
+            provider=type(llm_client).__name__, model=model, messages=messages, generate=call
+        )
+
+    async def on_progress(done: int, total: int) -> None:
+        if progress is not None:
+            await progress.status(f"⏳ Резюмирую документ: {done}/{total} частей…", force=done == total)
+
     try:
-        response = await llm_client.generate_text(model=model, messages=messages)
-        response = ensure_plain_text(response)
+        outcome = await summarize_document(
+            text,
+            generate=generate,
+            system_prompt=system_prompt,
+            store=ChunkSummaryStore(Path(session.text_path)),
+            max_concurrency=getattr(settings, "doc_summary_concurrency", 4),
+            on_progress=on_progress,
+        )
+    except QueueTimeoutError:
+        return ratelimited(map_error_text("rate_limited"), intent="document.summary", mode="local")
     except Exception:
+        LOGGER.warning("Document summary failed: doc_id=%s", session.doc_id, exc_info=True)
         return error("Не удалось получить резюме.", intent="document.summary", mode="local")
+    response = outcome.text
     if not response.strip():
         return error("Не удалось получить резюме.", intent="document.summary", mode="local")
+    if progress is not None and progress.message is not None:
+        await progress.status(f"✅ Резюме собрано из {outcome.chunks} частей.", force=True)
+    LOGGER.info(
+        "Document summary: doc_id=%s chunks=%s cached_chunks=%s llm_calls=%s",
+        session.doc_id,
+        outcome.chunks,
+        outcome.cached_chunks,
+        outcome.llm_calls,
+    )
     return ok(
         response.strip(),
         intent="document.summary",
@@ -1062,8 +1132,8 @@ async def _handle_document_question(
     session = document_store.get_active(user_id=user_id, chat_id=chat_id)
     if session is None or session.state != "qa_mode":
         return refused("Сначала пришлите файл.", intent="document.qa", mode="local")
-    text = _load_document_text(session.text_path)
-    if not text.strip():
+    index = DOCUMENT_INDEX_CACHE.get(session.text_path)
+    if index is None or not index.text.strip():
         return error("Текст документа не найден.", intent="document.qa", mode="local")
     llm_client = _get_llm_client(context)
     model = _resolve_llm_model(context)
@@ -1071,8 +1141,9 @@ async def _handle_document_question(
         return error("LLM не настроен.", intent="document.qa", mode="local")
     orchestrator = _get_orchestrator(context)
     facts_only = orchestrator.is_facts_only(user_id)
-    chunks = select_relevant_chunks(text, question, top_k=4)
-    if not chunks:
+    chunks = [chunk for chunk, _ in index.search(question, top_k=4)]
+    overview = ChunkSummaryStore(Path(session.text_path)).overview
+    if not chunks and not overview:
         return refused("В документе нет ответа.", intent="document.qa", mode="local")
     system_prompt = (
         "Отвечай только на основе предоставленных фрагментов документа. "
@@ -1080,14 +1151,38 @@ async def _handle_document_question(
     )
     if facts_only:
         system_prompt += " Никаких домыслов, только факты из текста."
-    context_text = "\n\n".join(f"Фрагмент {idx + 1}:\n{chunk}" for idx, chunk in enumerate(chunks))
+    # Fragments come best-first: when the budget is short, the least relevant go first.
+    plan = plan_prompt(
+        budget=min(
+            resolve_prompt_budget(name, (getattr(orchestrator, "config", None) or {}).get("llm"))
+            for name in client_models(llm_client, model)
+        ),
+        required=[system_prompt, f"Вопрос: {question}"],
+        blocks=[
+            PromptBlock("overview", [overview] if overview else [], share=0.3),
+            PromptBlock("fragments", chunks, share=0.7, drop_oldest=False),
+        ],
+    )
+    context_text = "\n\n".join(f"Фрагмент {idx + 1}:\n{chunk}" for idx, chunk in enumerate(plan.kept["fragments"]))
+    if plan.kept["overview"]:
+        context_text = f"Резюме документа:\n{plan.kept['overview'][0]}\n\n{context_text}".strip()
     messages = [
         {"role": "system", "content": system_prompt},
         {"role": "user", "content": f"Вопрос: {question}\n\n{context_text}"},
     ]
+    add_trace(
+        get_request_context(context),
+        step="llm.prompt",
+        component="prompt",
+        name=f"{estimate_messages_tokens(messages)}/{plan.budget} tokens",
+        status="ok",
+    )
     try:
-        response = await llm_client.generate_text(model=model, messages=messages)
+        async with _llm_slot(orchestrator, user_id):
+            response = await llm_client.generate_text(model=model, messages=messages)
         response = ensure_plain_text(response)
+    except QueueTimeoutError:
+        return ratelimited(map_error_text("rate_limited"), intent="document.qa", mode="local")
     except Exception:
         return error("Не удалось получить ответ.", intent="document.qa", mode="local")
     if not response.strip():
@@ -1236,8 +1331,9 @@ async def _build_reminders_list_result(
     limit: int,
     intent: str,
 ) -> OrchestratorResult:
-    items = await calendar_store.list_reminders(now, limit=None, include_disabled=False)
-    filtered = [item for item in items if item.user_id == user_id and item.chat_id == chat_id]
+    filtered = await calendar_store.list_reminders(
+        now, limit=None, include_disabled=False, user_id=user_id, chat_id=chat_id
+    )
     filtered.sort(key=lambda item: item.trigger_at)
     limited = filtered[: max(1, limit)]
     actions = _reminder_list_controls_actions()
@@ -1285,23 +1381,26 @@ async def _build_calendar_list_result(
     chat_id: int,
     intent: str,
 ) -> OrchestratorResult:
-    items = await calendar_store.list_items(start=start, end=end)
-    filtered = [item for item in items if item.user_id == user_id and item.chat_id == chat_id]
+    filtered = await calendar_store.list_occurrences(start, end, user_id=user_id, chat_id=chat_id)
     filtered.sort(key=lambda item: item.dt)
     actions = _calendar_list_controls_actions()
     if not filtered:
         return ok("Нет событий на ближайшие 7 дней.", intent=intent, mode="local", actions=actions)
     lines: list[str] = []
+    seen_series: set[str] = set()
     for item in filtered:
         dt_label = item.dt.astimezone(calendar_store.BOT_TZ).strftime("%Y-%m-%d %H:%M")
         lines.append(f"{item.id} | {dt_label} | {item.title}")
-        actions.append(
-            Action(
-                id="utility_calendar.delete",
-                label=f"🗑 Удалить: {_short_label(item.title)}",
-                payload={"op": "calendar.delete", "event_id": item.id},
-            )
-        )
+        payload: dict[str, object] = {"op": "calendar.delete", "event_id": item.id}
+        label = f"🗑 Удалить: {_short_label(item.title)}"
+        if item.rrule:
+            # One button per series; it leads to the "this / following / all" choice for the first listed occurrence.
+            if item.id in seen_series:
+                continue
+            seen_series.add(item.id)
+            payload["instance_dt"] = item.dt.isoformat()
+            label = f"{label} 🔄"
+        actions.append(Action(id="utility_calendar.delete", label=label, payload=payload))
     return ok("\n".join(lines), intent=intent, mode="local", actions=actions)
 
 
@@ -1630,7 +1729,9 @@ async def send_result(
     result: OrchestratorResult | dict[str, Any] | None,
     *,
     reply_markup=None,
+    edit_message=None,
 ) -> None:
+    """``edit_message`` replaces a placeholder (e.g. a StreamingReply) instead of sending anew."""
     public_result = normalize_to_orchestrator_result(result)
     user_id = update.effective_user.id if update.effective_user else 0
     facts_enabled = False
@@ -1703,7 +1804,10 @@ async def send_result(
         f"reply_markup={effective_reply_markup is not None}",
     )
     send_start = time.monotonic()
-    await _send_text(update, context, final_text, reply_markup=effective_reply_markup)
+    if edit_message is not None:
+        await safe_edit_text(update, context, final_text, reply_markup=effective_reply_markup, target=edit_message)
+    else:
+        await _send_text(update, context, final_text, reply_markup=effective_reply_markup)
     await _send_attachments(update, context, public_result.attachments)
     if request_id:
         total_duration_ms = None
@@ -3488,7 +3592,13 @@ async def _dispatch_action_payload(
         doc_id = payload.get("doc_id")
         if not isinstance(doc_id, str) or not doc_id:
             return error("Некорректные данные действия.", intent="document.summary", mode="local")
-        return await _handle_document_summary(context, user_id=user_id, chat_id=chat_id, doc_id=doc_id)
+        return await _handle_document_summary(
+            context,
+            user_id=user_id,
+            chat_id=chat_id,
+            doc_id=doc_id,
+            progress=StreamingReply(update, context),
+        )
     if op_value == "document.qa":
         doc_id = payload.get("doc_id")
         if not isinstance(doc_id, str) or not doc_id:
@@ -5354,6 +5464,76 @@ async def reminder_on(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Non
     await send_result(update, context, result)
 
 
+async def _extract_uploaded_document(
+    update: Update,
+    context: ContextTypes.DEFAULT_TYPE,
+    settings,
+    file_path: Path,
+    file_type: str,
+) -> ExtractedText | None:
+    """Extract text off the event loop; reports failures to the user and returns None."""
+    extractor = FileTextExtractor(
+        ocr_enabled=settings.ocr_enabled,
+        tesseract_lang=settings.tesseract_lang,
+        max_chars=settings.doc_max_chars,
+        max_pages=settings.doc_max_pages,
+    )
+    executor = _get_extraction_executor(context)
+    try:
+        if executor is not None:
+            extracted = await executor.extract(extractor, path=file_path, file_type=file_type)
+        else:
+            extracted = await asyncio.to_thread(extractor.extract, path=file_path, file_type=file_type)
+    except ExtractionBusyError:
+        await send_result(
+            update,
+            context,
+            refused(
+                "Сейчас обрабатывается много документов. Попробуйте отправить файл чуть позже.",
+                intent="document.extract.busy",
+                mode="local",
+            ),
+        )
+        return None
+    except ExtractionTimeoutError:
+        await send_result(
+            update,
+            context,
+            error(
+                "Документ обрабатывается слишком долго. Попробуйте файл поменьше.",
+                intent="document.extract.timeout",
+                mode="local",
+            ),
+        )
+        return None
+    except OCRNotAvailableError:
+        await send_result(
+            update,
+            context,
+            error(
+                "OCR недоступен. Установите tesseract или отключите OCR.",
+                intent="document.ocr_missing",
+                mode="local",
+            ),
+        )
+        return None
+    except Exception:
+        await send_result(
+            update,
+            context,
+            error("Не удалось извлечь текст из документа.", intent="document.extract", mode="local"),
+        )
+        return None
+    if not extracted.text.strip():
+        await send_result(
+            update,
+            context,
+            refused("Не удалось извлечь текст.", intent="document.extract.empty", mode="local"),
+        )
+        return None
+    return extracted
+
+
 @_with_error_handling
 async def document_upload(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     if not await _guard_access(update, context):
@@ -5376,6 +5556,7 @@ async def document_upload(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     user_id = update.effective_user.id if update.effective_user else 0
     chat_id = update.effective_chat.id if update.effective_chat else 0
     file_id = ""
+    file_unique_id = ""
     file_type = ""
     extension = ""
     if message.document is not None:
@@ -5393,57 +5574,59 @@ async def document_upload(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
             return
         file_type, extension = detected
         file_id = message.document.file_id
+        file_unique_id = message.document.file_unique_id or ""
     elif message.photo:
         photo = message.photo[-1]
         file_id = photo.file_id
+        file_unique_id = photo.file_unique_id or ""
         file_type = "image"
         extension = ".jpg"
     else:
         return
-    user_dir = settings.uploads_path / str(user_id)
-    user_dir.mkdir(parents=True, exist_ok=True)
-    file_path = user_dir / f"{file_id}{extension}"
-    file_obj = await context.bot.get_file(file_id)
-    await file_obj.download_to_drive(custom_path=str(file_path))
-    extractor = FileTextExtractor(ocr_enabled=settings.ocr_enabled)
-    try:
-        extracted = extractor.extract(path=file_path, file_type=file_type)
-    except OCRNotAvailableError:
-        await send_result(
-            update,
-            context,
-            error(
-                "OCR недоступен. Установите tesseract или отключите OCR.",
-                intent="document.ocr_missing",
-                mode="local",
-            ),
-        )
-        return
-    except Exception:
-        await send_result(
-            update,
-            context,
-            error("Не удалось извлечь текст из документа.", intent="document.extract", mode="local"),
-        )
-        return
-    if not extracted.text.strip():
-        await send_result(
-            update,
-            context,
-            refused("Не удалось извлечь текст.", intent="document.extract.empty", mode="local"),
-        )
-        return
-    text_dir = settings.document_texts_path / str(user_id)
-    text_dir.mkdir(parents=True, exist_ok=True)
-    text_path = text_dir / f"{file_id}.txt"
-    text_path.write_text(extracted.text, encoding="utf-8")
+    document_cache = _get_document_cache(context)
+    file_unique_id = file_unique_id if document_cache is not None else ""
+    cached = document_cache.lookup_unique_id(file_unique_id) if document_cache and file_unique_id else None
+    file_path: Path | None = None
+    content_hash = ""
+    if cached is None:
+        user_dir = settings.uploads_path / str(user_id)
+        user_dir.mkdir(parents=True, exist_ok=True)
+        file_path = user_dir / f"{file_id}{extension}"
+        file_obj = await context.bot.get_file(file_id)
+        await file_obj.download_to_drive(custom_path=str(file_path))
+        if document_cache is not None:
+            content_hash = await asyncio.to_thread(hash_file, file_path)
+            cached = document_cache.lookup_hash(content_hash, file_unique_id=file_unique_id)
+    if cached is None:
+        extracted = await _extract_uploaded_document(update, context, settings, file_path, file_type)
+        if extracted is None:
+            return
+        if document_cache is not None:
+            cached = document_cache.put(
+                content_hash,
+                extracted,
+                file_type=file_type,
+                file_unique_id=file_unique_id,
+            )
+    if document_cache is not None and cached is not None:
+        content_hash = cached.content_hash
+        text_path = document_cache.text_path(content_hash)
+    else:
+        text_dir = settings.document_texts_path / str(user_id)
+        text_dir.mkdir(parents=True, exist_ok=True)
+        text_path = text_dir / f"{file_id}.txt"
+        text_path.write_text(extracted.text, encoding="utf-8")
+        save_document_index(text_path, DocumentIndex.build(extracted.text))
     session = document_store.create_session(
         user_id=user_id,
         chat_id=chat_id,
-        file_path=str(file_path),
+        file_path=str(file_path) if file_path is not None else "",
         file_type=file_type,
         text_path=str(text_path),
+        content_hash=content_hash,
     )
+    if document_cache is not None and content_hash:
+        document_cache.acquire(content_hash, session.doc_id)
     result = ok(
         "Документ обработан. Что сделать?",
         intent="document.processed",
@@ -5573,16 +5756,21 @@ async def chat(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
             if memory_manager and await memory_manager.dialog_enabled(user_id) and _should_store_assistant_response(result):
                 await memory_manager.add_dialog_message(user_id, chat_id, "assistant", result.text)
             return
+    streaming = _build_streaming_reply(update, context)
     try:
         result = await orchestrator.handle(
             prompt,
             user_context,
+            on_partial=streaming.update if streaming is not None else None,
         )
     except Exception as exc:
         set_status(context, "error")
+        if streaming is not None:
+            # Otherwise "⏳ Думаю…" would hang above the error reply.
+            await streaming.discard()
         await _handle_exception(update, context, exc)
         return
-    await send_result(update, context, result)
+    await send_result(update, context, result, edit_message=streaming.message if streaming is not None else None)
     if memory_manager and await memory_manager.dialog_enabled(user_id) and _should_store_assistant_response(result):
         await memory_manager.add_dialog_message(user_id, chat_id, "assistant", result.text)
 
@@ -13,7 +13,9 @@ from apscheduler.triggers.cron import CronTrigger
 from apscheduler.triggers.date import DateTrigger
 
 from app.core import calendar_store
+from app.core.digest_engine import digest_slot_offset
 from app.core.user_profile import DEFAULT_TIMEZONE
+from app.infra.send_queue import get_send_queue
 
 LOGGER = logging.getLogger(__name__)
 
@@ -38,11 +40,13 @@ class AppScheduler:
         application: Any,
         calendar_store_module: Any = calendar_store,
         profile_store: Any = None,
+        digest_window_seconds: int = 0,
     ) -> None:
         self._scheduler = AsyncIOScheduler()
         self._application = application
         self._store = calendar_store_module
         self._profile_store = profile_store
+        self._digest_window_seconds = max(0, digest_window_seconds)
 
     def start(self) -> None:
         if self._scheduler.running:
@@ -109,14 +113,20 @@ class AppScheduler:
             return False
 
     def add_digest_job(self, user_id: int, chat_id: int, timezone_str: str) -> bool:
-        """Поставить ежедневный дайджест в 09:00 по времени пользователя (timezone на trigger)."""
+        """Поставить ежедневный дайджест в 09:00 по времени пользователя (timezone на trigger).
+
+        Внутри окна ``digest_window_seconds`` пользователь получает постоянный сдвиг по хэшу user_id,
+        чтобы дайджесты не уходили все в одну секунду.
+        """
         job_id = _job_name_digest(user_id)
         self.remove_job(job_id)
         try:
             tz = ZoneInfo(timezone_str)
+            offset = digest_slot_offset(user_id, self._digest_window_seconds)
+            slot = (DIGEST_HOUR * 3600 + DIGEST_MINUTE * 60 + offset) % 86400
             self._scheduler.add_job(
                 _run_digest_job,
-                trigger=CronTrigger(hour=DIGEST_HOUR, minute=DIGEST_MINUTE, timezone=tz),
+                trigger=CronTrigger(hour=slot // 3600, minute=slot % 3600 // 60, second=slot % 60, timezone=tz),
                 id=job_id,
                 replace_existing=True,
                 kwargs={
@@ -188,21 +198,52 @@ async def _run_reminder_job(
             chat_id=reminder.chat_id,
             columns=2,
         )
+    async def mark_sent() -> None:
+        fired_at = datetime.now(tz=tz)
+        next_reminder = await calendar_store_module.mark_reminder_sent(reminder.id, fired_at, missed=False)
+        if next_reminder is not None:
+            scheduler = getattr(application, "bot_data", {}).get("reminder_scheduler")
+            if scheduler is not None and hasattr(scheduler, "schedule_reminder"):
+                await scheduler.schedule_reminder(next_reminder)
+                LOGGER.info(
+                    "Reminder recurrence scheduled: reminder_id=%s next_trigger_at=%s",
+                    reminder.id,
+                    next_reminder.trigger_at.isoformat(),
+                )
+        LOGGER.info(
+            "Reminder sent: reminder_id=%s user_id=%s chat_id=%s trigger_at=%s",
+            reminder.id,
+            reminder.user_id,
+            reminder.chat_id,
+            reminder.trigger_at.isoformat(),
+        )
+
     try:
         bot = getattr(application, "bot", None)
-        if bot is not None:
+        send_queue = get_send_queue(application)
+        if send_queue is not None:
+            # Marked sent only once the queue actually delivered the message.
+            await send_queue.submit(
+                reminder.chat_id,
+                text,
+                reply_markup=reply_markup,
+                kind="reminder",
+                key=f"reminder:{reminder.id}:{reminder.trigger_at.isoformat()}",
+                on_delivered=mark_sent,
+            )
+        elif bot is not None:
             await bot.send_message(
                 chat_id=reminder.chat_id,
                 text=text,
                 reply_markup=reply_markup,
             )
-            if reply_markup is not None:
-                LOGGER.info(
-                    "reminder_followup_shown reminder_id=%s user_id=%s chat_id=%s",
-                    reminder.id,
-                    reminder.user_id,
-                    reminder.chat_id,
-                )
+        if reply_markup is not None and (bot is not None or send_queue is not None):
+            LOGGER.info(
+                "reminder_followup_shown reminder_id=%s user_id=%s chat_id=%s",
+                reminder.id,
+                reminder.user_id,
+                reminder.chat_id,
+            )
     except Exception:
         LOGGER.exception(
             "Reminder send failed: reminder_id=%s chat_id=%s",
@@ -210,29 +251,8 @@ async def _run_reminder_job(
             reminder.chat_id,
         )
         return
-
-    fired_at = datetime.now(tz=tz)
-    next_reminder = await calendar_store_module.mark_reminder_sent(
-        reminder.id, fired_at, missed=False
-    )
-
-    if next_reminder is not None:
-        scheduler = getattr(application, "bot_data", {}).get("reminder_scheduler")
-        if scheduler is not None and hasattr(scheduler, "schedule_reminder"):
-            await scheduler.schedule_reminder(next_reminder)
-            LOGGER.info(
-                "Reminder recurrence scheduled: reminder_id=%s next_trigger_at=%s",
-                reminder.id,
-                next_reminder.trigger_at.isoformat(),
-            )
-
-    LOGGER.info(
-        "Reminder sent: reminder_id=%s user_id=%s chat_id=%s trigger_at=%s",
-        reminder.id,
-        reminder.user_id,
-        reminder.chat_id,
-        reminder.trigger_at.isoformat(),
-    )
+    if send_queue is None:
+        await mark_sent()
 
 
 async def _run_digest_job(user_id: int, chat_id: int, application: Any) -> None:
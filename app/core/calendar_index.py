@@ -0,0 +1,304 @@
+from __future__ import annotations
+
+import bisect
+import heapq
+import itertools
+from collections.abc import Iterable
+
+from app.core.calendar_storage import iso_to_timestamp, normalized_status
+
+# Reminders whose trigger_at cannot be parsed are treated as due right away,
+# the same way list_due_reminders falls back to "now" for them.
+_UNPARSEABLE_TS = float("-inf")
+
+
+def _due_timestamp(record: dict[str, object]) -> float | None:
+    """Trigger timestamp for an active reminder record, None when it can never fire."""
+    if not bool(record.get("enabled", True)) or normalized_status(record) != "active":
+        return None
+    ts = iso_to_timestamp(record.get("trigger_at"))
+    return _UNPARSEABLE_TS if ts is None else ts
+
+
+class DueReminderIndex:
+    """Min-heap of active reminders keyed by trigger time.
+
+    Updates push a fresh heap entry and re-point reminder_id -> entry; superseded
+    entries stay in the heap and are discarded lazily when they reach the head.
+    """
+
+    def __init__(self) -> None:
+        self._heap: list[tuple[float, int, str]] = []
+        self._entries: dict[str, tuple[float, int]] = {}
+        self._counter = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def rebuild(self, records: Iterable[dict[str, object]]) -> None:
+        self._heap = []
+        self._entries = {}
+        for record in records:
+            self.update(record)
+
+    def update(self, record: dict[str, object]) -> None:
+        reminder_id = record.get("reminder_id")
+        if not isinstance(reminder_id, str):
+            return
+        ts = _due_timestamp(record)
+        if ts is None:
+            self._entries.pop(reminder_id, None)
+            return
+        current = self._entries.get(reminder_id)
+        if current is not None and current[0] == ts:
+            return
+        seq = next(self._counter)
+        self._entries[reminder_id] = (ts, seq)
+        heapq.heappush(self._heap, (ts, seq, reminder_id))
+        self._maybe_compact()
+
+    def remove(self, reminder_id: str) -> None:
+        self._entries.pop(reminder_id, None)
+
+    def _is_live(self, entry: tuple[float, int, str]) -> bool:
+        ts, seq, reminder_id = entry
+        return self._entries.get(reminder_id) == (ts, seq)
+
+    def _drop_stale_head(self) -> None:
+        while self._heap and not self._is_live(self._heap[0]):
+            heapq.heappop(self._heap)
+
+    def _maybe_compact(self) -> None:
+        if len(self._heap) > 2 * len(self._entries) + 64:
+            self._heap = [(ts, seq, reminder_id) for reminder_id, (ts, seq) in self._entries.items()]
+            heapq.heapify(self._heap)
+
+    def next_due_ts(self) -> float | None:
+        self._drop_stale_head()
+        return self._heap[0][0] if self._heap else None
+
+    def due_ids(self, now_ts: float) -> list[str]:
+        """Ids with trigger <= now_ts, ordered by trigger time.
+
+        Only the expired top of the heap is visited: children of an entry that is
+        not yet due cannot be due either. Entries stay in the heap until the
+        reminder is marked sent, snoozed or disabled.
+        """
+        self._drop_stale_head()
+        found: list[tuple[float, int, str]] = []
+        stack = [0] if self._heap else []
+        while stack:
+            position = stack.pop()
+            entry = self._heap[position]
+            if entry[0] > now_ts:
+                continue
+            if self._is_live(entry):
+                found.append(entry)
+            for child in (2 * position + 1, 2 * position + 2):
+                if child < len(self._heap):
+                    stack.append(child)
+        found.sort()
+        return [reminder_id for _, _, reminder_id in found]
+
+
+class EventStartIndex:
+    """Events sorted by start timestamp for bisect range lookups.
+
+    Each event keeps the sequence number of its first insertion, so events with
+    the same start stay in storage order when they are moved.
+    """
+
+    def __init__(self) -> None:
+        self._keys: list[tuple[float, int, str]] = []
+        self._entries: dict[str, tuple[float, int]] = {}
+        self._counter = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def rebuild(self, records: Iterable[dict[str, object]]) -> None:
+        self._entries = {}
+        for record in records:
+            event_id = record.get("event_id")
+            ts = iso_to_timestamp(record.get("dt_start"))
+            if isinstance(event_id, str) and ts is not None:
+                self._entries[event_id] = (ts, next(self._counter))
+        self._keys = sorted((ts, seq, event_id) for event_id, (ts, seq) in self._entries.items())
+
+    def update(self, record: dict[str, object]) -> None:
+        event_id = record.get("event_id")
+        if not isinstance(event_id, str):
+            return
+        ts = iso_to_timestamp(record.get("dt_start"))
+        current = self._entries.get(event_id)
+        if current is not None and current[0] == ts:
+            return
+        seq = current[1] if current is not None else next(self._counter)
+        self.remove(event_id)
+        if ts is None:
+            return
+        self._entries[event_id] = (ts, seq)
+        bisect.insort(self._keys, (ts, seq, event_id))
+
+    def remove(self, event_id: str) -> None:
+        current = self._entries.pop(event_id, None)
+        if current is None:
+            return
+        key = (current[0], current[1], event_id)
+        position = bisect.bisect_left(self._keys, key)
+        if position < len(self._keys) and self._keys[position] == key:
+            del self._keys[position]
+
+    def ids_between(self, start_ts: float | None, end_ts: float | None) -> list[str]:
+        """Ids with start_ts <= start <= end_ts, ordered by start."""
+        low = 0 if start_ts is None else bisect.bisect_left(self._keys, (start_ts,))
+        high = len(self._keys) if end_ts is None else bisect.bisect_right(self._keys, (end_ts, float("inf")))
+        return [event_id for _, _, event_id in self._keys[low:high]]
+
+
+def _user_key(record: dict[str, object]) -> int:
+    # Mirrors calendar_store: records without an integer user_id belong to user 0.
+    user_id = record.get("user_id")
+    return user_id if isinstance(user_id, int) else 0
+
+
+def _chat_pair(record: dict[str, object]) -> tuple[int, int] | None:
+    user_id = record.get("user_id")
+    chat_id = record.get("chat_id")
+    if isinstance(user_id, int) and isinstance(chat_id, int) and chat_id:
+        return user_id, chat_id
+    return None
+
+
+class UserIndex:
+    """user_id -> event/reminder ids, plus reference-counted (user_id, chat_id) pairs."""
+
+    def __init__(self) -> None:
+        self._ids: dict[str, dict[int, dict[str, None]]] = {"events": {}, "reminders": {}}
+        self._owners: dict[tuple[str, str], tuple[int, tuple[int, int] | None]] = {}
+        self._chats: dict[int, dict[int, int]] = {}
+
+    def clear(self) -> None:
+        self._ids = {"events": {}, "reminders": {}}
+        self._owners = {}
+        self._chats = {}
+
+    def update(self, kind: str, record_id: str, record: dict[str, object]) -> None:
+        owner = (_user_key(record), _chat_pair(record))
+        key = (kind, record_id)
+        previous = self._owners.get(key)
+        if previous == owner:
+            return
+        if previous is not None:
+            self._detach(kind, record_id, previous)
+        self._owners[key] = owner
+        user_key, pair = owner
+        self._ids[kind].setdefault(user_key, {})[record_id] = None
+        if pair is not None:
+            chats = self._chats.setdefault(pair[0], {})
+            chats[pair[1]] = chats.get(pair[1], 0) + 1
+
+    def remove(self, kind: str, record_id: str) -> None:
+        previous = self._owners.pop((kind, record_id), None)
+        if previous is not None:
+            self._detach(kind, record_id, previous)
+
+    def _detach(self, kind: str, record_id: str, owner: tuple[int, tuple[int, int] | None]) -> None:
+        user_key, pair = owner
+        ids = self._ids[kind].get(user_key)
+        if ids is not None:
+            ids.pop(record_id, None)
+            if not ids:
+                del self._ids[kind][user_key]
+        if pair is None:
+            return
+        chats = self._chats.get(pair[0])
+        if chats is None or pair[1] not in chats:
+            return
+        chats[pair[1]] -= 1
+        if chats[pair[1]] <= 0:
+            del chats[pair[1]]
+        if not chats:
+            del self._chats[pair[0]]
+
+    def user_of(self, kind: str, record_id: str) -> int | None:
+        owner = self._owners.get((kind, record_id))
+        return owner[0] if owner is not None else None
+
+    def ids(self, kind: str, user_id: int) -> list[str]:
+        return list(self._ids[kind].get(user_id, ()))
+
+    def chat_ids(self, user_id: int) -> list[int]:
+        return sorted(self._chats.get(user_id, ()))
+
+    def pairs(self) -> list[tuple[int, int]]:
+        return sorted((user_id, chat_id) for user_id, chats in self._chats.items() for chat_id in chats)
+
+
+class CalendarIndex:
+    """In-process secondary indexes over one storage engine's records.
+
+    ``owner``/``generation`` identify the engine state the indexes were built
+    from; calendar_store rebuilds them when either changes.
+    """
+
+    def __init__(self) -> None:
+        self.due = DueReminderIndex()
+        self.starts = EventStartIndex()
+        self.users = UserIndex()
+        self.recurring: dict[str, None] = {}
+        self.generation: int | None = None
+        self.owner: object | None = None
+
+    def rebuild(
+        self,
+        events: Iterable[dict[str, object]],
+        reminders: Iterable[dict[str, object]],
+    ) -> None:
+        self.users.clear()
+        self.recurring = {}
+        events = list(events)
+        self.starts.rebuild(events)
+        for record in events:
+            event_id = record.get("event_id")
+            if isinstance(event_id, str):
+                self.users.update("events", event_id, record)
+                if record.get("rrule"):
+                    self.recurring[event_id] = None
+        reminders = list(reminders)
+        self.due.rebuild(reminders)
+        for record in reminders:
+            reminder_id = record.get("reminder_id")
+            if isinstance(reminder_id, str):
+                self.users.update("reminders", reminder_id, record)
+
+    def invalidate(self) -> None:
+        self.generation = None
+        self.owner = None
+
+    def update_event(self, record: dict[str, object]) -> None:
+        event_id = record.get("event_id")
+        if not isinstance(event_id, str):
+            return
+        self.starts.update(record)
+        self.users.update("events", event_id, record)
+        if record.get("rrule"):
+            self.recurring[event_id] = None
+        else:
+            self.recurring.pop(event_id, None)
+
+    def remove_event(self, event_id: str) -> None:
+        self.starts.remove(event_id)
+        self.recurring.pop(event_id, None)
+        self.users.remove("events", event_id)
+
+    def update_reminder(self, record: dict[str, object]) -> None:
+        reminder_id = record.get("reminder_id")
+        if not isinstance(reminder_id, str):
+            return
+        self.due.update(record)
+        self.users.update("reminders", reminder_id, record)
+
+    def remove_reminder(self, reminder_id: str) -> None:
+        self.due.remove(reminder_id)
+        self.users.remove("reminders", reminder_id)
@@ -0,0 +1,872 @@
+from __future__ import annotations
+
+import asyncio
+import atexit
+import copy
+import json
+import logging
+import os
+import sqlite3
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Protocol
+
+from config.constants import TZ
+
+LOGGER = logging.getLogger(__name__)
+
+STORAGE_JSON = "json"
+STORAGE_SQLITE = "sqlite"
+DEFAULT_CALENDAR_PATH = "data/calendar.json"
+DEFAULT_CALENDAR_DB_PATH = "data/calendar.db"
+
+
+def calendar_path() -> Path:
+    return Path(os.getenv("CALENDAR_PATH", DEFAULT_CALENDAR_PATH))
+
+
+def calendar_db_path() -> Path:
+    return Path(os.getenv("CALENDAR_DB_PATH", DEFAULT_CALENDAR_DB_PATH))
+
+
+def flush_window_seconds() -> float:
+    try:
+        value = float(os.getenv("CALENDAR_FLUSH_WINDOW_SECONDS", "1"))
+    except ValueError:
+        return 1.0
+    return max(0.0, value)
+
+
+def storage_kind() -> str:
+    kind = os.getenv("CALENDAR_STORAGE", STORAGE_JSON).strip().lower()
+    return kind if kind in {STORAGE_JSON, STORAGE_SQLITE} else STORAGE_JSON
+
+
+def default_store(now: datetime | None = None) -> dict[str, object]:
+    timestamp = (now or datetime.now(tz=TZ)).isoformat()
+    return {"schema_version": 2, "events": [], "reminders": [], "digest_sent": {}, "updated_at": timestamp}
+
+
+def normalize_store(store: dict[str, object]) -> dict[str, object]:
+    if not isinstance(store, dict):
+        return default_store()
+    if "events" in store and "reminders" in store:
+        if "schema_version" not in store:
+            store["schema_version"] = 1
+        if "digest_sent" not in store or not isinstance(store.get("digest_sent"), dict):
+            store["digest_sent"] = {}
+        return store
+    items = store.get("items") or []
+    events: list[dict[str, object]] = []
+    reminders: list[dict[str, object]] = []
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        item_id = item.get("id")
+        ts = item.get("ts")
+        title = item.get("title")
+        if not isinstance(item_id, str) or not isinstance(ts, str) or not isinstance(title, str):
+            continue
+        events.append(
+            {
+                "event_id": item_id,
+                "dt_start": ts,
+                "text": title,
+                "created_at": item.get("created_at"),
+                "chat_id": item.get("chat_id"),
+                "user_id": item.get("user_id"),
+            }
+        )
+        remind_at = item.get("remind_at") or ts
+        reminders.append(
+            {
+                "reminder_id": item_id,
+                "event_id": item_id,
+                "user_id": item.get("user_id"),
+                "chat_id": item.get("chat_id"),
+                "trigger_at": remind_at,
+                "text": title,
+                "enabled": not bool(item.get("remind_sent", False)),
+                "sent_at": item.get("sent_at"),
+                "status": "active" if not bool(item.get("remind_sent", False)) else "done",
+                "recurrence": None,
+                "last_triggered_at": item.get("sent_at"),
+            }
+        )
+    timestamp = store.get("updated_at") or datetime.now(tz=TZ).isoformat()
+    digest_sent = store.get("digest_sent")
+    if not isinstance(digest_sent, dict):
+        digest_sent = {}
+    return {"schema_version": 1, "events": events, "reminders": reminders, "digest_sent": digest_sent, "updated_at": timestamp}
+
+
+def read_json_store(path: Path) -> dict[str, object]:
+    if not path.exists():
+        return default_store()
+    try:
+        with path.open("r", encoding="utf-8") as handle:
+            store = json.load(handle)
+            return normalize_store(store)
+    except json.JSONDecodeError:
+        return default_store()
+
+
+def write_json_store(path: Path, store: dict[str, object]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    with tmp_path.open("w", encoding="utf-8") as handle:
+        json.dump(store, handle, ensure_ascii=False, indent=2)
+    tmp_path.replace(path)
+
+
+def iso_to_timestamp(value: object) -> float | None:
+    """Epoch seconds for an ISO string; naive values are read in the bot timezone."""
+    if not isinstance(value, str) or not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=TZ)
+    return parsed.timestamp()
+
+
+def normalized_status(item: dict[str, object]) -> str:
+    status = item.get("status")
+    if isinstance(status, str) and status in {"active", "disabled", "done"}:
+        return status
+    enabled = bool(item.get("enabled", True))
+    return "active" if enabled else "disabled"
+
+
+class CalendarStorage(Protocol):
+    """Record-level storage engine behind the calendar_store async API.
+
+    Query methods are prefilters: they may return extra records (e.g. ones with
+    unparseable timestamps) but never drop matching ones; calendar_store applies
+    the exact filtering. Records are the plain dicts of the JSON schema.
+    """
+
+    @property
+    def generation(self) -> int: ...
+
+    def transaction(self) -> Iterator[None]: ...
+
+    def load(self) -> dict[str, object]: ...
+
+    def save(self, store: dict[str, object]) -> None: ...
+
+    def get_event(self, event_id: str) -> dict[str, object] | None: ...
+
+    def get_reminder(self, reminder_id: str) -> dict[str, object] | None: ...
+
+    def list_events(
+        self,
+        *,
+        start_ts: float | None = None,
+        end_ts: float | None = None,
+        user_id: int | None = None,
+    ) -> list[dict[str, object]]: ...
+
+    def list_reminders(
+        self,
+        *,
+        active_only: bool = False,
+        trigger_from_ts: float | None = None,
+        trigger_to_ts: float | None = None,
+        user_id: int | None = None,
+    ) -> list[dict[str, object]]: ...
+
+    def list_event_reminders(self, event_id: str) -> list[dict[str, object]]: ...
+
+    def put_event(self, event: dict[str, object]) -> None: ...
+
+    def put_reminder(self, reminder: dict[str, object]) -> None: ...
+
+    def delete_event(self, event_id: str) -> bool: ...
+
+    def delete_reminder(self, reminder_id: str) -> bool: ...
+
+    def get_digest_sent(self, user_id: int) -> str | None: ...
+
+    def set_digest_sent(self, user_id: int, value: str) -> None: ...
+
+    def user_chat_pairs(self) -> list[tuple[int, int]]: ...
+
+    def close(self) -> None: ...
+
+
+class JsonCalendarStorage:
+    """The historical data/calendar.json layout, kept parsed in memory.
+
+    Mutations mark the cached store dirty and are written with one atomic
+    rewrite per flush window (CALENDAR_FLUSH_WINDOW_SECONDS, 0 writes through
+    immediately). The file's mtime/size are checked on every transaction so
+    edits made outside the bot are picked up while nothing is pending.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self._path = path
+        self._cache: dict[str, object] | None = None
+        self._cache_stat: tuple[int, int] | None = None
+        self._store: dict[str, object] | None = None
+        self._depth = 0
+        self._changed = False
+        self._events_changed = False
+        self._dirty = False
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._flush_loop: asyncio.AbstractEventLoop | None = None
+        self._by_id: dict[str, dict[str, dict[str, object]]] = {"events": {}, "reminders": {}}
+        self._generation = 0
+        atexit.register(self.flush)
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    @property
+    def dirty(self) -> bool:
+        return self._dirty
+
+    @property
+    def generation(self) -> int:
+        """Bumped whenever the cached store is replaced rather than edited in place."""
+        with self.transaction():
+            return self._generation
+
+    def _file_stat(self) -> tuple[int, int] | None:
+        try:
+            stat = self._path.stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _ensure_loaded(self) -> dict[str, object]:
+        stat = self._file_stat()
+        if self._cache is not None and stat == self._cache_stat:
+            return self._cache
+        if self._cache is not None and self._dirty:
+            LOGGER.warning("Calendar file changed on disk with unsaved changes pending: path=%s", self._path)
+            return self._cache
+        self._replace_cache(read_json_store(self._path))
+        self._cache_stat = stat
+        return self._cache
+
+    def _replace_cache(self, store: dict[str, object]) -> None:
+        self._cache = store
+        self._generation += 1
+        for key, id_key in (("events", "event_id"), ("reminders", "reminder_id")):
+            by_id: dict[str, dict[str, object]] = {}
+            for item in store.get(key) or []:
+                if isinstance(item, dict) and isinstance(item.get(id_key), str):
+                    by_id.setdefault(item[id_key], item)
+            self._by_id[key] = by_id
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        if self._depth == 0:
+            self._store = self._ensure_loaded()
+            self._changed = False
+            self._events_changed = False
+        self._depth += 1
+        failed = False
+        try:
+            yield
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            self._depth -= 1
+            if self._depth == 0:
+                store = self._store
+                self._store = None
+                if failed and self._changed and not self._dirty:
+                    self._cache = None
+                elif self._changed and store is not None:
+                    if self._events_changed:
+                        store["schema_version"] = 2
+                    store["updated_at"] = datetime.now(tz=TZ).isoformat()
+                    self._dirty = True
+                    self._schedule_flush()
+
+    def _schedule_flush(self) -> None:
+        window = flush_window_seconds()
+        if window <= 0:
+            self.flush()
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()
+            return
+        if self._flush_handle is not None and self._flush_loop is loop:
+            return
+        self._cancel_flush()
+        self._flush_loop = loop
+        self._flush_handle = loop.call_later(window, self.flush)
+
+    def _cancel_flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+        self._flush_handle = None
+        self._flush_loop = None
+
+    def flush(self) -> None:
+        self._cancel_flush()
+        if not self._dirty or self._cache is None:
+            return
+        try:
+            write_json_store(self._path, self._cache)
+        except OSError:
+            LOGGER.exception("Calendar store flush failed: path=%s", self._path)
+            return
+        self._cache_stat = self._file_stat()
+        self._dirty = False
+
+    def _current(self) -> dict[str, object]:
+        if self._store is None:
+            raise RuntimeError("JsonCalendarStorage used outside of a transaction")
+        return self._store
+
+    def _records(self, key: str) -> list[dict[str, object]]:
+        store = self._current()
+        records = store.get(key)
+        if not isinstance(records, list):
+            records = []
+            store[key] = records
+        return records
+
+    def _mark_dirty(self, *, events: bool = False) -> None:
+        self._changed = True
+        if events:
+            self._events_changed = True
+
+    def load(self) -> dict[str, object]:
+        with self.transaction():
+            return copy.deepcopy(self._current())
+
+    def save(self, store: dict[str, object]) -> None:
+        self._cancel_flush()
+        write_json_store(self._path, store)
+        self._replace_cache(normalize_store(copy.deepcopy(store)))
+        self._cache_stat = self._file_stat()
+        self._dirty = False
+
+    def get_event(self, event_id: str) -> dict[str, object] | None:
+        # A copy, as the SQLite engine returns: callers edit it before put_event(), and an
+        # edit abandoned midway must not leak into the cache.
+        with self.transaction():
+            return copy.deepcopy(self._by_id["events"].get(event_id))
+
+    def get_reminder(self, reminder_id: str) -> dict[str, object] | None:
+        with self.transaction():
+            return copy.deepcopy(self._by_id["reminders"].get(reminder_id))
+
+    def list_events(
+        self,
+        *,
+        start_ts: float | None = None,
+        end_ts: float | None = None,
+        user_id: int | None = None,
+    ) -> list[dict[str, object]]:
+        with self.transaction():
+            items = [item for item in self._records("events") if isinstance(item, dict)]
+        if user_id is not None:
+            items = [item for item in items if item.get("user_id") == user_id]
+        return items
+
+    def list_reminders(
+        self,
+        *,
+        active_only: bool = False,
+        trigger_from_ts: float | None = None,
+        trigger_to_ts: float | None = None,
+        user_id: int | None = None,
+    ) -> list[dict[str, object]]:
+        with self.transaction():
+            items = [item for item in self._records("reminders") if isinstance(item, dict)]
+        if user_id is not None:
+            items = [item for item in items if item.get("user_id") == user_id]
+        return items
+
+    def list_event_reminders(self, event_id: str) -> list[dict[str, object]]:
+        with self.transaction():
+            return [
+                item
+                for item in self._records("reminders")
+                if isinstance(item, dict) and item.get("event_id") == event_id
+            ]
+
+    def _upsert(self, key: str, id_key: str, record: dict[str, object]) -> None:
+        record_id = record.get(id_key)
+        if not isinstance(record_id, str):
+            return
+        existing = self._by_id[key].get(record_id)
+        if existing is None:
+            self._records(key).append(record)
+            self._by_id[key][record_id] = record
+        elif existing is not record:
+            existing.clear()
+            existing.update(record)
+
+    def _remove(self, key: str, id_key: str, record_id: str) -> bool:
+        if self._by_id[key].pop(record_id, None) is None:
+            return False
+        records = self._records(key)
+        self._current()[key] = [
+            item for item in records if not (isinstance(item, dict) and item.get(id_key) == record_id)
+        ]
+        return True
+
+    def put_event(self, event: dict[str, object]) -> None:
+        with self.transaction():
+            self._upsert("events", "event_id", event)
+            self._mark_dirty(events=True)
+
+    def put_reminder(self, reminder: dict[str, object]) -> None:
+        with self.transaction():
+            self._upsert("reminders", "reminder_id", reminder)
+            self._mark_dirty()
+
+    def delete_event(self, event_id: str) -> bool:
+        with self.transaction():
+            if not self._remove("events", "event_id", event_id):
+                return False
+            self._mark_dirty(events=True)
+            return True
+
+    def delete_reminder(self, reminder_id: str) -> bool:
+        with self.transaction():
+            if not self._remove("reminders", "reminder_id", reminder_id):
+                return False
+            self._mark_dirty()
+            return True
+
+    def get_digest_sent(self, user_id: int) -> str | None:
+        with self.transaction():
+            digest_sent = self._current().get("digest_sent")
+            if not isinstance(digest_sent, dict):
+                return None
+            value = digest_sent.get(str(user_id))
+            return value if isinstance(value, str) else None
+
+    def set_digest_sent(self, user_id: int, value: str) -> None:
+        with self.transaction():
+            store = self._current()
+            digest_sent = dict(store.get("digest_sent") or {})
+            digest_sent[str(user_id)] = value
+            store["digest_sent"] = digest_sent
+            self._mark_dirty()
+
+    def user_chat_pairs(self) -> list[tuple[int, int]]:
+        with self.transaction():
+            items = self._records("reminders") + self._records("events")
+        pairs: set[tuple[int, int]] = set()
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            uid = item.get("user_id")
+            cid = item.get("chat_id")
+            if isinstance(uid, int) and isinstance(cid, int) and cid:
+                pairs.add((uid, cid))
+        return sorted(pairs)
+
+    def close(self) -> None:
+        self.flush()
+
+
+class SqliteCalendarStorage:
+    """SQLite (WAL) engine: one row per event/reminder, indexed columns plus the JSON payload."""
+
+    def __init__(self, db_path: Path, *, migrate_from: Path | None = None) -> None:
+        self._db_path = db_path
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(db_path, check_same_thread=False)
+        self._connection.row_factory = sqlite3.Row
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._depth = 0
+        self._generation = 0
+        self._ensure_schema()
+        if migrate_from is not None:
+            migrate_json_to_sqlite(migrate_from, self)
+
+    @property
+    def path(self) -> Path:
+        return self._db_path
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def _ensure_schema(self) -> None:
+        self._connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS events (
+                event_id TEXT PRIMARY KEY,
+                user_id INTEGER,
+                chat_id INTEGER,
+                dt_start_ts REAL,
+                payload TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS reminders (
+                reminder_id TEXT PRIMARY KEY,
+                event_id TEXT,
+                user_id INTEGER,
+                chat_id INTEGER,
+                trigger_ts REAL,
+                enabled INTEGER NOT NULL,
+                status TEXT NOT NULL,
+                payload TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS digest_sent (
+                user_key TEXT PRIMARY KEY,
+                sent_on TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_events_user_start ON events (user_id, dt_start_ts);
+            CREATE INDEX IF NOT EXISTS idx_events_start ON events (dt_start_ts);
+            CREATE INDEX IF NOT EXISTS idx_reminders_due ON reminders (enabled, status, trigger_ts);
+            CREATE INDEX IF NOT EXISTS idx_reminders_event ON reminders (event_id);
+            CREATE INDEX IF NOT EXISTS idx_reminders_user ON reminders (user_id);
+            """
+        )
+        self._connection.commit()
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        self._depth += 1
+        failed = False
+        try:
+            yield
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            self._depth -= 1
+            if self._depth == 0:
+                if failed:
+                    self._connection.rollback()
+                else:
+                    self._connection.commit()
+
+    def get_meta(self, key: str) -> str | None:
+        row = self._connection.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else None
+
+    def set_meta(self, key: str, value: str) -> None:
+        with self.transaction():
+            self._connection.execute(
+                "INSERT INTO meta (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                (key, value),
+            )
+
+    def is_empty(self) -> bool:
+        for table in ("events", "reminders", "digest_sent"):
+            if self._connection.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone():
+                return False
+        return True
+
+    def load(self) -> dict[str, object]:
+        events = [_decode(row) for row in self._connection.execute("SELECT payload FROM events ORDER BY rowid")]
+        reminders = [
+            _decode(row) for row in self._connection.execute("SELECT payload FROM reminders ORDER BY rowid")
+        ]
+        digest_sent = {
+            row["user_key"]: row["sent_on"]
+            for row in self._connection.execute("SELECT user_key, sent_on FROM digest_sent")
+        }
+        return {
+            "schema_version": 2,
+            "events": [item for item in events if item is not None],
+            "reminders": [item for item in reminders if item is not None],
+            "digest_sent": digest_sent,
+            "updated_at": self.get_meta("updated_at") or datetime.now(tz=TZ).isoformat(),
+        }
+
+    def save(self, store: dict[str, object]) -> None:
+        store = normalize_store(store)
+        with self.transaction():
+            self._connection.execute("DELETE FROM events")
+            self._connection.execute("DELETE FROM reminders")
+            self._connection.execute("DELETE FROM digest_sent")
+            for event in store.get("events") or []:
+                if isinstance(event, dict) and isinstance(event.get("event_id"), str):
+                    self.put_event(event)
+            for reminder in store.get("reminders") or []:
+                if isinstance(reminder, dict) and isinstance(reminder.get("reminder_id"), str):
+                    self.put_reminder(reminder)
+            digest_sent = store.get("digest_sent")
+            if isinstance(digest_sent, dict):
+                for key, value in digest_sent.items():
+                    if isinstance(value, str):
+                        self._connection.execute(
+                            "INSERT INTO digest_sent (user_key, sent_on) VALUES (?, ?)",
+                            (str(key), value),
+                        )
+            self._touch()
+            self._generation += 1
+
+    def _touch(self) -> None:
+        self._connection.execute(
+            "INSERT INTO meta (key, value) VALUES ('updated_at', ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (datetime.now(tz=TZ).isoformat(),),
+        )
+
+    def get_event(self, event_id: str) -> dict[str, object] | None:
+        row = self._connection.execute("SELECT payload FROM events WHERE event_id = ?", (event_id,)).fetchone()
+        return _decode(row) if row else None
+
+    def get_reminder(self, reminder_id: str) -> dict[str, object] | None:
+        row = self._connection.execute(
+            "SELECT payload FROM reminders WHERE reminder_id = ?",
+            (reminder_id,),
+        ).fetchone()
+        return _decode(row) if row else None
+
+    def list_events(
+        self,
+        *,
+        start_ts: float | None = None,
+        end_ts: float | None = None,
+        user_id: int | None = None,
+    ) -> list[dict[str, object]]:
+        sql = "SELECT payload FROM events WHERE 1 = 1"
+        params: list[object] = []
+        if user_id is not None:
+            sql += " AND user_id = ?"
+            params.append(user_id)
+        if start_ts is not None:
+            sql += " AND dt_start_ts >= ?"
+            params.append(start_ts)
+        if end_ts is not None:
+            sql += " AND dt_start_ts <= ?"
+            params.append(end_ts)
+        sql += " ORDER BY rowid"
+        return _decode_all(self._connection.execute(sql, params))
+
+    def list_reminders(
+        self,
+        *,
+        active_only: bool = False,
+        trigger_from_ts: float | None = None,
+        trigger_to_ts: float | None = None,
+        user_id: int | None = None,
+    ) -> list[dict[str, object]]:
+        sql = "SELECT payload FROM reminders WHERE 1 = 1"
+        params: list[object] = []
+        if active_only:
+            sql += " AND enabled = 1 AND status = 'active'"
+        if user_id is not None:
+            sql += " AND user_id = ?"
+            params.append(user_id)
+        if trigger_from_ts is not None:
+            sql += " AND (trigger_ts IS NULL OR trigger_ts >= ?)"
+            params.append(trigger_from_ts)
+        if trigger_to_ts is not None:
+            sql += " AND (trigger_ts IS NULL OR trigger_ts <= ?)"
+            params.append(trigger_to_ts)
+        sql += " ORDER BY rowid"
+        return _decode_all(self._connection.execute(sql, params))
+
+    def list_event_reminders(self, event_id: str) -> list[dict[str, object]]:
+        return _decode_all(
+            self._connection.execute(
+                "SELECT payload FROM reminders WHERE event_id = ? ORDER BY rowid",
+                (event_id,),
+            )
+        )
+
+    def put_event(self, event: dict[str, object]) -> None:
+        user_id = event.get("user_id")
+        chat_id = event.get("chat_id")
+        with self.transaction():
+            self._connection.execute(
+                """
+                INSERT INTO events (event_id, user_id, chat_id, dt_start_ts, payload)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(event_id) DO UPDATE SET
+                    user_id = excluded.user_id,
+                    chat_id = excluded.chat_id,
+                    dt_start_ts = excluded.dt_start_ts,
+                    payload = excluded.payload
+                """,
+                (
+                    event.get("event_id"),
+                    user_id if isinstance(user_id, int) else None,
+                    chat_id if isinstance(chat_id, int) else None,
+                    iso_to_timestamp(event.get("dt_start")),
+                    _encode(event),
+                ),
+            )
+            self._touch()
+
+    def put_reminder(self, reminder: dict[str, object]) -> None:
+        user_id = reminder.get("user_id")
+        chat_id = reminder.get("chat_id")
+        event_id = reminder.get("event_id")
+        with self.transaction():
+            self._connection.execute(
+                """
+                INSERT INTO reminders (
+                    reminder_id, event_id, user_id, chat_id, trigger_ts, enabled, status, payload
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(reminder_id) DO UPDATE SET
+                    event_id = excluded.event_id,
+                    user_id = excluded.user_id,
+                    chat_id = excluded.chat_id,
+                    trigger_ts = excluded.trigger_ts,
+                    enabled = excluded.enabled,
+                    status = excluded.status,
+                    payload = excluded.payload
+                """,
+                (
+                    reminder.get("reminder_id"),
+                    event_id if isinstance(event_id, str) else None,
+                    user_id if isinstance(user_id, int) else None,
+                    chat_id if isinstance(chat_id, int) else None,
+                    iso_to_timestamp(reminder.get("trigger_at")),
+                    1 if bool(reminder.get("enabled", True)) else 0,
+                    normalized_status(reminder),
+                    _encode(reminder),
+                ),
+            )
+            self._touch()
+
+    def delete_event(self, event_id: str) -> bool:
+        with self.transaction():
+            cursor = self._connection.execute("DELETE FROM events WHERE event_id = ?", (event_id,))
+            if not cursor.rowcount:
+                return False
+            self._touch()
+            return True
+
+    def delete_reminder(self, reminder_id: str) -> bool:
+        with self.transaction():
+            cursor = self._connection.execute("DELETE FROM reminders WHERE reminder_id = ?", (reminder_id,))
+            if not cursor.rowcount:
+                return False
+            self._touch()
+            return True
+
+    def get_digest_sent(self, user_id: int) -> str | None:
+        row = self._connection.execute(
+            "SELECT sent_on FROM digest_sent WHERE user_key = ?",
+            (str(user_id),),
+        ).fetchone()
+        return row["sent_on"] if row else None
+
+    def set_digest_sent(self, user_id: int, value: str) -> None:
+        with self.transaction():
+            self._connection.execute(
+                "INSERT INTO digest_sent (user_key, sent_on) VALUES (?, ?) "
+                "ON CONFLICT(user_key) DO UPDATE SET sent_on = excluded.sent_on",
+                (str(user_id), value),
+            )
+            self._touch()
+
+    def user_chat_pairs(self) -> list[tuple[int, int]]:
+        rows = self._connection.execute(
+            """
+            SELECT user_id, chat_id FROM reminders WHERE chat_id IS NOT NULL AND chat_id != 0
+            UNION
+            SELECT user_id, chat_id FROM events WHERE chat_id IS NOT NULL AND chat_id != 0
+            """
+        ).fetchall()
+        pairs = {(row["user_id"], row["chat_id"]) for row in rows if isinstance(row["user_id"], int)}
+        return sorted(pairs)
+
+    def close(self) -> None:
+        try:
+            self._connection.close()
+        except sqlite3.Error:
+            LOGGER.exception("Failed to close calendar database connection")
+
+
+def _encode(record: dict[str, object]) -> str:
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":"))
+
+
+def _decode(row: sqlite3.Row) -> dict[str, object] | None:
+    try:
+        payload = json.loads(row["payload"])
+    except (TypeError, json.JSONDecodeError):
+        return None
+    return payload if isinstance(payload, dict) else None
+
+
+def _decode_all(rows: Iterator[sqlite3.Row]) -> list[dict[str, object]]:
+    return [item for item in (_decode(row) for row in rows) if item is not None]
+
+
+_MIGRATION_META_KEY = "migrated_from_json"
+
+
+def migrate_json_to_sqlite(json_path: Path, storage: SqliteCalendarStorage) -> int:
+    """One-shot import of a schema_version 1/2 calendar.json into an empty database.
+
+    Returns the number of imported records; 0 when already migrated, the database
+    already has data or there is no JSON file.
+    """
+    if storage.get_meta(_MIGRATION_META_KEY) is not None:
+        return 0
+    if not storage.is_empty() or not json_path.exists():
+        storage.set_meta(_MIGRATION_META_KEY, "")
+        return 0
+    store = read_json_store(json_path)
+    events = [item for item in store.get("events") or [] if isinstance(item, dict)]
+    reminders = [item for item in store.get("reminders") or [] if isinstance(item, dict)]
+    with storage.transaction():
+        storage.save(store)
+        storage.set_meta(_MIGRATION_META_KEY, str(json_path))
+    LOGGER.info(
+        "Calendar store migrated to SQLite: path=%s events=%s reminders=%s schema_version=%s",
+        json_path,
+        len(events),
+        len(reminders),
+        store.get("schema_version"),
+    )
+    return len(events) + len(reminders)
+
+
+_STORAGES: dict[tuple[str, str], CalendarStorage] = {}
+
+
+def get_calendar_storage() -> CalendarStorage:
+    """Engine selected by CALENDAR_STORAGE (json|sqlite); one instance per path."""
+    kind = storage_kind()
+    if kind == STORAGE_SQLITE:
+        db_path = calendar_db_path()
+        key = (kind, str(db_path))
+        storage = _STORAGES.get(key)
+        if storage is None:
+            storage = SqliteCalendarStorage(db_path, migrate_from=calendar_path())
+            _STORAGES[key] = storage
+        return storage
+    path = calendar_path()
+    key = (kind, str(path))
+    storage = _STORAGES.get(key)
+    if storage is None:
+        storage = JsonCalendarStorage(path)
+        _STORAGES[key] = storage
+    return storage
+
+
+def flush_calendar_storages() -> None:
+    for storage in list(_STORAGES.values()):
+        flush = getattr(storage, "flush", None)
+        if callable(flush):
+            flush()
+
+
+def close_calendar_storages() -> None:
+    while _STORAGES:
+        _, storage = _STORAGES.popitem()
+        storage.close()
@@ -2,17 +2,30 @@ from __future__ import annotations
 
 import asyncio
 import calendar
-import json
-import os
+import logging
 import re
 import uuid
-from dataclasses import dataclass
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, replace
 from datetime import date, datetime, time, timedelta
 from pathlib import Path
 from zoneinfo import ZoneInfo
 
+from app.core.calendar_index import CalendarIndex
+from app.core.calendar_storage import (
+    CalendarStorage,
+    calendar_path,
+    default_store,
+    get_calendar_storage,
+    normalize_store,
+    normalized_status,
+)
+from app.core.recurrence_rrule import OCCURRENCE_CACHE
 from config.constants import TZ
 
+LOGGER = logging.getLogger(__name__)
+
 BOT_TZ = TZ
 MOSCOW_TZ = BOT_TZ  # backward compatible alias
 VIENNA_TZ = BOT_TZ  # backward compatible alias
@@ -56,89 +69,140 @@ class ParsedEvent:
 
 
 def _calendar_path() -> Path:
-    return Path(os.getenv("CALENDAR_PATH", "data/calendar.json"))
+    return calendar_path()
 
 
 def _default_store(now: datetime | None = None) -> dict[str, object]:
-    timestamp = (now or datetime.now(tz=VIENNA_TZ)).isoformat()
-    return {"schema_version": 2, "events": [], "reminders": [], "digest_sent": {}, "updated_at": timestamp}
+    return default_store(now)
+
+
+def _storage() -> CalendarStorage:
+    return get_calendar_storage()
 
 
 def load_store() -> dict[str, object]:
-    path = _calendar_path()
-    if not path.exists():
-        return _default_store()
-    try:
-        with path.open("r", encoding="utf-8") as handle:
-            store = json.load(handle)
-            return _normalize_store(store)
-    except json.JSONDecodeError:
-        return _default_store()
+    return _storage().load()
 
 
 _STORE_LOCK = asyncio.Lock()
 
 
 def save_store_atomic(store: dict[str, object]) -> None:
-    path = _calendar_path()
-    path.parent.mkdir(parents=True, exist_ok=True)
-    tmp_path = path.with_suffix(".tmp")
-    with tmp_path.open("w", encoding="utf-8") as handle:
-        json.dump(store, handle, ensure_ascii=False, indent=2)
-    tmp_path.replace(path)
+    _storage().save(store)
 
 
-def _normalize_store(store: dict[str, object]) -> dict[str, object]:
-    if not isinstance(store, dict):
-        return _default_store()
-    if "events" in store and "reminders" in store:
-        if "schema_version" not in store:
-            store["schema_version"] = 1
-        if "digest_sent" not in store or not isinstance(store.get("digest_sent"), dict):
-            store["digest_sent"] = {}
-        return store
-    items = store.get("items") or []
-    events: list[dict[str, object]] = []
-    reminders: list[dict[str, object]] = []
-    for item in items:
-        if not isinstance(item, dict):
-            continue
-        item_id = item.get("id")
-        ts = item.get("ts")
-        title = item.get("title")
-        if not isinstance(item_id, str) or not isinstance(ts, str) or not isinstance(title, str):
-            continue
-        events.append(
-            {
-                "event_id": item_id,
-                "dt_start": ts,
-                "text": title,
-                "created_at": item.get("created_at"),
-                "chat_id": item.get("chat_id"),
-                "user_id": item.get("user_id"),
-            }
-        )
-        remind_at = item.get("remind_at") or ts
-        reminders.append(
-            {
-                "reminder_id": item_id,
-                "event_id": item_id,
-                "user_id": item.get("user_id"),
-                "chat_id": item.get("chat_id"),
-                "trigger_at": remind_at,
-                "text": title,
-                "enabled": not bool(item.get("remind_sent", False)),
-                "sent_at": item.get("sent_at"),
-                "status": "active" if not bool(item.get("remind_sent", False)) else "done",
-                "recurrence": None,
-                "last_triggered_at": item.get("sent_at"),
-            }
+_INDEX = CalendarIndex()
+
+
+def _index(storage: CalendarStorage) -> CalendarIndex:
+    generation = storage.generation
+    if _INDEX.owner is not storage or _INDEX.generation != generation:
+        OCCURRENCE_CACHE.clear()
+        _INDEX.rebuild(storage.list_events(), storage.list_reminders())
+        _INDEX.owner = storage
+        _INDEX.generation = generation
+    return _INDEX
+
+
+@contextmanager
+def _transaction(storage: CalendarStorage) -> Iterator[None]:
+    try:
+        with storage.transaction():
+            yield
+    except BaseException:
+        _INDEX.invalidate()
+        raise
+
+
+def _invalidate_occurrences(item: dict[str, object] | None) -> None:
+    if item is None:
+        return
+    series_id = item.get("series_id") or item.get("event_id")
+    if isinstance(series_id, str):
+        OCCURRENCE_CACHE.invalidate(series_id)
+
+
+def _put_event(storage: CalendarStorage, item: dict[str, object]) -> None:
+    storage.put_event(item)
+    _invalidate_occurrences(item)
+    if _INDEX.owner is storage:
+        _INDEX.update_event(item)
+
+
+def _delete_event(storage: CalendarStorage, event_id: str) -> bool:
+    _invalidate_occurrences(storage.get_event(event_id))
+    removed = storage.delete_event(event_id)
+    if removed and _INDEX.owner is storage:
+        _INDEX.remove_event(event_id)
+    return removed
+
+
+_REMINDER_LISTENERS: list[Callable[[], None]] = []
+
+
+def add_reminder_listener(callback: Callable[[], None]) -> None:
+    """Call ``callback`` (synchronously, from the event loop) after any reminder is written or deleted."""
+    if callback not in _REMINDER_LISTENERS:
+        _REMINDER_LISTENERS.append(callback)
+
+
+def remove_reminder_listener(callback: Callable[[], None]) -> None:
+    if callback in _REMINDER_LISTENERS:
+        _REMINDER_LISTENERS.remove(callback)
+
+
+def _notify_reminder_listeners() -> None:
+    for callback in list(_REMINDER_LISTENERS):
+        try:
+            callback()
+        except Exception:
+            LOGGER.exception("Reminder listener failed")
+
+
+def _put_reminder(storage: CalendarStorage, item: dict[str, object]) -> None:
+    storage.put_reminder(item)
+    if _INDEX.owner is storage:
+        _INDEX.update_reminder(item)
+    _notify_reminder_listeners()
+
+
+def _delete_reminder(storage: CalendarStorage, reminder_id: str) -> bool:
+    removed = storage.delete_reminder(reminder_id)
+    if removed and _INDEX.owner is storage:
+        _INDEX.remove_reminder(reminder_id)
+    if removed:
+        _notify_reminder_listeners()
+    return removed
+
+
+def _events_in_range(
+    storage: CalendarStorage,
+    start: datetime | None,
+    end: datetime | None,
+    *,
+    user_id: int | None = None,
+) -> list[dict[str, object]]:
+    """Event records whose start falls in [start, end], in start order."""
+    index = _index(storage)
+    if user_id is not None and start is None and end is None:
+        ids = index.users.ids("events", user_id)
+    else:
+        ids = index.starts.ids_between(
+            start.timestamp() if start else None,
+            end.timestamp() if end else None,
         )
-    timestamp = store.get("updated_at") or datetime.now(tz=VIENNA_TZ).isoformat()
-    digest_sent = store.get("digest_sent")
-    if not isinstance(digest_sent, dict):
-        digest_sent = {}
-    return {"schema_version": 1, "events": events, "reminders": reminders, "digest_sent": digest_sent, "updated_at": timestamp}
+        if user_id is not None:
+            ids = [event_id for event_id in ids if index.users.user_of("events", event_id) == user_id]
+    return [item for item in (storage.get_event(event_id) for event_id in ids) if item]
+
+
+def _user_reminders(storage: CalendarStorage, user_id: int) -> list[dict[str, object]]:
+    ids = _index(storage).users.ids("reminders", user_id)
+    return [item for item in (storage.get_reminder(reminder_id) for reminder_id in ids) if item]
+
+
+def _normalize_store(store: dict[str, object]) -> dict[str, object]:
+    return normalize_store(store)
 
 
 def _parse_datetime(value: str | None, fallback: datetime) -> datetime:
@@ -154,11 +218,7 @@ def _parse_datetime(value: str | None, fallback: datetime) -> datetime:
 
 
 def _normalize_status(item: dict[str, object]) -> str:
-    status = item.get("status")
-    if isinstance(status, str) and status in {"active", "disabled", "done"}:
-        return status
-    enabled = bool(item.get("enabled", True))
-    return "active" if enabled else "disabled"
+    return normalized_status(item)
 
 
 def _parse_recurrence(value: object) -> dict[str, object] | None:
@@ -302,6 +362,72 @@ def _build_reminder_item(
     )
 
 
+def _event_from_record(item: dict[str, object]) -> CalendarItem | None:
+    ts = item.get("dt_start")
+    title = item.get("text")
+    item_id = item.get("event_id")
+    created_at = item.get("created_at")
+    if not isinstance(ts, str) or not isinstance(title, str) or not isinstance(item_id, str):
+        return None
+    try:
+        dt = datetime.fromisoformat(ts)
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=VIENNA_TZ)
+    chat_id = item.get("chat_id")
+    user_id = item.get("user_id")
+    tzinfo = _parse_timezone(
+        item.get("timezone"),
+        dt.tzinfo if isinstance(dt.tzinfo, ZoneInfo) else VIENNA_TZ,
+    )
+    dt = dt.astimezone(tzinfo)
+    series_id = item.get("series_id") if isinstance(item.get("series_id"), str) else item_id
+    return CalendarItem(
+        id=item_id,
+        ts=ts,
+        title=title,
+        created_at=str(created_at),
+        dt=dt,
+        chat_id=int(chat_id) if isinstance(chat_id, int) else 0,
+        user_id=int(user_id) if isinstance(user_id, int) else 0,
+        series_id=series_id,
+        rrule=item.get("rrule") if isinstance(item.get("rrule"), str) else None,
+        exdates=_parse_exdates(item.get("exdates")),
+        overrides=_parse_overrides(item.get("overrides"), tzinfo),
+        timezone=tzinfo.key,
+    )
+
+
+def _reminder_from_record(item: dict[str, object], *, fallback: datetime) -> ReminderItem | None:
+    reminder_id = item.get("reminder_id")
+    event_id = item.get("event_id")
+    trigger_at = item.get("trigger_at")
+    text = item.get("text")
+    if (
+        not isinstance(reminder_id, str)
+        or not isinstance(event_id, str)
+        or not isinstance(trigger_at, str)
+        or not isinstance(text, str)
+    ):
+        return None
+    llm_ctx = item.get("llm_context")
+    return _build_reminder_item(
+        reminder_id=reminder_id,
+        event_id=event_id,
+        user_id=int(item.get("user_id")) if isinstance(item.get("user_id"), int) else 0,
+        chat_id=int(item.get("chat_id")) if isinstance(item.get("chat_id"), int) else 0,
+        trigger_at=_parse_datetime(trigger_at, fallback),
+        text=text,
+        enabled=bool(item.get("enabled", True)),
+        sent_at=item.get("sent_at") if isinstance(item.get("sent_at"), str) else None,
+        status=_normalize_status(item),
+        recurrence=_parse_recurrence(item.get("recurrence")),
+        last_triggered_at=_parse_triggered_at(item.get("last_triggered_at")),
+        llm_context=llm_ctx if isinstance(llm_ctx, str) else None,
+    )
+
+
 async def add_item(
     dt: datetime,
     title: str,
@@ -318,74 +444,61 @@ async def add_item(
     reminder_llm_context: str | None = None,
 ) -> dict[str, object]:
     async with _STORE_LOCK:
-        store = load_store()
-        events = list(store.get("events") or [])
-        reminders = list(store.get("reminders") or [])
-        existing_ids = {item.get("event_id") for item in events if isinstance(item, dict)}
-        if isinstance(event_id, str) and event_id in existing_ids:
-            existing_item = next(
-                (item for item in events if isinstance(item, dict) and item.get("event_id") == event_id),
-                None,
+        storage = _storage()
+        with _transaction(storage):
+            if isinstance(event_id, str):
+                existing_item = storage.get_event(event_id)
+                if existing_item is not None:
+                    return {"event": dict(existing_item)}
+            event_id = event_id if isinstance(event_id, str) else _generate_unique_id(
+                lambda candidate: storage.get_event(candidate) is not None
             )
-            result: dict[str, object] = {"event": existing_item} if isinstance(existing_item, dict) else {"event": None}
-            return result
-        event_id = event_id if isinstance(event_id, str) else _generate_id(
-            {item_id for item_id in existing_ids if isinstance(item_id, str)}
-        )
-        reminder_ids = {
-            item.get("reminder_id") for item in reminders if isinstance(item, dict) and item.get("reminder_id")
-        }
-        reminder_id = _generate_id({item_id for item_id in reminder_ids if isinstance(item_id, str)})
-        now_iso = datetime.now(tz=VIENNA_TZ).isoformat()
-        remind_at_value = (remind_at or dt).astimezone(VIENNA_TZ).isoformat()
-        event_exdates = (
-            [value.astimezone(VIENNA_TZ).isoformat() for value in exdates if isinstance(value, datetime)]
-            if exdates
-            else None
-        )
-        event_overrides = _serialize_overrides(overrides)
-        event_timezone = timezone if isinstance(timezone, str) else _format_timezone(dt)
-        event_series_id = series_id if isinstance(series_id, str) else event_id
-        event = {
-            "event_id": event_id,
-            "dt_start": dt.astimezone(VIENNA_TZ).isoformat(),
-            "text": title,
-            "created_at": now_iso,
-            "chat_id": chat_id,
-            "user_id": user_id,
-            "series_id": event_series_id,
-            "rrule": rrule,
-            "exdates": event_exdates,
-            "overrides": event_overrides,
-            "timezone": event_timezone,
-        }
-        reminder: dict[str, object] | None = None
-        if remind_at is not None or reminders_enabled:
-            reminder = {
-                "reminder_id": reminder_id,
+            reminder_id = _generate_unique_id(lambda candidate: storage.get_reminder(candidate) is not None)
+            now_iso = datetime.now(tz=VIENNA_TZ).isoformat()
+            remind_at_value = (remind_at or dt).astimezone(VIENNA_TZ).isoformat()
+            event_exdates = (
+                [value.astimezone(VIENNA_TZ).isoformat() for value in exdates if isinstance(value, datetime)]
+                if exdates
+                else None
+            )
+            event_overrides = _serialize_overrides(overrides)
+            event_timezone = timezone if isinstance(timezone, str) else _format_timezone(dt)
+            event_series_id = series_id if isinstance(series_id, str) else event_id
+            event = {
                 "event_id": event_id,
-                "user_id": user_id,
-                "chat_id": chat_id,
-                "trigger_at": remind_at_value,
+                "dt_start": dt.astimezone(VIENNA_TZ).isoformat(),
                 "text": title,
-                "enabled": reminders_enabled,
-                "sent_at": None,
-                "status": "active" if reminders_enabled else "disabled",
-                "recurrence": None,
-                "last_triggered_at": None,
-                "llm_context": reminder_llm_context,
+                "created_at": now_iso,
+                "chat_id": chat_id,
+                "user_id": user_id,
+                "series_id": event_series_id,
+                "rrule": rrule,
+                "exdates": event_exdates,
+                "overrides": event_overrides,
+                "timezone": event_timezone,
             }
-        events.append(event)
+            reminder: dict[str, object] | None = None
+            if remind_at is not None or reminders_enabled:
+                reminder = {
+                    "reminder_id": reminder_id,
+                    "event_id": event_id,
+                    "user_id": user_id,
+                    "chat_id": chat_id,
+                    "trigger_at": remind_at_value,
+                    "text": title,
+                    "enabled": reminders_enabled,
+                    "sent_at": None,
+                    "status": "active" if reminders_enabled else "disabled",
+                    "recurrence": None,
+                    "last_triggered_at": None,
+                    "llm_context": reminder_llm_context,
+                }
+            _put_event(storage, event)
+            if reminder is not None:
+                _put_reminder(storage, reminder)
+        result: dict[str, object] = {"event": dict(event)}
         if reminder is not None:
-            reminders.append(reminder)
-        store["schema_version"] = 2
-        store["events"] = events
-        store["reminders"] = reminders
-        store["updated_at"] = now_iso
-        save_store_atomic(store)
-        result: dict[str, object] = {"event": event}
-        if reminder is not None:
-            result["reminder"] = reminder
+            result["reminder"] = dict(reminder)
         return result
 
 
@@ -422,198 +535,190 @@ async def add_reminder(
     return reminder
 
 
-async def list_items(start: datetime | None = None, end: datetime | None = None) -> list[CalendarItem]:
+async def list_items(
+    start: datetime | None = None,
+    end: datetime | None = None,
+    *,
+    user_id: int | None = None,
+    chat_id: int | None = None,
+) -> list[CalendarItem]:
     async with _STORE_LOCK:
-        store = load_store()
-        items = store.get("events") or []
+        storage = _storage()
+        with _transaction(storage):
+            items = _events_in_range(storage, start, end, user_id=user_id)
     result: list[CalendarItem] = []
     for item in items:
-        if not isinstance(item, dict):
+        calendar_item = _event_from_record(item)
+        if calendar_item is None:
             continue
-        ts = item.get("dt_start")
-        title = item.get("text")
-        item_id = item.get("event_id")
-        created_at = item.get("created_at")
-        if not isinstance(ts, str) or not isinstance(title, str) or not isinstance(item_id, str):
+        if not _event_matches(calendar_item, user_id=user_id, chat_id=chat_id):
             continue
-        try:
-            dt = datetime.fromisoformat(ts)
-        except ValueError:
+        if start and calendar_item.dt < start:
             continue
-        if dt.tzinfo is None:
-            dt = dt.replace(tzinfo=VIENNA_TZ)
-        if start and dt < start:
+        if end and calendar_item.dt > end:
             continue
-        if end and dt > end:
+        result.append(calendar_item)
+    result.sort(key=lambda item: item.dt)
+    return result
+
+
+async def list_occurrences(
+    start: datetime,
+    end: datetime,
+    *,
+    user_id: int | None = None,
+    chat_id: int | None = None,
+) -> list[CalendarItem]:
+    """Like list_items(), but RRULE series are expanded into one item per occurrence in [start, end]."""
+    async with _STORE_LOCK:
+        storage = _storage()
+        with _transaction(storage):
+            index = _index(storage)
+            single = [
+                item
+                for item in _events_in_range(storage, start, end, user_id=user_id)
+                if item.get("event_id") not in index.recurring
+            ]
+            series = [
+                item
+                for item in (storage.get_event(event_id) for event_id in index.recurring)
+                if item and (user_id is None or item.get("user_id") == user_id)
+            ]
+    result: list[CalendarItem] = []
+    for item in single:
+        calendar_item = _event_from_record(item)
+        if calendar_item is None or not _event_matches(calendar_item, user_id=user_id, chat_id=chat_id):
             continue
-        chat_id = item.get("chat_id")
-        user_id = item.get("user_id")
-        tzinfo = _parse_timezone(
-            item.get("timezone"),
-            dt.tzinfo if isinstance(dt.tzinfo, ZoneInfo) else VIENNA_TZ,
-        )
-        dt = dt.astimezone(tzinfo)
-        series_id = item.get("series_id") if isinstance(item.get("series_id"), str) else item_id
-        result.append(
-            CalendarItem(
-                id=item_id,
-                ts=ts,
-                title=title,
-                created_at=str(created_at),
-                dt=dt,
-                chat_id=int(chat_id) if isinstance(chat_id, int) else 0,
-                user_id=int(user_id) if isinstance(user_id, int) else 0,
-                series_id=series_id,
-                rrule=item.get("rrule") if isinstance(item.get("rrule"), str) else None,
-                exdates=_parse_exdates(item.get("exdates")),
-                overrides=_parse_overrides(item.get("overrides"), tzinfo),
-                timezone=tzinfo.key,
-            )
-        )
+        if start <= calendar_item.dt <= end:
+            result.append(calendar_item)
+    for item in series:
+        calendar_item = _event_from_record(item)
+        if calendar_item is None or not _event_matches(calendar_item, user_id=user_id, chat_id=chat_id):
+            continue
+        result.extend(_expand_occurrences(calendar_item, start, end))
     result.sort(key=lambda item: item.dt)
     return result
 
 
+def _event_matches(item: CalendarItem, *, user_id: int | None, chat_id: int | None) -> bool:
+    if user_id is not None and item.user_id != user_id:
+        return False
+    return chat_id is None or item.chat_id == chat_id
+
+
+def _expand_occurrences(item: CalendarItem, start: datetime, end: datetime) -> list[CalendarItem]:
+    if not item.rrule:
+        return [item] if start <= item.dt <= end else []
+    occurrences = OCCURRENCE_CACHE.expand(item.series_id or item.id, item.dt, item.rrule, item.exdates, start, end)
+    patches: dict[float, dict[str, object]] = {}
+    for key, patch in (item.overrides or {}).items():
+        try:
+            instance = datetime.fromisoformat(key)
+        except ValueError:
+            continue
+        if instance.tzinfo is None:
+            instance = instance.replace(tzinfo=item.dt.tzinfo)
+        patches[instance.timestamp()] = patch
+    result: list[CalendarItem] = []
+    for occurrence in occurrences:
+        patch = patches.pop(occurrence.timestamp(), {})
+        title = patch.get("title")
+        result.append(replace(item, dt=occurrence, title=title if isinstance(title, str) else item.title))
+    # Instances moved by "edit this occurrence" are excluded from the rule and
+    # kept only as overrides keyed by their new start.
+    for patch in patches.values():
+        moved = patch.get("start_at")
+        if isinstance(moved, datetime) and start <= moved <= end:
+            title = patch.get("title")
+            result.append(replace(item, dt=moved, title=title if isinstance(title, str) else item.title))
+    return result
+
+
 async def delete_item(item_id: str) -> tuple[bool, str | None]:
     async with _STORE_LOCK:
-        store = load_store()
-        events = list(store.get("events") or [])
-        reminders = list(store.get("reminders") or [])
-        kept_events = [
-            item for item in events if isinstance(item, dict) and item.get("event_id") != item_id
-        ]
-        if len(kept_events) == len(events):
-            return False, None
-        removed_reminder_id = None
-        kept_reminders = []
-        for reminder in reminders:
-            if not isinstance(reminder, dict):
-                continue
-            if reminder.get("event_id") == item_id:
-                removed_reminder_id = reminder.get("reminder_id")
-                continue
-            kept_reminders.append(reminder)
-        store["events"] = kept_events
-        store["reminders"] = kept_reminders
-        store["schema_version"] = 2
-        store["updated_at"] = datetime.now(tz=VIENNA_TZ).isoformat()
-        save_store_atomic(store)
+        storage = _storage()
+        with _transaction(storage):
+            if not _delete_event(storage, item_id):
+                return False, None
+            removed_reminder_id = None
+            for reminder in storage.list_event_reminders(item_id):
+                reminder_id = reminder.get("reminder_id")
+                if isinstance(reminder_id, str):
+                    _delete_reminder(storage, reminder_id)
+                removed_reminder_id = reminder_id
         return True, removed_reminder_id if isinstance(removed_reminder_id, str) else None
 
 
 async def list_due_reminders(now: datetime, limit: int | None = None) -> list[ReminderItem]:
     async with _STORE_LOCK:
-        store = load_store()
-        items = store.get("reminders") or []
+        storage = _storage()
+        with _transaction(storage):
+            due_ids = _index(storage).due.due_ids(now.timestamp())
+            items = [item for item in (storage.get_reminder(reminder_id) for reminder_id in due_ids) if item]
     result: list[ReminderItem] = []
     for item in items:
-        if not isinstance(item, dict):
-            continue
-        trigger_at = item.get("trigger_at")
-        reminder_id = item.get("reminder_id")
-        event_id = item.get("event_id")
-        text = item.get("text")
-        enabled = bool(item.get("enabled", True))
-        if (
-            not isinstance(trigger_at, str)
-            or not isinstance(reminder_id, str)
-            or not isinstance(event_id, str)
-            or not isinstance(text, str)
-        ):
+        reminder = _reminder_from_record(item, fallback=now)
+        if reminder is None:
             continue
-        status = _normalize_status(item)
-        remind_at = _parse_datetime(trigger_at, now)
-        if not enabled or status != "active" or remind_at > now:
+        if not reminder.enabled or reminder.status != "active" or reminder.trigger_at > now:
             continue
-        recurrence = _parse_recurrence(item.get("recurrence"))
-        last_triggered_at = _parse_triggered_at(item.get("last_triggered_at"))
-        llm_ctx = item.get("llm_context")
-        llm_context = llm_ctx if isinstance(llm_ctx, str) else None
-        result.append(
-            _build_reminder_item(
-                reminder_id=reminder_id,
-                event_id=event_id,
-                user_id=int(item.get("user_id")) if isinstance(item.get("user_id"), int) else 0,
-                chat_id=int(item.get("chat_id")) if isinstance(item.get("chat_id"), int) else 0,
-                trigger_at=remind_at,
-                text=text,
-                enabled=enabled,
-                sent_at=item.get("sent_at") if isinstance(item.get("sent_at"), str) else None,
-                status=status,
-                recurrence=recurrence,
-                last_triggered_at=last_triggered_at,
-                llm_context=llm_context,
-            )
-        )
+        result.append(reminder)
     result.sort(key=lambda item: item.trigger_at)
     if limit is not None:
         return result[:limit]
     return result
 
 
-async def mark_reminder_sent(reminder_id: str, sent_at: datetime, missed: bool = False) -> ReminderItem | None:
+async def next_due_at() -> datetime | None:
+    """Earliest trigger_at among active reminders (None when nothing is scheduled)."""
     async with _STORE_LOCK:
-        store = load_store()
-        reminders = list(store.get("reminders") or [])
-        updated_item: dict[str, object] | None = None
-        next_trigger: datetime | None = None
-        for item in reminders:
-            if isinstance(item, dict) and item.get("reminder_id") == reminder_id:
-                trigger_value = item.get("trigger_at")
-                if not isinstance(trigger_value, str):
-                    break
-                current_trigger = _parse_datetime(trigger_value, sent_at)
-                recurrence = _parse_recurrence(item.get("recurrence"))
-                base_trigger = current_trigger
-                if recurrence:
-                    snooze_base_value = item.get("snooze_base_at")
-                    if isinstance(snooze_base_value, str):
-                        base_trigger = _parse_datetime(snooze_base_value, current_trigger)
-                if recurrence:
-                    next_trigger = _next_recurrence_trigger(base_trigger, recurrence)
-                if recurrence and next_trigger is not None:
-                    item["trigger_at"] = next_trigger.astimezone(VIENNA_TZ).isoformat()
-                    item["enabled"] = True
-                    item["status"] = "active"
-                    item.pop("snooze_base_at", None)
-                else:
-                    item["enabled"] = False
-                    item["status"] = "done"
-                    item.pop("snooze_base_at", None)
-                if not missed:
-                    item["sent_at"] = sent_at.astimezone(VIENNA_TZ).isoformat()
-                elif "sent_at" not in item:
-                    item["sent_at"] = sent_at.astimezone(VIENNA_TZ).isoformat()
-                item["last_triggered_at"] = sent_at.astimezone(VIENNA_TZ).isoformat()
-                updated_item = item
-                break
-        if updated_item is None:
-            return None
-        store["reminders"] = reminders
-        store["updated_at"] = datetime.now(tz=VIENNA_TZ).isoformat()
-        save_store_atomic(store)
-    event_id = updated_item.get("event_id")
-    text = updated_item.get("text")
-    trigger_at_value = updated_item.get("trigger_at")
-    if not isinstance(event_id, str) or not isinstance(text, str) or not isinstance(trigger_at_value, str):
+        storage = _storage()
+        with _transaction(storage):
+            next_ts = _index(storage).due.next_due_ts()
+    if next_ts is None:
         return None
-    if updated_item.get("enabled") and updated_item.get("status") == "active" and next_trigger is not None:
-        llm_ctx = updated_item.get("llm_context")
-        llm_context = llm_ctx if isinstance(llm_ctx, str) else None
-        return _build_reminder_item(
-            reminder_id=reminder_id,
-            event_id=event_id,
-            user_id=int(updated_item.get("user_id")) if isinstance(updated_item.get("user_id"), int) else 0,
-            chat_id=int(updated_item.get("chat_id")) if isinstance(updated_item.get("chat_id"), int) else 0,
-            trigger_at=_parse_datetime(trigger_at_value, sent_at),
-            text=text,
-            enabled=True,
-            sent_at=updated_item.get("sent_at") if isinstance(updated_item.get("sent_at"), str) else None,
-            status="active",
-            recurrence=_parse_recurrence(updated_item.get("recurrence")),
-            last_triggered_at=_parse_triggered_at(updated_item.get("last_triggered_at")),
-            llm_context=llm_context,
-        )
+    if next_ts == float("-inf"):
+        return datetime.now(tz=VIENNA_TZ)
+    return datetime.fromtimestamp(next_ts, tz=VIENNA_TZ)
+
+
+async def mark_reminder_sent(reminder_id: str, sent_at: datetime, missed: bool = False) -> ReminderItem | None:
+    async with _STORE_LOCK:
+        storage = _storage()
+        with _transaction(storage):
+            item = storage.get_reminder(reminder_id)
+            if item is None:
+                return None
+            trigger_value = item.get("trigger_at")
+            if not isinstance(trigger_value, str):
+                return None
+            next_trigger: datetime | None = None
+            current_trigger = _parse_datetime(trigger_value, sent_at)
+            recurrence = _parse_recurrence(item.get("recurrence"))
+            base_trigger = current_trigger
+            if recurrence:
+                snooze_base_value = item.get("snooze_base_at")
+                if isinstance(snooze_base_value, str):
+                    base_trigger = _parse_datetime(snooze_base_value, current_trigger)
+            if recurrence:
+                next_trigger = _next_recurrence_trigger(base_trigger, recurrence)
+            if recurrence and next_trigger is not None:
+                item["trigger_at"] = next_trigger.astimezone(VIENNA_TZ).isoformat()
+                item["enabled"] = True
+                item["status"] = "active"
+                item.pop("snooze_base_at", None)
+            else:
+                item["enabled"] = False
+                item["status"] = "done"
+                item.pop("snooze_base_at", None)
+            if not missed:
+                item["sent_at"] = sent_at.astimezone(VIENNA_TZ).isoformat()
+            elif "sent_at" not in item:
+                item["sent_at"] = sent_at.astimezone(VIENNA_TZ).isoformat()
+            item["last_triggered_at"] = sent_at.astimezone(VIENNA_TZ).isoformat()
+            _put_reminder(storage, item)
+    if item.get("enabled") and item.get("status") == "active" and next_trigger is not None:
+        return _reminder_from_record(item, fallback=sent_at)
     return None
 
 
@@ -621,52 +726,34 @@ async def list_reminders(
     now: datetime,
     limit: int | None = 5,
     include_disabled: bool = False,
+    *,
+    user_id: int | None = None,
+    chat_id: int | None = None,
 ) -> list[ReminderItem]:
     async with _STORE_LOCK:
-        store = load_store()
-        reminders = list(store.get("reminders") or [])
+        storage = _storage()
+        if user_id is not None:
+            with _transaction(storage):
+                reminders = _user_reminders(storage, user_id)
+        else:
+            reminders = storage.list_reminders(
+                active_only=not include_disabled,
+                trigger_from_ts=now.timestamp(),
+            )
     result: list[ReminderItem] = []
     for item in reminders:
-        if not isinstance(item, dict):
+        reminder = _reminder_from_record(item, fallback=now)
+        if reminder is None:
             continue
-        reminder_id = item.get("reminder_id")
-        event_id = item.get("event_id")
-        trigger_at = item.get("trigger_at")
-        text = item.get("text")
-        enabled = bool(item.get("enabled", True))
-        if (
-            not isinstance(reminder_id, str)
-            or not isinstance(event_id, str)
-            or not isinstance(trigger_at, str)
-            or not isinstance(text, str)
-        ):
+        if user_id is not None and reminder.user_id != user_id:
             continue
-        status = _normalize_status(item)
-        if not include_disabled and (not enabled or status != "active"):
+        if chat_id is not None and reminder.chat_id != chat_id:
             continue
-        trigger_dt = _parse_datetime(trigger_at, now)
-        if trigger_dt < now:
+        if not include_disabled and (not reminder.enabled or reminder.status != "active"):
             continue
-        recurrence = _parse_recurrence(item.get("recurrence"))
-        last_triggered_at = _parse_triggered_at(item.get("last_triggered_at"))
-        llm_ctx = item.get("llm_context")
-        llm_context = llm_ctx if isinstance(llm_ctx, str) else None
-        result.append(
-            _build_reminder_item(
-                reminder_id=reminder_id,
-                event_id=event_id,
-                user_id=int(item.get("user_id")) if isinstance(item.get("user_id"), int) else 0,
-                chat_id=int(item.get("chat_id")) if isinstance(item.get("chat_id"), int) else 0,
-                trigger_at=trigger_dt,
-                text=text,
-                enabled=enabled,
-                sent_at=item.get("sent_at") if isinstance(item.get("sent_at"), str) else None,
-                status=status,
-                recurrence=recurrence,
-                last_triggered_at=last_triggered_at,
-                llm_context=llm_context,
-            )
-        )
+        if reminder.trigger_at < now:
+            continue
+        result.append(reminder)
     result.sort(key=lambda item: item.trigger_at)
     if limit is None:
         return result
@@ -675,80 +762,18 @@ async def list_reminders(
 
 async def get_reminder(reminder_id: str) -> ReminderItem | None:
     async with _STORE_LOCK:
-        store = load_store()
-        reminders = list(store.get("reminders") or [])
-    for item in reminders:
-        if not isinstance(item, dict) or item.get("reminder_id") != reminder_id:
-            continue
-        trigger_at = item.get("trigger_at")
-        text = item.get("text")
-        event_id = item.get("event_id")
-        if not isinstance(trigger_at, str) or not isinstance(text, str) or not isinstance(event_id, str):
-            return None
-        trigger_dt = _parse_datetime(trigger_at, datetime.now(tz=VIENNA_TZ))
-        status = _normalize_status(item)
-        recurrence = _parse_recurrence(item.get("recurrence"))
-        last_triggered_at = _parse_triggered_at(item.get("last_triggered_at"))
-        llm_ctx = item.get("llm_context")
-        llm_context = llm_ctx if isinstance(llm_ctx, str) else None
-        return _build_reminder_item(
-            reminder_id=reminder_id,
-            event_id=event_id,
-            user_id=int(item.get("user_id")) if isinstance(item.get("user_id"), int) else 0,
-            chat_id=int(item.get("chat_id")) if isinstance(item.get("chat_id"), int) else 0,
-            trigger_at=trigger_dt,
-            text=text,
-            enabled=bool(item.get("enabled", True)),
-            sent_at=item.get("sent_at") if isinstance(item.get("sent_at"), str) else None,
-            status=status,
-            recurrence=recurrence,
-            last_triggered_at=last_triggered_at,
-            llm_context=llm_context,
-        )
-    return None
+        item = _storage().get_reminder(reminder_id)
+    if item is None:
+        return None
+    return _reminder_from_record(item, fallback=datetime.now(tz=VIENNA_TZ))
 
 
 async def get_event(event_id: str) -> CalendarItem | None:
     async with _STORE_LOCK:
-        store = load_store()
-        events = list(store.get("events") or [])
-    for item in events:
-        if not isinstance(item, dict) or item.get("event_id") != event_id:
-            continue
-        ts = item.get("dt_start")
-        title = item.get("text")
-        created_at = item.get("created_at")
-        if not isinstance(ts, str) or not isinstance(title, str):
-            return None
-        try:
-            dt = datetime.fromisoformat(ts)
-        except ValueError:
-            return None
-        if dt.tzinfo is None:
-            dt = dt.replace(tzinfo=VIENNA_TZ)
-        chat_id = item.get("chat_id")
-        user_id = item.get("user_id")
-        tzinfo = _parse_timezone(
-            item.get("timezone"),
-            dt.tzinfo if isinstance(dt.tzinfo, ZoneInfo) else VIENNA_TZ,
-        )
-        dt = dt.astimezone(tzinfo)
-        series_id = item.get("series_id") if isinstance(item.get("series_id"), str) else event_id
-        return CalendarItem(
-            id=event_id,
-            ts=ts,
-            title=title,
-            created_at=str(created_at),
-            dt=dt,
-            chat_id=int(chat_id) if isinstance(chat_id, int) else 0,
-            user_id=int(user_id) if isinstance(user_id, int) else 0,
-            series_id=series_id,
-            rrule=item.get("rrule") if isinstance(item.get("rrule"), str) else None,
-            exdates=_parse_exdates(item.get("exdates")),
-            overrides=_parse_overrides(item.get("overrides"), tzinfo),
-            timezone=tzinfo.key,
-        )
-    return None
+        item = _storage().get_event(event_id)
+    if item is None:
+        return None
+    return _event_from_record(item)
 
 
 async def update_event_dt(event_id: str, new_dt: datetime) -> tuple[CalendarItem | None, str | None]:
@@ -769,13 +794,11 @@ async def update_event_fields(
     if new_dt is not None and new_dt.tzinfo is None:
         new_dt = new_dt.replace(tzinfo=VIENNA_TZ)
     async with _STORE_LOCK:
-        store = load_store()
-        events = list(store.get("events") or [])
-        reminders = list(store.get("reminders") or [])
-        updated_event: dict[str, object] | None = None
-        for item in events:
-            if not isinstance(item, dict) or item.get("event_id") != event_id:
-                continue
+        storage = _storage()
+        with _transaction(storage):
+            item = storage.get_event(event_id)
+            if item is None:
+                return None, None
             if new_dt is not None:
                 item["dt_start"] = new_dt.astimezone(VIENNA_TZ).isoformat()
             if new_title is not None:
@@ -794,84 +817,58 @@ async def update_event_fields(
                 item["timezone"] = new_timezone
             if new_series_id is not None:
                 item["series_id"] = new_series_id
-            updated_event = item
-            break
-        if updated_event is None:
-            return None, None
-        reminder_id: str | None = None
-        for item in reminders:
-            if not isinstance(item, dict) or item.get("event_id") != event_id:
-                continue
-            if new_dt is not None:
-                item["trigger_at"] = new_dt.astimezone(VIENNA_TZ).isoformat()
-            if new_title is not None:
-                item["text"] = new_title
-            reminder_id = item.get("reminder_id") if isinstance(item.get("reminder_id"), str) else None
-            break
-        store["events"] = events
-        store["reminders"] = reminders
-        store["schema_version"] = 2
-        store["updated_at"] = datetime.now(tz=VIENNA_TZ).isoformat()
-        save_store_atomic(store)
+            _put_event(storage, item)
+            reminder_id: str | None = None
+            event_reminders = storage.list_event_reminders(event_id)
+            if event_reminders:
+                reminder = event_reminders[0]
+                if new_dt is not None:
+                    reminder["trigger_at"] = new_dt.astimezone(VIENNA_TZ).isoformat()
+                if new_title is not None:
+                    reminder["text"] = new_title
+                reminder_id = reminder.get("reminder_id") if isinstance(reminder.get("reminder_id"), str) else None
+                _put_reminder(storage, reminder)
     return await get_event(event_id), reminder_id
 
 
 async def disable_reminder(reminder_id: str) -> bool:
     async with _STORE_LOCK:
-        store = load_store()
-        reminders = list(store.get("reminders") or [])
-        updated = False
-        for item in reminders:
-            if isinstance(item, dict) and item.get("reminder_id") == reminder_id:
-                status = _normalize_status(item)
-                if not item.get("enabled", True) or status == "disabled":
-                    return False
-                item["enabled"] = False
-                item["status"] = "disabled"
-                updated = True
-                break
-        if not updated:
-            return False
-        store["reminders"] = reminders
-        store["updated_at"] = datetime.now(tz=VIENNA_TZ).isoformat()
-        save_store_atomic(store)
+        storage = _storage()
+        with _transaction(storage):
+            item = storage.get_reminder(reminder_id)
+            if item is None:
+                return False
+            status = _normalize_status(item)
+            if not item.get("enabled", True) or status == "disabled":
+                return False
+            item["enabled"] = False
+            item["status"] = "disabled"
+            _put_reminder(storage, item)
         return True
 
 
 async def set_reminder_recurrence(reminder_id: str, recurrence: dict[str, object] | None) -> ReminderItem | None:
     async with _STORE_LOCK:
-        store = load_store()
-        reminders = list(store.get("reminders") or [])
-        updated_item: dict[str, object] | None = None
-        for item in reminders:
-            if isinstance(item, dict) and item.get("reminder_id") == reminder_id:
-                item["recurrence"] = recurrence
-                updated_item = item
-                break
-        if updated_item is None:
-            return None
-        store["reminders"] = reminders
-        store["updated_at"] = datetime.now(tz=VIENNA_TZ).isoformat()
-        save_store_atomic(store)
+        storage = _storage()
+        with _transaction(storage):
+            item = storage.get_reminder(reminder_id)
+            if item is None:
+                return None
+            item["recurrence"] = recurrence
+            _put_reminder(storage, item)
     return await get_reminder(reminder_id)
 
 
 async def enable_reminder(reminder_id: str) -> bool:
     async with _STORE_LOCK:
-        store = load_store()
-        reminders = list(store.get("reminders") or [])
-        updated = False
-        for item in reminders:
-            if isinstance(item, dict) and item.get("reminder_id") == reminder_id:
-                item["enabled"] = True
-                item["status"] = "active"
-                updated = True
-                break
-        if not updated:
-            return False
-        store["reminders"] = reminders
-        store["updated_at"] = datetime.now(tz=VIENNA_TZ).isoformat()
-        save_store_atomic(store)
+        storage = _storage()
+        with _transaction(storage):
+            item = storage.get_reminder(reminder_id)
+            if item is None:
+                return False
+            item["enabled"] = True
+            item["status"] = "active"
+            _put_reminder(storage, item)
         return True
 
 
@@ -885,13 +882,11 @@ async def apply_snooze(
     offset = max(1, minutes)
     current_now = (now or datetime.now(tz=VIENNA_TZ)).astimezone(VIENNA_TZ)
     async with _STORE_LOCK:
-        store = load_store()
-        reminders = list(store.get("reminders") or [])
-        updated_item: dict[str, object] | None = None
-        new_trigger: datetime | None = None
-        for item in reminders:
-            if not isinstance(item, dict) or item.get("reminder_id") != reminder_id:
-                continue
+        storage = _storage()
+        with _transaction(storage):
+            item = storage.get_reminder(reminder_id)
+            if item is None:
+                return None
             status = _normalize_status(item)
             if status != "active":
                 return None
@@ -912,33 +907,8 @@ async def apply_snooze(
                 existing_base = item.get("snooze_base_at")
                 if not isinstance(existing_base, str):
                     item["snooze_base_at"] = current_trigger.astimezone(VIENNA_TZ).isoformat()
-            updated_item = item
-            break
-        if updated_item is None or new_trigger is None:
-            return None
-        store["reminders"] = reminders
-        store["updated_at"] = datetime.now(tz=VIENNA_TZ).isoformat()
-        save_store_atomic(store)
-    event_id = updated_item.get("event_id")
-    text = updated_item.get("text")
-    if not isinstance(event_id, str) or not isinstance(text, str):
-        return None
-    llm_ctx = updated_item.get("llm_context")
-    llm_context = llm_ctx if isinstance(llm_ctx, str) else None
-    return _build_reminder_item(
-        reminder_id=reminder_id,
-        event_id=event_id,
-        user_id=int(updated_item.get("user_id")) if isinstance(updated_item.get("user_id"), int) else 0,
-        chat_id=int(updated_item.get("chat_id")) if isinstance(updated_item.get("chat_id"), int) else 0,
-        trigger_at=new_trigger.astimezone(VIENNA_TZ),
-        text=text,
-        enabled=True,
-        sent_at=updated_item.get("sent_at") if isinstance(updated_item.get("sent_at"), str) else None,
-        status=_normalize_status(updated_item),
-        recurrence=_parse_recurrence(updated_item.get("recurrence")),
-        last_triggered_at=_parse_triggered_at(updated_item.get("last_triggered_at")),
-        llm_context=llm_context,
-    )
+            _put_reminder(storage, item)
+    return _reminder_from_record(item, fallback=new_trigger)
 
 
 async def update_reminder_trigger(
@@ -947,100 +917,61 @@ async def update_reminder_trigger(
     enabled: bool = True,
 ) -> ReminderItem | None:
     async with _STORE_LOCK:
-        store = load_store()
-        reminders = list(store.get("reminders") or [])
-        updated_item: dict[str, object] | None = None
-        for item in reminders:
-            if isinstance(item, dict) and item.get("reminder_id") == reminder_id:
-                item["trigger_at"] = trigger_at.astimezone(VIENNA_TZ).isoformat()
-                item["enabled"] = enabled
-                item["status"] = "active" if enabled else "disabled"
-                updated_item = item
-                break
-        if updated_item is None:
-            return None
-        store["reminders"] = reminders
-        store["updated_at"] = datetime.now(tz=VIENNA_TZ).isoformat()
-        save_store_atomic(store)
-    event_id = updated_item.get("event_id")
-    text = updated_item.get("text")
-    if not isinstance(event_id, str) or not isinstance(text, str):
-        return None
-    llm_ctx = updated_item.get("llm_context")
-    llm_context = llm_ctx if isinstance(llm_ctx, str) else None
-    return _build_reminder_item(
-        reminder_id=reminder_id,
-        event_id=event_id,
-        user_id=int(updated_item.get("user_id")) if isinstance(updated_item.get("user_id"), int) else 0,
-        chat_id=int(updated_item.get("chat_id")) if isinstance(updated_item.get("chat_id"), int) else 0,
-        trigger_at=trigger_at.astimezone(VIENNA_TZ),
-        text=text,
-        enabled=enabled,
-        sent_at=updated_item.get("sent_at") if isinstance(updated_item.get("sent_at"), str) else None,
-        status=_normalize_status(updated_item),
-        recurrence=_parse_recurrence(updated_item.get("recurrence")),
-        last_triggered_at=_parse_triggered_at(updated_item.get("last_triggered_at")),
-        llm_context=llm_context,
-    )
+        storage = _storage()
+        with _transaction(storage):
+            item = storage.get_reminder(reminder_id)
+            if item is None:
+                return None
+            item["trigger_at"] = trigger_at.astimezone(VIENNA_TZ).isoformat()
+            item["enabled"] = enabled
+            item["status"] = "active" if enabled else "disabled"
+            _put_reminder(storage, item)
+    return _reminder_from_record(item, fallback=trigger_at)
 
 
 async def delete_reminder(reminder_id: str) -> bool:
     async with _STORE_LOCK:
-        store = load_store()
-        reminders = list(store.get("reminders") or [])
-        kept = [item for item in reminders if not (isinstance(item, dict) and item.get("reminder_id") == reminder_id)]
-        if len(kept) == len(reminders):
-            return False
-        store["reminders"] = kept
-        store["updated_at"] = datetime.now(tz=VIENNA_TZ).isoformat()
-        save_store_atomic(store)
-        return True
+        return _delete_reminder(_storage(), reminder_id)
 
 
 async def get_last_digest_sent(user_id: int) -> str | None:
     async with _STORE_LOCK:
-        store = load_store()
-        digest_sent = store.get("digest_sent")
-        if not isinstance(digest_sent, dict):
-            return None
-        value = digest_sent.get(str(user_id))
-        return value if isinstance(value, str) else None
+        return _storage().get_digest_sent(user_id)
+
+
+async def get_last_digest_sent_many(user_ids: Iterable[int]) -> dict[int, str]:
+    """get_last_digest_sent() for many users under one lock acquisition."""
+    async with _STORE_LOCK:
+        storage = _storage()
+        with _transaction(storage):
+            result: dict[int, str] = {}
+            for user_id in user_ids:
+                value = storage.get_digest_sent(user_id)
+                if value is not None:
+                    result[user_id] = value
+    return result
 
 
 async def set_last_digest_sent(user_id: int, yyyymmdd: str) -> None:
     async with _STORE_LOCK:
-        store = load_store()
-        digest_sent = dict(store.get("digest_sent") or {})
-        if not isinstance(digest_sent, dict):
-            digest_sent = {}
-        digest_sent[str(user_id)] = yyyymmdd
-        store["digest_sent"] = digest_sent
-        store["updated_at"] = datetime.now(tz=VIENNA_TZ).isoformat()
-        save_store_atomic(store)
+        _storage().set_digest_sent(user_id, yyyymmdd)
 
 
 async def resolve_user_chat_id(user_id: int) -> int | None:
     """Resolve chat_id for user from reminders/events. Returns None if not found."""
-    pairs = await list_user_chat_pairs()
-    for uid, cid in pairs:
-        if uid == user_id:
-            return cid
-    return None
+    async with _STORE_LOCK:
+        storage = _storage()
+        with _transaction(storage):
+            chat_ids = _index(storage).users.chat_ids(user_id)
+    return chat_ids[0] if chat_ids else None
 
 
 async def list_user_chat_pairs() -> list[tuple[int, int]]:
     """Return distinct (user_id, chat_id) from reminders and events."""
     async with _STORE_LOCK:
-        store = load_store()
-        pairs: set[tuple[int, int]] = set()
-        for item in list(store.get("reminders") or []) + list(store.get("events") or []):
-            if not isinstance(item, dict):
-                continue
-            uid = item.get("user_id")
-            cid = item.get("chat_id")
-            if isinstance(uid, int) and isinstance(cid, int) and cid:
-                pairs.add((uid, cid))
-        return sorted(pairs, key=lambda p: (p[0], p[1]))
+        storage = _storage()
+        with _transaction(storage):
+            return _index(storage).users.pairs()
 
 
 async def list_reminders_in_range(
@@ -1052,47 +983,30 @@ async def list_reminders_in_range(
 ) -> list[ReminderItem]:
     """Reminders with trigger_at in [start, end], enabled and active."""
     async with _STORE_LOCK:
-        store = load_store()
-        items = store.get("reminders") or []
+        storage = _storage()
+        if user_id is not None:
+            with _transaction(storage):
+                items = _user_reminders(storage, user_id)
+        else:
+            items = storage.list_reminders(
+                active_only=True,
+                trigger_from_ts=start.timestamp(),
+                trigger_to_ts=end.timestamp(),
+            )
     result: list[ReminderItem] = []
     for item in items:
-        if not isinstance(item, dict):
-            continue
-        reminder_id = item.get("reminder_id")
-        event_id = item.get("event_id")
-        trigger_at = item.get("trigger_at")
-        text = item.get("text")
-        if not all(isinstance(x, str) for x in (reminder_id, event_id, trigger_at, text)):
+        reminder = _reminder_from_record(item, fallback=start)
+        if reminder is None:
             continue
-        if not bool(item.get("enabled", True)) or _normalize_status(item) != "active":
+        if not reminder.enabled or reminder.status != "active":
             continue
-        uid = int(item.get("user_id")) if isinstance(item.get("user_id"), int) else 0
-        cid = int(item.get("chat_id")) if isinstance(item.get("chat_id"), int) else 0
-        if user_id is not None and uid != user_id:
+        if user_id is not None and reminder.user_id != user_id:
             continue
-        if chat_id is not None and cid != chat_id:
+        if chat_id is not None and reminder.chat_id != chat_id:
             continue
-        trigger_dt = _parse_datetime(trigger_at, start)
-        if trigger_dt < start or trigger_dt > end:
+        if reminder.trigger_at < start or reminder.trigger_at > end:
             continue
-        llm_ctx = item.get("llm_context")
-        llm_context = llm_ctx if isinstance(llm_ctx, str) else None
-        result.append(
-            _build_reminder_item(
-                reminder_id=reminder_id,
-                event_id=event_id,
-                user_id=uid,
-                chat_id=cid,
-                trigger_at=trigger_dt,
-                text=text,
-                enabled=True,
-                sent_at=item.get("sent_at") if isinstance(item.get("sent_at"), str) else None,
-                status="active",
-                recurrence=_parse_recurrence(item.get("recurrence")),
-                last_triggered_at=_parse_triggered_at(item.get("last_triggered_at")),
-                llm_context=llm_context,
-            )
-        )
+        result.append(reminder)
     result.sort(key=lambda r: r.trigger_at)
     return result
 
@@ -1103,16 +1017,15 @@ async def ensure_reminder_for_event(
     enabled: bool = True,
 ) -> ReminderItem:
     async with _STORE_LOCK:
-        store = load_store()
-        reminders = list(store.get("reminders") or [])
-        for item in reminders:
-            if isinstance(item, dict) and item.get("event_id") == event.id:
+        storage = _storage()
+        with _transaction(storage):
+            event_reminders = storage.list_event_reminders(event.id)
+            if event_reminders:
+                item = event_reminders[0]
                 item["enabled"] = enabled
                 item["trigger_at"] = trigger_at.astimezone(VIENNA_TZ).isoformat()
                 item["status"] = "active" if enabled else "disabled"
-                store["reminders"] = reminders
-                store["updated_at"] = datetime.now(tz=VIENNA_TZ).isoformat()
-                save_store_atomic(store)
+                _put_reminder(storage, item)
                 llm_ctx = item.get("llm_context")
                 llm_context = llm_ctx if isinstance(llm_ctx, str) else None
                 return _build_reminder_item(
@@ -1129,30 +1042,21 @@ async def ensure_reminder_for_event(
                     last_triggered_at=_parse_triggered_at(item.get("last_triggered_at")),
                     llm_context=llm_context,
                 )
-        reminder_id = _generate_id(
-            {
-                item_id
-                for item_id in (item.get("reminder_id") for item in reminders if isinstance(item, dict))
-                if isinstance(item_id, str)
+            reminder_id = _generate_unique_id(lambda candidate: storage.get_reminder(candidate) is not None)
+            reminder = {
+                "reminder_id": reminder_id,
+                "event_id": event.id,
+                "user_id": event.user_id,
+                "chat_id": event.chat_id,
+                "trigger_at": trigger_at.astimezone(VIENNA_TZ).isoformat(),
+                "text": event.title,
+                "enabled": enabled,
+                "sent_at": None,
+                "status": "active" if enabled else "disabled",
+                "recurrence": None,
+                "last_triggered_at": None,
             }
-        )
-        reminder = {
-            "reminder_id": reminder_id,
-            "event_id": event.id,
-            "user_id": event.user_id,
-            "chat_id": event.chat_id,
-            "trigger_at": trigger_at.astimezone(VIENNA_TZ).isoformat(),
-            "text": event.title,
-            "enabled": enabled,
-            "sent_at": None,
-            "status": "active" if enabled else "disabled",
-            "recurrence": None,
-            "last_triggered_at": None,
-        }
-        reminders.append(reminder)
-        store["reminders"] = reminders
-        store["updated_at"] = datetime.now(tz=VIENNA_TZ).isoformat()
-        save_store_atomic(store)
+            _put_reminder(storage, reminder)
         return _build_reminder_item(
             reminder_id=reminder_id,
             event_id=event.id,
@@ -1500,6 +1404,13 @@ def _generate_id(existing_ids: set[str]) -> str:
             return candidate
 
 
+def _generate_unique_id(exists: Callable[[str], bool]) -> str:
+    while True:
+        candidate = uuid.uuid4().hex[:8]
+        if not exists(candidate):
+            return candidate
+
+
 def _selftest() -> None:
     dt = parse_local_datetime("2026-02-05 18:30")
     assert dt.tzinfo == VIENNA_TZ
@@ -45,18 +45,15 @@ async def collect_daily_digest(
     start, end = _day_bounds(current, tz)
     date_key = _date_key(current, tz)
 
-    events_all = await calendar_store.list_items(start=start, end=end)
-    events = [item for item in events_all if item.user_id == user_id]
+    events = await calendar_store.list_occurrences(start, end, user_id=user_id)
     events.sort(key=lambda item: item.dt)
     if max_events:
         events = events[: max_events]
 
-    reminders_all = await calendar_store.list_reminders(current, limit=None, include_disabled=False)
-    reminders = [
-        item
-        for item in reminders_all
-        if item.user_id == user_id and start <= item.trigger_at.astimezone(tz) < end
-    ]
+    reminders_all = await calendar_store.list_reminders(
+        current, limit=None, include_disabled=False, user_id=user_id
+    )
+    reminders = [item for item in reminders_all if start <= item.trigger_at.astimezone(tz) < end]
     reminders.sort(key=lambda item: item.trigger_at)
     if max_reminders:
         reminders = reminders[: max_reminders]
@@ -3,16 +3,20 @@ from __future__ import annotations
 import asyncio
 import json
 import logging
-from dataclasses import dataclass
+from collections import deque
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Any, Callable, Literal
+from typing import IO, Any, Callable, Literal
 
 LOGGER = logging.getLogger(__name__)
 
 
 DialogRole = Literal["user", "assistant"]
 
+# Rewrite the log once it holds this many records more than the live state needs.
+COMPACT_SLACK_RECORDS = 1000
+
 
 @dataclass(frozen=True)
 class DialogMessage:
@@ -21,7 +25,21 @@ class DialogMessage:
     ts: str
 
 
+@dataclass
+class _UserState:
+    enabled: bool = False
+    chats: dict[int, deque[tuple[datetime, DialogMessage]]] = field(default_factory=dict)
+
+
 class DialogMemory:
+    """Short dialog context per (user, chat).
+
+    State lives in memory as bounded ring buffers; every change is appended as one
+    JSON line to ``<path>.jsonl``. Expired messages are dropped and the log is
+    rewritten by :meth:`compact` (periodically via :meth:`start_compaction`).
+    A legacy ``<path>`` JSON snapshot is imported once when no log exists yet.
+    """
+
     def __init__(
         self,
         path: Path,
@@ -32,32 +50,31 @@ class DialogMemory:
         now_provider: Callable[[], datetime] | None = None,
     ) -> None:
         self._path = path
+        self._log_path = path.with_suffix(".jsonl")
         self._max_turns = max(1, max_turns)
         self._max_messages = self._max_turns * 2
         self._max_text_length = max(1, max_text_length)
         self._ttl_seconds = max(1, ttl_seconds)
         self._now = now_provider or (lambda: datetime.now(timezone.utc))
         self._lock = asyncio.Lock()
-        self._data: dict[str, Any] = {"users": {}}
+        self._users: dict[int, _UserState] = {}
+        self._total = 0
+        self._log_records = 0
+        self._log: IO[str] | None = None
+        self._compaction_task: asyncio.Task[None] | None = None
 
     async def load(self) -> None:
-        if not self._path.exists():
-            return
-        try:
-            with self._path.open("r", encoding="utf-8") as handle:
-                data = json.load(handle)
-        except (OSError, json.JSONDecodeError) as exc:
-            LOGGER.warning("Dialog memory corrupted at %s: %s. Starting fresh.", self._path, exc)
-            self._data = {"users": {}}
-            return
-        if not isinstance(data, dict):
-            LOGGER.warning("Dialog memory invalid at %s. Starting fresh.", self._path)
-            self._data = {"users": {}}
-            return
-        self._data = data
-        changed = self._trim_all()
-        if changed:
-            await self._persist_locked(trim=False)
+        async with self._lock:
+            self._users = {}
+            self._total = 0
+            if self._log_path.exists():
+                self._replay_log()
+            elif self._path.exists():
+                self._import_snapshot()
+            else:
+                return
+            self._drop_expired(self._cutoff())
+            self._rewrite_log()
 
     async def add_user(self, user_id: int, chat_id: int, text: str) -> None:
         await self._add_message(user_id, chat_id, "user", text)
@@ -67,54 +84,36 @@ class DialogMemory:
 
     async def get_context(self, user_id: int, chat_id: int) -> list[DialogMessage]:
         async with self._lock:
-            changed = self._trim_all()
-            messages = self._get_messages(user_id, chat_id)
-            if changed:
-                await self._persist_locked(trim=False)
-            return [DialogMessage(**message) for message in messages]
+            messages = self._live_messages(user_id, chat_id)
+            return [message for _, message in messages] if messages else []
 
     async def clear(self, user_id: int, chat_id: int) -> None:
         async with self._lock:
-            user = self._get_user(user_id)
-            chats = user.setdefault("chats", {})
-            chats[str(chat_id)] = []
-            await self._persist_locked()
+            user = self._users.get(user_id)
+            messages = user.chats.pop(chat_id, None) if user else None
+            if messages:
+                self._total -= len(messages)
+            self._append({"op": "clear", "u": user_id, "c": chat_id})
 
     async def set_enabled(self, user_id: int, enabled: bool) -> None:
         async with self._lock:
-            user = self._get_user(user_id)
-            user["enabled"] = bool(enabled)
-            await self._persist_locked()
+            self._users.setdefault(user_id, _UserState()).enabled = bool(enabled)
+            self._append({"op": "enabled", "u": user_id, "v": bool(enabled)})
 
     async def is_enabled(self, user_id: int) -> bool:
         async with self._lock:
-            user = self._get_user(user_id, create=False)
-            if not user:
-                return False
-            return bool(user.get("enabled", True))
+            user = self._users.get(user_id)
+            return bool(user and user.enabled)
 
     async def get_status(self, user_id: int, chat_id: int) -> tuple[bool, int]:
         async with self._lock:
-            user = self._get_user(user_id, create=False)
-            enabled = False if not user else bool(user.get("enabled", True))
-            changed = self._trim_all()
-            messages = self._get_messages(user_id, chat_id)
-            if changed:
-                await self._persist_locked(trim=False)
-            return enabled, len(messages)
+            user = self._users.get(user_id)
+            messages = self._live_messages(user_id, chat_id)
+            return bool(user and user.enabled), len(messages) if messages else 0
 
     async def count_entries(self) -> int:
-        async with self._lock:
-            changed = self._trim_all()
-            total = 0
-            for user in self._data.get("users", {}).values():
-                chats = user.get("chats", {})
-                for messages in chats.values():
-                    if isinstance(messages, list):
-                        total += len(messages)
-            if changed:
-                await self._persist_locked(trim=False)
-            return total
+        # Maintained counter; may include expired messages until the next compaction.
+        return self._total
 
     async def get(self, user_id: int, chat_id: int) -> list[DialogMessage]:
         return await self.get_context(user_id, chat_id)
@@ -132,37 +131,89 @@ class DialogMemory:
         lines = [f"[{message.role}] {message.text}" for message in messages]
         return "\n".join(lines)
 
+    async def compact(self) -> int:
+        """Drop expired messages everywhere and rewrite the log from live state."""
+        async with self._lock:
+            removed = self._drop_expired(self._cutoff())
+            self._rewrite_log()
+            return removed
+
+    def start_compaction(self, interval_seconds: float = 600.0) -> None:
+        if self._compaction_task is not None and not self._compaction_task.done():
+            return
+        self._compaction_task = asyncio.create_task(self._compaction_loop(max(1.0, interval_seconds)))
+
+    async def close(self) -> None:
+        task, self._compaction_task = self._compaction_task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        async with self._lock:
+            if self._log is not None:
+                self._log.close()
+                self._log = None
+
+    async def _compaction_loop(self, interval_seconds: float) -> None:
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                removed = await self.compact()
+            except Exception:
+                LOGGER.exception("Dialog memory compaction failed: path=%s", self._log_path)
+                continue
+            if removed:
+                LOGGER.info("Dialog memory compacted: expired=%s entries=%s", removed, self._total)
+
     async def _add_message(self, user_id: int, chat_id: int, role: DialogRole, text: str) -> None:
         trimmed = self._sanitize_text(text)
         if not trimmed:
             return
         async with self._lock:
-            user = self._get_user(user_id)
-            chats = user.setdefault("chats", {})
-            chat_key = str(chat_id)
-            messages = chats.setdefault(chat_key, [])
-            messages.append(
-                {
-                    "role": role,
-                    "text": trimmed,
-                    "ts": self._now().isoformat(),
-                }
-            )
-            if len(messages) > self._max_messages:
-                chats[chat_key] = messages[-self._max_messages :]
-            await self._persist_locked()
-
-    def _get_user(self, user_id: int, *, create: bool = True) -> dict[str, Any]:
-        users = self._data.setdefault("users", {})
-        key = str(user_id)
-        if create:
-            return users.setdefault(key, {"enabled": False, "chats": {}})
-        return users.get(key, {})
-
-    def _get_messages(self, user_id: int, chat_id: int) -> list[dict[str, Any]]:
-        user = self._get_user(user_id)
-        chats = user.setdefault("chats", {})
-        return chats.setdefault(str(chat_id), [])
+            now = self._now()
+            message = DialogMessage(role=role, text=trimmed, ts=now.isoformat())
+            self._push(user_id, chat_id, message, self._as_utc(now))
+            self._append({"op": "add", "u": user_id, "c": chat_id, "role": role, "text": trimmed, "ts": message.ts})
+            if self._log_records > self._total * 2 + COMPACT_SLACK_RECORDS:
+                self._rewrite_log()
+
+    def _push(self, user_id: int, chat_id: int, message: DialogMessage, ts: datetime) -> None:
+        user = self._users.setdefault(user_id, _UserState())
+        messages = user.chats.get(chat_id)
+        if messages is None:
+            messages = user.chats[chat_id] = deque(maxlen=self._max_messages)
+        if len(messages) < self._max_messages:
+            self._total += 1
+        messages.append((ts, message))
+
+    def _live_messages(self, user_id: int, chat_id: int) -> deque[tuple[datetime, DialogMessage]] | None:
+        """Messages of one chat; only its expired head is dropped, other chats wait for compaction."""
+        user = self._users.get(user_id)
+        messages = user.chats.get(chat_id) if user else None
+        if not messages:
+            return None
+        cutoff = self._cutoff()
+        while messages and messages[0][0] < cutoff:
+            messages.popleft()
+            self._total -= 1
+        return messages
+
+    def _drop_expired(self, cutoff: datetime) -> int:
+        removed = 0
+        for user in self._users.values():
+            for chat_id, messages in list(user.chats.items()):
+                while messages and messages[0][0] < cutoff:
+                    messages.popleft()
+                    removed += 1
+                if not messages:
+                    del user.chats[chat_id]
+        self._total -= removed
+        return removed
+
+    def _cutoff(self) -> datetime:
+        return self._as_utc(self._now()) - timedelta(seconds=self._ttl_seconds)
 
     def _sanitize_text(self, text: str) -> str:
         trimmed = (text or "").strip()
@@ -172,43 +223,114 @@ class DialogMemory:
             trimmed = trimmed[: self._max_text_length].rstrip()
         return trimmed
 
-    async def _persist_locked(self, *, trim: bool = True) -> None:
-        if trim:
-            self._trim_all()
-        self._path.parent.mkdir(parents=True, exist_ok=True)
-        payload = {"users": self._data.get("users", {})}
-        tmp_path = self._path.with_suffix(".tmp")
+    def _append(self, record: dict[str, Any]) -> None:
+        if self._log is None:
+            self._log_path.parent.mkdir(parents=True, exist_ok=True)
+            self._log = self._log_path.open("a", encoding="utf-8")
+        self._log.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+        self._log.flush()
+        self._log_records += 1
+
+    def _rewrite_log(self) -> None:
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+        self._log_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self._log_path.with_suffix(".tmp")
+        records = 0
         with tmp_path.open("w", encoding="utf-8") as handle:
-            json.dump(payload, handle, ensure_ascii=False, separators=(",", ":"))
-        tmp_path.replace(self._path)
-
-    def _trim_all(self) -> bool:
-        changed = False
-        cutoff = self._now() - timedelta(seconds=self._ttl_seconds)
-        users = self._data.get("users", {})
-        for user in users.values():
-            chats = user.get("chats", {})
-            for chat_id, messages in list(chats.items()):
+            for user_id, user in self._users.items():
+                if user.enabled:
+                    handle.write(json.dumps({"op": "enabled", "u": user_id, "v": True}) + "\n")
+                    records += 1
+                for chat_id, messages in user.chats.items():
+                    for _, message in messages:
+                        record = {
+                            "op": "add",
+                            "u": user_id,
+                            "c": chat_id,
+                            "role": message.role,
+                            "text": message.text,
+                            "ts": message.ts,
+                        }
+                        handle.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+                        records += 1
+        tmp_path.replace(self._log_path)
+        self._log_records = records
+
+    def _replay_log(self) -> None:
+        try:
+            handle = self._log_path.open("r", encoding="utf-8")
+        except OSError as exc:
+            LOGGER.warning("Dialog memory log unreadable at %s: %s. Starting fresh.", self._log_path, exc)
+            return
+        skipped = 0
+        with handle:
+            for line in handle:
+                try:
+                    record = json.loads(line)
+                    self._apply(record)
+                except (ValueError, TypeError, KeyError, AttributeError):
+                    # A torn last line after a crash is expected; anything else is just skipped.
+                    skipped += 1
+        if skipped:
+            LOGGER.warning("Dialog memory log had %s invalid records at %s", skipped, self._log_path)
+
+    def _apply(self, record: dict[str, Any]) -> None:
+        op = record["op"]
+        user_id = int(record["u"])
+        if op == "add":
+            ts = self._parse_ts(record["ts"])
+            role = record["role"]
+            if ts is None or role not in ("user", "assistant"):
+                raise ValueError("invalid dialog record")
+            message = DialogMessage(role=role, text=str(record["text"]), ts=record["ts"])
+            self._push(user_id, int(record["c"]), message, ts)
+        elif op == "clear":
+            user = self._users.get(user_id)
+            messages = user.chats.pop(int(record["c"]), None) if user else None
+            if messages:
+                self._total -= len(messages)
+        elif op == "enabled":
+            self._users.setdefault(user_id, _UserState()).enabled = bool(record["v"])
+        else:
+            raise ValueError(f"unknown dialog op: {op}")
+
+    def _import_snapshot(self) -> None:
+        try:
+            with self._path.open("r", encoding="utf-8") as handle:
+                data = json.load(handle)
+        except (OSError, json.JSONDecodeError) as exc:
+            LOGGER.warning("Dialog memory corrupted at %s: %s. Starting fresh.", self._path, exc)
+            return
+        users = data.get("users") if isinstance(data, dict) else None
+        if not isinstance(users, dict):
+            LOGGER.warning("Dialog memory invalid at %s. Starting fresh.", self._path)
+            return
+        for user_key, user in users.items():
+            if not isinstance(user, dict):
+                continue
+            try:
+                user_id = int(user_key)
+            except ValueError:
+                continue
+            state = self._users.setdefault(user_id, _UserState())
+            state.enabled = bool(user.get("enabled", True))
+            chats = user.get("chats")
+            for chat_key, messages in (chats.items() if isinstance(chats, dict) else ()):
                 if not isinstance(messages, list):
-                    chats[chat_id] = []
-                    changed = True
                     continue
-                trimmed = self._trim_messages(messages, cutoff=cutoff)
-                if trimmed != messages:
-                    chats[chat_id] = trimmed
-                    changed = True
-        return changed
-
-    def _trim_messages(self, messages: list[dict[str, Any]], *, cutoff: datetime) -> list[dict[str, Any]]:
-        recent: list[dict[str, Any]] = []
-        for message in messages:
-            ts = self._parse_ts(message.get("ts"))
-            if ts is None or ts < cutoff:
-                continue
-            recent.append(message)
-        if len(recent) > self._max_messages:
-            recent = recent[-self._max_messages :]
-        return recent
+                for message in messages:
+                    try:
+                        self._apply({"op": "add", "u": user_id, "c": int(chat_key), **message})
+                    except (ValueError, TypeError, KeyError):
+                        continue
+        LOGGER.info("Dialog memory imported from %s into %s", self._path, self._log_path)
+
+    def _as_utc(self, value: datetime) -> datetime:
+        if value.tzinfo is None:
+            return value.replace(tzinfo=timezone.utc)
+        return value.astimezone(timezone.utc)
 
     def _parse_ts(self, value: object) -> datetime | None:
         if not isinstance(value, str) or not value:
@@ -217,6 +339,4 @@ class DialogMemory:
             parsed = datetime.fromisoformat(value)
         except ValueError:
             return None
-        if parsed.tzinfo is None:
-            return parsed.replace(tzinfo=timezone.utc)
-        return parsed.astimezone(timezone.utc)
+        return self._as_utc(parsed)
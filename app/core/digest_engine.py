@@ -0,0 +1,195 @@
+"""Сборка дайджестов пачкой: одна выборка из календаря на всех получателей и разнесённая по окну отправка."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import zlib
+from collections.abc import Awaitable, Callable, Iterable
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta
+from typing import Any
+from zoneinfo import ZoneInfo
+
+from app.core import calendar_store
+
+LOGGER = logging.getLogger(__name__)
+
+CATCH_UP_SECONDS = 2 * 3600
+
+
+def digest_slot_offset(user_id: int, window_seconds: int) -> int:
+    """Stable per-user delay inside the delivery window (same slot every day, spread evenly)."""
+    if window_seconds <= 0:
+        return 0
+    return zlib.crc32(str(user_id).encode("ascii")) % window_seconds
+
+
+def resolve_timezone(value: object, default: ZoneInfo) -> ZoneInfo:
+    if isinstance(value, str) and value:
+        try:
+            return ZoneInfo(value)
+        except (KeyError, ValueError):
+            LOGGER.warning("Unknown profile timezone, using default: timezone=%s", value)
+    return default
+
+
+@dataclass(frozen=True)
+class DigestTarget:
+    user_id: int
+    chat_id: int
+    tz: ZoneInfo
+    day_start: datetime
+    day_end: datetime
+    match_chat: bool = False
+
+    @property
+    def local_date(self) -> date:
+        return self.day_start.date()
+
+    @property
+    def queue_key(self) -> str:
+        """Send-queue key: one pending digest per user and day."""
+        return f"digest:{self.user_id}:{self.local_date.isoformat()}"
+
+
+@dataclass
+class DigestItems:
+    events: list[calendar_store.CalendarItem] = field(default_factory=list)
+    reminders: list[calendar_store.ReminderItem] = field(default_factory=list)
+
+
+def build_target(user_id: int, chat_id: int, *, tz: ZoneInfo, now: datetime, match_chat: bool = False) -> DigestTarget:
+    local = now.astimezone(tz)
+    start = datetime.combine(local.date(), time.min).replace(tzinfo=tz)
+    return DigestTarget(
+        user_id=user_id,
+        chat_id=chat_id,
+        tz=tz,
+        day_start=start,
+        day_end=start + timedelta(days=1),
+        match_chat=match_chat,
+    )
+
+
+def is_due(
+    target: DigestTarget,
+    now: datetime,
+    *,
+    send_time: time | None,
+    window_seconds: int = 0,
+    catch_up_seconds: int = CATCH_UP_SECONDS,
+) -> bool:
+    """True once the user's local send time plus its slot offset has passed today.
+
+    ``send_time=None`` means "now" (manual runs). Slots missed by more than
+    ``catch_up_seconds`` (e.g. the bot was down all morning) are skipped for the day.
+    """
+    if send_time is None:
+        return True
+    slot = datetime.combine(target.local_date, send_time).replace(tzinfo=target.tz) + timedelta(
+        seconds=digest_slot_offset(target.user_id, window_seconds)
+    )
+    return slot <= now <= slot + timedelta(seconds=max(window_seconds, 0) + catch_up_seconds)
+
+
+async def collect_digest_items(targets: Iterable[DigestTarget]) -> dict[int, DigestItems]:
+    """Load events and reminders for all targets with two store reads and group them by user."""
+    by_user = {target.user_id: target for target in targets}
+    if not by_user:
+        return {}
+    start = min(target.day_start for target in by_user.values())
+    end = max(target.day_end for target in by_user.values())
+    events = await calendar_store.list_occurrences(start, end)
+    reminders = await calendar_store.list_reminders_in_range(start, end)
+    grouped = {user_id: DigestItems() for user_id in by_user}
+    for event in events:
+        target = by_user.get(event.user_id)
+        if target is None or (target.match_chat and event.chat_id != target.chat_id):
+            continue
+        if target.day_start <= event.dt < target.day_end:
+            grouped[event.user_id].events.append(event)
+    for reminder in reminders:
+        target = by_user.get(reminder.user_id)
+        if target is None or (target.match_chat and reminder.chat_id != target.chat_id):
+            continue
+        if target.day_start <= reminder.trigger_at < target.day_end:
+            grouped[reminder.user_id].reminders.append(reminder)
+    for items in grouped.values():
+        items.events.sort(key=lambda item: item.dt)
+        items.reminders.sort(key=lambda item: item.trigger_at)
+    return grouped
+
+
+async def deliver_digests(
+    targets: list[DigestTarget],
+    deliver: Callable[[DigestTarget, DigestItems], Awaitable[bool]],
+    *,
+    concurrency: int = 8,
+) -> int:
+    """Collect once, then run ``deliver`` for every target with at most ``concurrency`` in flight."""
+    if not targets:
+        return 0
+    grouped = await collect_digest_items(targets)
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run(target: DigestTarget) -> bool:
+        async with semaphore:
+            try:
+                return await deliver(target, grouped.get(target.user_id, DigestItems()))
+            except Exception:
+                LOGGER.exception("Digest delivery failed: user_id=%s chat_id=%s", target.user_id, target.chat_id)
+                return False
+
+    results = await asyncio.gather(*(run(target) for target in targets))
+    return sum(1 for delivered in results if delivered)
+
+
+def any_slot_open(
+    timezones: Iterable[ZoneInfo],
+    now: datetime,
+    *,
+    send_time: time | None,
+    window_seconds: int = 0,
+    catch_up_seconds: int = CATCH_UP_SECONDS,
+) -> bool:
+    """Cheap pre-check for ``is_due``: can any user in these timezones be due right now?
+
+    Most minute ticks fall outside every timezone's send window and need no per-user work.
+    """
+    if send_time is None:
+        return True
+    # Slot offsets lie in [0, window), and each slot stays due for window + catch-up after it.
+    span = timedelta(seconds=2 * max(window_seconds, 0) + catch_up_seconds)
+    for tz in set(timezones):
+        opens = datetime.combine(now.astimezone(tz).date(), send_time).replace(tzinfo=tz)
+        if opens <= now <= opens + span:
+            return True
+    return False
+
+
+def profile_timezones(profile_store: Any, default: ZoneInfo) -> dict[int, ZoneInfo]:
+    """Timezones of users that have a saved profile (others keep ``default``)."""
+    if profile_store is None:
+        return {}
+    bulk = getattr(profile_store, "timezones", None)
+    if bulk is not None:
+        try:
+            return {user_id: resolve_timezone(value, default) for user_id, value in bulk().items()}
+        except Exception:
+            LOGGER.exception("Digest: failed to load profile timezones")
+            return {}
+    result: dict[int, ZoneInfo] = {}
+    try:
+        user_ids = profile_store.list_user_ids()
+    except Exception:
+        LOGGER.exception("Digest: failed to list profiles")
+        return {}
+    for user_id in user_ids:
+        try:
+            profile = profile_store.get(user_id)
+        except Exception:
+            LOGGER.exception("Digest: failed to load profile user_id=%s", user_id)
+            continue
+        result[user_id] = resolve_timezone(getattr(profile, "timezone", None), default)
+    return result
@@ -2,22 +2,48 @@ from __future__ import annotations
 
 import asyncio
 import logging
-from datetime import datetime
+from datetime import datetime, time
 from zoneinfo import ZoneInfo
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 
 from app.core import calendar_store
-from app.core.daily_digest import DIGEST_TZ, collect_daily_digest, render_daily_digest
+from app.core.daily_digest import DIGEST_TZ, DigestData, render_daily_digest
+from app.core.digest_engine import (
+    DigestItems,
+    DigestTarget,
+    any_slot_open,
+    build_target,
+    deliver_digests,
+    is_due,
+    profile_timezones,
+    resolve_timezone,
+)
 from app.infra.messaging import safe_send_bot_text
+from app.infra.send_queue import get_send_queue
 
 LOGGER = logging.getLogger(__name__)
 
 JOB_ID = "daily_digest"
+MAX_DIGEST_ITEMS = 8
 
 
-async def _send_digests_for_enabled_users(application, *, now: datetime | None = None, tz: ZoneInfo = DIGEST_TZ) -> int:
+async def _send_digests_for_enabled_users(
+    application,
+    *,
+    now: datetime | None = None,
+    tz: ZoneInfo = DIGEST_TZ,
+    send_time: time | None = None,
+    window_seconds: int = 0,
+    concurrency: int = 8,
+) -> int:
+    """Send the morning digest to users who enabled it, in their profile timezone.
+
+    Calendar data for all recipients is read once (see digest_engine). With
+    ``send_time`` only users whose staggered slot has passed are served; the job
+    calls this every minute so deliveries spread over ``window_seconds``.
+    """
     profile_store = application.bot_data.get("profile_store")
     if profile_store is None:
         LOGGER.warning("Daily digest skipped: profile_store missing")
@@ -25,7 +51,14 @@ async def _send_digests_for_enabled_users(application, *, now: datetime | None =
     current = now or datetime.now(tz=tz)
     if current.tzinfo is None:
         current = current.replace(tzinfo=tz)
-    sent = 0
+    timezones = profile_timezones(profile_store, tz)
+    if not any_slot_open([tz, *timezones.values()], current, send_time=send_time, window_seconds=window_seconds):
+        return 0
+    chat_by_user: dict[int, int] = {}
+    for user_id, chat_id in await calendar_store.list_user_chat_pairs():
+        chat_by_user.setdefault(user_id, chat_id)
+    send_queue = get_send_queue(application)
+    targets: list[DigestTarget] = []
     for user_id in profile_store.list_user_ids():
         try:
             profile = profile_store.get(user_id)
@@ -34,40 +67,95 @@ async def _send_digests_for_enabled_users(application, *, now: datetime | None =
             continue
         if not bool(getattr(profile, "daily_digest_enabled", False)):
             continue
-        date_key = current.astimezone(tz).date().isoformat()
+        target = build_target(
+            user_id,
+            chat_by_user.get(user_id, 0),
+            tz=resolve_timezone(getattr(profile, "timezone", None), tz),
+            now=current,
+        )
         last_sent = getattr(profile, "daily_digest_last_sent_date", None)
-        if isinstance(last_sent, str) and last_sent == date_key:
+        if isinstance(last_sent, str) and last_sent == target.local_date.isoformat():
+            continue
+        if not is_due(target, current, send_time=send_time, window_seconds=window_seconds):
             continue
-        chat_id = await calendar_store.resolve_user_chat_id(user_id)
-        if not isinstance(chat_id, int) or chat_id == 0:
+        if target.chat_id == 0:
             LOGGER.info("Daily digest skipped: chat_id unknown user_id=%s", user_id)
             continue
-        data = await collect_daily_digest(user_id=user_id, now=current, tz=tz)
-        text = render_daily_digest(data, tz=tz)
-        if not text:
+        if send_queue is not None and send_queue.is_pending(target.queue_key):
             continue
+        targets.append(target)
+
+    async def deliver(target: DigestTarget, items: DigestItems) -> bool:
+        date_key = target.local_date.isoformat()
+        data = DigestData(
+            date_key=date_key,
+            events=items.events[:MAX_DIGEST_ITEMS],
+            reminders=items.reminders[:MAX_DIGEST_ITEMS],
+        )
+        text = render_daily_digest(data, tz=target.tz)
+        if not text:
+            return False
+
+        async def mark_sent() -> None:
+            profile_store.update(target.user_id, {"daily_digest_last_sent_date": date_key})
+            LOGGER.info("Daily digest sent: user_id=%s chat_id=%s date=%s", target.user_id, target.chat_id, date_key)
+
         try:
-            await safe_send_bot_text(application.bot, chat_id, text)
+            if send_queue is not None:
+                # Recorded as sent only after delivery, so a dropped digest is retried next tick.
+                return await send_queue.submit(
+                    target.chat_id,
+                    text,
+                    kind="digest",
+                    key=target.queue_key,
+                    on_delivered=mark_sent,
+                )
+            await safe_send_bot_text(application.bot, target.chat_id, text)
         except Exception:
-            LOGGER.exception("Daily digest send failed: user_id=%s chat_id=%s", user_id, chat_id)
-            continue
-        profile_store.update(user_id, {"daily_digest_last_sent_date": date_key})
-        sent += 1
-        LOGGER.info("Daily digest sent: user_id=%s chat_id=%s date=%s", user_id, chat_id, date_key)
-    return sent
+            LOGGER.exception("Daily digest send failed: user_id=%s chat_id=%s", target.user_id, target.chat_id)
+            return False
+        await mark_sent()
+        return True
 
+    return await deliver_digests(targets, deliver, concurrency=concurrency)
 
-def _run_digest_job(application) -> None:
+
+def _run_digest_job(application, send_time: time, window_seconds: int) -> None:
     # APScheduler runs callables; we schedule the coroutine on the loop.
-    asyncio.create_task(_send_digests_for_enabled_users(application), name="daily-digest")
+    # The job ticks every minute; a tick still delivering is not overlapped.
+    running = application.bot_data.get("digest_task")
+    if isinstance(running, asyncio.Task) and not running.done():
+        return
+    application.bot_data["digest_task"] = asyncio.create_task(
+        _send_digests_for_enabled_users(application, send_time=send_time, window_seconds=window_seconds),
+        name="daily-digest",
+    )
 
 
-def start_digest_scheduler(application, *, tz: ZoneInfo = DIGEST_TZ) -> AsyncIOScheduler:
+def start_digest_scheduler(
+    application,
+    *,
+    tz: ZoneInfo = DIGEST_TZ,
+    send_time: time = time(9, 0),
+    window_seconds: int = 0,
+) -> AsyncIOScheduler:
     scheduler = AsyncIOScheduler(timezone=tz)
-    trigger = CronTrigger(hour=9, minute=0, timezone=tz)
-    scheduler.add_job(_run_digest_job, trigger=trigger, id=JOB_ID, replace_existing=True, args=[application])
+    trigger = CronTrigger(minute="*", timezone=tz)
+    scheduler.add_job(
+        _run_digest_job,
+        trigger=trigger,
+        id=JOB_ID,
+        replace_existing=True,
+        args=[application, send_time, window_seconds],
+    )
     scheduler.start()
-    LOGGER.info("Daily digest scheduler started: tz=%s job_id=%s", tz.key if isinstance(tz, ZoneInfo) else str(tz), JOB_ID)
+    LOGGER.info(
+        "Daily digest scheduler started: tz=%s job_id=%s send_time=%s window=%ss",
+        tz.key if isinstance(tz, ZoneInfo) else str(tz),
+        JOB_ID,
+        send_time.strftime("%H:%M"),
+        window_seconds,
+    )
     return scheduler
 
 
@@ -1,7 +1,19 @@
 from __future__ import annotations
 
+import heapq
+import json
+import logging
+import math
 import re
+from collections import Counter, OrderedDict
 from dataclasses import dataclass
+from pathlib import Path
+
+LOGGER = logging.getLogger(__name__)
+
+INDEX_VERSION = 1
+BM25_K1 = 1.5
+BM25_B = 0.75
 
 
 @dataclass(frozen=True)
@@ -11,21 +23,26 @@ class ChunkScore:
 
 
 def split_text(text: str, *, chunk_size: int = 900, overlap: int = 150) -> list[str]:
-    if not text:
-        return []
-    normalized = text.replace("\r\n", "\n").replace("\r", "\n")
-    chunks: list[str] = []
+    normalized = _normalize(text)
+    return [normalized[start:end].strip() for start, end in _chunk_spans(normalized, chunk_size, overlap)]
+
+
+def _normalize(text: str) -> str:
+    return text.replace("\r\n", "\n").replace("\r", "\n") if text else ""
+
+
+def _chunk_spans(normalized: str, chunk_size: int, overlap: int) -> list[tuple[int, int]]:
+    spans: list[tuple[int, int]] = []
     start = 0
     length = len(normalized)
     while start < length:
         end = min(length, start + chunk_size)
-        chunk = normalized[start:end].strip()
-        if chunk:
-            chunks.append(chunk)
+        if normalized[start:end].strip():
+            spans.append((start, end))
         if end == length:
             break
         start = max(0, end - overlap)
-    return chunks
+    return spans
 
 
 def select_relevant_chunks(
@@ -81,3 +98,164 @@ def select_relevant_chunks_with_scores(
 def _tokenize(text: str) -> list[str]:
     raw_tokens = re.findall(r"[\w\-]+", text.lower())
     return [token for token in raw_tokens if len(token) >= 3]
+
+
+class DocumentIndex:
+    """BM25 inverted index over the split_text() chunks of one document.
+
+    Built once at upload time and stored next to the text file as ``<name>.index.json``:
+    chunk offsets into the text, per-term posting lists of (chunk, term frequency) and
+    chunk lengths. Document frequency is the posting list length.
+    """
+
+    def __init__(
+        self,
+        text: str,
+        spans: list[tuple[int, int]],
+        postings: dict[str, list[tuple[int, int]]],
+        lengths: list[int],
+        *,
+        chunk_size: int = 900,
+        overlap: int = 150,
+    ) -> None:
+        self.text = text
+        self.spans = spans
+        self.postings = postings
+        self.lengths = lengths
+        self.chunk_size = chunk_size
+        self.overlap = overlap
+        self._avg_length = (sum(lengths) / len(lengths)) if lengths else 0.0
+
+    @classmethod
+    def build(cls, text: str, *, chunk_size: int = 900, overlap: int = 150) -> DocumentIndex:
+        normalized = _normalize(text)
+        spans = _chunk_spans(normalized, chunk_size, overlap)
+        postings: dict[str, list[tuple[int, int]]] = {}
+        lengths: list[int] = []
+        for chunk_id, (start, end) in enumerate(spans):
+            tokens = _tokenize(normalized[start:end])
+            lengths.append(len(tokens))
+            for term, tf in Counter(tokens).items():
+                postings.setdefault(term, []).append((chunk_id, tf))
+        return cls(normalized, spans, postings, lengths, chunk_size=chunk_size, overlap=overlap)
+
+    def __len__(self) -> int:
+        return len(self.spans)
+
+    def chunk(self, chunk_id: int) -> str:
+        start, end = self.spans[chunk_id]
+        return self.text[start:end].strip()
+
+    def search(self, query: str, *, top_k: int = 4) -> list[tuple[str, float]]:
+        """Top chunks by BM25 score; [] when no query term occurs in the document."""
+        total = len(self.spans)
+        if not total:
+            return []
+        scores: dict[int, float] = {}
+        for term in set(_tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            for chunk_id, tf in postings:
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.lengths[chunk_id] / (self._avg_length or 1))
+                scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+        best = heapq.nlargest(top_k, scores.items(), key=lambda item: (item[1], -item[0]))
+        return [(self.chunk(chunk_id), score) for chunk_id, score in best]
+
+    def to_dict(self) -> dict[str, object]:
+        return {
+            "version": INDEX_VERSION,
+            "chunk_size": self.chunk_size,
+            "overlap": self.overlap,
+            "text_length": len(self.text),
+            "spans": self.spans,
+            "lengths": self.lengths,
+            "postings": self.postings,
+        }
+
+    @classmethod
+    def from_dict(cls, text: str, payload: dict[str, object]) -> DocumentIndex | None:
+        normalized = _normalize(text)
+        if payload.get("version") != INDEX_VERSION or payload.get("text_length") != len(normalized):
+            return None
+        try:
+            spans = [(int(start), int(end)) for start, end in payload["spans"]]  # type: ignore[union-attr]
+            lengths = [int(value) for value in payload["lengths"]]  # type: ignore[union-attr]
+            postings = {
+                str(term): [(int(chunk_id), int(tf)) for chunk_id, tf in entries]
+                for term, entries in payload["postings"].items()  # type: ignore[union-attr]
+            }
+        except (KeyError, TypeError, ValueError):
+            return None
+        return cls(
+            normalized,
+            spans,
+            postings,
+            lengths,
+            chunk_size=int(payload.get("chunk_size", 900)),  # type: ignore[arg-type]
+            overlap=int(payload.get("overlap", 150)),  # type: ignore[arg-type]
+        )
+
+
+def index_path_for(text_path: Path) -> Path:
+    return text_path.with_name(f"{text_path.stem}.index.json")
+
+
+def save_document_index(text_path: Path, index: DocumentIndex) -> None:
+    index_path_for(text_path).write_text(json.dumps(index.to_dict(), ensure_ascii=False), encoding="utf-8")
+
+
+def load_document_index(text_path: Path) -> DocumentIndex | None:
+    """Read the text and its persisted index; rebuild (and persist) a missing or stale index."""
+    try:
+        text = text_path.read_text(encoding="utf-8")
+    except FileNotFoundError:
+        return None
+    try:
+        payload = json.loads(index_path_for(text_path).read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        payload = None
+    index = DocumentIndex.from_dict(text, payload) if isinstance(payload, dict) else None
+    if index is None:
+        index = DocumentIndex.build(text)
+        try:
+            save_document_index(text_path, index)
+        except OSError:
+            LOGGER.warning("Document index not persisted: path=%s", text_path, exc_info=True)
+    return index
+
+
+class DocumentIndexCache:
+    """Keeps the indexes of recently used documents in memory, keyed by text path and mtime."""
+
+    def __init__(self, max_entries: int = 32) -> None:
+        self._max_entries = max(1, max_entries)
+        self._entries: OrderedDict[str, tuple[float, DocumentIndex]] = OrderedDict()
+
+    def get(self, text_path: str | Path) -> DocumentIndex | None:
+        path = Path(text_path)
+        key = str(path)
+        try:
+            mtime = path.stat().st_mtime
+        except OSError:
+            self._entries.pop(key, None)
+            return None
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == mtime:
+            self._entries.move_to_end(key)
+            return entry[1]
+        index = load_document_index(path)
+        if index is None:
+            return None
+        self._entries[key] = (mtime, index)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+        return index
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+DOCUMENT_INDEX_CACHE = DocumentIndexCache()
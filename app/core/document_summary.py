@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from pathlib import Path
+
+from app.core.document_qa import split_text
+
+LOGGER = logging.getLogger(__name__)
+
+SUMMARY_VERSION = 1
+MAP_CHUNK_SIZE = 6000
+MAP_OVERLAP = 200
+REDUCE_MAX_CHARS = 8000
+
+MAP_SYSTEM_PROMPT = (
+    "Ты помощник. Сделай краткое тезисное резюме фрагмента документа. "
+    "Используй только текст фрагмента, без домыслов и вступлений."
+)
+REDUCE_SYSTEM_PROMPT = (
+    "Ты помощник. Объедини резюме последовательных частей документа в одно тезисное резюме. "
+    "Убери повторы, сохрани факты, числа и даты."
+)
+
+GenerateText = Callable[[list[dict[str, str]]], Awaitable[str]]
+ProgressCallback = Callable[[int, int], Awaitable[None]]
+
+
+def chunk_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def summaries_path_for(text_path: Path) -> Path:
+    return text_path.with_name(f"{text_path.stem}.summaries.json")
+
+
+class ChunkSummaryStore:
+    """Chunk summaries persisted next to the document text, keyed by the chunk content hash.
+
+    Texts in the shared document cache are per content hash, so every session of the
+    same upload reuses the summaries. ``overview`` is the last full document summary;
+    Q&A uses it as general context.
+    """
+
+    def __init__(self, text_path: Path) -> None:
+        self._path = summaries_path_for(text_path)
+        self._chunks: dict[str, str] = {}
+        self.overview = ""
+        try:
+            payload = json.loads(self._path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            return
+        if not isinstance(payload, dict) or payload.get("version") != SUMMARY_VERSION:
+            return
+        chunks = payload.get("chunks")
+        if isinstance(chunks, dict):
+            self._chunks = {str(key): str(value) for key, value in chunks.items()}
+        self.overview = str(payload.get("overview") or "")
+
+    def get(self, key: str) -> str | None:
+        return self._chunks.get(key)
+
+    def put(self, key: str, summary: str) -> None:
+        self._chunks[key] = summary
+
+    def __len__(self) -> int:
+        return len(self._chunks)
+
+    def save(self) -> None:
+        data = {"version": SUMMARY_VERSION, "chunks": self._chunks, "overview": self.overview}
+        tmp_path = self._path.with_suffix(".tmp")
+        try:
+            tmp_path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+            tmp_path.replace(self._path)
+        except OSError:
+            LOGGER.warning("Chunk summaries not persisted: path=%s", self._path, exc_info=True)
+
+
+@dataclass(frozen=True)
+class SummaryOutcome:
+    text: str
+    chunks: int
+    cached_chunks: int
+    llm_calls: int
+
+
+async def summarize_document(
+    text: str,
+    *,
+    generate: GenerateText,
+    system_prompt: str,
+    store: ChunkSummaryStore | None = None,
+    max_concurrency: int = 4,
+    on_progress: ProgressCallback | None = None,
+) -> SummaryOutcome:
+    """Map-reduce summary: summarize chunks concurrently, then merge the summaries.
+
+    A document that fits into one chunk is summarized with a single call. Otherwise
+    each ``MAP_CHUNK_SIZE`` chunk is summarized (at most ``max_concurrency`` calls in
+    flight, cached chunks are not sent again) and the chunk summaries are merged in
+    groups of up to ``REDUCE_MAX_CHARS`` until one final call with ``system_prompt``.
+    Chunk summaries are saved as soon as they arrive, so a failed run is cheaper to retry.
+    """
+    chunks = split_text(text, chunk_size=MAP_CHUNK_SIZE, overlap=MAP_OVERLAP)
+    if len(chunks) <= 1:
+        summary = await generate(
+            [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": f"Текст документа:\n{text.strip()}\n\nСделай резюме."},
+            ]
+        )
+        if store is not None and summary.strip():
+            store.overview = summary.strip()
+            store.save()
+        return SummaryOutcome(text=summary, chunks=len(chunks), cached_chunks=0, llm_calls=1)
+
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    total = len(chunks)
+    done = 0
+    calls = 0
+    cached = 0
+
+    async def report() -> None:
+        if on_progress is not None:
+            try:
+                await on_progress(done, total)
+            except Exception:
+                LOGGER.warning("Summary progress callback failed", exc_info=True)
+
+    async def summarize_chunk(index: int, chunk: str) -> str:
+        nonlocal done, calls, cached
+        key = chunk_hash(chunk)
+        summary = store.get(key) if store is not None else None
+        if summary is None:
+            async with semaphore:
+                calls += 1
+                summary = (
+                    await generate(
+                        [
+                            {"role": "system", "content": MAP_SYSTEM_PROMPT},
+                            {"role": "user", "content": f"Фрагмент {index + 1} из {total}:\n{chunk}"},
+                        ]
+                    )
+                ).strip()
+            if not summary:
+                raise ValueError(f"empty summary for chunk {index + 1}")
+            if store is not None:
+                store.put(key, summary)
+                store.save()
+        else:
+            cached += 1
+        done += 1
+        await report()
+        return summary
+
+    await report()
+    partials = list(await asyncio.gather(*(summarize_chunk(index, chunk) for index, chunk in enumerate(chunks))))
+
+    async def reduce_group(group: list[str]) -> str:
+        nonlocal calls
+        async with semaphore:
+            calls += 1
+            return (
+                await generate(
+                    [
+                        {"role": "system", "content": REDUCE_SYSTEM_PROMPT},
+                        {"role": "user", "content": _join_partials(group)},
+                    ]
+                )
+            ).strip()
+
+    while len(_join_partials(partials)) > REDUCE_MAX_CHARS and len(partials) > 1:
+        partials = list(await asyncio.gather(*(reduce_group(group) for group in _group_partials(partials))))
+    calls += 1
+    final = await generate(
+        [
+            {"role": "system", "content": system_prompt},
+            {
+                "role": "user",
+                "content": f"Резюме частей документа по порядку:\n{_join_partials(partials)[:REDUCE_MAX_CHARS]}"
+                "\n\nСделай итоговое резюме документа.",
+            },
+        ]
+    )
+    if store is not None and final.strip():
+        store.overview = final.strip()
+        store.save()
+    return SummaryOutcome(text=final, chunks=total, cached_chunks=cached, llm_calls=calls)
+
+
+def _join_partials(partials: list[str]) -> str:
+    return "\n\n".join(f"Часть {index + 1}:\n{summary}" for index, summary in enumerate(partials))
+
+
+def _group_partials(partials: list[str]) -> list[list[str]]:
+    """Split consecutive summaries into groups that fit one reduce call (at least two per group)."""
+    groups: list[list[str]] = []
+    current: list[str] = []
+    size = 0
+    for summary in partials:
+        if len(current) >= 2 and size + len(summary) > REDUCE_MAX_CHARS:
+            groups.append(current)
+            current, size = [], 0
+        current.append(summary)
+        size += len(summary)
+    if current:
+        groups.append(current)
+    return groups
@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from pathlib import Path
+
+from app.core.file_text_extractor import (
+    PDF_PAGE_BATCH,
+    ExtractedText,
+    FileTextExtractor,
+    pdf_page_count,
+)
+from app.infra.observability.metrics import MetricsCollector
+
+LOGGER = logging.getLogger(__name__)
+
+# pypdf parsing and Tesseract are CPU-bound and hold the GIL; python-docx is light.
+_PROCESS_FILE_TYPES = frozenset({"pdf", "image"})
+
+
+class ExtractionBusyError(RuntimeError):
+    """Raised when the extraction queue is full; the caller should ask to retry later."""
+
+
+class ExtractionTimeoutError(RuntimeError):
+    """Raised when an extraction job does not finish within its timeout."""
+
+
+@dataclass(frozen=True)
+class ExtractionPoolConfig:
+    workers: int = 2
+    timeout_seconds: float = 60.0
+    max_queue: int = 8
+    use_processes: bool = True
+
+
+def _run_extraction(extractor: FileTextExtractor, path: str, file_type: str) -> ExtractedText:
+    return extractor.extract(path=Path(path), file_type=file_type)
+
+
+class ExtractionExecutor:
+    """Runs FileTextExtractor jobs off the event loop.
+
+    PDF and OCR jobs go to a process pool, DOCX to a thread pool; a PDF is split
+    into page batches spread over the worker processes. At most
+    ``workers + max_queue`` jobs may be in flight; beyond that new jobs are refused
+    with ExtractionBusyError. A job that times out is cancelled if it has not started
+    yet; a job already running in a worker is abandoned and keeps its slot until the
+    worker finishes, so a stuck document cannot be used to flood the pools.
+    """
+
+    def __init__(self, config: ExtractionPoolConfig | None = None, *, metrics: MetricsCollector | None = None) -> None:
+        self.config = config or ExtractionPoolConfig()
+        self._metrics = metrics
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._process_pool: ProcessPoolExecutor | None = None
+        self._thread_pool: ThreadPoolExecutor | None = None
+
+    @property
+    def in_flight(self) -> int:
+        with self._lock:
+            return self._in_flight
+
+    async def extract(self, extractor: FileTextExtractor, *, path: Path, file_type: str) -> ExtractedText:
+        limit = max(1, self.config.workers) + max(0, self.config.max_queue)
+        with self._lock:
+            if self._in_flight >= limit:
+                self._count("busy")
+                raise ExtractionBusyError(f"Extraction queue is full ({self._in_flight} jobs)")
+            self._in_flight += 1
+            self._set_depth(self._in_flight)
+        started_at = time.monotonic()
+        release_on_exit = True
+        submitted: list[Future] = []
+        try:
+            if self.config.use_processes and file_type == "pdf":
+                job = self._extract_pdf(extractor, str(path), submitted)
+            else:
+                future = self._pool(file_type in _PROCESS_FILE_TYPES).submit(
+                    _run_extraction, extractor, str(path), file_type
+                )
+                # The slot is held until the worker really returns, even after a timeout.
+                future.add_done_callback(self._release)
+                release_on_exit = False
+                job = asyncio.wrap_future(future)
+            result = await asyncio.wait_for(job, timeout=self.config.timeout_seconds)
+        except TimeoutError as exc:
+            self._count("timeouts")
+            LOGGER.warning("Extraction timed out: file_type=%s timeout=%.1fs", file_type, self.config.timeout_seconds)
+            raise ExtractionTimeoutError(f"Extraction exceeded {self.config.timeout_seconds}s") from exc
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM on a huge scan); start a fresh pool for the next job.
+            self._reset_process_pool()
+            self._count("errors")
+            raise
+        except Exception:
+            self._count("errors")
+            raise
+        finally:
+            if release_on_exit:
+                # PDF batches still running in a worker keep the slot until they return.
+                self._release_after([future for future in submitted if not future.cancel() and not future.done()])
+            if self._metrics is not None:
+                self._metrics.record_request_duration(f"extraction_{file_type}", time.monotonic() - started_at)
+        self._count("completed")
+        return result
+
+    async def _extract_pdf(
+        self, extractor: FileTextExtractor, source: str, submitted: list[Future]
+    ) -> ExtractedText:
+        """Extract PDF page batches across the worker processes, in order, stopping at DOC_MAX_CHARS.
+
+        At most ``workers`` batches run at once; once the text collected so far exceeds
+        the character cap no further batches are scheduled and queued ones are cancelled.
+        Every worker call is appended to ``submitted`` so the caller can tell when they are over.
+        """
+
+        def submit(pool: Executor, fn, *args) -> asyncio.Future:
+            future = pool.submit(fn, *args)
+            submitted.append(future)
+            return asyncio.wrap_future(future)
+
+        total_pages = await submit(self._pool(False), pdf_page_count, source)
+        limit = extractor.page_limit(total_pages)
+        cap = extractor.char_limit()
+        pending = deque(range(0, limit, PDF_PAGE_BATCH))
+        running: deque[asyncio.Future[list[tuple[str, str]]]] = deque()
+        pages: list[tuple[str, str]] = []
+        size = 0
+        pool = self._pool(True)
+        try:
+            while pending or running:
+                while pending and len(running) < max(1, self.config.workers):
+                    start = pending.popleft()
+                    stop = min(start + PDF_PAGE_BATCH, limit)
+                    running.append(submit(pool, extractor.extract_pdf_pages, source, start, stop))
+                batch = await running.popleft()
+                pages.extend(batch)
+                size += sum(len(text) + 1 for text, _ in batch)
+                if cap is not None and size > cap:
+                    self._count("pdf_early_stops")
+                    break
+        finally:
+            for future in running:
+                future.cancel()
+        return extractor.assemble_pdf(pages, total_pages=total_pages)
+
+    def shutdown(self) -> None:
+        process_pool, self._process_pool = self._process_pool, None
+        thread_pool, self._thread_pool = self._thread_pool, None
+        for pool in (process_pool, thread_pool):
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+
+    def _pool(self, processes: bool) -> Executor:
+        workers = max(1, self.config.workers)
+        with self._lock:
+            if processes and self.config.use_processes:
+                if self._process_pool is None:
+                    # spawn: the bot process runs threads, forking it is not safe.
+                    self._process_pool = ProcessPoolExecutor(
+                        max_workers=workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                    )
+                return self._process_pool
+            if self._thread_pool is None:
+                self._thread_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="extract")
+            return self._thread_pool
+
+    def _reset_process_pool(self) -> None:
+        with self._lock:
+            pool, self._process_pool = self._process_pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def _release_after(self, futures: list[Future]) -> None:
+        """Free one slot once all ``futures`` are done (right away when there are none)."""
+        remaining = len(futures)
+        if not remaining:
+            self._release(None)
+            return
+
+        def done(_future: Future) -> None:
+            nonlocal remaining
+            with self._lock:
+                remaining -= 1
+                last = remaining == 0
+            if last:
+                self._release(None)
+
+        for future in futures:
+            future.add_done_callback(done)
+
+    def _release(self, _future: Future | None) -> None:
+        with self._lock:
+            self._in_flight = max(0, self._in_flight - 1)
+            self._set_depth(self._in_flight)
+
+    def _set_depth(self, depth: int) -> None:
+        if self._metrics is not None:
+            self._metrics.set_gauge("extraction.in_flight", depth)
+
+    def _count(self, name: str) -> None:
+        if self._metrics is not None:
+            self._metrics.inc(f"extraction.{name}")
@@ -1,12 +1,25 @@
 from __future__ import annotations
 
+import logging
+from collections.abc import Iterable
 from dataclasses import dataclass
 from io import BytesIO
 from pathlib import Path
+from typing import Any
 
 from PIL import Image
 from pytesseract import TesseractNotFoundError, image_to_string
 
+LOGGER = logging.getLogger(__name__)
+
+# Pages handed to one worker at a time; a batch reopens the PDF, so tiny batches waste parsing.
+PDF_PAGE_BATCH = 4
+
+PDF_PAGE_TEXT = "text"
+PDF_PAGE_OCR = "ocr"
+PDF_PAGE_EMPTY = "empty"
+PDF_PAGE_OCR_MISSING = "ocr_missing"
+
 
 @dataclass(frozen=True)
 class ExtractedText:
@@ -19,6 +32,60 @@ class OCRNotAvailableError(RuntimeError):
     """Raised when OCR is requested but Tesseract is unavailable or disabled."""
 
 
+def _open_pdf(source: Path | str | bytes) -> Any:
+    try:
+        from pypdf import PdfReader
+    except ModuleNotFoundError as exc:
+        raise ImportError("pypdf is required to extract text from PDF files.") from exc
+    if isinstance(source, bytes):
+        return PdfReader(BytesIO(source))
+    return PdfReader(str(source))
+
+
+def pdf_page_count(source: Path | str | bytes) -> int:
+    return len(_open_pdf(source).pages)
+
+
+def _read_pdf_pages(
+    reader: Any,
+    indices: Iterable[int],
+    ocr_enabled: bool,
+    tesseract_lang: str,
+) -> Iterable[tuple[str, str]]:
+    for index in indices:
+        page = reader.pages[index]
+        text = (page.extract_text() or "").strip()
+        if text:
+            yield text, PDF_PAGE_TEXT
+        elif not ocr_enabled:
+            yield "", PDF_PAGE_EMPTY
+        else:
+            yield _ocr_pdf_page(page, tesseract_lang)
+
+
+def _ocr_pdf_page(page: Any, tesseract_lang: str) -> tuple[str, str]:
+    """OCR the images embedded in a page without a text layer (a scan is one image per page)."""
+    parts: list[str] = []
+    try:
+        images = list(page.images)
+    except Exception:
+        LOGGER.debug("PDF page images unreadable", exc_info=True)
+        return "", PDF_PAGE_EMPTY
+    for embedded in images:
+        try:
+            parts.append((image_to_string(embedded.image, lang=tesseract_lang) or "").strip())
+        except TesseractNotFoundError:
+            return "", PDF_PAGE_OCR_MISSING
+        except Exception:
+            LOGGER.debug("PDF page image OCR failed", exc_info=True)
+    text = "\n".join(part for part in parts if part)
+    return (text, PDF_PAGE_OCR) if text else ("", PDF_PAGE_EMPTY)
+
+
+def _cap_text(text: str, cap: int) -> str:
+    return text[:cap].rsplit("\n", 1)[0].strip() or text[:cap]
+
+
 class FileTextExtractor:
     def __init__(
         self,
@@ -59,50 +126,73 @@ class FileTextExtractor:
             return self._extract_image_from_bytes(data)
         raise ValueError(f"Unsupported file type: {ext}")
 
-    def _extract_pdf(self, path: Path) -> ExtractedText:
-        try:
-            from pypdf import PdfReader
-        except ModuleNotFoundError as exc:
-            raise ImportError("pypdf is required to extract text from PDF files.") from exc
-        reader = PdfReader(str(path))
-        pages_text: list[str] = []
-        for page in reader.pages:
-            pages_text.append(page.extract_text() or "")
-        text = "\n".join(pages_text).strip()
+    def extract_pdf_pages(self, source: Path | str | bytes, start: int, stop: int) -> list[tuple[str, str]]:
+        """Text of pages [start, stop) as (text, kind); submitted to extraction workers page batch by batch."""
+        reader = _open_pdf(source)
+        indices = range(start, min(stop, len(reader.pages)))
+        return list(_read_pdf_pages(reader, indices, self._ocr_enabled, self._tesseract_lang))
+
+    def page_limit(self, total_pages: int) -> int:
+        if self._max_pages is None:
+            return total_pages
+        return min(total_pages, max(0, self._max_pages))
+
+    def char_limit(self, max_chars: int | None = None) -> int | None:
+        return max_chars if max_chars is not None else self._max_chars
+
+    def assemble_pdf(
+        self,
+        pages: list[tuple[str, str]],
+        *,
+        total_pages: int,
+        max_chars: int | None = None,
+    ) -> ExtractedText:
+        """Join page texts in order, applying DOC_MAX_PAGES / DOC_MAX_CHARS and their warnings."""
+        text = "\n".join(page_text for page_text, _ in pages).strip()
+        kinds = [kind for _, kind in pages]
+        if not text and PDF_PAGE_OCR_MISSING in kinds:
+            raise OCRNotAvailableError("Tesseract OCR is not available.")
+        warnings_list: list[str] = []
+        if self.page_limit(total_pages) < total_pages:
+            warnings_list.append("pages_truncated")
+        cap = self.char_limit(max_chars)
+        if cap is not None and (len(text) > cap or len(pages) < self.page_limit(total_pages)):
+            text = _cap_text(text, cap)
+            warnings_list.append("chars_truncated")
+        if PDF_PAGE_OCR_MISSING in kinds:
+            warnings_list.append("ocr_unavailable")
         return ExtractedText(
             text=text,
             metadata={
-                "pages": len(reader.pages),
+                "pages": len(pages),
+                "total_pages": total_pages,
+                "ocr_pages": kinds.count(PDF_PAGE_OCR),
                 "characters": len(text),
             },
+            warnings=tuple(warnings_list),
         )
 
+    def _extract_pdf(self, path: Path) -> ExtractedText:
+        return self._extract_pdf_serial(_open_pdf(path))
+
+    def _extract_pdf_serial(self, reader: Any, *, max_chars: int | None = None) -> ExtractedText:
+        total_pages = len(reader.pages)
+        cap = self.char_limit(max_chars)
+        pages: list[tuple[str, str]] = []
+        size = 0
+        pages_iter = _read_pdf_pages(reader, range(self.page_limit(total_pages)), self._ocr_enabled, self._tesseract_lang)
+        for page_text, kind in pages_iter:
+            pages.append((page_text, kind))
+            size += len(page_text) + 1
+            if cap is not None and size > cap:
+                break
+        return self.assemble_pdf(pages, total_pages=total_pages, max_chars=max_chars)
+
     def _extract_docx(self, path: Path) -> ExtractedText:
-        try:
-            from docx import Document
-        except ModuleNotFoundError as exc:
-            raise ImportError("python-docx is required to extract text from DOCX files.") from exc
-        document = Document(str(path))
-        paragraphs = [paragraph.text for paragraph in document.paragraphs if paragraph.text]
-        text = "\n".join(paragraphs).strip()
-        return ExtractedText(
-            text=text,
-            metadata={
-                "paragraphs": len(document.paragraphs),
-                "characters": len(text),
-            },
-        )
+        return self._extract_docx_from_bytes(path.read_bytes())
 
     def _extract_image(self, path: Path) -> ExtractedText:
-        if not self._ocr_enabled:
-            raise OCRNotAvailableError("OCR disabled via configuration.")
-        try:
-            image = Image.open(path)
-            text = image_to_string(image, lang=self._tesseract_lang) or ""
-        except TesseractNotFoundError as exc:
-            raise OCRNotAvailableError("Tesseract OCR is not available.") from exc
-        text = text.strip()
-        return ExtractedText(text=text, metadata={"characters": len(text)})
+        return self._extract_image_from_bytes(path.read_bytes())
 
     def _extract_pdf_from_bytes(
         self,
@@ -110,30 +200,7 @@ class FileTextExtractor:
         *,
         max_chars: int | None = None,
     ) -> ExtractedText:
-        try:
-            from pypdf import PdfReader
-        except ModuleNotFoundError as exc:
-            raise ImportError("pypdf is required to extract text from PDF files.") from exc
-        reader = PdfReader(BytesIO(data))
-        limit_pages = self._max_pages
-        pages_text: list[str] = []
-        for i, page in enumerate(reader.pages):
-            if limit_pages is not None and i >= limit_pages:
-                break
-            pages_text.append(page.extract_text() or "")
-        text = "\n".join(pages_text).strip()
-        warnings_list: list[str] = []
-        if limit_pages is not None and len(reader.pages) > limit_pages:
-            warnings_list.append("pages_truncated")
-        cap = max_chars if max_chars is not None else self._max_chars
-        if cap is not None and len(text) > cap:
-            text = text[:cap].rsplit("\n", 1)[0].strip() or text[:cap]
-            warnings_list.append("chars_truncated")
-        return ExtractedText(
-            text=text,
-            metadata={"pages": len(pages_text), "characters": len(text)},
-            warnings=tuple(warnings_list),
-        )
+        return self._extract_pdf_serial(_open_pdf(data), max_chars=max_chars)
 
     def _extract_docx_from_bytes(
         self,
@@ -149,9 +216,9 @@ class FileTextExtractor:
         paragraphs = [p.text for p in document.paragraphs if p.text]
         text = "\n".join(paragraphs).strip()
         warnings_list: list[str] = []
-        cap = max_chars if max_chars is not None else self._max_chars
+        cap = self.char_limit(max_chars)
         if cap is not None and len(text) > cap:
-            text = text[:cap].rsplit("\n", 1)[0].strip() or text[:cap]
+            text = _cap_text(text, cap)
             warnings_list.append("chars_truncated")
         return ExtractedText(
             text=text,
@@ -168,4 +235,9 @@ class FileTextExtractor:
         except TesseractNotFoundError as exc:
             raise OCRNotAvailableError("Tesseract OCR is not available.") from exc
         text = text.strip()
-        return ExtractedText(text=text, metadata={"characters": len(text)}, warnings=())
+        warnings_list: list[str] = []
+        cap = self.char_limit()
+        if cap is not None and len(text) > cap:
+            text = _cap_text(text, cap)
+            warnings_list.append("chars_truncated")
+        return ExtractedText(text=text, metadata={"characters": len(text)}, warnings=tuple(warnings_list))
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import asyncio
+import contextlib
 import json
 import logging
 import time
@@ -8,6 +9,7 @@ from datetime import datetime, timezone
 from pathlib import Path
 import re
 import traceback
+from collections.abc import AsyncIterator, Awaitable, Callable
 from typing import Any
 
 from app.core.bot_identity import (
@@ -21,6 +23,15 @@ from app.core.decision import Decision
 from app.core.error_messages import map_error_text
 from app.core.models import TaskExecutionResult
 from app.core.facts import build_sources_prompt, render_fact_response_with_sources
+from app.core.prompt_budget import (
+    MESSAGE_OVERHEAD_TOKENS,
+    PromptBlock,
+    estimate_messages_tokens,
+    plan_prompt,
+    resolve_prompt_budget,
+    split_dialog_lines,
+    split_paragraphs,
+)
 from app.core.result import (
     OrchestratorResult,
     Source,
@@ -28,12 +39,16 @@ from app.core.result import (
     ensure_valid,
     error,
     ok,
+    ratelimited,
     refused,
 )
 from app.core.text_safety import SAFE_FALLBACK_TEXT, SOURCES_DISCLAIMER_TEXT, is_sources_request, sanitize_llm_text
 from app.core.tasks import TaskDefinition, TaskError, get_task_registry
 from app.infra.access import AccessController
-from app.infra.llm import LLMAPIError, LLMClient, LLMGuardError, ensure_plain_text
+from app.infra.fair_limiter import FairLimiterRegistry, QueueTimeoutError, user_scope
+from app.infra.llm import LLMAPIError, LLMClient, LLMGuardError, client_models, ensure_plain_text
+from app.infra.llm_cache import LLMResponseCache
+from app.infra.observability.metrics import MetricsCollector
 from app.infra.rate_limit import RateLimiter
 from app.infra.resilience import (
     CircuitBreakerRegistry,
@@ -54,6 +69,7 @@ from app.infra.request_context import (
     log_error,
     log_event,
 )
+from app.infra.single_flight import SingleFlight
 from app.infra.storage import TaskStorage
 from app.tools.web_search import NullSearchClient, SearchClient
 from app.core.search_sources import get_enabled_sources, parse_sources_from_config
@@ -150,6 +166,9 @@ class Orchestrator:
         retry_policy: RetryPolicy | None = None,
         circuit_breakers: CircuitBreakerRegistry | None = None,
         search_sources_store: Any = None,
+        response_cache: LLMResponseCache | None = None,
+        metrics: MetricsCollector | None = None,
+        concurrency_limits: FairLimiterRegistry | None = None,
     ) -> None:
         self._config = config
         self._storage = storage
@@ -162,6 +181,11 @@ class Orchestrator:
         self._search_client = search_client or NullSearchClient()
         self._feature_web_search = feature_web_search
         self._search_sources_store = search_sources_store
+        self._response_cache = response_cache
+        # Identical upstream calls already in flight are shared instead of repeated.
+        self._llm_flight: SingleFlight[str] = SingleFlight("llm", metrics=metrics)
+        self._search_flight: SingleFlight[list[Source]] = SingleFlight("web_search", metrics=metrics)
+        self._concurrency_limits = concurrency_limits
         self._facts_only_default = _coerce_bool(config.get("facts_only_default", False))
         self._facts_only_by_user: dict[int, bool] = {}
         self._timeouts = timeouts or load_timeouts(config)
@@ -174,6 +198,25 @@ class Orchestrator:
     def config(self) -> dict[str, Any]:
         return self._config
 
+    @contextlib.asynccontextmanager
+    async def llm_slot(self, user_id: int) -> AsyncIterator[None]:
+        """Slot in the LLM provider's fair queue, bound to ``user_id``.
+
+        Raises ``QueueTimeoutError`` on entry when no slot frees up in time. A client
+        that limits its own routes (``LLMRouter``) only gets the user bound here.
+        """
+        llm_client = self._llm_client
+        with user_scope(user_id):
+            if (
+                self._concurrency_limits is None
+                or llm_client is None
+                or getattr(llm_client, "manages_concurrency", False)
+            ):
+                yield
+                return
+            async with self._concurrency_limits.get(f"llm.{_resolve_llm_provider(llm_client)}").slot(user_id):
+                yield
+
     def list_tasks(self) -> list[TaskDefinition]:
         enabled = self._enabled_tasks()
         return [self._registry[name] for name in enabled if name in self._registry]
@@ -184,7 +227,9 @@ class Orchestrator:
         user_context: dict[str, Any],
         *,
         request_context: RequestContext | None = None,
+        on_partial: Callable[[str], Awaitable[None]] | None = None,
     ) -> OrchestratorResult:
+        """``on_partial`` receives the accumulated answer while a plain LLM reply streams."""
         user_id = int(user_context.get("user_id") or 0)
         dialog_context = user_context.get("dialog_context")
         dialog_message_count = user_context.get("dialog_message_count")
@@ -263,6 +308,7 @@ class Orchestrator:
                 memory_context=memory_context if isinstance(memory_context, str) else None,
                 request_id=request_id if isinstance(request_id, str) else None,
                 request_context=request_context,
+                on_partial=on_partial,
             )
             result = self._build_llm_result(
                 execution,
@@ -292,6 +338,7 @@ class Orchestrator:
             memory_context=memory_context if isinstance(memory_context, str) else None,
             request_id=request_id if isinstance(request_id, str) else None,
             request_context=request_context,
+            on_partial=on_partial,
         )
         result = self._build_llm_result(
             execution,
@@ -443,7 +490,9 @@ class Orchestrator:
         memory_context: str | None = None,
         request_id: str | None = None,
         request_context: RequestContext | None = None,
+        cacheable: bool = False,
     ) -> TaskExecutionResult:
+        """``cacheable`` marks a deterministic tool prompt: no history, answer may come from the cache."""
         execution, _ = await self._request_llm(
             user_id,
             prompt,
@@ -454,6 +503,7 @@ class Orchestrator:
             memory_context=memory_context,
             request_id=request_id,
             request_context=request_context,
+            cacheable=cacheable,
         )
         return execution
 
@@ -479,6 +529,8 @@ class Orchestrator:
         memory_context: str | None = None,
         request_id: str | None = None,
         request_context: RequestContext | None = None,
+        on_partial: Callable[[str], Awaitable[None]] | None = None,
+        cacheable: bool = False,
     ) -> tuple[TaskExecutionResult, list[str]]:
         executed_at = datetime.now(timezone.utc)
         trimmed = prompt.strip()
@@ -517,7 +569,9 @@ class Orchestrator:
             return execution, []
         else:
             llm_config = self._config.get("llm", {})
-            model = self._llm_model or llm_config.get("model", "sonar")
+            route_models = client_models(llm_client, self._llm_model or llm_config.get("model", "sonar"))
+            # With a router this names every route, so cache and single-flight keys follow the routes.
+            model = "+".join(route_models)
             provider = _resolve_llm_provider(llm_client)
             llm_trace_name = f"{provider}/{model}" if provider else model
             # Для search — единая идентичность + инструкции; для ask/summary — только конфиг + plain text (без identity в system, чтобы не ломать тесты и контракт)
@@ -535,24 +589,47 @@ class Orchestrator:
                 else:
                     system_content = _PLAIN_TEXT_SYSTEM_PROMPT
 
+            # Sized for the smallest window: the router may pick any route.
+            prompt_budget = min(resolve_prompt_budget(name, llm_config) for name in route_models)
+
             def _build_messages(request_prompt: str) -> list[dict[str, Any]]:
                 messages: list[dict[str, Any]] = []
                 messages.append({"role": "system", "content": system_content})
-                history_turns = self._resolve_history_turns(llm_config)
+                # Cacheable tool prompts must not depend on the user's previous turns.
+                history_turns = 0 if cacheable else self._resolve_history_turns(llm_config)
+                history: list[tuple[str, str]] = []
                 if history_turns > 0:
                     recent = self._storage.get_recent_executions(
                         user_id,
                         task_names=["ask", "search"],
                         limit=history_turns,
                     )
-                    for record in recent:
-                        if record["status"] != "success":
-                            continue
-                        messages.append({"role": "user", "content": record["payload"]})
-                        messages.append({"role": "assistant", "content": record["result"]})
+                    history = [
+                        (record["payload"], record["result"]) for record in recent if record["status"] == "success"
+                    ]
+                # Dialog, memory and history share what the system prompt and the question leave;
+                # the oldest turns go first when they do not fit.
+                plan = plan_prompt(
+                    budget=prompt_budget,
+                    required=[system_content, request_prompt],
+                    blocks=[
+                        PromptBlock("dialog", split_dialog_lines(dialog_context), share=0.4),
+                        PromptBlock("memory", split_paragraphs(memory_context), share=0.2),
+                        PromptBlock(
+                            "history",
+                            [f"{question}\n{answer}" for question, answer in history],
+                            share=0.4,
+                            part_overhead=2 * MESSAGE_OVERHEAD_TOKENS,
+                            truncate=False,
+                        ),
+                    ],
+                )
+                for question, answer in history[len(history) - len(plan.kept["history"]) :]:
+                    messages.append({"role": "user", "content": question})
+                    messages.append({"role": "assistant", "content": answer})
                 combined_prompt = request_prompt
-                memory_text = memory_context.strip() if isinstance(memory_context, str) else ""
-                dialog_text = dialog_context.strip() if isinstance(dialog_context, str) else ""
+                memory_text = "\n\n".join(plan.kept["memory"])
+                dialog_text = "\n".join(plan.kept["dialog"])
                 context_blocks = [block for block in [memory_text, dialog_text] if block]
                 context_text = "\n\n".join(context_blocks)
                 if context_text:
@@ -573,8 +650,18 @@ class Orchestrator:
                 messages.append({"role": "user", "content": combined_prompt})
                 return messages
 
+            response_cache = self._response_cache if cacheable and on_partial is None else None
+            cache_key: str | None = None
+            cached_text: str | None = None
+            if response_cache is not None:
+                cache_key = response_cache.make_key(
+                    provider=provider or "-",
+                    model=model,
+                    messages=_build_messages(trimmed),
+                )
+                cached_text = response_cache.get(cache_key)
             breaker = self._circuit_breakers.get("llm")
-            allowed, circuit_event = breaker.allow_request()
+            allowed, circuit_event = breaker.allow_request() if cached_text is None else (True, None)
             if circuit_event:
                 log_event(
                     LOGGER,
@@ -630,22 +717,64 @@ class Orchestrator:
                 status="start",
                 duration_ms=0.0,
             )
+            stream_text = getattr(llm_client, "stream_text", None) if on_partial is not None else None
+
+            async def call_llm(call: Callable[[], Awaitable[str]]) -> str:
+                # Queue wait is outside retry_async so it does not eat into the LLM timeout.
+                async with self.llm_slot(user_id):
+                    return await retry_async(
+                        call,
+                        policy=self._retry_policy,
+                        timeout_seconds=self._timeouts.llm_seconds,
+                        logger=LOGGER,
+                        request_context=request_context,
+                        component="llm",
+                        name=llm_trace_name,
+                        is_retryable=self._is_retryable_exception,
+                    )
+
             try:
                 messages = _build_messages(trimmed)
-                response_text = await retry_async(
-                    lambda: llm_client.generate_text(
-                        model=model,
-                        messages=messages,
-                        web_search_options=None,
-                    ),
-                    policy=self._retry_policy,
-                    timeout_seconds=self._timeouts.llm_seconds,
-                    logger=LOGGER,
-                    request_context=request_context,
-                    component="llm",
-                    name=llm_trace_name,
-                    is_retryable=self._is_retryable_exception,
+                prompt_tokens = estimate_messages_tokens(messages)
+                if request_context:
+                    request_context.meta["prompt_tokens"] = prompt_tokens
+                add_trace(
+                    request_context,
+                    step="llm.prompt",
+                    component="prompt",
+                    name=f"{prompt_tokens}/{prompt_budget} tokens",
+                    status="ok",
                 )
+                if cached_text is not None:
+                    response_text = cached_text
+                    log_event(
+                        LOGGER,
+                        request_context,
+                        component="llm",
+                        event="llm.cache.hit",
+                        status="ok",
+                        name=llm_trace_name,
+                    )
+                else:
+                    flight_key = cache_key or LLMResponseCache.make_key(
+                        provider=provider or "-", model=model, messages=messages
+                    )
+                    if stream_text is not None:
+                        response_text = await call_llm(
+                            lambda: _collect_stream(stream_text, model=model, messages=messages, on_partial=on_partial)
+                        )
+                    else:
+                        # The slot is taken inside the flight, so coalesced followers never hold one.
+                        response_text = await self._llm_flight.do(
+                            flight_key,
+                            lambda: call_llm(
+                                lambda: llm_client.generate_text(
+                                    model=model,
+                                    messages=messages,
+                                    web_search_options=None,
+                                )
+                            ),
+                        )
                 result = ensure_plain_text(response_text)
                 sanitized, meta = sanitize_llm_text(
                     result,
@@ -659,19 +788,12 @@ class Orchestrator:
                     )
                     regen_prompt = f"{trimmed}\n\n{regen_instruction}"
                     regen_messages = _build_messages(regen_prompt)
-                    response_text = await retry_async(
+                    response_text = await call_llm(
                         lambda: llm_client.generate_text(
                             model=model,
                             messages=regen_messages,
                             web_search_options=None,
-                        ),
-                        policy=self._retry_policy,
-                        timeout_seconds=self._timeouts.llm_seconds,
-                        logger=LOGGER,
-                        request_context=request_context,
-                        component="llm",
-                        name=llm_trace_name,
-                        is_retryable=self._is_retryable_exception,
+                        )
                     )
                     result = ensure_plain_text(response_text)
                     sanitized, meta = sanitize_llm_text(
@@ -679,6 +801,15 @@ class Orchestrator:
                         sources_requested=sources_requested,
                         allow_source_citations=allow_source_citations,
                     )
+                if (
+                    response_cache is not None
+                    and cache_key is not None
+                    and cached_text is None
+                    and not meta["failed"]
+                    and not meta.get("needs_regeneration")
+                ):
+                    # The answer actually used (after any regeneration), so a hit needs no further LLM call.
+                    response_cache.put(cache_key, response_text, messages=messages, latency_ms=elapsed_ms(start_time))
                 if meta["failed"]:
                     result = SAFE_FALLBACK_TEXT
                     if sources_requested and not allow_source_citations:
@@ -692,7 +823,7 @@ class Orchestrator:
                 else:
                     result = sanitized
                 status = "success"
-                circuit_event = breaker.record_success()
+                circuit_event = breaker.record_success() if cached_text is None else None
                 if circuit_event:
                     log_event(
                         LOGGER,
@@ -702,6 +833,19 @@ class Orchestrator:
                         status="ok",
                         name=llm_trace_name,
                     )
+            except QueueTimeoutError:
+                # Our own backlog, not a provider failure: leave the breaker closed.
+                result = map_error_text("rate_limited")
+                status = "ratelimited"
+                breaker.release()
+                add_trace(
+                    request_context,
+                    step="llm.queue",
+                    component="queue",
+                    name=llm_trace_name,
+                    status="error",
+                    duration_ms=elapsed_ms(start_time),
+                )
             except LLMGuardError as exc:
                 result = "Некорректный ответ LLM. Попробуйте позже."
                 status = "error"
@@ -1146,7 +1290,10 @@ class Orchestrator:
         for _ in enabled_sources:
             try:
                 sources = await retry_async(
-                    lambda: self._search_client.search(trimmed_query, max_results=5),
+                    lambda: self._search_flight.do(
+                        (" ".join(trimmed_query.casefold().split()), 5),
+                        lambda: self._search_client.search(trimmed_query, max_results=5),
+                    ),
                     policy=self._retry_policy,
                     timeout_seconds=self._timeouts.web_tool_call_seconds,
                     logger=LOGGER,
@@ -1284,8 +1431,9 @@ class Orchestrator:
         )
         execution, _ = await self._request_llm(user_id, llm_prompt, mode="search")
         if execution.status != "success":
+            build = ratelimited if execution.status == "ratelimited" else error
             return ensure_valid(
-                error(
+                build(
                     execution.result,
                     intent=intent,
                     mode="llm",
@@ -1414,13 +1562,14 @@ class Orchestrator:
             payload,
             mode="summary",
             system_prompt=system_prompt,
+            cacheable=True,
         )
         if execution.status != "success":
             status = "error"
             if "LLM не настроен" in execution.result:
                 status = "refused"
             result = (
-                error(
+                (ratelimited if execution.status == "ratelimited" else error)(
                     execution.result,
                     intent="utility.summary",
                     mode="llm",
@@ -1451,6 +1600,15 @@ class Orchestrator:
         request_context: RequestContext | None,
     ) -> OrchestratorResult:
         status = "ok" if execution.status == "success" else "error"
+        if execution.status == "ratelimited":
+            return ensure_valid(
+                ratelimited(
+                    execution.result,
+                    intent=intent,
+                    mode="llm",
+                    debug={"task_name": execution.task_name, "reason": "llm_queue_timeout"},
+                )
+            )
         sources: list[Source] = []
         if facts_only:
             return ensure_valid(
@@ -1662,6 +1820,21 @@ def _resolve_llm_provider(client: LLMClient) -> str:
     return name.lower()
 
 
+async def _collect_stream(
+    stream_text: Callable[..., Any],
+    *,
+    model: str,
+    messages: list[dict[str, Any]],
+    on_partial: Callable[[str], Awaitable[None]],
+) -> str:
+    text = ""
+    await on_partial(text)
+    async for delta in stream_text(model=model, messages=messages, web_search_options=None):
+        text += delta
+        await on_partial(text)
+    return ensure_plain_text(text)
+
+
 def _coerce_bool(value: object) -> bool:
     if isinstance(value, bool):
         return value
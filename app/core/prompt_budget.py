@@ -0,0 +1,173 @@
+"""Сборка промпта в пределах бюджета токенов модели.
+
+Токены оцениваются локально и грубо (UTF-8 байты / 4: ~4 символа латиницы или ~2
+символа кириллицы на токен) — этого достаточно, чтобы не переполнить контекст и не
+раздувать запрос. Обязательные части (system и сам вопрос) не урезаются; остальные
+блоки получают долю оставшегося бюджета по приоритету, неиспользованное
+перераспределяется, а при нехватке сначала выбрасываются самые старые реплики.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Any
+
+LOGGER = logging.getLogger(__name__)
+
+# Known context windows; the longest matching prefix wins.
+MODEL_CONTEXT_TOKENS: dict[str, int] = {
+    "gpt-3.5-turbo": 16_385,
+    "gpt-4": 8_192,
+    "gpt-4-turbo": 128_000,
+    "gpt-4o": 128_000,
+    "gpt-4.1": 1_000_000,
+    "sonar": 127_000,
+    "sonar-pro": 200_000,
+}
+DEFAULT_CONTEXT_TOKENS = 8_192
+# Cap on the prompt even for huge windows: long prompts cost latency and money.
+DEFAULT_MAX_PROMPT_TOKENS = 8_000
+RESERVED_OUTPUT_TOKENS = 1_024
+MESSAGE_OVERHEAD_TOKENS = 4
+
+_DIALOG_LINE = re.compile(r"(?m)^(?=\[(?:user|assistant)\] )")
+
+
+def estimate_tokens(text: str) -> int:
+    if not text:
+        return 0
+    return (len(text.encode("utf-8")) + 3) // 4
+
+
+def estimate_messages_tokens(messages: list[dict[str, Any]]) -> int:
+    return sum(
+        estimate_tokens(message.get("content") if isinstance(message.get("content"), str) else "")
+        + MESSAGE_OVERHEAD_TOKENS
+        for message in messages
+    )
+
+
+def resolve_prompt_budget(model: str | None, llm_config: dict[str, Any] | None = None) -> int:
+    """Tokens available for the prompt: model window minus the reply reserve, capped by config."""
+    llm_config = llm_config or {}
+    context_tokens = llm_config.get("context_tokens")
+    if not isinstance(context_tokens, int) or context_tokens <= 0:
+        context_tokens = DEFAULT_CONTEXT_TOKENS
+        name = (model or "").lower()
+        matches = [prefix for prefix in MODEL_CONTEXT_TOKENS if name.startswith(prefix)]
+        if matches:
+            context_tokens = MODEL_CONTEXT_TOKENS[max(matches, key=len)]
+    max_prompt = llm_config.get("max_prompt_tokens")
+    if not isinstance(max_prompt, int) or max_prompt <= 0:
+        max_prompt = DEFAULT_MAX_PROMPT_TOKENS
+    return max(256, min(context_tokens - RESERVED_OUTPUT_TOKENS, max_prompt))
+
+
+def split_dialog_lines(text: str | None) -> list[str]:
+    """``DialogMemory.format_context`` output split into messages (multi-line texts stay whole)."""
+    if not text or not text.strip():
+        return []
+    return [part.strip("\n") for part in _DIALOG_LINE.split(text.strip()) if part.strip()]
+
+
+def split_paragraphs(text: str | None) -> list[str]:
+    if not text or not text.strip():
+        return []
+    return [part.strip() for part in text.strip().split("\n\n") if part.strip()]
+
+
+@dataclass
+class PromptBlock:
+    """Optional prompt content. ``parts`` are in prompt order (oldest first for dialogs)."""
+
+    name: str
+    parts: list[str]
+    share: float
+    drop_oldest: bool = True
+    part_overhead: int = 0
+    truncate: bool = True
+
+
+@dataclass
+class PromptPlan:
+    kept: dict[str, list[str]]
+    tokens: int
+    budget: int
+    dropped: dict[str, int] = field(default_factory=dict)
+
+    @property
+    def trimmed(self) -> bool:
+        return any(self.dropped.values())
+
+
+def plan_prompt(
+    *,
+    budget: int,
+    required: list[str],
+    blocks: list[PromptBlock],
+) -> PromptPlan:
+    """Fit ``blocks`` into what ``required`` texts leave of ``budget``; blocks are in priority order."""
+    used = sum(estimate_tokens(text) + MESSAGE_OVERHEAD_TOKENS for text in required)
+    available = max(0, budget - used)
+    costs = {block.name: [estimate_tokens(part) + block.part_overhead for part in block.parts] for block in blocks}
+    needs = {block.name: sum(costs[block.name]) for block in blocks}
+    total_share = sum(max(block.share, 0.0) for block in blocks) or 1.0
+    grants = {
+        block.name: min(needs[block.name], int(available * max(block.share, 0.0) / total_share))
+        for block in blocks
+    }
+    spare = available - sum(grants.values())
+    for block in blocks:
+        extra = min(spare, needs[block.name] - grants[block.name])
+        grants[block.name] += extra
+        spare -= extra
+
+    kept: dict[str, list[str]] = {}
+    dropped: dict[str, int] = {}
+    for block in blocks:
+        parts, spent = _fit_block(block, costs[block.name], grants[block.name])
+        kept[block.name] = parts
+        dropped[block.name] = len(block.parts) - len(parts)
+        used += spent
+    plan = PromptPlan(kept=kept, tokens=used, budget=budget, dropped=dropped)
+    if plan.trimmed:
+        LOGGER.info(
+            "Prompt trimmed to budget: budget=%s tokens=%s dropped=%s",
+            budget,
+            used,
+            {name: count for name, count in dropped.items() if count},
+        )
+    return plan
+
+
+def _fit_block(block: PromptBlock, costs: list[int], grant: int) -> tuple[list[str], int]:
+    order = range(len(block.parts) - 1, -1, -1) if block.drop_oldest else range(len(block.parts))
+    chosen: list[int] = []
+    spent = 0
+    for index in order:
+        if spent + costs[index] <= grant:
+            chosen.append(index)
+            spent += costs[index]
+            continue
+        remaining = grant - spent - block.part_overhead
+        if block.truncate and remaining >= 16:
+            chosen.append(index)
+            spent += remaining + block.part_overhead
+            truncated = _truncate_to_tokens(block.parts[index], remaining)
+            return _ordered(block, chosen, {index: truncated}), spent
+        break
+    return _ordered(block, chosen, {}), spent
+
+
+def _ordered(block: PromptBlock, chosen: list[int], replaced: dict[int, str]) -> list[str]:
+    return [replaced.get(index, block.parts[index]) for index in sorted(chosen)]
+
+
+def _truncate_to_tokens(text: str, tokens: int) -> str:
+    # Start from a proportional cut and shrink; exact enough for an estimate.
+    limit = max(1, int(len(text) * tokens / max(1, estimate_tokens(text))) - 1)
+    while limit > 1 and estimate_tokens(text[:limit]) >= tokens:
+        limit = int(limit * 0.9)
+    return text[:limit].rstrip() + "…"
@@ -0,0 +1,258 @@
+from __future__ import annotations
+
+import calendar
+import itertools
+from collections import OrderedDict
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from datetime import UTC, date, datetime, timedelta
+from functools import lru_cache
+
+_WEEKDAY_CODES = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+_FREQUENCIES = {"DAILY", "WEEKLY", "MONTHLY", "YEARLY"}
+# A rule whose periods keep producing nothing (e.g. BYMONTHDAY=31 with INTERVAL=2
+# landing only on short months) is abandoned after this many empty periods.
+_MAX_EMPTY_PERIODS = 1000
+
+
+@dataclass(frozen=True)
+class CompiledRRule:
+    """Parsed RRULE (the FREQ/INTERVAL/COUNT/UNTIL/BYDAY/BYMONTHDAY subset the bot writes)."""
+
+    parts: tuple[tuple[str, str], ...]
+    freq: str | None
+    interval: int
+    count: int | None
+    until: datetime | None
+    byday: tuple[int, ...]
+    bymonthday: tuple[int, ...]
+
+    def to_string(self) -> str:
+        return ";".join(f"{key}={value}" for key, value in self.parts)
+
+    def occurrences(
+        self,
+        dtstart: datetime,
+        *,
+        start: datetime | None = None,
+        end: datetime | None = None,
+    ) -> Iterator[datetime]:
+        """Occurrence starts in [start, end], in order, in dtstart's timezone."""
+        tzinfo = dtstart.tzinfo or UTC
+        if self.freq is None:
+            if (start is None or dtstart >= start) and (end is None or dtstart <= end):
+                yield dtstart
+            return
+        local_start = dtstart.replace(tzinfo=None)
+        first_period = 0
+        if start is not None and self.count is None:
+            # Without COUNT nothing before the window needs to be enumerated.
+            first_period = max(0, self._period_of(local_start, start.astimezone(tzinfo).replace(tzinfo=None)) - 1)
+        emitted = 0
+        empty_periods = 0
+        for period in itertools.count(first_period):
+            produced = False
+            for local_value in self._period_instances(local_start, period):
+                if local_value < local_start:
+                    continue
+                produced = True
+                value = local_value.replace(tzinfo=tzinfo)
+                if self.until is not None and value > self.until:
+                    return
+                if end is not None and value > end:
+                    return
+                emitted += 1
+                if self.count is not None and emitted > self.count:
+                    return
+                if start is None or value >= start:
+                    yield value
+            empty_periods = 0 if produced else empty_periods + 1
+            if empty_periods > _MAX_EMPTY_PERIODS:
+                return
+
+    def _period_of(self, local_start: datetime, local_value: datetime) -> int:
+        if self.freq == "DAILY":
+            return (local_value.date() - local_start.date()).days // self.interval
+        if self.freq == "WEEKLY":
+            return (_week_start(local_value.date()) - _week_start(local_start.date())).days // 7 // self.interval
+        if self.freq == "MONTHLY":
+            months = (local_value.year - local_start.year) * 12 + local_value.month - local_start.month
+            return months // self.interval
+        return (local_value.year - local_start.year) // self.interval
+
+    def _period_instances(self, local_start: datetime, period: int) -> list[datetime]:
+        clock = local_start.time()
+        step = period * self.interval
+        if self.freq == "DAILY":
+            day = local_start.date() + timedelta(days=step)
+            if self.byday and day.weekday() not in self.byday:
+                return []
+            return [datetime.combine(day, clock)]
+        if self.freq == "WEEKLY":
+            monday = _week_start(local_start.date()) + timedelta(weeks=step)
+            weekdays = self.byday or (local_start.weekday(),)
+            return [datetime.combine(monday + timedelta(days=weekday), clock) for weekday in sorted(weekdays)]
+        if self.freq == "MONTHLY":
+            month_index = local_start.year * 12 + local_start.month - 1 + step
+            year, month = divmod(month_index, 12)
+            month += 1
+            days_in_month = calendar.monthrange(year, month)[1]
+            days = set()
+            for monthday in self.bymonthday or (local_start.day,):
+                day = monthday if monthday > 0 else days_in_month + monthday + 1
+                if 1 <= day <= days_in_month:
+                    days.add(day)
+            return [datetime.combine(date(year, month, day), clock) for day in sorted(days)]
+        year = local_start.year + step
+        if local_start.month == 2 and local_start.day == 29 and not calendar.isleap(year):
+            return []
+        return [datetime.combine(date(year, local_start.month, local_start.day), clock)]
+
+
+def _week_start(value: date) -> date:
+    return value - timedelta(days=value.weekday())
+
+
+def _parse_until(value: str) -> datetime | None:
+    try:
+        if value.endswith("Z"):
+            return datetime.strptime(value, "%Y%m%dT%H%M%SZ").replace(tzinfo=UTC)
+        if "T" in value:
+            return datetime.strptime(value, "%Y%m%dT%H%M%S").replace(tzinfo=UTC)
+        return datetime.strptime(value, "%Y%m%d").replace(hour=23, minute=59, second=59, tzinfo=UTC)
+    except ValueError:
+        return None
+
+
+def _parse_int(value: str | None, default: int | None) -> int | None:
+    if value is None:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        return default
+
+
+@lru_cache(maxsize=512)
+def compile_rrule(rrule: str) -> CompiledRRule:
+    parts: list[tuple[str, str]] = []
+    for segment in rrule.split(";"):
+        if "=" not in segment:
+            continue
+        key, value = segment.split("=", 1)
+        if key and value:
+            parts.append((key, value))
+    values = dict(parts)
+    freq = values.get("FREQ", "").upper()
+    interval = _parse_int(values.get("INTERVAL"), 1) or 1
+    count = _parse_int(values.get("COUNT"), None)
+    byday = tuple(
+        _WEEKDAY_CODES.index(code[-2:].upper())
+        for code in values.get("BYDAY", "").split(",")
+        if code[-2:].upper() in _WEEKDAY_CODES
+    )
+    bymonthday = tuple(
+        day
+        for day in (_parse_int(raw, None) for raw in values.get("BYMONTHDAY", "").split(",") if raw)
+        if day is not None and day != 0 and -31 <= day <= 31
+    )
+    return CompiledRRule(
+        parts=tuple(dict(parts).items()),
+        freq=freq if freq in _FREQUENCIES else None,
+        interval=max(1, interval),
+        count=None if count is None else max(0, count),
+        until=_parse_until(values["UNTIL"]) if "UNTIL" in values else None,
+        byday=byday,
+        bymonthday=bymonthday,
+    )
+
+
+def set_rrule_part(rrule: str | None, key: str, value: str) -> str | None:
+    if not rrule:
+        return None
+    parts = dict(compile_rrule(rrule).parts)
+    parts[key] = value
+    return ";".join(f"{part}={part_value}" for part, part_value in parts.items())
+
+
+def strip_rrule_parts(rrule: str | None, keys: set[str]) -> str | None:
+    if not rrule:
+        return rrule
+    parts = [(key, value) for key, value in compile_rrule(rrule).parts if key not in keys]
+    if not parts:
+        return None
+    return ";".join(f"{key}={value}" for key, value in parts)
+
+
+def format_utc_value(value: datetime) -> str:
+    return value.astimezone(UTC).strftime("%Y%m%dT%H%M%SZ")
+
+
+_CacheKey = tuple[str, str, str, frozenset[float], float, float]
+
+
+class OccurrenceCache:
+    """LRU of expanded occurrence windows.
+
+    Keyed by (series_id, rrule, dtstart, exdates, window); a series' entries
+    are dropped with invalidate(series_id) whenever one of its events changes.
+    """
+
+    def __init__(self, max_entries: int = 1024) -> None:
+        self._max_entries = max_entries
+        self._entries: OrderedDict[_CacheKey, tuple[datetime, ...]] = OrderedDict()
+        self._by_series: dict[str, set[_CacheKey]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def expand(
+        self,
+        series_id: str,
+        dtstart: datetime,
+        rrule: str,
+        exdates: Iterable[datetime] | None,
+        start: datetime,
+        end: datetime,
+    ) -> tuple[datetime, ...]:
+        excluded = frozenset(value.timestamp() for value in exdates or ())
+        key = (series_id, rrule, dtstart.isoformat(), excluded, start.timestamp(), end.timestamp())
+        cached = self._entries.get(key)
+        if cached is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return cached
+        self.misses += 1
+        value = tuple(
+            occurrence
+            for occurrence in compile_rrule(rrule).occurrences(dtstart, start=start, end=end)
+            if occurrence.timestamp() not in excluded
+        )
+        self._entries[key] = value
+        self._by_series.setdefault(series_id, set()).add(key)
+        while len(self._entries) > self._max_entries:
+            old_key, _ = self._entries.popitem(last=False)
+            self._discard_series_key(old_key)
+        return value
+
+    def invalidate(self, series_id: str) -> None:
+        for key in self._by_series.pop(series_id, ()):
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._by_series.clear()
+
+    def _discard_series_key(self, key: _CacheKey) -> None:
+        keys = self._by_series.get(key[0])
+        if keys is None:
+            return
+        keys.discard(key)
+        if not keys:
+            del self._by_series[key[0]]
+
+
+OCCURRENCE_CACHE = OccurrenceCache()
+
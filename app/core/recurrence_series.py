@@ -1,10 +1,11 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, replace
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
 
 from app.core import calendar_store
+from app.core.recurrence_rrule import format_utc_value, set_rrule_part, strip_rrule_parts
 
 
 @dataclass(frozen=True)
@@ -72,7 +73,7 @@ def edit_series_future(
 ) -> tuple[RecurrenceSeries, RecurrenceSeries]:
     tzinfo = series.timezone
     instance_value = _ensure_tz(instance_dt, tzinfo)
-    updated_rrule = _set_rrule_part(series.rrule, "UNTIL", _format_utc_value(instance_value - timedelta(seconds=1)))
+    updated_rrule = set_rrule_part(series.rrule, "UNTIL", format_utc_value(instance_value - timedelta(seconds=1)))
     master_exdates, future_exdates = _split_exdates(series.exdates, instance_value)
     master_overrides, future_overrides = _split_overrides(series.overrides, instance_value, tzinfo)
     master_series = replace(
@@ -84,7 +85,7 @@ def edit_series_future(
     normalized_patch = _normalize_patch(patch, tzinfo)
     future_start = normalized_patch.get("start_at") if isinstance(normalized_patch.get("start_at"), datetime) else instance_value
     future_title = normalized_patch.get("title") if isinstance(normalized_patch.get("title"), str) else series.title
-    future_rrule = _strip_rrule_parts(series.rrule, {"UNTIL", "COUNT"})
+    future_rrule = strip_rrule_parts(series.rrule, {"UNTIL", "COUNT"})
     future_series = RecurrenceSeries(
         series_id=series.series_id,
         start_dt=future_start,
@@ -110,7 +111,7 @@ def delete_instance_this(series: RecurrenceSeries, instance_dt: datetime) -> Rec
 def delete_series_future(series: RecurrenceSeries, instance_dt: datetime) -> RecurrenceSeries:
     tzinfo = series.timezone
     instance_value = _ensure_tz(instance_dt, tzinfo)
-    updated_rrule = _set_rrule_part(series.rrule, "UNTIL", _format_utc_value(instance_value - timedelta(seconds=1)))
+    updated_rrule = set_rrule_part(series.rrule, "UNTIL", format_utc_value(instance_value - timedelta(seconds=1)))
     master_exdates, _ = _split_exdates(series.exdates, instance_value)
     master_overrides, _ = _split_overrides(series.overrides, instance_value, tzinfo)
     return replace(series, rrule=updated_rrule, exdates=master_exdates, overrides=master_overrides)
@@ -202,44 +203,6 @@ def _dedupe_exdates(exdates: list[datetime]) -> list[datetime]:
     return result
 
 
-def _parse_rrule(rrule: str) -> dict[str, str]:
-    parts: dict[str, str] = {}
-    for segment in rrule.split(";"):
-        if "=" not in segment:
-            continue
-        key, value = segment.split("=", 1)
-        if key and value:
-            parts[key] = value
-    return parts
-
-
-def _format_rrule(parts: dict[str, str]) -> str:
-    return ";".join(f"{key}={value}" for key, value in parts.items())
-
-
-def _set_rrule_part(rrule: str | None, key: str, value: str) -> str | None:
-    if not rrule:
-        return None
-    parts = _parse_rrule(rrule)
-    parts[key] = value
-    return _format_rrule(parts)
-
-
-def _strip_rrule_parts(rrule: str | None, keys: set[str]) -> str | None:
-    if not rrule:
-        return rrule
-    parts = _parse_rrule(rrule)
-    for key in keys:
-        parts.pop(key, None)
-    if not parts:
-        return None
-    return _format_rrule(parts)
-
-
-def _format_utc_value(value: datetime) -> str:
-    return value.astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
-
-
 def _resolve_timezone(event: calendar_store.CalendarItem) -> ZoneInfo:
     if event.timezone:
         try:
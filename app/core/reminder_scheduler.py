@@ -5,24 +5,17 @@ import logging
 import os
 from datetime import datetime, timedelta
 
-from telegram.ext import Application, ContextTypes
+from telegram.ext import Application
 
-from app.core import calendar_store
 from app.bot.actions import ActionStore, build_inline_keyboard
+from app.core import calendar_store
 from app.core.result import Action
 from app.infra.messaging import safe_send_bot_text
+from app.infra.send_queue import get_send_queue
 
 LOGGER = logging.getLogger(__name__)
 
 
-def _get_tick_seconds() -> int:
-    try:
-        value = int(os.getenv("REMINDER_TICK_SECONDS", "20"))
-    except ValueError:
-        return 20
-    return max(1, value)
-
-
 def _get_grace_minutes() -> int:
     try:
         value = int(os.getenv("REMINDER_GRACE_MINUTES", "60"))
@@ -35,7 +28,12 @@ async def _process_due_reminders(application: Application) -> None:
     now = datetime.now(tz=calendar_store.BOT_TZ)
     grace_window = timedelta(minutes=_get_grace_minutes())
     due_items = await calendar_store.list_due_reminders(now)
+    send_queue = get_send_queue(application)
     for item in due_items:
+        queue_key = _reminder_queue_key(item)
+        if send_queue is not None and send_queue.is_pending(queue_key):
+            # Still waiting in the send queue; it is marked sent once delivered.
+            continue
         if not item.chat_id:
             LOGGER.warning(
                 "Reminder skipped (missing chat_id): reminder_id=%s user_id=%s chat_id=%s trigger_at=%s",
@@ -71,7 +69,41 @@ async def _process_due_reminders(application: Application) -> None:
                 chat_id=item.chat_id,
                 columns=2,
             )
+
+        async def mark_sent(item: calendar_store.ReminderItem = item) -> None:
+            LOGGER.info(
+                "Reminder sent: reminder_id=%s user_id=%s chat_id=%s trigger_at=%s request_id=%s",
+                item.id,
+                item.user_id,
+                item.chat_id,
+                item.trigger_at.isoformat(),
+                "-",
+            )
+            await calendar_store.mark_reminder_sent(item.id, now, missed=False)
+
+        async def mark_dropped(item: calendar_store.ReminderItem = item) -> None:
+            # Dropped for good (e.g. the user blocked the bot): re-sending every pass would only fail again.
+            LOGGER.warning(
+                "Reminder dropped: reminder_id=%s user_id=%s chat_id=%s trigger_at=%s",
+                item.id,
+                item.user_id,
+                item.chat_id,
+                item.trigger_at.isoformat(),
+            )
+            await calendar_store.mark_reminder_sent(item.id, now, missed=True)
+
         try:
+            if send_queue is not None:
+                await send_queue.submit(
+                    item.chat_id,
+                    text,
+                    reply_markup=reply_markup,
+                    kind="reminder",
+                    key=queue_key,
+                    on_delivered=mark_sent,
+                    on_failed=mark_dropped,
+                )
+                continue
             await safe_send_bot_text(application.bot, item.chat_id, text, reply_markup=reply_markup)
         except Exception:
             LOGGER.exception(
@@ -82,53 +114,114 @@ async def _process_due_reminders(application: Application) -> None:
                 item.trigger_at.isoformat(),
             )
             continue
-        LOGGER.info(
-            "Reminder sent: reminder_id=%s user_id=%s chat_id=%s trigger_at=%s request_id=%s",
-            item.id,
-            item.user_id,
-            item.chat_id,
-            item.trigger_at.isoformat(),
-            "-",
-        )
-        await calendar_store.mark_reminder_sent(item.id, now, missed=False)
-
-
-async def _job_callback(context: ContextTypes.DEFAULT_TYPE) -> None:
-    await _process_due_reminders(context.application)
-
-
-async def _loop_runner(application: Application) -> None:
-    tick_seconds = _get_tick_seconds()
-    try:
+        await mark_sent()
+
+
+def _reminder_queue_key(item: calendar_store.ReminderItem) -> str:
+    return f"reminder:{item.id}:{item.trigger_at.isoformat()}"
+
+
+class ReminderDispatcher:
+    """Single-task reminder dispatcher with one timer armed for the earliest trigger.
+
+    The task sleeps until ``calendar_store.next_due_at()`` and is woken early whenever
+    a reminder is written or deleted (store listener), so new, snoozed or rescheduled
+    reminders re-arm the timer without per-reminder jobs. Each wake-up drains every due
+    reminder in one pass; the store's due index makes both lookups O(log n).
+    """
+
+    def __init__(
+        self,
+        application: Application,
+        *,
+        store=calendar_store,
+        metrics: object | None = None,
+        max_sleep_seconds: float = 3600.0,
+        retry_seconds: float = 5.0,
+    ) -> None:
+        self._application = application
+        self._store = store
+        self._metrics = metrics
+        self._max_sleep = max(1.0, max_sleep_seconds)
+        self._retry = max(0.1, retry_seconds)
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task[None] | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._wakeup = asyncio.Event()
+        self._store.add_reminder_listener(self.wake)
+        self._task = asyncio.create_task(self._run(), name="reminder-dispatcher")
+        LOGGER.info("Reminder dispatcher started")
+
+    async def stop(self) -> None:
+        self._store.remove_reminder_listener(self.wake)
+        task, self._task = self._task, None
+        if task is None:
+            return
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            LOGGER.info("Reminder dispatcher stopped")
+
+    def wake(self) -> None:
+        """Re-arm the timer: the next due time is recomputed on the dispatcher task."""
+        self._wakeup.set()
+
+    async def dispatch_due(self) -> None:
+        next_due = await self._store.next_due_at()
+        if next_due is not None and self._metrics is not None:
+            lag = (datetime.now(tz=calendar_store.BOT_TZ) - next_due).total_seconds()
+            set_gauge = getattr(self._metrics, "set_gauge", None)
+            if callable(set_gauge) and lag >= 0:
+                set_gauge("reminders.dispatch_lag_ms", round(lag * 1000))
+        await _process_due_reminders(self._application)
+
+    async def _sleep_seconds(self) -> float:
+        next_due = await self._store.next_due_at()
+        if next_due is None:
+            return self._max_sleep
+        delay = (next_due - datetime.now(tz=calendar_store.BOT_TZ)).total_seconds()
+        return min(self._max_sleep, max(0.0, delay))
+
+    async def _run(self) -> None:
         while True:
-            await _process_due_reminders(application)
-            await asyncio.sleep(tick_seconds)
-    except asyncio.CancelledError:
-        LOGGER.info("Reminder scheduler task cancelled")
-        raise
+            self._wakeup.clear()
+            try:
+                await self.dispatch_due()
+                delay = await self._sleep_seconds()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                LOGGER.exception("Reminder dispatch failed")
+                delay = self._retry
+            if delay <= 0 and not self._wakeup.is_set():
+                # Reminders still due after a pass failed to send; retry later instead of spinning.
+                delay = self._retry
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+            except TimeoutError:
+                pass
 
 
 async def post_init(application: Application) -> None:
-    tick_seconds = _get_tick_seconds()
-    if application.job_queue:
-        job = application.job_queue.run_repeating(_job_callback, interval=tick_seconds, first=0)
-        application.bot_data["reminder_job"] = job
-        LOGGER.info("Reminder scheduler started via job_queue (tick=%s)", tick_seconds)
-        return
-    task = asyncio.create_task(_loop_runner(application), name="reminder-scheduler")
-    application.bot_data["reminder_task"] = task
-    LOGGER.info("Reminder scheduler started via background task (tick=%s)", tick_seconds)
+    dispatcher = application.bot_data.get("reminder_dispatcher")
+    if not isinstance(dispatcher, ReminderDispatcher):
+        dispatcher = ReminderDispatcher(application)
+        application.bot_data["reminder_dispatcher"] = dispatcher
+    dispatcher.start()
 
 
 async def post_shutdown(application: Application) -> None:
-    task = application.bot_data.pop("reminder_task", None)
-    if task is None:
-        return
-    task.cancel()
-    try:
-        await task
-    except asyncio.CancelledError:
-        LOGGER.info("Reminder scheduler task shutdown complete")
+    dispatcher = application.bot_data.get("reminder_dispatcher")
+    if isinstance(dispatcher, ReminderDispatcher):
+        await dispatcher.stop()
 
 
 def _build_reminder_actions(reminder: calendar_store.ReminderItem) -> list[Action]:
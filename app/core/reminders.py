@@ -11,6 +11,16 @@ from app.bot.actions import ActionStore, build_inline_keyboard
 from app.core.result import Action
 
 from app.core import calendar_store
+from app.core.digest_engine import (
+    DigestItems,
+    DigestTarget,
+    any_slot_open,
+    build_target,
+    deliver_digests,
+    is_due,
+    profile_timezones,
+)
+from app.infra.send_queue import get_send_queue
 
 LOGGER = logging.getLogger(__name__)
 
@@ -43,12 +53,16 @@ class ReminderScheduler:
         max_future_days: int | None = None,
         *,
         app_scheduler: object | None = None,
+        dispatcher: object | None = None,
     ) -> None:
         self._application = application
         self._store = calendar_store_module
         self._timezone = timezone
         self._max_future_days = max_future_days or _get_max_future_days()
         self._app_scheduler = app_scheduler
+        # With a dispatcher (see reminder_scheduler.ReminderDispatcher) the store itself is the
+        # schedule: no per-reminder jobs are created, the dispatcher is only woken up.
+        self._dispatcher = dispatcher
 
     async def schedule_reminder(
         self,
@@ -56,6 +70,16 @@ class ReminderScheduler:
         *,
         now: datetime | None = None,
     ) -> str | None:
+        if self._dispatcher is not None:
+            if not reminder.enabled:
+                return None
+            current = now or datetime.now(tz=self._timezone)
+            if current.tzinfo is None:
+                current = current.replace(tzinfo=self._timezone)
+            if reminder.trigger_at > current + timedelta(days=self._max_future_days):
+                return None
+            self._dispatcher.wake()
+            return self._job_name(reminder.id)
         if self._app_scheduler is not None:
             if not reminder.enabled:
                 return None
@@ -129,7 +153,9 @@ class ReminderScheduler:
 
     async def cancel_reminder(self, reminder_id: str) -> bool:
         removed = False
-        if self._app_scheduler is not None:
+        if self._dispatcher is not None:
+            pass  # disabling the reminder in the store re-arms the dispatcher
+        elif self._app_scheduler is not None:
             rm_job = getattr(self._app_scheduler, "remove_reminder_job", None)
             if callable(rm_job):
                 removed = rm_job(reminder_id)
@@ -147,6 +173,11 @@ class ReminderScheduler:
         return removed or store_updated
 
     async def restore_all(self, now: datetime | None = None) -> int:
+        if self._dispatcher is not None:
+            # Pending reminders are read from the store's due index; nothing to re-register.
+            self._dispatcher.wake()
+            LOGGER.info("Reminder restore skipped: dispatcher reads pending reminders from the store")
+            return 0
         current = now or datetime.now(tz=self._timezone)
         if current.tzinfo is None:
             current = current.replace(tzinfo=self._timezone)
@@ -217,7 +248,19 @@ class ReminderScheduler:
                 chat_id=reminder.chat_id,
                 columns=2,
             )
+        send_queue = get_send_queue(self._application)
         try:
+            if send_queue is not None:
+                # Marked sent (and the recurrence scheduled) only once the queue delivered it.
+                await send_queue.submit(
+                    reminder.chat_id,
+                    text,
+                    reply_markup=reply_markup,
+                    kind="reminder",
+                    key=f"reminder:{reminder.id}:{reminder.trigger_at.isoformat()}",
+                    on_delivered=lambda: self._mark_sent(reminder),
+                )
+                return
             await self._application.bot.send_message(chat_id=reminder.chat_id, text=text, reply_markup=reply_markup)
         except Exception:
             LOGGER.exception(
@@ -228,6 +271,9 @@ class ReminderScheduler:
                 reminder.trigger_at.isoformat(),
             )
             return
+        await self._mark_sent(reminder)
+
+    async def _mark_sent(self, reminder: calendar_store.ReminderItem) -> None:
         fired_at = datetime.now(tz=self._timezone)
         next_reminder = await self._store.mark_reminder_sent(reminder.id, fired_at, missed=False)
         if next_reminder is not None:
@@ -288,39 +334,98 @@ def _get_digest_time() -> time:
     return time(max(0, min(23, hour)), max(0, min(59, minute)))
 
 
-async def run_daily_digest(application: Application) -> None:
-    """Send daily digest to each user at most once per day."""
-    now = datetime.now(tz=calendar_store.BOT_TZ)
-    today_yyyymmdd = now.strftime("%Y%m%d")
-    start, end = calendar_store.day_bounds(now.date())
+def _get_digest_window_seconds() -> int:
+    try:
+        minutes = int(os.getenv("DIGEST_WINDOW_MINUTES", "30"))
+    except ValueError:
+        return 30 * 60
+    return max(0, minutes) * 60
+
+
+async def run_daily_digest(
+    application: Application,
+    *,
+    now: datetime | None = None,
+    send_time: time | None = None,
+    window_seconds: int = 0,
+    concurrency: int = 8,
+) -> int:
+    """Send daily digest to each user at most once per day.
+
+    Called without ``send_time`` it sends to everyone right away. The scheduled run
+    passes ``send_time`` and is called every minute: each user is served once their
+    local ``send_time`` plus a stable per-user offset inside ``window_seconds`` has
+    passed, so deliveries are spread over the window instead of all at once.
+    """
+    current = now or datetime.now(tz=calendar_store.BOT_TZ)
+    timezones = profile_timezones(getattr(application, "bot_data", {}).get("profile_store"), calendar_store.BOT_TZ)
+    if not any_slot_open(
+        [calendar_store.BOT_TZ, *timezones.values()], current, send_time=send_time, window_seconds=window_seconds
+    ):
+        return 0
     pairs = await calendar_store.list_user_chat_pairs()
+    last_sent = await calendar_store.get_last_digest_sent_many({user_id for user_id, _ in pairs})
+    send_queue = get_send_queue(application)
+    targets: list[DigestTarget] = []
+    seen: set[int] = set()
     for user_id, chat_id in pairs:
-        last_sent = await calendar_store.get_last_digest_sent(user_id)
-        if last_sent == today_yyyymmdd:
+        if user_id in seen:
             continue
-        reminders = await calendar_store.list_reminders_in_range(
-            start, end, user_id=user_id, chat_id=chat_id
+        seen.add(user_id)
+        target = build_target(
+            user_id,
+            chat_id,
+            tz=timezones.get(user_id, calendar_store.BOT_TZ),
+            now=current,
+            match_chat=True,
         )
-        events = await calendar_store.list_items(start=start, end=end)
-        events = [e for e in events if e.user_id == user_id and e.chat_id == chat_id]
-        lines: list[str] = ["📋 План на сегодня"]
-        if reminders:
-            lines.append("\n⏰ Напоминания:")
-            for r in reminders:
-                when = r.trigger_at.astimezone(calendar_store.BOT_TZ).strftime("%H:%M")
-                rec = " 🔄" if r.recurrence else ""
-                lines.append(f"  • {when} — {r.text}{rec}")
-        if events:
-            lines.append("\n📅 События:")
-            for e in events:
-                when = e.dt.astimezone(calendar_store.BOT_TZ).strftime("%H:%M")
-                lines.append(f"  • {when} — {e.title}")
-        if len(lines) <= 1:
-            lines.append("\nНет запланированных напоминаний и событий.")
-        text = "\n".join(lines)
+        if last_sent.get(user_id) == target.local_date.strftime("%Y%m%d"):
+            continue
+        if send_queue is not None and send_queue.is_pending(target.queue_key):
+            continue
+        if is_due(target, current, send_time=send_time, window_seconds=window_seconds):
+            targets.append(target)
+
+    async def deliver(target: DigestTarget, items: DigestItems) -> bool:
+        text = _render_plan(items, tz=target.tz)
+
+        async def mark_sent() -> None:
+            await calendar_store.set_last_digest_sent(target.user_id, target.local_date.strftime("%Y%m%d"))
+            LOGGER.info("Daily digest sent: user_id=%s chat_id=%s", target.user_id, target.chat_id)
+
         try:
-            await application.bot.send_message(chat_id=chat_id, text=text)
-            await calendar_store.set_last_digest_sent(user_id, today_yyyymmdd)
-            LOGGER.info("Daily digest sent: user_id=%s chat_id=%s", user_id, chat_id)
+            if send_queue is not None:
+                # Recorded as sent only after delivery, so a dropped digest is retried next tick.
+                return await send_queue.submit(
+                    target.chat_id,
+                    text,
+                    kind="digest",
+                    key=target.queue_key,
+                    on_delivered=mark_sent,
+                )
+            await application.bot.send_message(chat_id=target.chat_id, text=text)
+            await mark_sent()
         except Exception:
-            LOGGER.exception("Daily digest send failed: user_id=%s chat_id=%s", user_id, chat_id)
+            LOGGER.exception("Daily digest send failed: user_id=%s chat_id=%s", target.user_id, target.chat_id)
+            return False
+        return True
+
+    return await deliver_digests(targets, deliver, concurrency=concurrency)
+
+
+def _render_plan(items: DigestItems, *, tz: ZoneInfo) -> str:
+    lines: list[str] = ["📋 План на сегодня"]
+    if items.reminders:
+        lines.append("\n⏰ Напоминания:")
+        for r in items.reminders:
+            when = r.trigger_at.astimezone(tz).strftime("%H:%M")
+            rec = " 🔄" if r.recurrence else ""
+            lines.append(f"  • {when} — {r.text}{rec}")
+    if items.events:
+        lines.append("\n📅 События:")
+        for e in items.events:
+            when = e.dt.astimezone(tz).strftime("%H:%M")
+            lines.append(f"  • {when} — {e.title}")
+    if len(lines) <= 1:
+        lines.append("\nНет запланированных напоминаний и событий.")
+    return "\n".join(lines)
@@ -5,7 +5,7 @@ import logging
 import os
 import time
 import uuid
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, timedelta
 
 from app.core import calendar_store, recurrence_parse, tools_calendar_caldav
 from app.core.recurrence_series import (
@@ -19,6 +19,7 @@ from app.core.recurrence_series import (
 )
 from app.core.calendar_backend import CalendarCreateResult, LocalCalendarBackend
 from app.core.error_messages import map_error_text
+from app.core.recurrence_rrule import format_utc_value, set_rrule_part, strip_rrule_parts
 from app.core.recurrence_scope import RecurrenceScope, normalize_scope
 from app.core.result import Action, OrchestratorResult, ensure_valid, error, ok, refused
 from app.core.reminders import ReminderScheduler
@@ -914,7 +915,7 @@ async def _apply_caldav_update_scope(
             name="calendar.update",
             is_retryable=_is_retryable_calendar_error,
         )
-        new_rrule = _strip_rrule_parts(event.rrule, {"UNTIL", "COUNT"})
+        new_rrule = strip_rrule_parts(event.rrule, {"UNTIL", "COUNT"})
         await retry_async(
             lambda: tools_calendar_caldav.create_event(
                 config,
@@ -1032,8 +1033,8 @@ def _apply_recurrence_delete_scope(
         return rrule, _dedupe_exdates(exdates)
     if scope == RecurrenceScope.FUTURE:
         base_dt = instance_dt or event.dt
-        until_value = _format_utc_value(base_dt - timedelta(seconds=1))
-        updated_rrule = _set_rrule_part(rrule, "UNTIL", until_value)
+        until_value = format_utc_value(base_dt - timedelta(seconds=1))
+        updated_rrule = set_rrule_part(rrule, "UNTIL", until_value)
         return updated_rrule, event.exdates
     return rrule, event.exdates
 
@@ -1064,42 +1065,6 @@ def _dedupe_exdates(exdates: list[datetime]) -> list[datetime] | None:
     return result or None
 
 
-def _parse_rrule(rrule: str) -> dict[str, str]:
-    parts: dict[str, str] = {}
-    for segment in rrule.split(";"):
-        if "=" not in segment:
-            continue
-        key, value = segment.split("=", 1)
-        if key and value:
-            parts[key] = value
-    return parts
-
-
-def _format_rrule(parts: dict[str, str]) -> str:
-    return ";".join(f"{key}={value}" for key, value in parts.items())
-
-
-def _set_rrule_part(rrule: str, key: str, value: str) -> str:
-    parts = _parse_rrule(rrule)
-    parts[key] = value
-    return _format_rrule(parts)
-
-
-def _strip_rrule_parts(rrule: str | None, keys: set[str]) -> str | None:
-    if not rrule:
-        return rrule
-    parts = _parse_rrule(rrule)
-    for key in keys:
-        parts.pop(key, None)
-    if not parts:
-        return None
-    return _format_rrule(parts)
-
-
-def _format_utc_value(value: datetime) -> str:
-    return value.astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
-
-
 async def list_calendar_items(
     start: datetime | None,
     end: datetime | None,
@@ -1281,7 +1246,7 @@ async def _list_local_items(
     intent: str,
     caldav_error: str | None = None,
 ) -> OrchestratorResult:
-    items = await calendar_store.list_items(start=start, end=end)
+    items = await calendar_store.list_occurrences(start, end)
     if not items:
         debug = {"calendar_backend": "local_fallback", "caldav_error": caldav_error} if caldav_error else {}
         return ensure_valid(
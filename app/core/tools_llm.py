@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from app.core.bot_identity import get_system_prompt_for_llm
 from app.core.orchestrator import Orchestrator
-from app.core.result import OrchestratorResult, ensure_valid, error, ok, refused
+from app.core.result import OrchestratorResult, ensure_valid, error, ok, ratelimited, refused
 from app.infra.request_context import RequestContext
 
 
@@ -73,6 +73,7 @@ async def _run_llm_tool(
         mode="ask",
         system_prompt=system_prompt,
         request_context=request_context if isinstance(request_context, RequestContext) else None,
+        cacheable=True,
     )
     if execution.status != "success":
         if "LLM не настроен" in execution.result:
@@ -84,8 +85,9 @@ async def _run_llm_tool(
                     debug={"task_name": execution.task_name},
                 )
             )
+        build = ratelimited if execution.status == "ratelimited" else error
         return ensure_valid(
-            error(
+            build(
                 execution.result,
                 intent=intent,
                 mode="llm",
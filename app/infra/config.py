@@ -79,6 +79,49 @@ class Settings:
     otel_otlp_endpoint: str | None = None
     systemd_watchdog_enabled: bool = False
     dry_run: bool = False
+    # Shared HTTP pool for LLM clients
+    llm_http_max_connections: int = 20
+    llm_http_keepalive_seconds: float = 30.0
+    llm_http2: bool = True
+    # Progressive Telegram edits while an LLM answer streams
+    llm_streaming_enabled: bool = True
+    llm_stream_edit_interval_seconds: float = 1.0
+    # Concurrent citation metadata fetching for /search
+    web_search_fetch_concurrency: int = 4
+    web_search_deadline_seconds: float = 6.0
+    # TTL/LRU cache for citation metadata and /search results
+    web_search_cache_max_entries: int = 2048
+    web_search_cache_ttl_seconds: float = 24 * 3600
+    web_search_query_cache_ttl_seconds: float = 300.0
+    web_search_cache_path: Path | None = None
+    # TTL/LRU cache of answers to deterministic LLM tool prompts
+    llm_cache_max_entries: int = 512
+    llm_cache_ttl_seconds: float = 6 * 3600
+    llm_cache_path: Path | None = None
+    # Routing between OpenAI and Perplexity when both keys are set
+    llm_hedge_enabled: bool = False
+    llm_hedge_after_seconds: float = 2.0
+    # Concurrent calls per LLM provider, fair per-user queue in front of them
+    llm_max_concurrency: int = 8
+    llm_max_concurrency_per_user: int = 2
+    llm_queue_timeout_seconds: float = 10.0
+    # Worker pool for document text extraction and OCR
+    extraction_workers: int = 2
+    extraction_timeout_seconds: float = 60.0
+    extraction_max_queue: int = 8
+    extraction_use_processes: bool = True
+    # Content-addressed cache of extracted document texts
+    document_cache_path: Path = Path("data/document_cache")
+    document_cache_max_bytes: int = 200_000_000
+    # Map-reduce summaries of long documents
+    doc_summary_concurrency: int = 4
+    # Outbound queue for reminders and digests
+    send_queue_global_per_second: float = 30.0
+    send_queue_per_chat_per_second: float = 1.0
+    send_queue_concurrency: int = 8
+    send_queue_max_pending: int = 5000
+    send_queue_path: Path = Path("data/send_queue.db")
+    action_max_per_chat: int = 200
 
 
 @dataclass(frozen=True)
@@ -242,6 +285,10 @@ def load_settings() -> Settings:
     file_storage_dir = Path(
         os.getenv("FILE_STORAGE_DIR", str(DEFAULT_UPLOADS_PATH))
     )
+    web_search_cache_path_raw = os.getenv("WEB_SEARCH_CACHE_PATH", "").strip()
+    web_search_cache_path = Path(web_search_cache_path_raw) if web_search_cache_path_raw else None
+    llm_cache_path_raw = os.getenv("LLM_CACHE_PATH", "").strip()
+    llm_cache_path = Path(llm_cache_path_raw) if llm_cache_path_raw else None
     return Settings(
         bot_token=token,
         orchestrator_config_path=config_path,
@@ -302,6 +349,41 @@ def load_settings() -> Settings:
         otel_otlp_endpoint=os.getenv("OTEL_OTLP_ENDPOINT") or None,
         systemd_watchdog_enabled=_parse_optional_bool(os.getenv("SYSTEMD_WATCHDOG_ENABLED")) or False,
         dry_run=dry_run,
+        llm_http_max_connections=_parse_int_with_default(os.getenv("LLM_HTTP_MAX_CONNECTIONS"), 20),
+        llm_http_keepalive_seconds=_parse_optional_float(os.getenv("LLM_HTTP_KEEPALIVE_SECONDS"), 30.0),
+        llm_http2=_parse_optional_bool(os.getenv("LLM_HTTP2")) is not False,
+        llm_streaming_enabled=_parse_optional_bool(os.getenv("LLM_STREAMING")) is not False,
+        llm_stream_edit_interval_seconds=_parse_optional_float(os.getenv("LLM_STREAM_EDIT_INTERVAL_SECONDS"), 1.0),
+        web_search_fetch_concurrency=_parse_int_with_default(os.getenv("WEB_SEARCH_FETCH_CONCURRENCY"), 4),
+        web_search_deadline_seconds=_parse_optional_float(os.getenv("WEB_SEARCH_DEADLINE_SECONDS"), 6.0),
+        web_search_cache_max_entries=_parse_int_with_default(os.getenv("WEB_SEARCH_CACHE_MAX_ENTRIES"), 2048),
+        web_search_cache_ttl_seconds=_parse_optional_float(os.getenv("WEB_SEARCH_CACHE_TTL_SECONDS"), 24 * 3600),
+        web_search_query_cache_ttl_seconds=_parse_optional_float(
+            os.getenv("WEB_SEARCH_QUERY_CACHE_TTL_SECONDS"),
+            300.0,
+        ),
+        web_search_cache_path=web_search_cache_path,
+        llm_cache_max_entries=_parse_int_with_default(os.getenv("LLM_CACHE_MAX_ENTRIES"), 512),
+        llm_cache_ttl_seconds=_parse_optional_float(os.getenv("LLM_CACHE_TTL_SECONDS"), 6 * 3600),
+        llm_cache_path=llm_cache_path,
+        llm_hedge_enabled=_parse_optional_bool(os.getenv("LLM_HEDGE_ENABLED")) or False,
+        llm_hedge_after_seconds=_parse_optional_float(os.getenv("LLM_HEDGE_AFTER_SECONDS"), 2.0),
+        llm_max_concurrency=_parse_int_with_default(os.getenv("LLM_MAX_CONCURRENCY"), 8),
+        llm_max_concurrency_per_user=_parse_int_with_default(os.getenv("LLM_MAX_CONCURRENCY_PER_USER"), 2),
+        llm_queue_timeout_seconds=_parse_optional_float(os.getenv("LLM_QUEUE_TIMEOUT_SECONDS"), 10.0),
+        extraction_workers=_parse_int_with_default(os.getenv("EXTRACTION_WORKERS"), 2),
+        extraction_timeout_seconds=_parse_optional_float(os.getenv("EXTRACTION_TIMEOUT_SECONDS"), 60.0),
+        extraction_max_queue=_parse_int_with_default(os.getenv("EXTRACTION_MAX_QUEUE"), 8),
+        extraction_use_processes=_parse_optional_bool(os.getenv("EXTRACTION_USE_PROCESSES")) is not False,
+        document_cache_path=Path(os.getenv("DOCUMENT_CACHE_PATH", "data/document_cache")),
+        document_cache_max_bytes=_parse_int_with_default(os.getenv("DOCUMENT_CACHE_MAX_BYTES"), 200_000_000),
+        doc_summary_concurrency=_parse_int_with_default(os.getenv("DOC_SUMMARY_CONCURRENCY"), 4),
+        send_queue_global_per_second=_parse_optional_float(os.getenv("SEND_QUEUE_GLOBAL_PER_SECOND"), 30.0),
+        send_queue_per_chat_per_second=_parse_optional_float(os.getenv("SEND_QUEUE_PER_CHAT_PER_SECOND"), 1.0),
+        send_queue_concurrency=_parse_int_with_default(os.getenv("SEND_QUEUE_CONCURRENCY"), 8),
+        send_queue_max_pending=_parse_int_with_default(os.getenv("SEND_QUEUE_MAX_PENDING"), 5000),
+        send_queue_path=Path(os.getenv("SEND_QUEUE_PATH", "data/send_queue.db")),
+        action_max_per_chat=_parse_int_with_default(os.getenv("ACTION_MAX_PER_CHAT"), 200),
     )
 
 
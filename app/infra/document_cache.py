@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import shutil
+import time
+from collections.abc import Callable, Iterable
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+from app.core.document_qa import DocumentIndex, save_document_index
+from app.core.file_text_extractor import ExtractedText
+
+LOGGER = logging.getLogger(__name__)
+
+_INDEX_FILE = "index.json"
+_TEXT_FILE = "text.txt"
+
+
+@dataclass
+class CachedDocument:
+    content_hash: str
+    file_type: str
+    variant: str
+    size_bytes: int
+    metadata: dict[str, int]
+    warnings: list[str]
+    last_used: float
+    doc_ids: list[str] = field(default_factory=list)
+
+
+def hash_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for block in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class DocumentCache:
+    """Content-addressed store of extracted document texts.
+
+    Entries are keyed by the SHA-256 of the uploaded bytes; Telegram ``file_unique_id``
+    values are aliases, so a repeated upload is found before it is even downloaded.
+    Each entry keeps the text, the extraction metadata and the Q&A index under
+    ``<root>/<sha256>/``. Document sessions hold references; only unreferenced entries
+    are evicted, least recently used first, once the cache exceeds ``max_bytes``.
+    ``variant`` describes the extraction settings (limits, OCR) the text was made with,
+    entries made with other settings are treated as misses.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        *,
+        max_bytes: int = 200_000_000,
+        variant: str = "",
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self._root = root
+        self._max_bytes = max(0, max_bytes)
+        self._variant = variant
+        self._clock = clock
+        self._entries: dict[str, CachedDocument] = {}
+        self._unique_ids: dict[str, str] = {}
+        self._hash_by_doc: dict[str, str] = {}
+
+    def load(self) -> None:
+        index_path = self._root / _INDEX_FILE
+        if not index_path.exists():
+            return
+        try:
+            payload = json.loads(index_path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            LOGGER.warning("Document cache index unreadable, starting empty: path=%s", index_path)
+            return
+        for raw in payload.get("entries", []):
+            try:
+                entry = CachedDocument(**raw)
+            except TypeError:
+                continue
+            if (self._root / entry.content_hash / _TEXT_FILE).exists():
+                self._entries[entry.content_hash] = entry
+        unique_ids = payload.get("unique_ids", {})
+        if isinstance(unique_ids, dict):
+            self._unique_ids = {
+                str(key): str(value) for key, value in unique_ids.items() if str(value) in self._entries
+            }
+        self._rebuild_doc_refs()
+
+    def save(self) -> None:
+        self._root.mkdir(parents=True, exist_ok=True)
+        data = {
+            "entries": [asdict(entry) for entry in self._entries.values()],
+            "unique_ids": dict(self._unique_ids),
+        }
+        index_path = self._root / _INDEX_FILE
+        tmp_path = index_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+        tmp_path.replace(index_path)
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(entry.size_bytes for entry in self._entries.values())
+
+    def lookup_unique_id(self, file_unique_id: str) -> CachedDocument | None:
+        content_hash = self._unique_ids.get(file_unique_id)
+        return self.lookup_hash(content_hash) if content_hash else None
+
+    def lookup_hash(self, content_hash: str, *, file_unique_id: str = "") -> CachedDocument | None:
+        entry = self._entries.get(content_hash)
+        if entry is None or entry.variant != self._variant:
+            return None
+        if not self.text_path(content_hash).exists():
+            self._remove(content_hash)
+            self.save()
+            return None
+        entry.last_used = self._clock()
+        if file_unique_id:
+            self._unique_ids[file_unique_id] = content_hash
+        return entry
+
+    def put(
+        self,
+        content_hash: str,
+        extracted: ExtractedText,
+        *,
+        file_type: str,
+        file_unique_id: str = "",
+    ) -> CachedDocument:
+        directory = self._root / content_hash
+        directory.mkdir(parents=True, exist_ok=True)
+        text_path = directory / _TEXT_FILE
+        text_path.write_text(extracted.text, encoding="utf-8")
+        save_document_index(text_path, DocumentIndex.build(extracted.text))
+        previous = self._entries.get(content_hash)
+        entry = CachedDocument(
+            content_hash=content_hash,
+            file_type=file_type,
+            variant=self._variant,
+            size_bytes=sum(path.stat().st_size for path in directory.iterdir() if path.is_file()),
+            metadata=dict(extracted.metadata),
+            warnings=list(extracted.warnings),
+            last_used=self._clock(),
+            doc_ids=list(previous.doc_ids) if previous else [],
+        )
+        self._entries[content_hash] = entry
+        if file_unique_id:
+            self._unique_ids[file_unique_id] = content_hash
+        # The caller has not acquired the new entry yet; it must survive this eviction pass.
+        self._evict(keep=content_hash)
+        self.save()
+        return entry
+
+    def text_path(self, content_hash: str) -> Path:
+        return self._root / content_hash / _TEXT_FILE
+
+    def acquire(self, content_hash: str, doc_id: str) -> None:
+        entry = self._entries.get(content_hash)
+        if entry is None or doc_id in entry.doc_ids:
+            return
+        entry.doc_ids.append(doc_id)
+        self._hash_by_doc[doc_id] = content_hash
+        self.save()
+
+    def release(self, doc_id: str) -> None:
+        content_hash = self._hash_by_doc.pop(doc_id, None)
+        entry = self._entries.get(content_hash) if content_hash else None
+        if entry is None:
+            return
+        entry.doc_ids = [value for value in entry.doc_ids if value != doc_id]
+        self._evict()
+        self.save()
+
+    def retain_sessions(self, live_doc_ids: Iterable[str]) -> None:
+        """Drop references held by sessions that no longer exist (e.g. lost on a crash)."""
+        live = set(live_doc_ids)
+        changed = False
+        for entry in self._entries.values():
+            kept = [doc_id for doc_id in entry.doc_ids if doc_id in live]
+            if kept != entry.doc_ids:
+                entry.doc_ids = kept
+                changed = True
+        if changed:
+            self._rebuild_doc_refs()
+            self._evict()
+            self.save()
+
+    def _evict(self, *, keep: str = "") -> None:
+        total = self.total_bytes
+        if total <= self._max_bytes:
+            return
+        candidates = sorted(
+            (entry for entry in self._entries.values() if not entry.doc_ids and entry.content_hash != keep),
+            key=lambda entry: entry.last_used,
+        )
+        for entry in candidates:
+            if total <= self._max_bytes:
+                break
+            total -= entry.size_bytes
+            self._remove(entry.content_hash)
+            LOGGER.info("Document cache evicted: hash=%s size=%s", entry.content_hash[:12], entry.size_bytes)
+
+    def _remove(self, content_hash: str) -> None:
+        self._entries.pop(content_hash, None)
+        self._unique_ids = {key: value for key, value in self._unique_ids.items() if value != content_hash}
+        shutil.rmtree(self._root / content_hash, ignore_errors=True)
+
+    def _rebuild_doc_refs(self) -> None:
+        self._hash_by_doc = {
+            doc_id: entry.content_hash for entry in self._entries.values() for doc_id in entry.doc_ids
+        }
@@ -23,6 +23,7 @@ class DocumentSession:
     created_at: datetime
     updated_at: datetime
     expires_at: datetime
+    content_hash: str = ""
 
 
 class DocumentSessionStore:
@@ -32,8 +33,10 @@ class DocumentSessionStore:
         *,
         ttl_seconds: int = 7200,
         now_provider: Callable[[], datetime] | None = None,
+        on_session_removed: Callable[[DocumentSession], None] | None = None,
     ) -> None:
         self._path = path
+        self._on_session_removed = on_session_removed
         self._ttl_seconds = max(60, ttl_seconds)
         self._now_provider = now_provider or (lambda: datetime.now(timezone.utc))
         self._sessions: dict[str, DocumentSession] = {}
@@ -71,6 +74,7 @@ class DocumentSessionStore:
         file_type: str,
         text_path: str,
         state: str = "action_select",
+        content_hash: str = "",
     ) -> DocumentSession:
         now = self._now_provider()
         expires_at = now + timedelta(seconds=self._ttl_seconds)
@@ -85,6 +89,7 @@ class DocumentSessionStore:
             created_at=now,
             updated_at=now,
             expires_at=expires_at,
+            content_hash=content_hash,
         )
         self._sessions[session.doc_id] = session
         self._active_by_key[_active_key(user_id, chat_id)] = session.doc_id
@@ -97,6 +102,9 @@ class DocumentSessionStore:
         )
         return session
 
+    def session_ids(self) -> list[str]:
+        return list(self._sessions)
+
     def _is_expired(self, session: DocumentSession) -> bool:
         return self._now_provider() >= session.expires_at
 
@@ -154,6 +162,15 @@ class DocumentSessionStore:
         self._active_by_key.pop(key, None)
         self._sessions.pop(session.doc_id, None)
         self.save()
+        self._notify_removed(session)
+
+    def _notify_removed(self, session: DocumentSession) -> None:
+        if self._on_session_removed is None:
+            return
+        try:
+            self._on_session_removed(session)
+        except Exception:
+            LOGGER.exception("doc_session_release_failed doc_id=%s", session.doc_id)
 
     def set_state(self, *, doc_id: str, state: str) -> DocumentSession | None:
         session = self._sessions.get(doc_id)
@@ -178,6 +195,7 @@ class DocumentSessionStore:
                 doc_id,
             )
             self.save()
+            self._notify_removed(session)
         return session
 
     def cleanup_expired(
@@ -201,9 +219,12 @@ class DocumentSessionStore:
                 del self._active_by_key[key]
         for doc_id in to_remove:
             session = self._sessions.pop(doc_id, None)
+            if session:
+                self._notify_removed(session)
             if session and (delete_text_files or delete_upload_files):
                 try:
-                    if delete_text_files and session.text_path:
+                    # Texts with a content hash belong to the shared document cache.
+                    if delete_text_files and session.text_path and not session.content_hash:
                         Path(session.text_path).unlink(missing_ok=True)
                     if delete_upload_files and session.file_path:
                         Path(session.file_path).unlink(missing_ok=True)
@@ -252,4 +273,5 @@ def _deserialize_session(
         created_at=created_at,
         updated_at=updated_at,
         expires_at=expires_at,
+        content_hash=str(raw.get("content_hash", "")),
     )
@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import OrderedDict, deque
+from collections.abc import AsyncIterator, Hashable, Iterator
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+
+from app.infra.observability.metrics import MetricsCollector
+
+LOGGER = logging.getLogger(__name__)
+
+# Whose call this is, for limiters below an interface without a user argument (LLMRouter).
+_CURRENT_USER: ContextVar[Hashable | None] = ContextVar("fair_limiter_user", default=None)
+
+
+@contextmanager
+def user_scope(user_id: Hashable) -> Iterator[None]:
+    token = _CURRENT_USER.set(user_id)
+    try:
+        yield
+    finally:
+        _CURRENT_USER.reset(token)
+
+
+def current_user() -> Hashable | None:
+    return _CURRENT_USER.get()
+
+
+class QueueTimeoutError(RuntimeError):
+    """No slot was granted within the queue timeout."""
+
+
+class FairLimiter:
+    """Bounded concurrency with a fair per-user queue.
+
+    At most ``max_concurrency`` calls run at once and at most ``max_per_user`` of
+    them belong to one user. Waiters are queued per user and a free slot goes to
+    the waiting user with the fewest running calls, so a burst from one user waits
+    behind others instead of taking every slot. A waiter that gets no slot within
+    ``queue_timeout_seconds`` gets ``QueueTimeoutError``.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        max_concurrency: int,
+        max_per_user: int | None = None,
+        queue_timeout_seconds: float | None = 10.0,
+        metrics: MetricsCollector | None = None,
+    ) -> None:
+        self._name = name
+        self._limit = max(1, max_concurrency)
+        self._per_user = max(1, max_per_user) if max_per_user else max(1, self._limit // 2)
+        self._timeout = queue_timeout_seconds if queue_timeout_seconds and queue_timeout_seconds > 0 else None
+        self._metrics = metrics
+        self._inflight = 0
+        self._active: dict[Hashable, int] = {}
+        self._queues: OrderedDict[Hashable, deque[asyncio.Future[None]]] = OrderedDict()
+        self._waiting = 0
+
+    @property
+    def inflight(self) -> int:
+        return self._inflight
+
+    @property
+    def queue_depth(self) -> int:
+        return self._waiting
+
+    @asynccontextmanager
+    async def slot(self, user_id: Hashable) -> AsyncIterator[None]:
+        await self.acquire(user_id)
+        try:
+            yield
+        finally:
+            self.release(user_id)
+
+    def try_acquire(self, user_id: Hashable) -> bool:
+        """Take a slot only if one is free right now and nobody is queued for it."""
+        if self._waiting or self._inflight >= self._limit or self._active.get(user_id, 0) >= self._per_user:
+            return False
+        self._inflight += 1
+        self._active[user_id] = self._active.get(user_id, 0) + 1
+        self._set_gauges()
+        return True
+
+    async def acquire(self, user_id: Hashable) -> None:
+        future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._queues.setdefault(user_id, deque()).append(future)
+        self._waiting += 1
+        self._dispatch()
+        if future.done():
+            return
+        self._inc("queued")
+        try:
+            await asyncio.wait_for(future, timeout=self._timeout)
+        except BaseException as exc:
+            if future.done() and not future.cancelled():
+                # Granted just as the wait ended: hand the slot on.
+                self.release(user_id)
+            else:
+                future.cancel()
+                self._waiting -= 1
+                self._set_gauges()
+            if isinstance(exc, asyncio.TimeoutError):
+                self._inc("timeouts")
+                LOGGER.info("Concurrency queue timeout: name=%s user_id=%s", self._name, user_id)
+                raise QueueTimeoutError(f"{self._name}: no free slot in {self._timeout}s") from None
+            raise
+
+    def release(self, user_id: Hashable) -> None:
+        self._inflight -= 1
+        remaining = self._active.get(user_id, 0) - 1
+        if remaining > 0:
+            self._active[user_id] = remaining
+        else:
+            self._active.pop(user_id, None)
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        while self._inflight < self._limit:
+            # The waiting user with the fewest running calls goes next; ties go round-robin.
+            chosen: Hashable | None = None
+            for user_id in list(self._queues):
+                queue = self._queues[user_id]
+                while queue and queue[0].done():
+                    queue.popleft()
+                if not queue:
+                    del self._queues[user_id]
+                    continue
+                active = self._active.get(user_id, 0)
+                if active < self._per_user and (chosen is None or active < self._active.get(chosen, 0)):
+                    chosen = user_id
+            if chosen is None:
+                break
+            queue = self._queues[chosen]
+            future = queue.popleft()
+            if queue:
+                self._queues.move_to_end(chosen)
+            else:
+                del self._queues[chosen]
+            self._inflight += 1
+            self._active[chosen] = self._active.get(chosen, 0) + 1
+            self._waiting -= 1
+            future.set_result(None)
+        self._set_gauges()
+
+    def _inc(self, suffix: str) -> None:
+        if self._metrics is not None:
+            self._metrics.inc(f"concurrency.{self._name}.{suffix}")
+
+    def _set_gauges(self) -> None:
+        if self._metrics is not None:
+            self._metrics.set_gauge(f"concurrency.{self._name}.inflight", self._inflight)
+            self._metrics.set_gauge(f"concurrency.{self._name}.queue_depth", self._waiting)
+
+
+class FairLimiterRegistry:
+    """One ``FairLimiter`` per name (e.g. ``llm.openai``), all with the same limits."""
+
+    def __init__(
+        self,
+        *,
+        max_concurrency: int,
+        max_per_user: int | None = None,
+        queue_timeout_seconds: float | None = 10.0,
+        metrics: MetricsCollector | None = None,
+    ) -> None:
+        self._max_concurrency = max_concurrency
+        self._max_per_user = max_per_user
+        self._queue_timeout = queue_timeout_seconds
+        self._metrics = metrics
+        self._limiters: dict[str, FairLimiter] = {}
+
+    def get(self, name: str) -> FairLimiter:
+        limiter = self._limiters.get(name)
+        if limiter is None:
+            limiter = FairLimiter(
+                name,
+                max_concurrency=self._max_concurrency,
+                max_per_user=self._max_per_user,
+                queue_timeout_seconds=self._queue_timeout,
+                metrics=self._metrics,
+            )
+            self._limiters[name] = limiter
+        return limiter
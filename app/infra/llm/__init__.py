@@ -1,5 +1,19 @@
 from app.infra.llm.base import LLMAPIError, LLMClient, LLMGuardError, ensure_plain_text
+from app.infra.llm.http_pool import HTTPPoolConfig, SharedHTTPClient
 from app.infra.llm.openai_client import OpenAIClient
 from app.infra.llm.perplexity import PerplexityClient
+from app.infra.llm.router import LLMRoute, LLMRouter, client_models
 
-__all__ = ["LLMAPIError", "LLMClient", "LLMGuardError", "ensure_plain_text", "OpenAIClient", "PerplexityClient"]
+__all__ = [
+    "HTTPPoolConfig",
+    "LLMAPIError",
+    "LLMClient",
+    "LLMGuardError",
+    "LLMRoute",
+    "LLMRouter",
+    "ensure_plain_text",
+    "OpenAIClient",
+    "PerplexityClient",
+    "SharedHTTPClient",
+    "client_models",
+]
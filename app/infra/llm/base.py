@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import json
+from collections.abc import AsyncIterator
 from dataclasses import dataclass
 from typing import Any, Protocol
 
@@ -41,6 +43,40 @@ class LLMClient(Protocol):
         ...
 
 
+class StreamingLLMClient(LLMClient, Protocol):
+    def stream_text(
+        self,
+        *,
+        model: str,
+        messages: list[dict[str, Any]],
+        max_tokens: int | None = None,
+        web_search_options: dict[str, Any] | None = None,
+    ) -> AsyncIterator[str]:
+        """Yield content deltas of a chat completion as they arrive."""
+        ...
+
+
+async def iter_sse_deltas(lines: AsyncIterator[str]) -> AsyncIterator[str]:
+    """Content deltas from an OpenAI-compatible ``stream: true`` SSE body."""
+    async for line in lines:
+        if not line.startswith("data:"):
+            continue
+        data = line[5:].strip()
+        if data == "[DONE]":
+            return
+        try:
+            chunk = json.loads(data)
+        except json.JSONDecodeError:
+            continue
+        choices = chunk.get("choices") if isinstance(chunk, dict) else None
+        if not choices:
+            continue
+        delta = choices[0].get("delta") or {}
+        content = delta.get("content")
+        if isinstance(content, str) and content:
+            yield content
+
+
 def ensure_plain_text(text: str) -> str:
     trimmed = text.strip()
     lowered = trimmed.lower()
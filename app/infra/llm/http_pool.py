@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+import logging
+from dataclasses import dataclass
+
+import httpx
+
+LOGGER = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class HTTPPoolConfig:
+    max_connections: int = 20
+    max_keepalive_connections: int | None = None
+    keepalive_expiry: float = 30.0
+    http2: bool = True
+
+
+def http2_available() -> bool:
+    """HTTP/2 needs the optional ``h2`` package (``pip install httpx[http2]``)."""
+    return importlib.util.find_spec("h2") is not None
+
+
+class SharedHTTPClient:
+    """Lazily created, pooled httpx.AsyncClient shared by the LLM clients.
+
+    The pool is bound to the event loop that created it; a call from another loop
+    (e.g. a fresh asyncio.run) gets a new pool instead of reusing dead connections.
+    """
+
+    def __init__(
+        self,
+        config: HTTPPoolConfig | None = None,
+        *,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ) -> None:
+        self.config = config or HTTPPoolConfig()
+        self._transport = transport
+        self._client: httpx.AsyncClient | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def get(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client.is_closed or self._loop is not loop:
+            self._client = self._build()
+            self._loop = loop
+        return self._client
+
+    def _build(self) -> httpx.AsyncClient:
+        config = self.config
+        http2 = config.http2 and self._transport is None and http2_available()
+        limits = httpx.Limits(
+            max_connections=config.max_connections,
+            max_keepalive_connections=config.max_keepalive_connections or config.max_connections,
+            keepalive_expiry=config.keepalive_expiry,
+        )
+        LOGGER.debug(
+            "Creating pooled LLM HTTP client: max_connections=%s keepalive_expiry=%s http2=%s",
+            config.max_connections,
+            config.keepalive_expiry,
+            http2,
+        )
+        return httpx.AsyncClient(limits=limits, http2=http2, transport=self._transport)
+
+    async def aclose(self) -> None:
+        client, self._client, self._loop = self._client, None, None
+        if client is None or client.is_closed:
+            return
+        try:
+            await client.aclose()
+        except RuntimeError:
+            # The pool belonged to an event loop that is already closed.
+            LOGGER.debug("LLM HTTP client was bound to a closed event loop")
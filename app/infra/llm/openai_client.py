@@ -1,11 +1,13 @@
 from __future__ import annotations
 
 import asyncio
+from collections.abc import AsyncIterator
 from typing import Any
 
 import httpx
 
-from app.infra.llm.base import LLMAPIError, ensure_plain_text
+from app.infra.llm.base import LLMAPIError, ensure_plain_text, iter_sse_deltas
+from app.infra.llm.http_pool import SharedHTTPClient
 
 
 class OpenAIAPIError(LLMAPIError):
@@ -22,6 +24,7 @@ class OpenAIClient:
         base_url: str = "https://api.openai.com/v1",
         timeout_seconds: float = 30.0,
         max_retries: int = 0,
+        http_client: SharedHTTPClient | None = None,
     ) -> None:
         self.api_key = api_key
         self.model = model
@@ -29,6 +32,7 @@ class OpenAIClient:
         self.base_url = base_url.rstrip("/")
         self.timeout_seconds = timeout_seconds
         self.max_retries = max_retries
+        self._http = http_client or SharedHTTPClient()
 
     async def create_chat_completion(
         self,
@@ -52,21 +56,21 @@ class OpenAIClient:
             "Content-Type": "application/json",
         }
 
-        async with httpx.AsyncClient(timeout=self.timeout_seconds) as client:
-            response = None
-            for attempt in range(self.max_retries + 1):
-                try:
-                    response = await client.post(url, json=payload, headers=headers)
-                except httpx.TimeoutException as exc:
-                    if attempt < self.max_retries:
-                        await asyncio.sleep(0.5 * (attempt + 1))
-                        continue
-                    raise RuntimeError("OpenAI request timed out") from exc
-
-                if response.status_code >= 500 and attempt < self.max_retries:
+        client = self._http.get()
+        response = None
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = await client.post(url, json=payload, headers=headers, timeout=self.timeout_seconds)
+            except httpx.TimeoutException as exc:
+                if attempt < self.max_retries:
                     await asyncio.sleep(0.5 * (attempt + 1))
                     continue
-                break
+                raise RuntimeError("OpenAI request timed out") from exc
+
+            if response.status_code >= 500 and attempt < self.max_retries:
+                await asyncio.sleep(0.5 * (attempt + 1))
+                continue
+            break
 
         if response is None:
             raise RuntimeError("OpenAI request failed")
@@ -87,6 +91,43 @@ class OpenAIClient:
         )
         return {"content": content}
 
+    async def stream_text(
+        self,
+        *,
+        model: str | None = None,
+        messages: list[dict[str, Any]],
+        max_tokens: int | None = None,
+        web_search_options: dict[str, Any] | None = None,
+    ) -> AsyncIterator[str]:
+        payload: dict[str, Any] = {"model": model or self.model, "messages": messages, "stream": True}
+        if max_tokens is not None:
+            payload["max_tokens"] = max_tokens
+        _ = web_search_options
+
+        url = f"{self.base_url}/chat/completions"
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+            "Accept": "text/event-stream",
+        }
+        client = self._http.get()
+        try:
+            async with client.stream("POST", url, json=payload, headers=headers, timeout=self.timeout_seconds) as response:
+                if response.status_code // 100 != 2:
+                    body = (await response.aread()).decode("utf-8", errors="replace")
+                    trimmed = body[:500] + ("..." if len(body) > 500 else "")
+                    raise OpenAIAPIError(
+                        status_code=response.status_code,
+                        message=f"OpenAI API error {response.status_code}: {trimmed}",
+                    )
+                async for delta in iter_sse_deltas(response.aiter_lines()):
+                    yield delta
+        except httpx.TimeoutException as exc:
+            raise RuntimeError("OpenAI request timed out") from exc
+
+    async def aclose(self) -> None:
+        await self._http.aclose()
+
     async def generate_text(
         self,
         *,
@@ -122,21 +163,21 @@ class OpenAIClient:
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json",
         }
-        async with httpx.AsyncClient(timeout=self.timeout_seconds) as client:
-            response = None
-            for attempt in range(self.max_retries + 1):
-                try:
-                    response = await client.post(url, json=payload, headers=headers)
-                except httpx.TimeoutException as exc:
-                    if attempt < self.max_retries:
-                        await asyncio.sleep(0.5 * (attempt + 1))
-                        continue
-                    raise RuntimeError("OpenAI image request timed out") from exc
-
-                if response.status_code >= 500 and attempt < self.max_retries:
+        client = self._http.get()
+        response = None
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = await client.post(url, json=payload, headers=headers, timeout=self.timeout_seconds)
+            except httpx.TimeoutException as exc:
+                if attempt < self.max_retries:
                     await asyncio.sleep(0.5 * (attempt + 1))
                     continue
-                break
+                raise RuntimeError("OpenAI image request timed out") from exc
+
+            if response.status_code >= 500 and attempt < self.max_retries:
+                await asyncio.sleep(0.5 * (attempt + 1))
+                continue
+            break
 
         if response is None:
             raise RuntimeError("OpenAI image request failed")
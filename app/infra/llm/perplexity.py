@@ -1,11 +1,13 @@
 from __future__ import annotations
 
 import asyncio
+from collections.abc import AsyncIterator
 from typing import Any
 
 import httpx
 
-from app.infra.llm.base import LLMAPIError, ensure_plain_text
+from app.infra.llm.base import LLMAPIError, ensure_plain_text, iter_sse_deltas
+from app.infra.llm.http_pool import SharedHTTPClient
 
 class PerplexityAPIError(LLMAPIError):
     """Perplexity-specific API error wrapper."""
@@ -19,11 +21,13 @@ class PerplexityClient:
         base_url: str = "https://api.perplexity.ai",
         timeout_seconds: float = 30.0,
         max_retries: int = 0,
+        http_client: SharedHTTPClient | None = None,
     ) -> None:
         self.api_key = api_key
         self.base_url = base_url.rstrip("/")
         self.timeout_seconds = timeout_seconds
         self.max_retries = max_retries
+        self._http = http_client or SharedHTTPClient()
 
     async def create_chat_completion(
         self,
@@ -45,21 +49,21 @@ class PerplexityClient:
             "Content-Type": "application/json",
         }
 
-        async with httpx.AsyncClient(timeout=self.timeout_seconds) as client:
-            response = None
-            for attempt in range(self.max_retries + 1):
-                try:
-                    response = await client.post(url, json=payload, headers=headers)
-                except httpx.TimeoutException as exc:
-                    if attempt < self.max_retries:
-                        await asyncio.sleep(0.5 * (attempt + 1))
-                        continue
-                    raise RuntimeError("Perplexity request timed out") from exc
-
-                if response.status_code >= 500 and attempt < self.max_retries:
+        client = self._http.get()
+        response = None
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = await client.post(url, json=payload, headers=headers, timeout=self.timeout_seconds)
+            except httpx.TimeoutException as exc:
+                if attempt < self.max_retries:
                     await asyncio.sleep(0.5 * (attempt + 1))
                     continue
-                break
+                raise RuntimeError("Perplexity request timed out") from exc
+
+            if response.status_code >= 500 and attempt < self.max_retries:
+                await asyncio.sleep(0.5 * (attempt + 1))
+                continue
+            break
 
         if response is None:
             raise RuntimeError("Perplexity request failed")
@@ -81,6 +85,44 @@ class PerplexityClient:
         citations = data.get("citations")
         return {"content": content, "citations": citations}
 
+    async def stream_text(
+        self,
+        *,
+        model: str,
+        messages: list[dict[str, Any]],
+        max_tokens: int | None = None,
+        web_search_options: dict[str, Any] | None = None,
+    ) -> AsyncIterator[str]:
+        payload: dict[str, Any] = {"model": model, "messages": messages, "stream": True}
+        if max_tokens is not None:
+            payload["max_tokens"] = max_tokens
+        if web_search_options is not None:
+            payload["web_search_options"] = web_search_options
+
+        url = f"{self.base_url}/chat/completions"
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+            "Accept": "text/event-stream",
+        }
+        client = self._http.get()
+        try:
+            async with client.stream("POST", url, json=payload, headers=headers, timeout=self.timeout_seconds) as response:
+                if response.status_code // 100 != 2:
+                    body = (await response.aread()).decode("utf-8", errors="replace")
+                    trimmed = body[:500] + ("..." if len(body) > 500 else "")
+                    raise PerplexityAPIError(
+                        status_code=response.status_code,
+                        message=f"Perplexity API error {response.status_code}: {trimmed}",
+                    )
+                async for delta in iter_sse_deltas(response.aiter_lines()):
+                    yield delta
+        except httpx.TimeoutException as exc:
+            raise RuntimeError("Perplexity request timed out") from exc
+
+    async def aclose(self) -> None:
+        await self._http.aclose()
+
     async def generate_text(
         self,
         *,
@@ -0,0 +1,352 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import deque
+from collections.abc import AsyncIterator, Hashable
+from dataclasses import dataclass, field
+from typing import Any
+
+from app.infra.fair_limiter import FairLimiter, FairLimiterRegistry, current_user
+from app.infra.llm.base import LLMAPIError, LLMClient
+from app.infra.observability.metrics import MetricsCollector
+from app.infra.resilience import CircuitBreakerRegistry
+
+LOGGER = logging.getLogger(__name__)
+
+# Below this many samples a route's percentiles are not trusted yet.
+MIN_SAMPLES = 5
+
+
+def client_models(client: Any, model: str) -> list[str]:
+    """Models a call may actually run on: a router's routes, else ``model``."""
+    route_models = getattr(client, "route_models", None)
+    if isinstance(route_models, list) and route_models:
+        return list(dict.fromkeys(route_models))
+    return [model]
+
+
+@dataclass
+class LLMRoute:
+    name: str
+    client: LLMClient
+    model: str
+
+
+@dataclass
+class RouteStats:
+    latencies: deque[float] = field(default_factory=lambda: deque(maxlen=100))
+    outcomes: deque[bool] = field(default_factory=lambda: deque(maxlen=50))
+
+    def record(self, latency: float, ok: bool) -> None:
+        self.outcomes.append(ok)
+        if ok:
+            self.latencies.append(latency)
+
+    def percentile(self, fraction: float) -> float | None:
+        if len(self.latencies) < MIN_SAMPLES:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    @property
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return 1.0 - sum(self.outcomes) / len(self.outcomes)
+
+    @property
+    def unhealthy(self) -> bool:
+        return len(self.outcomes) >= MIN_SAMPLES and self.error_rate > 0.5
+
+
+class LLMRouter:
+    """``LLMClient`` over several providers/models.
+
+    Each call goes to the healthy route with the lowest rolling p50 latency (routes
+    without enough samples keep their configured order after measured ones). A route
+    that fails or whose circuit breaker (``llm.<name>``) is open is skipped in favour
+    of the next one. With ``hedge`` enabled, a second route is started when the first
+    has not answered within its p95 (``hedge_after_seconds`` until measured); the first
+    answer wins and the other call is left to finish so its latency is still recorded.
+
+    With ``concurrency_limits`` every route call holds a slot of the ``llm.<name>``
+    limiter for the user bound by ``fair_limiter.user_scope``. A route with a free
+    slot is preferred over a busy one; only when all are busy does the call queue
+    for the best route (``QueueTimeoutError`` when that takes too long). Hedges never
+    queue.
+    """
+
+    def __init__(
+        self,
+        routes: list[LLMRoute],
+        *,
+        circuit_breakers: CircuitBreakerRegistry,
+        hedge: bool = False,
+        hedge_after_seconds: float = 2.0,
+        metrics: MetricsCollector | None = None,
+        concurrency_limits: FairLimiterRegistry | None = None,
+    ) -> None:
+        if not routes:
+            raise ValueError("LLMRouter needs at least one route")
+        self._routes = routes
+        self._breakers = circuit_breakers
+        self._hedge = hedge
+        self._hedge_after = max(0.05, hedge_after_seconds)
+        self._metrics = metrics
+        self._limits = concurrency_limits
+        self._stats = {route.name: RouteStats() for route in routes}
+        self._background: set[asyncio.Task[Any]] = set()
+        self.api_key = routes[0].client.api_key
+        self.provider = "+".join(route.name for route in routes)
+
+    @property
+    def routes(self) -> list[LLMRoute]:
+        return list(self._routes)
+
+    @property
+    def route_models(self) -> list[str]:
+        """Model of every route; the ``model`` argument of calls is ignored in their favour.
+
+        The route is picked only at call time, so callers sizing a prompt or keying a
+        cache beforehand should account for all of them.
+        """
+        return [route.model for route in self._routes]
+
+    @property
+    def manages_concurrency(self) -> bool:
+        """True when calls are limited per route here, so callers must not add their own slot."""
+        return self._limits is not None
+
+    def stats(self, name: str) -> RouteStats:
+        return self._stats[name]
+
+    def ordered_routes(self) -> list[LLMRoute]:
+        def key(item: tuple[int, LLMRoute]) -> tuple[bool, float, int]:
+            index, route = item
+            stats = self._stats[route.name]
+            p50 = stats.percentile(0.5)
+            return stats.unhealthy, p50 if p50 is not None else float("inf"), index
+
+        return [route for _, route in sorted(enumerate(self._routes), key=key)]
+
+    async def create_chat_completion(
+        self,
+        *,
+        model: str | None = None,
+        messages: list[dict[str, Any]],
+        max_tokens: int | None = None,
+        web_search_options: dict[str, Any] | None = None,
+    ) -> dict[str, Any]:
+        return await self._route(
+            lambda route: route.client.create_chat_completion(
+                model=route.model,
+                messages=messages,
+                max_tokens=max_tokens,
+                web_search_options=web_search_options,
+            )
+        )
+
+    async def generate_text(
+        self,
+        *,
+        model: str | None = None,
+        messages: list[dict[str, Any]],
+        max_tokens: int | None = None,
+        web_search_options: dict[str, Any] | None = None,
+    ) -> str:
+        # ``model`` comes from the single-provider setup; each route uses its own model.
+        return await self._route(
+            lambda route: route.client.generate_text(
+                model=route.model,
+                messages=messages,
+                max_tokens=max_tokens,
+                web_search_options=web_search_options,
+            )
+        )
+
+    async def stream_text(
+        self,
+        *,
+        model: str | None = None,
+        messages: list[dict[str, Any]],
+        max_tokens: int | None = None,
+        web_search_options: dict[str, Any] | None = None,
+    ) -> AsyncIterator[str]:
+        """Stream from the best route; fall back to the next one only if nothing was streamed yet."""
+        last_exc: Exception | None = None
+        candidates = self.ordered_routes()
+        user = current_user()
+        while (route := await self._reserve(candidates, user, wait=True)) is not None:
+            self._inc(f"llm_router.requests.{route.name}")
+            started = time.monotonic()
+            streamed = False
+            ok = False
+            try:
+                stream = getattr(route.client, "stream_text", None)
+                if stream is None:
+                    text = await route.client.generate_text(
+                        model=route.model,
+                        messages=messages,
+                        max_tokens=max_tokens,
+                        web_search_options=web_search_options,
+                    )
+                    streamed = True
+                    yield text
+                else:
+                    async for delta in stream(
+                        model=route.model,
+                        messages=messages,
+                        max_tokens=max_tokens,
+                        web_search_options=web_search_options,
+                    ):
+                        streamed = True
+                        yield delta
+                ok = True
+            except Exception as exc:
+                if streamed:
+                    raise
+                LOGGER.warning("LLM route failed: route=%s error=%r", route.name, exc)
+                last_exc = exc
+                continue
+            finally:
+                # Also settles the breaker and the slot when the consumer stops early or is cancelled.
+                self._finish(route, started, ok=ok, user=user)
+            return
+        raise last_exc or LLMAPIError(status_code=503, message="All LLM providers are unavailable")
+
+    async def aclose(self) -> None:
+        for task in list(self._background):
+            task.cancel()
+        if self._background:
+            await asyncio.gather(*self._background, return_exceptions=True)
+
+    async def _route(self, call: Any) -> Any:
+        candidates = self.ordered_routes()
+        user = current_user()
+        pending: dict[asyncio.Task[Any], tuple[LLMRoute, float]] = {}
+        hedged = False
+        last_exc: Exception | None = None
+
+        async def launch(*, wait: bool) -> bool:
+            route = await self._reserve(candidates, user, wait=wait)
+            if route is None:
+                return False
+            self._inc(f"llm_router.requests.{route.name}")
+            pending[asyncio.ensure_future(call(route))] = (route, time.monotonic())
+            return True
+
+        await launch(wait=True)
+        try:
+            while pending:
+                timeout = None
+                if self._hedge and not hedged and len(pending) == 1:
+                    (route, started), = pending.values()
+                    timeout = max(0.0, self._hedge_delay(route) - (time.monotonic() - started))
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    hedged = True
+                    if await launch(wait=False):
+                        self._inc("llm_router.hedges")
+                    continue
+                for task in done:
+                    route, started = pending.pop(task)
+                    exc = task.exception()
+                    if exc is None:
+                        self._finish(route, started, ok=True, user=user)
+                        if hedged:
+                            self._inc(f"llm_router.hedge_wins.{route.name}")
+                        self._detach(pending, user)
+                        return task.result()
+                    self._finish(route, started, ok=False, user=user)
+                    last_exc = exc
+                    LOGGER.warning("LLM route failed: route=%s error=%r", route.name, exc)
+                if not pending:
+                    await launch(wait=True)
+        except asyncio.CancelledError:
+            # The caller gave up (e.g. retry_async timeout): count in-flight calls as failed.
+            for task, (route, started) in pending.items():
+                task.cancel()
+                self._finish(route, started, ok=False, user=user)
+            raise
+        if last_exc is not None:
+            raise last_exc
+        raise LLMAPIError(status_code=503, message="All LLM providers are unavailable")
+
+    def _detach(self, pending: dict[asyncio.Task[Any], tuple[LLMRoute, float]], user: Hashable | None) -> None:
+        """Let losing hedged calls finish in the background and record their outcome."""
+        for task, (route, started) in pending.items():
+            self._background.add(task)
+
+            def done(finished: asyncio.Task[Any], route: LLMRoute = route, started: float = started) -> None:
+                self._background.discard(finished)
+                ok = not finished.cancelled() and finished.exception() is None
+                self._finish(route, started, ok=ok, user=user)
+
+            task.add_done_callback(done)
+        pending.clear()
+
+    def _hedge_delay(self, route: LLMRoute) -> float:
+        p95 = self._stats[route.name].percentile(0.95)
+        return max(0.05, p95) if p95 is not None else self._hedge_after
+
+    async def _reserve(self, candidates: list[LLMRoute], user: Hashable | None, *, wait: bool) -> LLMRoute | None:
+        """Take the next usable route off ``candidates``: slot held and breaker passed.
+
+        Routes with a free slot go first. With ``wait`` the call then queues for the
+        busy ones in order; without it they stay in ``candidates`` for a later fallback.
+        """
+        busy: list[LLMRoute] = []
+        chosen: LLMRoute | None = None
+        while candidates and chosen is None:
+            route = candidates.pop(0)
+            limiter = self._limiter(route)
+            if limiter is not None and not limiter.try_acquire(user):
+                busy.append(route)
+            elif self._allow(route):
+                chosen = route
+            elif limiter is not None:
+                limiter.release(user)
+        while wait and busy and chosen is None:
+            route = busy.pop(0)
+            limiter = self._limiter(route)
+            await limiter.acquire(user)
+            if self._allow(route):
+                chosen = route
+            else:
+                limiter.release(user)
+        candidates[:0] = busy
+        return chosen
+
+    def _limiter(self, route: LLMRoute) -> FairLimiter | None:
+        return self._limits.get(f"llm.{route.name}") if self._limits is not None else None
+
+    def _allow(self, route: LLMRoute) -> bool:
+        allowed, event = self._breakers.get(f"llm.{route.name}").allow_request()
+        if event:
+            LOGGER.info("LLM route circuit: route=%s event=%s", route.name, event)
+        return allowed
+
+    def _finish(self, route: LLMRoute, started: float, *, ok: bool, user: Hashable | None) -> None:
+        limiter = self._limiter(route)
+        if limiter is not None:
+            limiter.release(user)
+        latency = time.monotonic() - started
+        stats = self._stats[route.name]
+        stats.record(latency, ok)
+        breaker = self._breakers.get(f"llm.{route.name}")
+        event = breaker.record_success() if ok else breaker.record_failure()
+        if event:
+            LOGGER.info("LLM route circuit: route=%s event=%s", route.name, event)
+        if not ok:
+            self._inc(f"llm_router.failures.{route.name}")
+        if self._metrics is not None:
+            p95 = stats.percentile(0.95)
+            if p95 is not None:
+                self._metrics.set_gauge(f"llm_router.p95_ms.{route.name}", round(p95 * 1000, 1))
+            self._metrics.set_gauge(f"llm_router.error_rate.{route.name}", round(stats.error_rate, 3))
+
+    def _inc(self, name: str) -> None:
+        if self._metrics is not None:
+            self._metrics.inc(name)
@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import sqlite3
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from app.infra.observability.metrics import MetricsCollector
+from app.infra.ttl_cache import TTLCache
+
+LOGGER = logging.getLogger(__name__)
+
+# Rough chars-per-token ratio, only used for the "saved tokens" counter.
+_CHARS_PER_TOKEN = 4
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    text: str
+    tokens: int
+    latency_ms: float
+
+
+class LLMResponseCache:
+    """Answers to deterministic LLM prompts (/check, /rewrite, /explain, summaries).
+
+    Keyed by provider, model, max_tokens and a hash of the normalized messages, so
+    only byte-for-byte equivalent requests share an answer. Entries live in an LRU
+    with a TTL; with ``persist_path`` they also go to SQLite and survive restarts.
+    Dialog turns (``ask`` with history/context) must not be routed here.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_entries: int = 512,
+        ttl_seconds: float = 6 * 3600,
+        persist_path: Path | None = None,
+        metrics: MetricsCollector | None = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self._entries: TTLCache[CachedResponse] = TTLCache(max_entries, clock=clock)
+        self._ttl = ttl_seconds
+        self._metrics = metrics
+        self._clock = clock
+        self._connection: sqlite3.Connection | None = None
+        if persist_path is not None:
+            persist_path.parent.mkdir(parents=True, exist_ok=True)
+            self._connection = sqlite3.connect(persist_path, check_same_thread=False)
+            self._ensure_schema()
+
+    def _ensure_schema(self) -> None:
+        assert self._connection is not None
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS llm_responses (
+                key TEXT PRIMARY KEY,
+                text TEXT NOT NULL,
+                tokens INTEGER NOT NULL,
+                latency_ms REAL NOT NULL,
+                expires_at REAL NOT NULL
+            )
+            """
+        )
+        self._connection.execute("DELETE FROM llm_responses WHERE expires_at <= ?", (self._clock(),))
+        self._connection.commit()
+
+    @staticmethod
+    def make_key(
+        *,
+        provider: str,
+        model: str,
+        messages: list[dict[str, Any]],
+        max_tokens: int | None = None,
+    ) -> str:
+        normalized = [
+            {"role": str(message.get("role", "")), "content": _normalize_content(message.get("content"))}
+            for message in messages
+        ]
+        encoded = json.dumps(
+            [provider, model, max_tokens, normalized], ensure_ascii=False, separators=(",", ":")
+        ).encode("utf-8")
+        return hashlib.sha256(encoded).hexdigest()
+
+    def get(self, key: str) -> str | None:
+        entry = self._entries.get(key)
+        if entry is None and self._connection is not None:
+            entry = self._load(key)
+        if entry is None:
+            self._inc("llm_cache.misses")
+            return None
+        self._inc("llm_cache.hits")
+        self._inc("llm_cache.saved_tokens", entry.tokens)
+        self._inc("llm_cache.saved_ms", int(entry.latency_ms))
+        return entry.text
+
+    def put(self, key: str, text: str, *, messages: list[dict[str, Any]], latency_ms: float) -> None:
+        if not text.strip():
+            return
+        prompt_chars = sum(len(_normalize_content(message.get("content"))) for message in messages)
+        entry = CachedResponse(
+            text=text,
+            tokens=(prompt_chars + len(text)) // _CHARS_PER_TOKEN,
+            latency_ms=latency_ms,
+        )
+        expires_at = self._clock() + self._ttl
+        self._entries.put(key, entry, self._ttl, expires_at=expires_at)
+        if self._connection is None:
+            return
+        try:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO llm_responses (key, text, tokens, latency_ms, expires_at) VALUES (?, ?, ?, ?, ?)",
+                (key, entry.text, entry.tokens, entry.latency_ms, expires_at),
+            )
+            self._connection.commit()
+        except sqlite3.Error:
+            LOGGER.warning("LLM response cache: failed to persist entry", exc_info=True)
+
+    async def get_or_generate(
+        self,
+        *,
+        provider: str,
+        model: str,
+        messages: list[dict[str, Any]],
+        generate: Callable[[], Awaitable[str]],
+        max_tokens: int | None = None,
+    ) -> str:
+        key = self.make_key(provider=provider, model=model, messages=messages, max_tokens=max_tokens)
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+        started = time.monotonic()
+        text = await generate()
+        self.put(key, text, messages=messages, latency_ms=(time.monotonic() - started) * 1000)
+        return text
+
+    def close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _load(self, key: str) -> CachedResponse | None:
+        assert self._connection is not None
+        try:
+            row = self._connection.execute(
+                "SELECT text, tokens, latency_ms, expires_at FROM llm_responses WHERE key = ?",
+                (key,),
+            ).fetchone()
+        except sqlite3.Error:
+            LOGGER.warning("LLM response cache: failed to read entry", exc_info=True)
+            return None
+        if row is None or row[3] <= self._clock():
+            return None
+        entry = CachedResponse(text=row[0], tokens=int(row[1]), latency_ms=float(row[2]))
+        self._entries.put(key, entry, 0, expires_at=row[3])
+        return entry
+
+    def _inc(self, name: str, value: int = 1) -> None:
+        if self._metrics is not None and value > 0:
+            self._metrics.inc(name, value)
+
+
+def _normalize_content(content: object) -> str:
+    if not isinstance(content, str):
+        return json.dumps(content, ensure_ascii=False, sort_keys=True, default=str)
+    lines = content.replace("\r\n", "\n").strip().split("\n")
+    return "\n".join(line.rstrip() for line in lines)
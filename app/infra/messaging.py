@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import logging
+import time
 from typing import Iterable
 
 from telegram import Update
@@ -76,27 +77,35 @@ async def safe_edit_text(
     context: ContextTypes.DEFAULT_TYPE | None,
     text: str | None,
     reply_markup=None,
+    *,
+    target=None,
 ) -> int:
+    """Edit the callback message, or ``target`` (a message the bot sent) when given."""
     message = update.effective_message if update else None
     callback_query = update.callback_query if update else None
-    if not message or not callback_query:
+    if target is not None:
+        edit = target.edit_text
+    elif message and callback_query:
+        edit = callback_query.edit_message_text
+    else:
         return await safe_send_text(update, context, text, reply_markup=reply_markup)
     payload = text if text and text.strip() else EMPTY_MESSAGE_PLACEHOLDER
     chunks = chunk_text(payload, max_len=MAX_CHUNK_SIZE)
     if not chunks:
         return 0
     try:
-        await callback_query.edit_message_text(chunks[0], reply_markup=reply_markup)
+        await edit(chunks[0], reply_markup=reply_markup)
 
     except BadRequest as exc:
         msg = str(exc)
         # Нормально для устаревших кнопок (callback уже протух).
         if "Message is not modified" in msg:
             LOGGER.info("Telegram edit skipped (message not modified): %s", msg)
-            try:
-                await callback_query.answer("Сообщение уже актуально.")
-            except BadRequest as answer_exc:
-                LOGGER.debug("Failed to answer callback query after edit skip: %s", answer_exc)
+            if callback_query is not None and target is None:
+                try:
+                    await callback_query.answer("Сообщение уже актуально.")
+                except BadRequest as answer_exc:
+                    LOGGER.debug("Failed to answer callback query after edit skip: %s", answer_exc)
             add_response_size(context, len(payload))
             return len(payload)
         if "Query is too old" in msg or "response timeout expired" in msg or "query id is invalid" in msg:
@@ -107,7 +116,7 @@ async def safe_edit_text(
             LOGGER.exception("Failed to edit message text: %s", exc)
         # Fallback: ответить реплаем (или, если реплай не выйдет — обычным send_message).
         try:
-            await _send_chunks(message, chunks, reply_markup=reply_markup)
+            await _send_chunks(message or target, chunks, reply_markup=reply_markup)
         except Exception:
             LOGGER.exception("Fallback reply_text failed; trying bot.send_message")
             if update is not None and context is not None and getattr(update, "effective_chat", None):
@@ -116,11 +125,102 @@ async def safe_edit_text(
         add_response_size(context, len(payload))
         return len(payload)
     if len(chunks) > 1:
-        await _send_chunks(message, chunks[1:])
+        await _send_chunks(message or target, chunks[1:])
     add_response_size(context, len(payload))
     return len(payload)
 
 
+class StreamingReply:
+    """Placeholder reply that is progressively edited while an answer streams in.
+
+    ``update()`` is cheap to call for every delta: edits are throttled to one per
+    ``interval_seconds`` and skipped until at least ``min_growth`` new characters
+    arrived. The final text is delivered separately (see ``send_result``).
+    """
+
+    def __init__(
+        self,
+        update: Update,
+        context: ContextTypes.DEFAULT_TYPE | None,
+        *,
+        placeholder: str = "⏳ Думаю…",
+        interval_seconds: float = 1.0,
+        min_growth: int = 40,
+    ) -> None:
+        self._update = update
+        self._context = context
+        self._placeholder = placeholder
+        self._interval = interval_seconds
+        self._min_growth = min_growth
+        self._last_edit = 0.0
+        self._shown = ""
+        self.message = None
+        self.failed = False
+
+    async def update(self, text: str) -> None:
+        if self.failed:
+            return
+        try:
+            if self.message is None:
+                source = self._update.effective_message
+                if source is None:
+                    self.failed = True
+                    return
+                self.message = await source.reply_text(self._placeholder)
+                self._last_edit = time.monotonic()
+                return
+            preview = text.strip()
+            if preview.startswith(("{", "[")):
+                return
+            now = time.monotonic()
+            if now - self._last_edit < self._interval or len(preview) - len(self._shown) < self._min_growth:
+                return
+            if len(preview) > MAX_CHUNK_SIZE:
+                preview = preview[: MAX_CHUNK_SIZE - 1].rstrip() + "…"
+            await self.message.edit_text(f"{preview} ▌")
+            self._shown = preview
+            self._last_edit = now
+        except Exception:
+            # Progress edits are best effort; the final answer is still sent in full.
+            LOGGER.warning("Streaming progress edit failed", exc_info=True)
+            self.failed = self.message is None
+
+    async def status(self, text: str, *, force: bool = False) -> None:
+        """Show a progress line as is (no growth check, no cursor); throttled unless ``force``."""
+        if self.failed:
+            return
+        try:
+            if self.message is None:
+                source = self._update.effective_message
+                if source is None:
+                    self.failed = True
+                    return
+                self.message = await source.reply_text(text)
+                self._shown = text
+                self._last_edit = time.monotonic()
+                return
+            now = time.monotonic()
+            if text == self._shown or (not force and now - self._last_edit < self._interval):
+                return
+            await self.message.edit_text(text)
+            self._shown = text
+            self._last_edit = now
+        except Exception:
+            LOGGER.warning("Progress status edit failed", exc_info=True)
+            self.failed = self.message is None
+
+    async def discard(self) -> None:
+        """Delete the placeholder, e.g. when the request failed and the error goes out as a new message."""
+        message, self.message = self.message, None
+        self.failed = True
+        if message is None:
+            return
+        try:
+            await message.delete()
+        except Exception:
+            LOGGER.warning("Streaming placeholder delete failed", exc_info=True)
+
+
 async def safe_send_bot_text(bot, chat_id: int, text: str | None, reply_markup=None) -> int:
     payload = text if text and text.strip() else EMPTY_MESSAGE_PLACEHOLDER
     chunks = chunk_text(payload, max_len=MAX_CHUNK_SIZE)
@@ -1,7 +1,7 @@
 """
 Simple metrics collector for Prometheus-style /metrics. Created only when OBS is enabled.
 API: enabled, record_update, record_error, record_request_duration, update_uptime,
-     update_active_wizards, get_metrics_text. All methods no-op when disabled; no global registry.
+     update_active_wizards, inc, set_gauge, get_metrics_text. All methods no-op when disabled; no global registry.
 """
 
 from __future__ import annotations
@@ -28,6 +28,7 @@ class MetricsCollector:
         self._start_time = time.monotonic()
         self._uptime_seconds: float = 0.0
         self._active_wizards: int = 0
+        self._gauges: dict[str, float] = {}
 
     def record_update(self, update_type: str) -> None:
         if not self.enabled:
@@ -99,6 +100,11 @@ class MetricsCollector:
             lines.append("# HELP msb_active_wizards Active wizards count")
             lines.append("# TYPE msb_active_wizards gauge")
             lines.append(f"msb_active_wizards {self._active_wizards}")
+            for key in sorted(self._gauges.keys()):
+                name = "msb_" + key.replace(".", "_")
+                lines.append(f"# HELP {name} Gauge")
+                lines.append(f"# TYPE {name} gauge")
+                lines.append(f"{name} {self._gauges[key]}")
             return "\n".join(lines) + "\n" if lines else ""
 
     def inc(self, name: str, value: int = 1) -> None:
@@ -107,6 +113,16 @@ class MetricsCollector:
         with self._lock:
             self._counters[name] += value
 
+    def set_gauge(self, name: str, value: float) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._gauges[name] = value
+
+    def get_gauges(self) -> dict[str, float]:
+        with self._lock:
+            return dict(self._gauges)
+
     def get_counters(self) -> dict[str, int]:
         with self._lock:
             return dict(self._counters)
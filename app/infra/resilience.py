@@ -191,6 +191,11 @@ class CircuitBreaker:
             return True, None
         return True, None
 
+    def release(self) -> None:
+        """Give back an allowed request that was never made (no outcome is recorded)."""
+        if self._state == "half_open":
+            self._half_open_in_flight = False
+
     def record_success(self) -> str | None:
         if self._state == "half_open":
             self._state = "closed"
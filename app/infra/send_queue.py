@@ -0,0 +1,429 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import sqlite3
+import time
+import warnings
+from collections import deque
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from datetime import timedelta
+from pathlib import Path
+from typing import Any
+
+from telegram import InlineKeyboardMarkup
+from telegram.error import BadRequest, Forbidden, NetworkError, RetryAfter
+
+from app.infra.messaging import EMPTY_MESSAGE_PLACEHOLDER, MAX_CHUNK_SIZE, chunk_text
+
+LOGGER = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Classic token bucket: ``rate`` tokens per second, at most ``capacity`` stored."""
+
+    def __init__(self, rate: float, capacity: float | None = None, *, clock: Callable[[], float] = time.time) -> None:
+        self._rate = max(0.001, rate)
+        self._capacity = max(1.0, capacity if capacity is not None else rate)
+        self._clock = clock
+        self._tokens = self._capacity
+        self._updated = clock()
+
+    def delay(self) -> float:
+        """Seconds until one token is available (0 when it can be taken now)."""
+        now = self._clock()
+        self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+        if self._tokens >= 1:
+            return 0.0
+        return (1 - self._tokens) / self._rate
+
+    def take(self) -> None:
+        self._tokens -= 1
+
+    @property
+    def full(self) -> bool:
+        self.delay()
+        return self._tokens >= self._capacity
+
+
+@dataclass
+class _Delivery:
+    """Chunks of one submitted text; ``on_delivered`` runs once all of them were sent.
+
+    ``on_failed`` runs instead when any chunk was dropped for good.
+    """
+
+    remaining: int
+    on_delivered: Callable[[], Awaitable[None]] | None = None
+    on_failed: Callable[[], Awaitable[None]] | None = None
+    key: str | None = None
+    failed: bool = False
+
+
+@dataclass
+class OutboundMessage:
+    chat_id: int
+    text: str
+    reply_markup: dict[str, Any] | None = None
+    kind: str = "message"
+    attempts: int = 0
+    not_before: float = 0.0
+    row_id: int | None = None
+    delivery: _Delivery | None = None
+
+
+class OutboundSendQueue:
+    """Rate-aware queue for bot-initiated messages (reminders, digests).
+
+    Sends run concurrently across chats (up to ``concurrency`` in flight) but stay
+    ordered within a chat. A global token bucket keeps the bot under Telegram's
+    ~30 msg/s limit and a per-chat bucket under ~1 msg/s per chat. ``RetryAfter``
+    postpones the chat (and the whole queue) for the requested time and requeues the
+    message; network errors are retried with backoff up to ``max_attempts``.
+    ``submit`` waits while ``max_pending`` messages are queued (backpressure).
+    ``on_delivered`` runs only after every chunk was sent, so callers record a
+    reminder or digest as delivered only then, and ``on_failed`` once a message was
+    dropped (blocked chat, bad request, retries exhausted) so they can stop re-sending
+    it; ``key`` lets them skip a message that is still queued. With ``persist_path`` pending messages without ``on_delivered``
+    are kept in SQLite until delivered and are reloaded by ``start()`` after a
+    restart, without inline buttons (their callback tokens live in memory only).
+    Messages with ``on_delivered`` are not persisted: their owner has not marked
+    them sent and submits them again after a restart.
+    """
+
+    def __init__(
+        self,
+        bot: Any,
+        *,
+        global_per_second: float = 30.0,
+        per_chat_per_second: float = 1.0,
+        per_chat_burst: int = 3,
+        concurrency: int = 8,
+        max_pending: int = 5000,
+        max_attempts: int = 5,
+        persist_path: Path | None = None,
+        metrics: object | None = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self._bot = bot
+        self._clock = clock
+        self._global = TokenBucket(global_per_second, global_per_second, clock=clock)
+        self._per_chat_rate = per_chat_per_second
+        self._per_chat_burst = max(1, per_chat_burst)
+        self._chat_buckets: dict[int, TokenBucket] = {}
+        self._concurrency = max(1, concurrency)
+        self._max_pending = max(1, max_pending)
+        self._max_attempts = max(1, max_attempts)
+        self._metrics = metrics
+        self._chats: dict[int, deque[OutboundMessage]] = {}
+        self._ready: deque[int] = deque()
+        self._busy: set[int] = set()
+        self._sending: set[asyncio.Task[None]] = set()
+        self._callbacks: set[asyncio.Task[None]] = set()
+        self._keys: dict[str, int] = {}
+        self._pending = 0
+        self._paused_until = 0.0
+        self._wakeup = asyncio.Event()
+        self._changed = asyncio.Condition()
+        self._task: asyncio.Task[None] | None = None
+        self._db: sqlite3.Connection | None = None
+        if persist_path is not None:
+            persist_path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(persist_path), check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS outbound_messages ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, chat_id INTEGER NOT NULL, text TEXT NOT NULL, "
+                "reply_markup TEXT, kind TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, "
+                "not_before REAL NOT NULL DEFAULT 0)"
+            )
+            self._db.commit()
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def is_pending(self, key: str) -> bool:
+        return key in self._keys
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._wakeup = asyncio.Event()
+        self._changed = asyncio.Condition()
+        if self._db is not None and not self._chats:
+            rows = self._db.execute(
+                "SELECT id, chat_id, text, kind, attempts, not_before FROM outbound_messages ORDER BY id"
+            ).fetchall()
+            for row_id, chat_id, text, kind, attempts, not_before in rows:
+                self._enqueue(
+                    OutboundMessage(
+                        chat_id=int(chat_id),
+                        text=str(text),
+                        kind=str(kind),
+                        attempts=int(attempts),
+                        not_before=float(not_before),
+                        row_id=int(row_id),
+                    )
+                )
+            if rows:
+                LOGGER.info("Send queue restored pending messages: count=%s", len(rows))
+        self._task = asyncio.create_task(self._run(), name="send-queue")
+
+    async def stop(self) -> None:
+        """Stop sending; undelivered messages stay persisted for the next start."""
+        task, self._task = self._task, None
+        for sending in list(self._sending):
+            sending.cancel()
+        if self._sending:
+            await asyncio.gather(*self._sending, return_exceptions=True)
+        if self._callbacks:
+            await asyncio.gather(*self._callbacks, return_exceptions=True)
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    async def submit(
+        self,
+        chat_id: int,
+        text: str | None,
+        *,
+        reply_markup: InlineKeyboardMarkup | dict[str, Any] | None = None,
+        kind: str = "message",
+        key: str | None = None,
+        on_delivered: Callable[[], Awaitable[None]] | None = None,
+        on_failed: Callable[[], Awaitable[None]] | None = None,
+    ) -> bool:
+        """Queue a message (split into Telegram-sized chunks, markup on the first one).
+
+        Returns False without queueing when a message with the same ``key`` is still pending.
+        """
+        payload = text if text and text.strip() else EMPTY_MESSAGE_PLACEHOLDER
+        markup = reply_markup.to_dict() if isinstance(reply_markup, InlineKeyboardMarkup) else reply_markup
+        chunks = chunk_text(payload, max_len=MAX_CHUNK_SIZE)
+        async with self._changed:
+            await self._changed.wait_for(lambda: self._pending < self._max_pending)
+            if key is not None and key in self._keys:
+                return False
+            delivery = _Delivery(remaining=len(chunks), on_delivered=on_delivered, on_failed=on_failed, key=key)
+            if key is not None:
+                self._keys[key] = len(chunks)
+            for index, chunk in enumerate(chunks):
+                message = OutboundMessage(
+                    chat_id=chat_id,
+                    text=chunk,
+                    reply_markup=markup if index == 0 else None,
+                    kind=kind,
+                    delivery=delivery,
+                )
+                if on_delivered is None:
+                    self._persist(message)
+                self._enqueue(message)
+        self._inc(f"send_queue.submitted.{kind}")
+        self._wakeup.set()
+        return True
+
+    async def join(self) -> None:
+        """Wait until every queued message was delivered or dropped."""
+        async with self._changed:
+            await self._changed.wait_for(lambda: self._pending == 0)
+
+    def _enqueue(self, message: OutboundMessage) -> None:
+        queue = self._chats.get(message.chat_id)
+        if queue is None:
+            queue = self._chats[message.chat_id] = deque()
+            self._ready.append(message.chat_id)
+        queue.append(message)
+        self._pending += 1
+        self._set_gauge()
+
+    async def _run(self) -> None:
+        while True:
+            self._wakeup.clear()
+            delay = self._dispatch_ready()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+            except TimeoutError:
+                pass
+
+    def _dispatch_ready(self) -> float | None:
+        """Start every send allowed right now; return how long to sleep (None: until woken)."""
+        now = self._clock()
+        if now < self._paused_until:
+            return self._paused_until - now
+        next_delay: float | None = None
+        for _ in range(len(self._ready)):
+            if len(self._busy) >= self._concurrency:
+                return next_delay
+            chat_id = self._ready[0]
+            if chat_id not in self._chats:
+                self._ready.popleft()  # drained chat, removed lazily
+                continue
+            self._ready.rotate(-1)
+            if chat_id in self._busy:
+                continue
+            message = self._chats[chat_id][0]
+            bucket = self._chat_buckets.get(chat_id)
+            if bucket is None:
+                bucket = self._chat_buckets[chat_id] = TokenBucket(
+                    self._per_chat_rate, self._per_chat_burst, clock=self._clock
+                )
+            wait = max(message.not_before - now, bucket.delay())
+            if wait > 0:
+                next_delay = wait if next_delay is None else min(next_delay, wait)
+                continue
+            global_wait = self._global.delay()
+            if global_wait > 0:
+                return global_wait if next_delay is None else min(next_delay, global_wait)
+            self._global.take()
+            bucket.take()
+            self._busy.add(chat_id)
+            task = asyncio.create_task(self._send(message), name=f"send-queue:{chat_id}")
+            self._sending.add(task)
+            task.add_done_callback(self._sending.discard)
+        return next_delay
+
+    async def _send(self, message: OutboundMessage) -> None:
+        delivered = False
+        try:
+            markup = InlineKeyboardMarkup.de_json(message.reply_markup, self._bot) if message.reply_markup else None
+            await self._bot.send_message(chat_id=message.chat_id, text=message.text, reply_markup=markup)
+            delivered = True
+            self._inc(f"send_queue.sent.{message.kind}")
+        except RetryAfter as exc:
+            seconds = _retry_after_seconds(exc)
+            LOGGER.warning("Send queue flood control: chat_id=%s retry_after=%.1fs", message.chat_id, seconds)
+            self._inc("send_queue.retry_after")
+            self._paused_until = max(self._paused_until, self._clock() + seconds)
+            self._retry_later(message, seconds, count_attempt=False)
+            return
+        except (Forbidden, BadRequest):
+            LOGGER.warning("Send queue dropped message: chat_id=%s kind=%s", message.chat_id, message.kind, exc_info=True)
+            self._inc(f"send_queue.dropped.{message.kind}")
+        except NetworkError:
+            if message.attempts + 1 < self._max_attempts:
+                self._retry_later(message, float(2 ** message.attempts), count_attempt=True)
+                return
+            LOGGER.exception("Send queue gave up: chat_id=%s kind=%s", message.chat_id, message.kind)
+            self._inc(f"send_queue.dropped.{message.kind}")
+        except asyncio.CancelledError:
+            self._busy.discard(message.chat_id)
+            raise
+        except Exception:
+            LOGGER.exception("Send queue send failed: chat_id=%s kind=%s", message.chat_id, message.kind)
+            self._inc(f"send_queue.dropped.{message.kind}")
+        self._complete(message, delivered=delivered)
+
+    def _retry_later(self, message: OutboundMessage, seconds: float, *, count_attempt: bool) -> None:
+        if count_attempt:
+            message.attempts += 1
+            self._inc("send_queue.retries")
+        message.not_before = self._clock() + seconds
+        if self._db is not None and message.row_id is not None:
+            self._db.execute(
+                "UPDATE outbound_messages SET attempts = ?, not_before = ? WHERE id = ?",
+                (message.attempts, message.not_before, message.row_id),
+            )
+            self._db.commit()
+        self._busy.discard(message.chat_id)
+        self._wakeup.set()
+
+    def _complete(self, message: OutboundMessage, *, delivered: bool) -> None:
+        queue = self._chats[message.chat_id]
+        queue.popleft()
+        if not queue:
+            del self._chats[message.chat_id]
+            bucket = self._chat_buckets.get(message.chat_id)
+            if bucket is not None and bucket.full:
+                del self._chat_buckets[message.chat_id]
+        if self._db is not None and message.row_id is not None:
+            self._db.execute("DELETE FROM outbound_messages WHERE id = ?", (message.row_id,))
+            self._db.commit()
+        self._busy.discard(message.chat_id)
+        self._pending -= 1
+        self._settle(message, delivered=delivered)
+        self._set_gauge()
+        self._wakeup.set()
+        asyncio.get_running_loop().create_task(self._notify_changed())
+
+    def _settle(self, message: OutboundMessage, *, delivered: bool) -> None:
+        delivery = message.delivery
+        if delivery is None:
+            return
+        delivery.remaining -= 1
+        delivery.failed = delivery.failed or not delivered
+        if delivery.key is not None:
+            left = self._keys.get(delivery.key, 0) - 1
+            if left > 0:
+                self._keys[delivery.key] = left
+            else:
+                self._keys.pop(delivery.key, None)
+        if delivery.remaining > 0:
+            return
+        callback = delivery.on_failed if delivery.failed else delivery.on_delivered
+        if callback is None:
+            return
+        task = asyncio.get_running_loop().create_task(self._run_callback(message, callback))
+        self._callbacks.add(task)
+        task.add_done_callback(self._callbacks.discard)
+
+    async def _run_callback(self, message: OutboundMessage, callback: Callable[[], Awaitable[None]]) -> None:
+        try:
+            await callback()
+        except Exception:
+            LOGGER.exception("Send queue delivery callback failed: chat_id=%s kind=%s", message.chat_id, message.kind)
+
+    async def _notify_changed(self) -> None:
+        async with self._changed:
+            self._changed.notify_all()
+
+    def _persist(self, message: OutboundMessage) -> None:
+        if self._db is None:
+            return
+        cursor = self._db.execute(
+            "INSERT INTO outbound_messages (chat_id, text, kind, attempts, not_before) VALUES (?, ?, ?, ?, ?)",
+            (
+                message.chat_id,
+                message.text,
+                message.kind,
+                message.attempts,
+                message.not_before,
+            ),
+        )
+        self._db.commit()
+        message.row_id = cursor.lastrowid
+
+    def _inc(self, name: str) -> None:
+        inc = getattr(self._metrics, "inc", None)
+        if callable(inc):
+            inc(name)
+
+    def _set_gauge(self) -> None:
+        set_gauge = getattr(self._metrics, "set_gauge", None)
+        if callable(set_gauge):
+            set_gauge("send_queue.pending", self._pending)
+
+
+def _retry_after_seconds(exc: RetryAfter) -> float:
+    with warnings.catch_warnings():
+        # PTB 22 warns that the int form is deprecated in favour of timedelta.
+        warnings.simplefilter("ignore")
+        value = exc.retry_after
+    return value.total_seconds() if isinstance(value, timedelta) else float(value)
+
+
+def get_send_queue(application: Any) -> OutboundSendQueue | None:
+    queue = getattr(application, "bot_data", {}).get("send_queue")
+    return queue if isinstance(queue, OutboundSendQueue) and queue.running else None
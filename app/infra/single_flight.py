@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Generic, TypeVar
+
+from app.infra.observability.metrics import MetricsCollector
+
+LOGGER = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class SingleFlight(Generic[T]):
+    """Coalesce concurrent identical calls: callers with the same key await one shared task.
+
+    Each caller waits through ``asyncio.shield``, so one caller's timeout or
+    cancellation does not cancel the call the others are waiting for. The shared
+    call is cancelled only when every caller has gone. Results are not kept after
+    the call finishes; this is not a cache.
+    """
+
+    def __init__(self, name: str, *, metrics: MetricsCollector | None = None) -> None:
+        self._name = name
+        self._metrics = metrics
+        self._calls: dict[Hashable, asyncio.Task[T]] = {}
+        self._waiters: dict[Hashable, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: Hashable, call: Callable[[], Awaitable[T]]) -> T:
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(call())
+            self._calls[key] = task
+            self._waiters[key] = 0
+            task.add_done_callback(lambda done, key=key: self._forget(key, done))
+            self._inc("leaders")
+        else:
+            self._inc("coalesced")
+        self._set_inflight()
+        self._waiters[key] += 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if not task.done() and self._calls.get(key) is task and self._waiters[key] == 1:
+                # Last waiter left: drop the call so a new caller starts a fresh one.
+                del self._calls[key]
+                del self._waiters[key]
+                task.cancel()
+            raise
+        finally:
+            if self._calls.get(key) is task:
+                self._waiters[key] -= 1
+
+    def _forget(self, key: Hashable, task: asyncio.Task[T]) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+            del self._waiters[key]
+        if not task.cancelled() and task.exception() is not None:
+            # Retrieved here so an exception nobody awaited anymore is not reported as lost.
+            LOGGER.debug("Single-flight call failed: name=%s error=%r", self._name, task.exception())
+        self._set_inflight()
+
+    def _inc(self, suffix: str) -> None:
+        if self._metrics is not None:
+            self._metrics.inc(f"single_flight.{self._name}.{suffix}")
+
+    def _set_inflight(self) -> None:
+        if self._metrics is not None:
+            self._metrics.set_gauge(f"single_flight.{self._name}.inflight", len(self._calls))
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import Generic, TypeVar
+
+T = TypeVar("T")
+
+
+class TTLCache(Generic[T]):
+    """LRU of at most ``max_entries`` values, each with its own expiry time."""
+
+    def __init__(self, max_entries: int, *, clock: Callable[[], float] = time.time) -> None:
+        self._max_entries = max(1, max_entries)
+        self._clock = clock
+        self._entries: OrderedDict[object, tuple[float, T]] = OrderedDict()
+
+    def get(self, key: object) -> T | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= self._clock():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: object, value: T, ttl_seconds: float, *, expires_at: float | None = None) -> None:
+        if expires_at is None:
+            expires_at = self._clock() + ttl_seconds
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -27,6 +27,7 @@ class UserProfileStore:
         self._db_path = db_path
         self._connection = sqlite3.connect(db_path, check_same_thread=False)
         self._connection.row_factory = sqlite3.Row
+        self._timezones: dict[int, str] | None = None
         self._ensure_schema()
 
     def _ensure_schema(self) -> None:
@@ -126,6 +127,28 @@ class UserProfileStore:
         result.sort()
         return result
 
+    def timezones(self) -> dict[int, str]:
+        """Profile timezone of every user, read in one query and cached until the next save."""
+        if self._timezones is None:
+            cursor = self._connection.execute(
+                "SELECT user_id, schema_version, payload, updated_at FROM user_profiles"
+            )
+            result: dict[int, str] = {}
+            for row in cursor.fetchall():
+                user_id = row["user_id"]
+                if not isinstance(user_id, int):
+                    continue
+                payload, _, updated_at = self._load_payload(row)
+                normalized = normalize_profile_payload(
+                    payload,
+                    user_id=user_id,
+                    created_at=updated_at,
+                    updated_at=updated_at,
+                )
+                result[user_id] = normalized["timezone"]
+            self._timezones = result
+        return dict(self._timezones)
+
     def _fetch_row(self, user_id: int) -> sqlite3.Row | None:
         cursor = self._connection.execute(
             """
@@ -176,6 +199,7 @@ class UserProfileStore:
             ),
         )
         self._connection.commit()
+        self._timezones = None
 
     def _migrate_payload(
         self,
@@ -12,9 +12,11 @@ from telegram.ext import Application, CallbackQueryHandler, CommandHandler, Mess
 from telegram.warnings import PTBUserWarning
 
 from app.bot import actions, handlers, wizard
-from app.core import calendar_store
+from app.core import calendar_storage, calendar_store
+from app.core.extraction_executor import ExtractionExecutor, ExtractionPoolConfig
 from app.core.orchestrator import Orchestrator, load_orchestrator_config
-from app.core.reminders import ReminderScheduler, run_daily_digest, _get_digest_time
+from app.core.reminder_scheduler import ReminderDispatcher
+from app.core.reminders import ReminderScheduler, run_daily_digest, _get_digest_time, _get_digest_window_seconds
 from app.core.dialog_memory import DialogMemory
 from app.core.memory_manager import MemoryManager, UserActionsLog, UserProfileMemory
 from app.infra.access import AccessController
@@ -24,10 +26,15 @@ from app.infra.config import StartupFeatures, load_settings, resolve_env_label,
 from app.infra.user_profile_store import UserProfileStore
 from app.infra.request_context import RequestContext, log_event
 from app.infra.version import resolve_app_version
-from app.infra.llm import OpenAIClient, PerplexityClient
+from app.infra.llm import HTTPPoolConfig, LLMRoute, LLMRouter, OpenAIClient, PerplexityClient, SharedHTTPClient
+from app.infra.fair_limiter import FairLimiterRegistry
+from app.infra.llm_cache import LLMResponseCache
+from app.infra.observability.metrics import MetricsCollector
 from app.infra.rate_limit import RateLimiter as LLMRateLimiter
 from app.infra.rate_limiter import RateLimiter
+from app.infra.document_cache import DocumentCache
 from app.infra.document_session_store import DocumentSessionStore
+from app.infra.send_queue import OutboundSendQueue
 from app.infra.resilience import (
     CircuitBreakerRegistry,
     load_circuit_breaker_config,
@@ -38,7 +45,7 @@ from app.infra.storage import TaskStorage
 from app.infra.last_state_store import LastStateStore
 from app.infra.trace_store import TraceStore
 from app.infra.draft_store import DraftStore
-from app.tools import NullSearchClient, PerplexityWebSearchClient
+from app.tools import NullSearchClient, PerplexityWebSearchClient, WebSearchCache
 from app.storage.wizard_store import WizardStore
 
 
@@ -143,12 +150,35 @@ def main() -> None:
     openai_client = None
     search_client = NullSearchClient()
     perplexity_client = None
+    web_http = SharedHTTPClient(HTTPPoolConfig(max_connections=max(1, settings.web_search_fetch_concurrency) * 2))
+    metrics = MetricsCollector(enabled=settings.obs_http_enabled)
+    web_search_cache = WebSearchCache(
+        max_entries=settings.web_search_cache_max_entries,
+        metadata_ttl_seconds=settings.web_search_cache_ttl_seconds,
+        query_ttl_seconds=settings.web_search_query_cache_ttl_seconds,
+        persist_path=settings.web_search_cache_path,
+        metrics=metrics,
+    )
+    llm_response_cache = LLMResponseCache(
+        max_entries=settings.llm_cache_max_entries,
+        ttl_seconds=settings.llm_cache_ttl_seconds,
+        persist_path=settings.llm_cache_path,
+        metrics=metrics,
+    )
+    llm_http = SharedHTTPClient(
+        HTTPPoolConfig(
+            max_connections=settings.llm_http_max_connections,
+            keepalive_expiry=settings.llm_http_keepalive_seconds,
+            http2=settings.llm_http2,
+        )
+    )
     if settings.openai_api_key:
         openai_client = OpenAIClient(
             api_key=settings.openai_api_key,
             model=settings.openai_model,
             timeout_seconds=timeouts.llm_seconds,
             max_retries=0,
+            http_client=llm_http,
         )
         llm_client = openai_client
     elif settings.perplexity_api_key:
@@ -157,13 +187,48 @@ def main() -> None:
             base_url=settings.perplexity_base_url,
             timeout_seconds=timeouts.llm_seconds,
             max_retries=0,
+            http_client=llm_http,
         )
         llm_client = perplexity_client
+    llm_concurrency = FairLimiterRegistry(
+        max_concurrency=settings.llm_max_concurrency,
+        max_per_user=settings.llm_max_concurrency_per_user,
+        queue_timeout_seconds=settings.llm_queue_timeout_seconds,
+        metrics=metrics,
+    )
+    llm_router = None
+    if openai_client is not None and settings.perplexity_api_key:
+        llm_router = LLMRouter(
+            [
+                LLMRoute(name="openai", client=openai_client, model=settings.openai_model),
+                LLMRoute(
+                    name="perplexity",
+                    client=PerplexityClient(
+                        api_key=settings.perplexity_api_key,
+                        base_url=settings.perplexity_base_url,
+                        timeout_seconds=timeouts.llm_seconds,
+                        max_retries=0,
+                        http_client=llm_http,
+                    ),
+                    model=settings.perplexity_model,
+                ),
+            ],
+            circuit_breakers=circuit_breakers,
+            hedge=settings.llm_hedge_enabled,
+            hedge_after_seconds=settings.llm_hedge_after_seconds,
+            metrics=metrics,
+            concurrency_limits=llm_concurrency,
+        )
+        llm_client = llm_router
     if settings.perplexity_api_key and perplexity_client is not None:
         search_client = PerplexityWebSearchClient(
             perplexity_client,
             model=settings.perplexity_model,
             timeout_seconds=timeouts.external_api_seconds,
+            http_client=web_http,
+            max_concurrency=settings.web_search_fetch_concurrency,
+            deadline_seconds=settings.web_search_deadline_seconds,
+            cache=web_search_cache,
         )
     config_allowlist_ids = extract_allowed_user_ids(config)
     initial_allowlist_ids = settings.allowed_user_ids or config_allowlist_ids
@@ -197,6 +262,9 @@ def main() -> None:
         timeouts=timeouts,
         retry_policy=retry_policy,
         circuit_breakers=circuit_breakers,
+        response_cache=llm_response_cache,
+        metrics=metrics,
+        concurrency_limits=llm_concurrency,
     )
     dialog_memory = DialogMemory(
         settings.dialog_memory_path,
@@ -205,8 +273,30 @@ def main() -> None:
     asyncio.run(dialog_memory.load())
     settings.uploads_path.mkdir(parents=True, exist_ok=True)
     settings.document_texts_path.mkdir(parents=True, exist_ok=True)
-    document_store = DocumentSessionStore(settings.document_sessions_path)
+    document_cache = DocumentCache(
+        settings.document_cache_path,
+        max_bytes=settings.document_cache_max_bytes,
+        variant=(
+            f"pages={settings.doc_max_pages};chars={settings.doc_max_chars};"
+            f"ocr={settings.ocr_enabled}:{settings.tesseract_lang}"
+        ),
+    )
+    document_cache.load()
+    document_store = DocumentSessionStore(
+        settings.document_sessions_path,
+        on_session_removed=lambda session: document_cache.release(session.doc_id),
+    )
     document_store.load()
+    document_cache.retain_sessions(document_store.session_ids())
+    extraction_executor = ExtractionExecutor(
+        ExtractionPoolConfig(
+            workers=settings.extraction_workers,
+            timeout_seconds=settings.extraction_timeout_seconds,
+            max_queue=settings.extraction_max_queue,
+            use_processes=settings.extraction_use_processes,
+        ),
+        metrics=metrics,
+    )
     profile_store = UserProfileStore(settings.db_path)
     actions_log_store = ActionsLogStore(settings.db_path)
     memory_manager = MemoryManager(
@@ -217,10 +307,23 @@ def main() -> None:
 
     warnings.filterwarnings("ignore", message="No JobQueue set up", category=PTBUserWarning)
     application = Application.builder().token(settings.bot_token).build()
+    send_queue = OutboundSendQueue(
+        application.bot,
+        global_per_second=settings.send_queue_global_per_second,
+        per_chat_per_second=settings.send_queue_per_chat_per_second,
+        concurrency=settings.send_queue_concurrency,
+        max_pending=settings.send_queue_max_pending,
+        persist_path=settings.send_queue_path,
+        metrics=metrics,
+    )
+    application.bot_data["send_queue"] = send_queue
+    reminder_dispatcher = ReminderDispatcher(application, metrics=metrics)
     reminder_scheduler = ReminderScheduler(
         application=application,
         max_future_days=settings.reminder_max_future_days,
+        dispatcher=reminder_dispatcher,
     )
+    application.bot_data["reminder_dispatcher"] = reminder_dispatcher
     application.bot_data["reminder_scheduler"] = reminder_scheduler
     application.bot_data["orchestrator"] = orchestrator
     application.bot_data["storage"] = storage
@@ -238,21 +341,26 @@ def main() -> None:
     application.bot_data["history_size"] = settings.history_size
     application.bot_data["message_limit"] = settings.telegram_message_limit
     application.bot_data["settings"] = settings
+    application.bot_data["metrics"] = metrics
     application.bot_data["resilience_timeouts"] = timeouts
     application.bot_data["resilience_retry_policy"] = retry_policy
     application.bot_data["circuit_breakers"] = circuit_breakers
     application.bot_data["openai_client"] = openai_client
     application.bot_data["llm_client"] = llm_client
+    application.bot_data["llm_response_cache"] = llm_response_cache
     application.bot_data["start_time"] = time.monotonic()
     application.bot_data["dialog_memory"] = dialog_memory
     application.bot_data["profile_store"] = profile_store
     application.bot_data["actions_log_store"] = actions_log_store
     application.bot_data["memory_manager"] = memory_manager
     application.bot_data["document_store"] = document_store
+    application.bot_data["document_cache"] = document_cache
+    application.bot_data["extraction_executor"] = extraction_executor
     application.bot_data["last_state_store"] = LastStateStore(ttl_seconds=7 * 24 * 3600)
     application.bot_data["action_store"] = actions.ActionStore(
         ttl_seconds=settings.action_ttl_seconds,
         max_items=settings.action_max_size,
+        max_items_per_chat=settings.action_max_per_chat,
     )
     application.bot_data["draft_store"] = DraftStore(max_items=50, ttl_seconds=24 * 3600)
     application.bot_data["trace_store"] = TraceStore(max_items=20, ttl_seconds=86400)
@@ -290,29 +398,45 @@ def main() -> None:
         logging.getLogger(__name__).warning("JobQueue not configured; reminders will run without it.")
 
     async def _restore_reminders(app: Application) -> None:
+        send_queue.start()
+        dialog_memory.start_compaction()
         if not settings.reminders_enabled:
             logging.getLogger(__name__).info("Reminders disabled by config")
             return
-        await reminder_scheduler.restore_all()
+        reminder_dispatcher.start()
         if app.job_queue:
-            from datetime import time as dt_time
+            digest_time = _get_digest_time()
+            digest_window = _get_digest_window_seconds()
 
             async def _digest_job(ctx) -> None:
-                await run_daily_digest(ctx.application)
+                # Every minute: users whose local digest_time + per-user slot has passed get theirs.
+                await run_daily_digest(ctx.application, send_time=digest_time, window_seconds=digest_window)
 
-            digest_time = _get_digest_time()
-            tz_time = dt_time(digest_time.hour, digest_time.minute, tzinfo=calendar_store.BOT_TZ)
-            app.job_queue.run_daily(
-                _digest_job,
-                time=tz_time,
-                name="daily_digest",
-            )
+            app.job_queue.run_repeating(_digest_job, interval=60, first=0, name="daily_digest")
             logging.getLogger(__name__).info(
-                "Daily digest job scheduled at %02d:%02d", digest_time.hour, digest_time.minute
+                "Daily digest job scheduled at %02d:%02d (local time), window=%ss",
+                digest_time.hour,
+                digest_time.minute,
+                digest_window,
             )
 
     application.post_init = _restore_reminders
 
+    async def _shutdown(app: Application) -> None:
+        await reminder_dispatcher.stop()
+        await send_queue.stop()
+        await dialog_memory.close()
+        calendar_storage.close_calendar_storages()
+        if llm_router is not None:
+            await llm_router.aclose()
+        await llm_http.aclose()
+        await web_http.aclose()
+        web_search_cache.close()
+        llm_response_cache.close()
+        extraction_executor.shutdown()
+
+    application.post_shutdown = _shutdown
+
     _register_handlers(application)
     application.add_error_handler(handlers.error_handler)
 
@@ -1,3 +1,8 @@
-from app.tools.web_search import NullSearchClient, PerplexityWebSearchClient, SearchClient
+from app.tools.web_search import (
+    NullSearchClient,
+    PerplexityWebSearchClient,
+    SearchClient,
+    WebSearchCache,
+)
 
-__all__ = ["SearchClient", "NullSearchClient", "PerplexityWebSearchClient"]
+__all__ = ["SearchClient", "NullSearchClient", "PerplexityWebSearchClient", "WebSearchCache"]
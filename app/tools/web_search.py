@@ -1,9 +1,14 @@
 from __future__ import annotations
 
+import asyncio
 import html
 import logging
 import re
+import sqlite3
+import time
+from collections.abc import Callable
 from html.parser import HTMLParser
+from pathlib import Path
 from time import monotonic
 from typing import Protocol
 from urllib.parse import urlparse
@@ -11,10 +16,16 @@ from urllib.parse import urlparse
 import httpx
 
 from app.core.result import Source
+from app.infra.llm.http_pool import HTTPPoolConfig, SharedHTTPClient
 from app.infra.llm.perplexity import PerplexityClient
+from app.infra.observability.metrics import MetricsCollector
+from app.infra.ttl_cache import TTLCache
 
 LOGGER = logging.getLogger(__name__)
 
+_USER_AGENT = "SecretaryBot/1.0 (+web-search)"
+_MAX_HTML_CHARS = 120_000
+
 
 class SearchClient(Protocol):
     async def search(self, query: str, max_results: int = 5) -> list[Source]:
@@ -31,14 +42,24 @@ class _MetaParser(HTMLParser):
         super().__init__()
         self.title = ""
         self.description = ""
+        self.head_closed = False
         self._in_title = False
+        self._title_done = False
+
+    @property
+    def complete(self) -> bool:
+        return self.head_closed or (self._title_done and bool(self.description))
 
     def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
         attr_map = {key.lower(): (value or "") for key, value in attrs}
-        if tag.lower() == "title":
-            self._in_title = True
+        tag = tag.lower()
+        if tag == "title":
+            self._in_title = not self._title_done
+            return
+        if tag == "body":
+            self.head_closed = True
             return
-        if tag.lower() != "meta":
+        if tag != "meta":
             return
         name = attr_map.get("name", "").lower()
         prop = attr_map.get("property", "").lower()
@@ -47,12 +68,124 @@ class _MetaParser(HTMLParser):
                 self.description = attr_map.get("content", "")
 
     def handle_endtag(self, tag: str) -> None:
-        if tag.lower() == "title":
+        tag = tag.lower()
+        if tag == "title" and self._in_title:
             self._in_title = False
+            self._title_done = True
+        elif tag == "head":
+            self.head_closed = True
 
     def handle_data(self, data: str) -> None:
-        if self._in_title and not self.title:
-            self.title = data
+        # The title may arrive split across stream chunks.
+        if self._in_title:
+            self.title += data
+
+
+class WebSearchCache:
+    """Page metadata (url -> title, description) and short-lived /search results.
+
+    Failed fetches are cached as empty metadata for ``negative_ttl_seconds`` so a dead
+    site is not retried on every query. With ``persist_path`` the metadata also goes
+    to SQLite and survives restarts; query results stay in memory only.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_entries: int = 2048,
+        metadata_ttl_seconds: float = 24 * 3600,
+        negative_ttl_seconds: float = 600,
+        query_ttl_seconds: float = 300,
+        persist_path: Path | None = None,
+        metrics: MetricsCollector | None = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self._metadata: TTLCache[tuple[str, str]] = TTLCache(max_entries, clock=clock)
+        self._queries: TTLCache[list[Source]] = TTLCache(max(1, max_entries // 8), clock=clock)
+        self._metadata_ttl = metadata_ttl_seconds
+        self._negative_ttl = negative_ttl_seconds
+        self._query_ttl = query_ttl_seconds
+        self._metrics = metrics
+        self._clock = clock
+        self._connection: sqlite3.Connection | None = None
+        if persist_path is not None:
+            persist_path.parent.mkdir(parents=True, exist_ok=True)
+            self._connection = sqlite3.connect(persist_path, check_same_thread=False)
+            self._ensure_schema()
+
+    def _ensure_schema(self) -> None:
+        assert self._connection is not None
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS web_source_metadata (
+                url TEXT PRIMARY KEY,
+                title TEXT NOT NULL,
+                description TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            )
+            """
+        )
+        self._connection.execute("DELETE FROM web_source_metadata WHERE expires_at <= ?", (self._clock(),))
+        self._connection.commit()
+
+    def get_metadata(self, url: str) -> tuple[str, str] | None:
+        value = self._metadata.get(url)
+        if value is None and self._connection is not None:
+            value = self._load_metadata(url)
+        self._count("metadata", value is not None)
+        return value
+
+    def put_metadata(self, url: str, title: str, description: str) -> None:
+        ttl = self._metadata_ttl if (title or description) else self._negative_ttl
+        expires_at = self._clock() + ttl
+        self._metadata.put(url, (title, description), ttl, expires_at=expires_at)
+        if self._connection is None:
+            return
+        try:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO web_source_metadata (url, title, description, expires_at) VALUES (?, ?, ?, ?)",
+                (url, title, description, expires_at),
+            )
+            self._connection.commit()
+        except sqlite3.Error:
+            LOGGER.warning("Web search cache: failed to persist url metadata", exc_info=True)
+
+    def get_query(self, query: str, max_results: int) -> list[Source] | None:
+        value = self._queries.get(_query_key(query, max_results))
+        self._count("query", value is not None)
+        return list(value) if value is not None else None
+
+    def put_query(self, query: str, max_results: int, sources: list[Source]) -> None:
+        self._queries.put(_query_key(query, max_results), list(sources), self._query_ttl)
+
+    def close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def _load_metadata(self, url: str) -> tuple[str, str] | None:
+        assert self._connection is not None
+        try:
+            row = self._connection.execute(
+                "SELECT title, description, expires_at FROM web_source_metadata WHERE url = ?",
+                (url,),
+            ).fetchone()
+        except sqlite3.Error:
+            LOGGER.warning("Web search cache: failed to read url metadata", exc_info=True)
+            return None
+        if row is None or row[2] <= self._clock():
+            return None
+        value = (row[0], row[1])
+        self._metadata.put(url, value, 0, expires_at=row[2])
+        return value
+
+    def _count(self, kind: str, hit: bool) -> None:
+        if self._metrics is not None:
+            self._metrics.inc(f"web_search_cache.{kind}_{'hits' if hit else 'misses'}")
+
+
+def _query_key(query: str, max_results: int) -> tuple[str, int]:
+    return " ".join(query.casefold().split()), max_results
 
 
 class PerplexityWebSearchClient:
@@ -63,15 +196,27 @@ class PerplexityWebSearchClient:
         model: str = "sonar",
         timeout_seconds: float = 4.0,
         snippet_limit: int = 320,
+        http_client: SharedHTTPClient | None = None,
+        max_concurrency: int = 4,
+        deadline_seconds: float | None = None,
+        cache: WebSearchCache | None = None,
     ) -> None:
         self._perplexity_client = perplexity_client
         self._model = model
         self._timeout_seconds = timeout_seconds
         self._snippet_limit = snippet_limit
+        self._http = http_client or SharedHTTPClient(HTTPPoolConfig(max_connections=10))
+        self._max_concurrency = max(1, max_concurrency)
+        self._deadline_seconds = deadline_seconds if deadline_seconds is not None else timeout_seconds
+        self._cache = cache
 
     async def search(self, query: str, max_results: int = 5) -> list[Source]:
         if not query.strip():
             return []
+        if self._cache is not None:
+            cached = self._cache.get_query(query, max_results)
+            if cached is not None:
+                return cached
         started_at = monotonic()
         response = await self._perplexity_client.create_chat_completion(
             model=self._model,
@@ -90,44 +235,99 @@ class PerplexityWebSearchClient:
         if not isinstance(raw_citations, list):
             return []
         urls = _normalize_urls(raw_citations, max_results=max_results)
-        sources = [await self._build_source(url) for url in urls]
+        sources = await self._build_sources(urls)
         LOGGER.info(
             "Web search: provider=perplexity query_len=%s sources=%s latency=%.2fs",
             len(query),
             len(sources),
             monotonic() - started_at,
         )
+        if self._cache is not None and sources:
+            self._cache.put_query(query, max_results, sources)
+        return sources
+
+    async def aclose(self) -> None:
+        await self._http.aclose()
+        if self._cache is not None:
+            self._cache.close()
+
+    async def _build_sources(self, urls: list[str]) -> list[Source]:
+        """Fetch metadata for all urls concurrently; stragglers past the deadline keep URL-only metadata."""
+        if not urls:
+            return []
+        semaphore = asyncio.Semaphore(self._max_concurrency)
+
+        async def limited(url: str) -> Source:
+            async with semaphore:
+                return await self._build_source(url)
+
+        tasks = [asyncio.create_task(limited(url)) for url in urls]
+        done, pending = await asyncio.wait(tasks, timeout=self._deadline_seconds)
+        for task in pending:
+            task.cancel()
+        if pending:
+            LOGGER.info("Web search: %s source fetches missed the %.1fs deadline", len(pending), self._deadline_seconds)
+            await asyncio.gather(*pending, return_exceptions=True)
+        sources: list[Source] = []
+        for url, task in zip(urls, tasks, strict=True):
+            if task in done and not task.cancelled() and task.exception() is None:
+                sources.append(task.result())
+            else:
+                sources.append(Source(title=url, url=url, snippet=""))
         return sources
 
     async def _build_source(self, url: str) -> Source:
         title = url
         snippet = ""
-        html_text = await _fetch_html(url, timeout_seconds=self._timeout_seconds)
-        if html_text:
-            parsed_title, parsed_description = _parse_title_and_description(html_text)
-            if parsed_title:
-                title = parsed_title
-            snippet = _trim(parsed_description, self._snippet_limit)
+        cached = self._cache.get_metadata(url) if self._cache is not None else None
+        if cached is not None:
+            parsed_title, parsed_description = cached
+        else:
+            parsed_title, parsed_description = await _fetch_metadata(
+                self._http.get(),
+                url,
+                timeout_seconds=self._timeout_seconds,
+            )
+            if self._cache is not None:
+                self._cache.put_metadata(url, parsed_title, parsed_description)
+        if parsed_title:
+            title = parsed_title
+        snippet = _trim(parsed_description, self._snippet_limit)
         return Source(title=title, url=url, snippet=snippet)
 
 
-async def _fetch_html(url: str, *, timeout_seconds: float) -> str:
+async def _fetch_metadata(client: httpx.AsyncClient, url: str, *, timeout_seconds: float) -> tuple[str, str]:
+    """Stream the page and parse only until <head> yields a title and a description."""
+    parser = _MetaParser()
+    received: list[str] = []
+    size = 0
     try:
-        async with httpx.AsyncClient(
+        async with client.stream(
+            "GET",
+            url,
             timeout=timeout_seconds,
             follow_redirects=True,
-            headers={"User-Agent": "SecretaryBot/1.0 (+web-search)"},
-        ) as client:
-            response = await client.get(url)
+            headers={"User-Agent": _USER_AGENT},
+        ) as response:
             if response.status_code // 100 != 2:
-                return ""
+                return "", ""
             content_type = response.headers.get("content-type", "").lower()
             if "text/html" not in content_type and "application/xhtml+xml" not in content_type:
-                return ""
-            return response.text[:120_000]
+                return "", ""
+            async for chunk in response.aiter_text():
+                chunk = chunk[: _MAX_HTML_CHARS - size]
+                received.append(chunk)
+                size += len(chunk)
+                try:
+                    parser.feed(chunk)
+                except Exception:
+                    break
+                if parser.complete or size >= _MAX_HTML_CHARS:
+                    break
     except Exception:
         LOGGER.debug("Source metadata fetch failed: url=%s", url, exc_info=True)
-        return ""
+        return "", ""
+    return _finish_metadata(parser, "".join(received))
 
 
 def _normalize_urls(raw_citations: list[object], *, max_results: int) -> list[str]:
@@ -151,12 +351,7 @@ def _normalize_urls(raw_citations: list[object], *, max_results: int) -> list[st
     return urls
 
 
-def _parse_title_and_description(html_text: str) -> tuple[str, str]:
-    parser = _MetaParser()
-    try:
-        parser.feed(html_text)
-    except Exception:
-        pass
+def _finish_metadata(parser: _MetaParser, html_text: str) -> tuple[str, str]:
     title = _clean(parser.title)
     description = _clean(parser.description)
     if not description:
@@ -0,0 +1,96 @@
+"""Day/week range lookups over a large local calendar: full scan vs start index.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_calendar_range [--events 100000] [--repeat 20]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from app.core import calendar_store
+
+
+def _build_store(count: int, base: datetime) -> dict[str, object]:
+    store = calendar_store._default_store()
+    events: list[dict[str, object]] = []
+    for index in range(count):
+        dt = base + timedelta(minutes=37 * index)
+        events.append(
+            {
+                "event_id": f"evt-{index}",
+                "dt_start": dt.isoformat(),
+                "text": f"Событие {index}",
+                "created_at": base.isoformat(),
+                "chat_id": 100 + index % 50,
+                "user_id": 1 + index % 50,
+                "timezone": "Europe/Moscow",
+            }
+        )
+    store["events"] = events
+    return store
+
+
+def _scan(store: dict[str, object], start: datetime, end: datetime) -> list[calendar_store.CalendarItem]:
+    # What list_items() did before the start index: materialize every event.
+    result = []
+    for item in store["events"]:
+        calendar_item = calendar_store._event_from_record(item)
+        if calendar_item is None or calendar_item.dt < start or calendar_item.dt > end:
+            continue
+        result.append(calendar_item)
+    result.sort(key=lambda item: item.dt)
+    return result
+
+
+def _timed(func, repeat: int) -> tuple[float, object]:
+    started = time.perf_counter()
+    value = None
+    for _ in range(repeat):
+        value = func()
+    return (time.perf_counter() - started) / repeat, value
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    base = datetime(2026, 1, 1, 9, 0, tzinfo=calendar_store.BOT_TZ)
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["CALENDAR_STORAGE"] = "json"
+        os.environ["CALENDAR_PATH"] = os.path.join(tmp, "calendar.json")
+        store = _build_store(args.events, base)
+        calendar_store.save_store_atomic(store)
+
+        middle = (base + timedelta(minutes=37 * args.events // 2)).date()
+        windows = {
+            "day": calendar_store.day_bounds(middle),
+            "week": calendar_store.week_bounds(middle),
+        }
+        started = time.perf_counter()
+        asyncio.run(calendar_store.list_items(*windows["day"]))
+        print(f"events={args.events} index build={time.perf_counter() - started:.3f}s")
+        for name, (start, end) in windows.items():
+            scan_time, scanned = _timed(
+                lambda start=start, end=end: _scan(store, start, end), max(1, args.repeat // 10)
+            )
+            index_time, indexed = _timed(
+                lambda start=start, end=end: asyncio.run(calendar_store.list_items(start, end)), args.repeat
+            )
+            assert [item.id for item in scanned] == [item.id for item in indexed]
+            print(
+                f"{name:>4}: hits={len(indexed):>4} scan={scan_time * 1000:9.2f}ms "
+                f"index={index_time * 1000:7.2f}ms speedup=x{scan_time / index_time:.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Document Q&A chunk retrieval on a 200k-character document: re-split scan vs BM25 index.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_document_qa [--chars 200000] [--repeat 50]
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from app.core.document_qa import DocumentIndex, DocumentIndexCache, save_document_index, select_relevant_chunks
+
+_WORDS = (
+    "договор оплата поставка акт срок штраф сторона обязательство уведомление претензия "
+    "расчёт счёт товар качество гарантия приёмка отгрузка доставка склад возврат"
+).split()
+_QUESTIONS = [
+    "Какой срок оплаты по договору?",
+    "Что будет за просрочку поставки?",
+    "Как оформляется возврат товара на склад?",
+    "Кто отвечает за качество при приёмке?",
+]
+
+
+def _document(chars: int) -> str:
+    rng = random.Random(7)
+    words: list[str] = []
+    size = 0
+    while size < chars:
+        word = rng.choice(_WORDS) if rng.random() < 0.3 else f"слово{rng.randrange(5000)}"
+        words.append(word)
+        size += len(word) + 1
+        if len(words) % 15 == 0:
+            words[-1] += ".\n"
+    return " ".join(words)[:chars]
+
+
+def _median_ms(call, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        call()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chars", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    text = _document(args.chars)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        text_path = Path(tmp) / "doc.txt"
+        text_path.write_text(text, encoding="utf-8")
+        started = time.perf_counter()
+        index = DocumentIndex.build(text)
+        build_ms = (time.perf_counter() - started) * 1000
+        save_document_index(text_path, index)
+        cache = DocumentIndexCache()
+        started = time.perf_counter()
+        cache.get(text_path)
+        load_ms = (time.perf_counter() - started) * 1000
+
+        def scan() -> None:
+            for question in _QUESTIONS:
+                select_relevant_chunks(text_path.read_text(encoding="utf-8"), question, top_k=4)
+
+        def indexed() -> None:
+            for question in _QUESTIONS:
+                cache.get(text_path).search(question, top_k=4)
+
+        before = _median_ms(scan, args.repeat) / len(_QUESTIONS)
+        after = _median_ms(indexed, args.repeat) / len(_QUESTIONS)
+
+    print(f"document: {len(text)} chars, {len(index)} chunks, {len(index.postings)} terms")
+    print(f"index build (once, at upload): {build_ms:.1f}ms; cold load from disk: {load_ms:.1f}ms")
+    print(f"per question: re-split scan={before:.2f}ms indexed={after:.3f}ms (x{before / after:.0f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""LLM call latency against a local stub server: client per call vs shared pool.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_llm_http_pool [--calls 200]
+
+The stub is plain HTTP on localhost, so only the TCP connect and client setup
+are saved here; against the real APIs each avoided TLS handshake adds more.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+from aiohttp import web
+
+from app.infra.llm import OpenAIClient, SharedHTTPClient
+
+_COMPLETION = {"choices": [{"message": {"content": "ok"}}]}
+
+
+async def _start_stub() -> tuple[web.AppRunner, str]:
+    async def completions(request: web.Request) -> web.Response:
+        await request.read()
+        return web.json_response(_COMPLETION)
+
+    app = web.Application()
+    app.router.add_post("/v1/chat/completions", completions)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}/v1"
+
+
+async def _per_call_client(base_url: str) -> None:
+    # The request path before the shared pool: a fresh AsyncClient per call.
+    async with httpx.AsyncClient(timeout=10) as client:
+        response = await client.post(
+            f"{base_url}/chat/completions",
+            json={"model": "stub", "messages": [{"role": "user", "content": "hi"}]},
+            headers={"Authorization": "Bearer stub"},
+        )
+        response.json()
+
+
+async def _measure(call, calls: int) -> list[float]:
+    samples = []
+    for _ in range(calls):
+        started = time.perf_counter()
+        await call()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def _report(name: str, samples: list[float]) -> float:
+    median = statistics.median(samples)
+    p95 = sorted(samples)[int(len(samples) * 0.95) - 1]
+    print(f"{name:>16}: median={median:6.2f}ms p95={p95:6.2f}ms")
+    return median
+
+
+async def _run(calls: int) -> None:
+    runner, base_url = await _start_stub()
+    shared = SharedHTTPClient()
+    client = OpenAIClient(api_key="stub", model="stub", base_url=base_url, timeout_seconds=10, http_client=shared)
+    messages = [{"role": "user", "content": "hi"}]
+    try:
+        per_call = await _measure(lambda: _per_call_client(base_url), calls)
+        pooled = await _measure(lambda: client.create_chat_completion(messages=messages), calls)
+    finally:
+        await shared.aclose()
+        await runner.cleanup()
+    before = _report("client per call", per_call)
+    after = _report("shared pool", pooled)
+    print(f"saving per call: {before - after:.2f}ms (x{before / after:.1f})")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(_run(args.calls))
+
+
+if __name__ == "__main__":
+    main()
@@ -61,6 +61,33 @@ def test_action_store_ttl_and_security(monkeypatch) -> None:
     assert store.get_action(user_id=1, chat_id=2, action_id=action_id_expired) is None
 
 
+def test_action_store_evicts_in_order_and_caps_each_chat(monkeypatch) -> None:
+    clock = {"value": 100.0}
+    monkeypatch.setattr(actions.time, "monotonic", lambda: clock["value"])
+    store = actions.ActionStore(ttl_seconds=60, max_items=6, max_items_per_chat=3)
+    action = Action(id="test", label="Test", payload={"op": "menu_open"})
+
+    quiet = [store.store_action(action=action, user_id=1, chat_id=1) for _ in range(2)]
+    clock["value"] += 1
+    chatty = [store.store_action(action=action, user_id=2, chat_id=2) for _ in range(10)]
+
+    # The chatty chat only replaced its own buttons.
+    assert all(store.get_action(user_id=1, chat_id=1, action_id=token) for token in quiet)
+    assert [token for token in chatty if store.get_action(user_id=2, chat_id=2, action_id=token)] == chatty[-3:]
+    assert len(store) == 5
+
+    others = [store.store_action(action=action, user_id=3, chat_id=3) for _ in range(2)]
+    # Over the global limit the oldest action goes first.
+    assert store.get_action(user_id=1, chat_id=1, action_id=quiet[0]) is None
+    assert store.get_action(user_id=1, chat_id=1, action_id=quiet[1]) is not None
+    assert len(store) == 6
+
+    clock["value"] += 59.5
+    assert store.lookup_action(user_id=3, chat_id=3, action_id=others[0]).status == "ok"
+    assert store.lookup_action(user_id=1, chat_id=1, action_id=quiet[1]).status == "missing"
+    assert len(store) == 5
+
+
 def test_build_inline_keyboard() -> None:
     store = actions.ActionStore()
     action_list = [
@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timedelta
+
+from app.core import calendar_store
+from app.core.calendar_index import CalendarIndex, DueReminderIndex, EventStartIndex
+
+
+def _record(reminder_id: str, trigger_at: datetime, **extra) -> dict[str, object]:
+    record: dict[str, object] = {
+        "reminder_id": reminder_id,
+        "event_id": reminder_id,
+        "trigger_at": trigger_at.isoformat(),
+        "enabled": True,
+        "status": "active",
+    }
+    record.update(extra)
+    return record
+
+
+def test_due_index_returns_only_expired_in_trigger_order() -> None:
+    base = datetime(2026, 3, 1, 9, 0, tzinfo=calendar_store.BOT_TZ)
+    index = DueReminderIndex()
+    index.rebuild(
+        [
+            _record("late", base + timedelta(hours=2)),
+            _record("b", base + timedelta(minutes=5)),
+            _record("a", base),
+            _record("off", base, enabled=False, status="disabled"),
+            _record("done", base, status="done"),
+        ]
+    )
+
+    assert index.due_ids((base + timedelta(minutes=10)).timestamp()) == ["a", "b"]
+    assert index.next_due_ts() == base.timestamp()
+    assert len(index) == 3
+
+
+def test_due_index_updates_replace_and_remove_entries() -> None:
+    base = datetime(2026, 3, 1, 9, 0, tzinfo=calendar_store.BOT_TZ)
+    index = DueReminderIndex()
+    index.rebuild([_record("a", base), _record("b", base + timedelta(minutes=1))])
+
+    index.update(_record("a", base + timedelta(hours=1)))
+    index.remove("b")
+
+    assert index.due_ids((base + timedelta(minutes=30)).timestamp()) == []
+    assert index.next_due_ts() == (base + timedelta(hours=1)).timestamp()
+    index.update(_record("a", base, status="done"))
+    assert index.next_due_ts() is None
+
+
+def test_calendar_store_keeps_due_index_in_sync(tmp_path, monkeypatch) -> None:
+    monkeypatch.setenv("CALENDAR_PATH", str(tmp_path / "calendar.json"))
+    now = datetime(2026, 3, 1, 9, 0, tzinfo=calendar_store.BOT_TZ)
+
+    async def scenario() -> None:
+        first = await calendar_store.add_reminder(
+            trigger_at=now - timedelta(minutes=1), text="Первое", chat_id=1, user_id=1
+        )
+        second = await calendar_store.add_reminder(
+            trigger_at=now + timedelta(minutes=30), text="Второе", chat_id=1, user_id=1
+        )
+        assert [item.id for item in await calendar_store.list_due_reminders(now)] == [first.id]
+        assert await calendar_store.next_due_at() == first.trigger_at
+
+        await calendar_store.apply_snooze(first.id, minutes=10, now=now)
+        assert await calendar_store.list_due_reminders(now) == []
+        assert await calendar_store.next_due_at() == now + timedelta(minutes=10)
+
+        await calendar_store.disable_reminder(first.id)
+        assert await calendar_store.next_due_at() == second.trigger_at
+
+        later = now + timedelta(hours=1)
+        assert [item.id for item in await calendar_store.list_due_reminders(later)] == [second.id]
+        await calendar_store.mark_reminder_sent(second.id, later)
+        assert await calendar_store.list_due_reminders(later) == []
+        assert await calendar_store.next_due_at() is None
+
+    asyncio.run(scenario())
+
+
+def test_event_start_index_range_lookup_and_moves() -> None:
+    base = datetime(2026, 3, 1, 9, 0, tzinfo=calendar_store.BOT_TZ)
+    index = EventStartIndex()
+    index.rebuild(
+        [
+            {"event_id": "b", "dt_start": (base + timedelta(hours=1)).isoformat()},
+            {"event_id": "a", "dt_start": base.isoformat()},
+            {"event_id": "tie", "dt_start": (base + timedelta(hours=1)).isoformat()},
+            {"event_id": "next-day", "dt_start": (base + timedelta(days=1)).isoformat()},
+            {"event_id": "broken", "dt_start": "not a date"},
+        ]
+    )
+    day_start, day_end = calendar_store.day_bounds(base.date())
+
+    assert index.ids_between(day_start.timestamp(), day_end.timestamp()) == ["a", "b", "tie"]
+    assert index.ids_between(base.timestamp(), base.timestamp()) == ["a"]
+    assert len(index) == 4
+
+    index.update({"event_id": "b", "dt_start": (base + timedelta(days=1)).isoformat()})
+    index.update({"event_id": "b", "dt_start": (base + timedelta(hours=1)).isoformat()})
+    index.remove("a")
+    assert index.ids_between(day_start.timestamp(), None) == ["b", "tie", "next-day"]
+
+
+def test_user_index_tracks_ids_and_chat_pairs() -> None:
+    index = CalendarIndex()
+    index.rebuild(
+        [
+            {"event_id": "e1", "user_id": 1, "chat_id": 10},
+            {"event_id": "e2", "user_id": 2, "chat_id": 20},
+            {"event_id": "e3", "chat_id": 30},
+        ],
+        [{"reminder_id": "r1", "event_id": "e1", "user_id": 1, "chat_id": 11, "status": "done"}],
+    )
+
+    assert index.users.ids("events", 1) == ["e1"]
+    assert index.users.ids("events", 0) == ["e3"]
+    assert index.users.ids("reminders", 1) == ["r1"]
+    assert index.users.pairs() == [(1, 10), (1, 11), (2, 20)]
+
+    index.update_event({"event_id": "e1", "user_id": 2, "chat_id": 20})
+    index.remove_reminder("r1")
+    assert index.users.ids("events", 1) == []
+    assert index.users.chat_ids(1) == []
+    assert index.users.chat_ids(2) == [20]
+    index.remove_event("e2")
+    assert index.users.pairs() == [(2, 20)]
+
+
+def test_calendar_store_user_scoped_queries(tmp_path, monkeypatch) -> None:
+    monkeypatch.setenv("CALENDAR_PATH", str(tmp_path / "calendar.json"))
+    now = datetime(2026, 3, 1, 9, 0, tzinfo=calendar_store.BOT_TZ)
+
+    async def scenario() -> None:
+        mine = await calendar_store.add_item(
+            dt=now + timedelta(hours=1), title="Моё", chat_id=10, remind_at=now + timedelta(minutes=30), user_id=1
+        )
+        await calendar_store.add_item(dt=now + timedelta(hours=2), title="В группе", chat_id=11, user_id=1)
+        await calendar_store.add_item(
+            dt=now + timedelta(hours=1), title="Чужое", chat_id=20, remind_at=now + timedelta(minutes=30), user_id=2
+        )
+        start, end = calendar_store.day_bounds(now.date())
+
+        assert [item.title for item in await calendar_store.list_items(start, end, user_id=1)] == ["Моё", "В группе"]
+        assert [item.title for item in await calendar_store.list_items(user_id=1, chat_id=11)] == ["В группе"]
+        reminders = await calendar_store.list_reminders(now, limit=None, user_id=2)
+        assert [item.text for item in reminders] == ["Чужое"]
+        assert await calendar_store.list_user_chat_pairs() == [(1, 10), (1, 11), (2, 20)]
+        assert await calendar_store.resolve_user_chat_id(1) == 10
+
+        await calendar_store.delete_item(mine["event"]["event_id"])
+        remaining = await calendar_store.list_reminders(now, limit=None, user_id=1)
+        assert [item.text for item in remaining] == ["В группе"]
+        assert await calendar_store.resolve_user_chat_id(1) == 11
+        assert await calendar_store.resolve_user_chat_id(3) is None
+
+    asyncio.run(scenario())
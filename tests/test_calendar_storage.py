@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import sqlite3
+from datetime import datetime, timedelta
+
+from app.core import calendar_storage, calendar_store
+
+
+def _use_sqlite(tmp_path, monkeypatch):
+    json_path = tmp_path / "calendar.json"
+    db_path = tmp_path / "calendar.db"
+    monkeypatch.setenv("CALENDAR_PATH", str(json_path))
+    monkeypatch.setenv("CALENDAR_STORAGE", "sqlite")
+    monkeypatch.setenv("CALENDAR_DB_PATH", str(db_path))
+    return json_path, db_path
+
+
+def test_sqlite_storage_migrates_schema_v1_items(tmp_path, monkeypatch) -> None:
+    json_path, db_path = _use_sqlite(tmp_path, monkeypatch)
+    payload = {
+        "items": [
+            {
+                "id": "old-1",
+                "ts": "2026-04-01T09:00:00+03:00",
+                "title": "Старый формат",
+                "created_at": "2026-03-20T10:00:00+03:00",
+                "chat_id": 10,
+                "user_id": 1,
+                "remind_at": "2026-04-01T08:50:00+03:00",
+            }
+        ],
+        "updated_at": "2026-03-20T10:00:00+03:00",
+    }
+    json_path.write_text(json.dumps(payload), encoding="utf-8")
+
+    event = asyncio.run(calendar_store.get_event("old-1"))
+    reminder = asyncio.run(calendar_store.get_reminder("old-1"))
+
+    assert event is not None and event.title == "Старый формат"
+    assert reminder is not None and reminder.status == "active"
+    storage = calendar_storage.get_calendar_storage()
+    assert isinstance(storage, calendar_storage.SqliteCalendarStorage)
+    assert storage.get_meta("migrated_from_json") == str(json_path)
+
+    json_path.write_text(json.dumps({"events": [], "reminders": []}), encoding="utf-8")
+    assert calendar_storage.migrate_json_to_sqlite(json_path, storage) == 0
+    assert asyncio.run(calendar_store.get_event("old-1")) is not None
+    calendar_storage.close_calendar_storages()
+    assert db_path.exists()
+
+
+def test_sqlite_storage_uses_wal_and_indexes(tmp_path, monkeypatch) -> None:
+    _, db_path = _use_sqlite(tmp_path, monkeypatch)
+    calendar_storage.get_calendar_storage()
+
+    connection = sqlite3.connect(db_path)
+    journal_mode = connection.execute("PRAGMA journal_mode").fetchone()[0]
+    indexes = {row[1] for row in connection.execute("SELECT type, name FROM sqlite_master WHERE type = 'index'")}
+    connection.close()
+    calendar_storage.close_calendar_storages()
+
+    assert journal_mode == "wal"
+    assert {"idx_events_user_start", "idx_reminders_due", "idx_reminders_event"} <= indexes
+
+
+def test_sqlite_storage_round_trip_via_async_api(tmp_path, monkeypatch) -> None:
+    json_path, _ = _use_sqlite(tmp_path, monkeypatch)
+    now = datetime(2026, 5, 1, 12, 0, tzinfo=calendar_store.BOT_TZ)
+
+    created = asyncio.run(
+        calendar_store.add_item(
+            dt=now + timedelta(hours=1),
+            title="Созвон",
+            chat_id=20,
+            remind_at=now - timedelta(minutes=5),
+            user_id=2,
+        )
+    )
+    reminder_id = created["reminder"]["reminder_id"]
+    asyncio.run(calendar_store.add_item(dt=now + timedelta(days=3), title="Позже", chat_id=20, user_id=2))
+
+    due = asyncio.run(calendar_store.list_due_reminders(now))
+    assert [item.id for item in due] == [reminder_id]
+    day_start, day_end = calendar_store.day_bounds(now.date())
+    assert [item.title for item in asyncio.run(calendar_store.list_items(day_start, day_end))] == ["Созвон"]
+
+    asyncio.run(calendar_store.mark_reminder_sent(reminder_id, now))
+    assert asyncio.run(calendar_store.list_due_reminders(now)) == []
+    asyncio.run(calendar_store.set_last_digest_sent(2, "20260501"))
+    assert asyncio.run(calendar_store.get_last_digest_sent(2)) == "20260501"
+    assert asyncio.run(calendar_store.resolve_user_chat_id(2)) == 20
+
+    deleted, removed_reminder_id = asyncio.run(calendar_store.delete_item(created["event"]["event_id"]))
+    assert deleted is True
+    assert removed_reminder_id == reminder_id
+    assert len(calendar_store.load_store()["events"]) == 1
+    assert not json_path.exists()
+    calendar_storage.close_calendar_storages()
+
+
+def test_json_storage_coalesces_writes_within_flush_window(tmp_path, monkeypatch) -> None:
+    path = tmp_path / "calendar.json"
+    monkeypatch.setenv("CALENDAR_PATH", str(path))
+    monkeypatch.setenv("CALENDAR_FLUSH_WINDOW_SECONDS", "0.05")
+    writes: list[int] = []
+    original_write = calendar_storage.write_json_store
+
+    def _counting_write(target, store):
+        writes.append(len(store.get("events") or []))
+        original_write(target, store)
+
+    monkeypatch.setattr(calendar_storage, "write_json_store", _counting_write)
+    now = datetime(2026, 5, 1, 12, 0, tzinfo=calendar_store.BOT_TZ)
+
+    async def scenario() -> None:
+        for index in range(5):
+            await calendar_store.add_item(dt=now + timedelta(hours=index), title=f"E{index}", chat_id=1, user_id=1)
+        assert writes == []
+        assert len(await calendar_store.list_items()) == 5
+        await asyncio.sleep(0.1)
+
+    asyncio.run(scenario())
+
+    assert writes == [5]
+    assert len(json.loads(path.read_text(encoding="utf-8"))["events"]) == 5
+
+
+def test_json_storage_picks_up_external_edits_and_flushes_on_close(tmp_path, monkeypatch) -> None:
+    path = tmp_path / "calendar.json"
+    monkeypatch.setenv("CALENDAR_PATH", str(path))
+    monkeypatch.setenv("CALENDAR_FLUSH_WINDOW_SECONDS", "60")
+    now = datetime(2026, 5, 1, 12, 0, tzinfo=calendar_store.BOT_TZ)
+    asyncio.run(calendar_store.add_item(dt=now, title="Первое", chat_id=1, user_id=1))
+    assert [item.title for item in asyncio.run(calendar_store.list_items())] == ["Первое"]
+    assert not path.exists()
+    calendar_storage.flush_calendar_storages()
+    assert path.exists()
+
+    external = {
+        "events": [
+            {"event_id": "ext-1", "dt_start": now.isoformat(), "text": "Снаружи", "chat_id": 1, "user_id": 1}
+        ],
+        "reminders": [],
+    }
+    path.write_text(json.dumps(external, ensure_ascii=False), encoding="utf-8")
+    assert [item.title for item in asyncio.run(calendar_store.list_items())] == ["Снаружи"]
+
+    async def mutate() -> None:
+        await calendar_store.add_item(dt=now, title="Второе", chat_id=1, user_id=1)
+
+    asyncio.run(mutate())
+    assert len(json.loads(path.read_text(encoding="utf-8"))["events"]) == 1
+    calendar_storage.flush_calendar_storages()
+    assert len(json.loads(path.read_text(encoding="utf-8"))["events"]) == 2
+
+
+def test_json_storage_get_returns_copies_like_sqlite(tmp_path, monkeypatch) -> None:
+    monkeypatch.setenv("CALENDAR_PATH", str(tmp_path / "calendar.json"))
+    now = datetime(2026, 5, 1, 12, 0, tzinfo=calendar_store.BOT_TZ)
+    reminder = asyncio.run(calendar_store.add_reminder(trigger_at=now, text="Позвонить", chat_id=1, user_id=1))
+    storage = calendar_storage.get_calendar_storage()
+
+    before = storage.get_reminder(reminder.id)
+    # An edit abandoned before put_reminder() must not reach the cache.
+    record = storage.get_reminder(reminder.id)
+    record["enabled"] = False
+    record["text"] = "Полузаписано"
+
+    assert storage.get_reminder(reminder.id) == before
+    assert before["text"] == "Позвонить"
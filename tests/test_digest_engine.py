@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, time, timedelta
+from types import SimpleNamespace
+from zoneinfo import ZoneInfo
+
+from app.core import calendar_store
+from app.core.digest_engine import digest_slot_offset
+from app.core.reminders import run_daily_digest
+from app.infra.user_profile_store import UserProfileStore
+
+
+class DummyBot:
+    def __init__(self) -> None:
+        self.sent: list[tuple[int, str]] = []
+
+    async def send_message(self, chat_id: int, text: str, **kwargs) -> None:
+        self.sent.append((chat_id, text))
+
+
+def test_slot_offsets_are_stable_and_spread_over_window() -> None:
+    offsets = [digest_slot_offset(user_id, 1800) for user_id in range(1, 1001)]
+
+    assert offsets == [digest_slot_offset(user_id, 1800) for user_id in range(1, 1001)]
+    assert all(0 <= offset < 1800 for offset in offsets)
+    # Roughly uniform: every 5-minute bucket of the window gets a share of users.
+    buckets = [sum(1 for offset in offsets if start <= offset < start + 300) for start in range(0, 1800, 300)]
+    assert min(buckets) > 100
+    assert digest_slot_offset(42, 0) == 0
+
+
+def test_staggered_digest_reads_store_once_and_honours_profile_timezone(tmp_path, monkeypatch) -> None:
+    monkeypatch.setenv("CALENDAR_PATH", str(tmp_path / "calendar.json"))
+    tokyo = ZoneInfo("Asia/Tokyo")
+    profile_store = UserProfileStore(tmp_path / "profiles.db")
+    profile_store.update(500, {"timezone": "Asia/Tokyo"})
+    day = datetime(2026, 3, 2, 8, 0, tzinfo=calendar_store.BOT_TZ)
+
+    async def seed() -> None:
+        for user_id in range(1, 41):
+            await calendar_store.add_reminder(
+                trigger_at=day + timedelta(hours=4), text=f"Дело {user_id}", chat_id=user_id, user_id=user_id
+            )
+        await calendar_store.add_reminder(
+            trigger_at=datetime(2026, 3, 3, 12, 0, tzinfo=tokyo), text="Токио", chat_id=500, user_id=500
+        )
+
+    asyncio.run(seed())
+    occurrence_calls: list[tuple[datetime, datetime]] = []
+    original = calendar_store.list_occurrences
+
+    async def counting_occurrences(start, end, **kwargs):
+        occurrence_calls.append((start, end))
+        return await original(start, end, **kwargs)
+
+    monkeypatch.setattr(calendar_store, "list_occurrences", counting_occurrences)
+    bot = DummyBot()
+    application = SimpleNamespace(bot=bot, bot_data={"profile_store": profile_store})
+    send_time = time(9, 0)
+    window = 600
+
+    def tick(at: datetime) -> int:
+        return asyncio.run(run_daily_digest(application, now=at, send_time=send_time, window_seconds=window))
+
+    assert tick(day.replace(hour=8, minute=59)) == 0
+    # Halfway through the window only users whose slot has passed are served.
+    halfway = tick(day.replace(hour=9, minute=5))
+    expected_halfway = sum(1 for user_id in range(1, 41) if digest_slot_offset(user_id, window) <= 300)
+    assert halfway == expected_halfway and 0 < halfway < 40
+    assert tick(day.replace(hour=9, minute=11)) == 40 - halfway
+    assert tick(day.replace(hour=9, minute=12)) == 0
+    # One store read per tick that had someone to serve, never one per user.
+    assert len(occurrence_calls) == 2
+    assert {chat_id for chat_id, _ in bot.sent} == set(range(1, 41))
+    assert all("Дело" in text for _, text in bot.sent)
+
+    # 09:00 in Tokyo is the previous evening in the bot timezone.
+    tokyo_morning = datetime(2026, 3, 3, 9, 0, tzinfo=tokyo) + timedelta(seconds=window)
+    assert tick(tokyo_morning) == 1
+    assert bot.sent[-1][0] == 500 and "12:00 — Токио" in bot.sent[-1][1]
+
+
+def test_ticks_outside_every_send_window_skip_store_reads(tmp_path, monkeypatch) -> None:
+    profile_store = UserProfileStore(tmp_path / "profiles.db")
+    profile_store.update(1, {"timezone": "Asia/Tokyo"})
+    assert profile_store.timezones() == {1: "Asia/Tokyo"}
+    profile_store.update(1, {"timezone": "Europe/Moscow"})
+    # Saving a profile drops the cached timezones.
+    assert profile_store.timezones() == {1: "Europe/Moscow"}
+
+    pair_reads: list[int] = []
+
+    async def counting_pairs():
+        pair_reads.append(1)
+        return []
+
+    monkeypatch.setattr(calendar_store, "list_user_chat_pairs", counting_pairs)
+    application = SimpleNamespace(bot=DummyBot(), bot_data={"profile_store": profile_store})
+    day = datetime(2026, 3, 2, 0, 0, tzinfo=calendar_store.BOT_TZ)
+
+    def tick(at: datetime) -> int:
+        return asyncio.run(run_daily_digest(application, now=at, send_time=time(9, 0), window_seconds=600))
+
+    assert tick(day.replace(hour=3)) == 0
+    assert tick(day.replace(hour=15)) == 0
+    assert pair_reads == []
+    assert tick(day.replace(hour=9, minute=5)) == 0
+    assert pair_reads == [1]
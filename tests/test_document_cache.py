@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+from types import SimpleNamespace
+
+from app.bot import handlers
+from app.core.file_text_extractor import ExtractedText
+from app.infra.document_cache import DocumentCache
+from app.infra.document_session_store import DocumentSessionStore
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        self.now += 1
+        return self.now
+
+
+def _extracted(text: str) -> ExtractedText:
+    return ExtractedText(text=text, metadata={"characters": len(text)})
+
+
+def test_document_cache_aliases_refcounts_and_evicts_lru(tmp_path: Path) -> None:
+    cache = DocumentCache(tmp_path / "cache", max_bytes=10_000, variant="v1", clock=_Clock())
+    cache.put("a" * 64, _extracted("alpha " * 300), file_type="pdf", file_unique_id="uniq-a")
+    cache.put("b" * 64, _extracted("beta " * 300), file_type="pdf")
+
+    assert cache.lookup_unique_id("uniq-a").content_hash == "a" * 64
+    assert cache.lookup_hash("b" * 64, file_unique_id="uniq-b") is not None
+    assert (tmp_path / "cache" / ("a" * 64) / "text.index.json").exists()
+    cache.acquire("b" * 64, "doc-1")
+    cache.put("c" * 64, _extracted("gamma " * 1200), file_type="docx")
+
+    # "b" is referenced by a session, so the least recently used free entry "a" goes first.
+    assert cache.lookup_hash("a" * 64) is None and cache.lookup_unique_id("uniq-a") is None
+    assert not (tmp_path / "cache" / ("a" * 64)).exists()
+    assert cache.lookup_hash("b" * 64) is not None
+
+    reloaded = DocumentCache(tmp_path / "cache", max_bytes=10_000, variant="v1")
+    reloaded.load()
+    assert reloaded.lookup_unique_id("uniq-b").doc_ids == ["doc-1"]
+    reloaded.retain_sessions([])
+    assert reloaded.lookup_hash("b" * 64).doc_ids == []
+
+    other_settings = DocumentCache(tmp_path / "cache", variant="v2")
+    other_settings.load()
+    assert other_settings.lookup_unique_id("uniq-b") is None
+
+
+def test_session_removal_releases_cache_reference(tmp_path: Path) -> None:
+    cache = DocumentCache(tmp_path / "cache", variant="v1")
+    entry = cache.put("d" * 64, _extracted("text"), file_type="pdf")
+    store = DocumentSessionStore(tmp_path / "sessions.json", on_session_removed=lambda s: cache.release(s.doc_id))
+    session = store.create_session(
+        user_id=1,
+        chat_id=1,
+        file_path="",
+        file_type="pdf",
+        text_path=str(cache.text_path(entry.content_hash)),
+        content_hash=entry.content_hash,
+    )
+    cache.acquire(entry.content_hash, session.doc_id)
+    assert entry.doc_ids == [session.doc_id]
+
+    store.close_active(user_id=1, chat_id=1)
+
+    assert entry.doc_ids == []
+
+
+def test_repeat_upload_skips_download_and_extraction(tmp_path: Path, monkeypatch) -> None:
+    downloads: list[str] = []
+    extractions: list[str] = []
+    sent: list[str] = []
+
+    class FakeFile:
+        async def download_to_drive(self, custom_path: str) -> None:
+            downloads.append(custom_path)
+            Path(custom_path).write_bytes(b"%PDF same bytes")
+
+    async def get_file(file_id: str) -> FakeFile:
+        return FakeFile()
+
+    async def fake_extract(update, context, settings, file_path, file_type):
+        extractions.append(str(file_path))
+        return _extracted("Документ о квартальном отчёте.")
+
+    async def fake_send_result(update, context, result, reply_markup=None):
+        sent.append(result.intent)
+
+    async def fake_guard_access(update, context, bucket="default"):
+        return True
+
+    monkeypatch.setattr(handlers, "_extract_uploaded_document", fake_extract)
+    monkeypatch.setattr(handlers, "send_result", fake_send_result)
+    monkeypatch.setattr(handlers, "_guard_access", fake_guard_access)
+    cache = DocumentCache(tmp_path / "cache")
+    store = DocumentSessionStore(tmp_path / "sessions.json", on_session_removed=lambda s: cache.release(s.doc_id))
+    context = SimpleNamespace(
+        application=SimpleNamespace(
+            bot_data={
+                "settings": SimpleNamespace(uploads_path=tmp_path / "uploads", document_texts_path=tmp_path / "texts"),
+                "document_store": store,
+                "document_cache": cache,
+            }
+        ),
+        bot=SimpleNamespace(get_file=get_file),
+        chat_data={},
+    )
+
+    def upload(user_id: int, file_id: str, file_unique_id: str) -> SimpleNamespace:
+        document = SimpleNamespace(
+            file_id=file_id,
+            file_unique_id=file_unique_id,
+            mime_type="application/pdf",
+            file_name="report.pdf",
+        )
+        message = SimpleNamespace(document=document, photo=None, text=None, caption=None)
+        return SimpleNamespace(
+            effective_user=SimpleNamespace(id=user_id, username="u"),
+            effective_chat=SimpleNamespace(id=user_id),
+            message=message,
+            effective_message=message,
+            callback_query=None,
+        )
+
+    asyncio.run(handlers.document_upload(upload(1, "f1", "same"), context))
+    asyncio.run(handlers.document_upload(upload(2, "f2", "same"), context))
+    asyncio.run(handlers.document_upload(upload(3, "f3", "renamed"), context))
+
+    assert sent == ["document.processed"] * 3
+    assert len(downloads) == 2 and len(extractions) == 1
+    sessions = [store.get_active(user_id=user_id, chat_id=user_id) for user_id in (1, 2, 3)]
+    assert len({session.content_hash for session in sessions}) == 1
+    assert Path(sessions[1].text_path).read_text(encoding="utf-8") == "Документ о квартальном отчёте."
+    assert len(cache.lookup_unique_id("renamed").doc_ids) == 3
+
+
+def test_put_never_evicts_the_entry_it_just_wrote(tmp_path: Path) -> None:
+    cache = DocumentCache(tmp_path / "cache", max_bytes=1_000, variant="v1", clock=_Clock())
+    cache.put("a" * 64, _extracted("small"), file_type="pdf")
+
+    # Larger than the whole cache: older free entries go, the new one stays until its session takes it.
+    entry = cache.put("b" * 64, _extracted("big " * 1000), file_type="pdf")
+
+    assert cache.lookup_hash("a" * 64) is None
+    assert cache.text_path(entry.content_hash).exists()
+    cache.acquire(entry.content_hash, "doc-1")
+    assert cache.lookup_hash("b" * 64).doc_ids == ["doc-1"]
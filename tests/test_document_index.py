@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from app.core.document_qa import (
+    DocumentIndex,
+    DocumentIndexCache,
+    index_path_for,
+    load_document_index,
+    save_document_index,
+    split_text,
+)
+
+
+def _document() -> str:
+    filler = "Общие положения договора и порядок взаимодействия сторон. " * 30
+    return (
+        filler
+        + "Оплата производится в течение 30 дней после подписания акта. "
+        + filler
+        + "Штраф за просрочку оплаты составляет 0,1% в день. Оплата штрафа отдельно. "
+        + filler
+    )
+
+
+def test_index_chunks_match_split_text_and_bm25_ranks_rare_terms_first() -> None:
+    text = _document()
+    index = DocumentIndex.build(text)
+
+    assert [index.chunk(chunk_id) for chunk_id in range(len(index))] == split_text(text)
+    results = index.search("Оплата: какой штраф за просрочку?", top_k=2)
+    assert "Штраф за просрочку" in results[0][0]
+    assert results[0][1] > results[1][1]
+    assert index.search("несуществующее слово") == []
+    assert DocumentIndex.build("").search("оплата") == []
+
+
+def test_index_persists_next_to_text_and_rebuilds_when_stale(tmp_path: Path) -> None:
+    text_path = tmp_path / "doc.txt"
+    text_path.write_text(_document(), encoding="utf-8")
+    save_document_index(text_path, DocumentIndex.build(_document()))
+
+    loaded = load_document_index(text_path)
+    assert index_path_for(text_path).name == "doc.index.json"
+    assert loaded.search("штраф")[0][0] == DocumentIndex.build(_document()).search("штраф")[0][0]
+
+    text_path.write_text("Новый текст про отпуск и график работы.", encoding="utf-8")
+    rebuilt = load_document_index(text_path)
+    assert rebuilt.search("отпуск")
+    assert json.loads(index_path_for(text_path).read_text(encoding="utf-8"))["text_length"] == len(rebuilt.text)
+
+
+def test_index_cache_reuses_loaded_index_until_file_changes(tmp_path: Path) -> None:
+    text_path = tmp_path / "doc.txt"
+    text_path.write_text(_document(), encoding="utf-8")
+    cache = DocumentIndexCache(max_entries=2)
+
+    first = cache.get(text_path)
+    assert cache.get(str(text_path)) is first
+    text_path.unlink()
+    assert cache.get(text_path) is None
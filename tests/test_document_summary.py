@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+from types import SimpleNamespace
+
+from app.bot import handlers
+from app.core.document_summary import MAP_SYSTEM_PROMPT, REDUCE_SYSTEM_PROMPT, ChunkSummaryStore, summarize_document
+from app.infra.document_session_store import DocumentSessionStore
+
+
+def _long_document(parts: int = 10) -> str:
+    return "\n".join(f"Раздел {index}. " + f"Условие номер {index} описано подробно. " * 150 for index in range(parts))
+
+
+class FakeLLM:
+    def __init__(self) -> None:
+        self.calls: list[str] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def generate(self, messages: list[dict[str, str]]) -> str:
+        self.calls.append(messages[0]["content"])
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        if messages[0]["content"] == MAP_SYSTEM_PROMPT:
+            return "Тезис: " + messages[1]["content"].splitlines()[0] + " " + "деталь " * 150
+        if messages[0]["content"] == REDUCE_SYSTEM_PROMPT:
+            return "Сводка частей"
+        return "Итоговое резюме"
+
+    async def generate_text(self, *, model: str, messages: list[dict[str, str]]) -> str:
+        return await self.generate(messages)
+
+
+def test_map_reduce_bounds_concurrency_and_reuses_cached_chunks(tmp_path: Path) -> None:
+    text = _long_document()
+    text_path = tmp_path / "doc.txt"
+    text_path.write_text(text, encoding="utf-8")
+    llm = FakeLLM()
+    progress: list[tuple[int, int]] = []
+
+    async def on_progress(done: int, total: int) -> None:
+        progress.append((done, total))
+
+    outcome = asyncio.run(
+        summarize_document(
+            text,
+            generate=llm.generate,
+            system_prompt="final",
+            store=ChunkSummaryStore(text_path),
+            max_concurrency=2,
+            on_progress=on_progress,
+        )
+    )
+
+    map_calls = llm.calls.count(MAP_SYSTEM_PROMPT)
+    assert outcome.text == "Итоговое резюме"
+    assert outcome.chunks == map_calls > 5 and outcome.cached_chunks == 0
+    assert llm.max_in_flight == 2
+    # Chunk summaries do not fit into one request, so they are merged in groups first.
+    assert llm.calls.count(REDUCE_SYSTEM_PROMPT) >= 2 and llm.calls[-1] == "final"
+    assert progress[0] == (0, outcome.chunks) and progress[-1] == (outcome.chunks, outcome.chunks)
+
+    llm.calls.clear()
+    again = asyncio.run(
+        summarize_document(text, generate=llm.generate, system_prompt="final", store=ChunkSummaryStore(text_path))
+    )
+    assert again.cached_chunks == again.chunks and MAP_SYSTEM_PROMPT not in llm.calls
+    assert ChunkSummaryStore(text_path).overview == "Итоговое резюме"
+
+
+def test_summary_handler_reports_progress_and_qa_reuses_overview(tmp_path: Path) -> None:
+    text_path = tmp_path / "text.txt"
+    text_path.write_text(_long_document(4), encoding="utf-8")
+    store = DocumentSessionStore(tmp_path / "sessions.json")
+    session = store.create_session(user_id=1, chat_id=1, file_path="", file_type="pdf", text_path=str(text_path))
+    llm = FakeLLM()
+    context = SimpleNamespace(
+        application=SimpleNamespace(
+            bot_data={
+                "document_store": store,
+                "llm_client": llm,
+                "settings": SimpleNamespace(openai_model="gpt", perplexity_model="sonar", doc_summary_concurrency=3),
+                "orchestrator": SimpleNamespace(is_facts_only=lambda user_id: True),
+            }
+        ),
+        chat_data={},
+    )
+    edits: list[str] = []
+
+    class FakeMessage:
+        async def reply_text(self, text: str) -> FakeMessage:
+            edits.append(text)
+            return self
+
+        async def edit_text(self, text: str) -> None:
+            edits.append(text)
+
+    update = SimpleNamespace(effective_message=FakeMessage())
+    result = asyncio.run(
+        handlers._handle_document_summary(
+            context,
+            user_id=1,
+            chat_id=1,
+            doc_id=session.doc_id,
+            progress=handlers.StreamingReply(update, context),
+        )
+    )
+
+    assert result.text == "Итоговое резюме"
+    assert edits[0].startswith("⏳ Резюмирую документ: 0/")
+    assert edits[-1].startswith("✅ Резюме собрано")
+    assert llm.max_in_flight <= 3
+
+    store.set_state(doc_id=session.doc_id, state="qa_mode")
+    captured: list[str] = []
+
+    async def answer(*, model: str, messages: list[dict[str, str]]) -> str:
+        captured.append(messages[1]["content"])
+        return "Про условия"
+
+    llm.generate_text = answer
+    qa_result = asyncio.run(handlers._handle_document_question(context, user_id=1, chat_id=1, question="О чём он?"))
+    assert qa_result.text == "Про условия"
+    assert "Резюме документа:\nИтоговое резюме" in captured[0]
@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from app.core import extraction_executor, file_text_extractor
+from app.core.extraction_executor import (
+    ExtractionBusyError,
+    ExtractionExecutor,
+    ExtractionPoolConfig,
+    ExtractionTimeoutError,
+)
+from app.core.file_text_extractor import ExtractedText, FileTextExtractor, OCRNotAvailableError
+from app.infra.observability.metrics import MetricsCollector
+from tests.test_document_reader import _build_simple_pdf
+
+
+def _build_multipage_pdf(texts: list[str]) -> bytes:
+    count = len(texts)
+    objects = [
+        "1 0 obj << /Type /Catalog /Pages 2 0 R >> endobj",
+        "2 0 obj << /Type /Pages /Kids [{}] /Count {} >> endobj".format(
+            " ".join(f"{4 + 2 * index} 0 R" for index in range(count)), count
+        ),
+        "3 0 obj << /Type /Font /Subtype /Type1 /BaseFont /Helvetica >> endobj",
+    ]
+    for index, text in enumerate(texts):
+        page_id, content_id = 4 + 2 * index, 5 + 2 * index
+        stream = f"BT /F1 12 Tf 20 100 Td ({text}) Tj ET"
+        objects.append(
+            f"{page_id} 0 obj << /Type /Page /Parent 2 0 R /MediaBox [0 0 300 200] "
+            f"/Contents {content_id} 0 R /Resources << /Font << /F1 3 0 R >> >> >> endobj"
+        )
+        objects.append(f"{content_id} 0 obj << /Length {len(stream)} >> stream\n{stream}\nendstream endobj")
+    pdf = b"%PDF-1.4\n"
+    offsets = []
+    for obj in objects:
+        offsets.append(len(pdf))
+        pdf += obj.encode("latin1") + b"\n"
+    xref_offset = len(pdf)
+    xref = f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n" + "".join(f"{offset:010d} 00000 n \n" for offset in offsets)
+    trailer = f"trailer << /Root 1 0 R /Size {len(objects) + 1} >>\nstartxref\n{xref_offset}\n%%EOF\n"
+    return pdf + xref.encode("latin1") + trailer.encode("latin1")
+
+
+class BlockingExtractor(FileTextExtractor):
+    def __init__(self, release: threading.Event) -> None:
+        super().__init__()
+        self.release = release
+
+    def extract(self, *, path: Path, file_type: str) -> ExtractedText:
+        self.release.wait(5)
+        return ExtractedText(text=path.name, metadata={"characters": len(path.name)})
+
+
+def test_extraction_executor_runs_pdf_in_worker_process(tmp_path: Path) -> None:
+    pytest.importorskip("pypdf")
+    pdf_path = tmp_path / "sample.pdf"
+    pdf_path.write_bytes(_build_simple_pdf("Hello Worker"))
+    metrics = MetricsCollector()
+    executor = ExtractionExecutor(ExtractionPoolConfig(workers=1, timeout_seconds=60), metrics=metrics)
+
+    try:
+        extracted = asyncio.run(executor.extract(FileTextExtractor(), path=pdf_path, file_type="pdf"))
+    finally:
+        executor.shutdown()
+
+    assert "Hello Worker" in extracted.text
+    assert metrics.get_counters()["extraction.completed"] == 1
+    assert metrics.get_gauges()["extraction.in_flight"] == 0
+
+
+def test_extraction_executor_refuses_when_queue_full_and_times_out(tmp_path: Path) -> None:
+    release = threading.Event()
+    metrics = MetricsCollector()
+    executor = ExtractionExecutor(
+        ExtractionPoolConfig(workers=1, max_queue=1, timeout_seconds=0.2, use_processes=False),
+        metrics=metrics,
+    )
+    extractor = BlockingExtractor(release)
+
+    async def scenario() -> list[object]:
+        jobs = [
+            executor.extract(extractor, path=tmp_path / f"{index}.docx", file_type="docx")
+            for index in range(3)
+        ]
+        return await asyncio.gather(*jobs, return_exceptions=True)
+
+    try:
+        outcomes = asyncio.run(scenario())
+        assert [type(item) for item in outcomes] == [ExtractionTimeoutError, ExtractionTimeoutError, ExtractionBusyError]
+        # The running job keeps its slot until the worker returns; the queued one was cancelled.
+        assert executor.in_flight == 1
+        release.set()
+        extracted = asyncio.run(executor.extract(extractor, path=tmp_path / "late.docx", file_type="docx"))
+        assert extracted.text == "late.docx"
+    finally:
+        release.set()
+        executor.shutdown()
+
+    counters = metrics.get_counters()
+    assert counters["extraction.busy"] == 1
+    assert counters["extraction.timeouts"] == 2
+
+
+def test_pdf_pages_extracted_in_parallel_honour_page_and_char_limits(tmp_path: Path) -> None:
+    pytest.importorskip("pypdf")
+    pdf_path = tmp_path / "long.pdf"
+    pdf_path.write_bytes(_build_multipage_pdf([f"Page {index} text" for index in range(1, 21)]))
+    metrics = MetricsCollector()
+    executor = ExtractionExecutor(ExtractionPoolConfig(workers=2, timeout_seconds=60), metrics=metrics)
+
+    async def scenario() -> tuple[ExtractedText, ExtractedText]:
+        by_pages = await executor.extract(FileTextExtractor(max_pages=10), path=pdf_path, file_type="pdf")
+        by_chars = await executor.extract(FileTextExtractor(max_chars=40), path=pdf_path, file_type="pdf")
+        return by_pages, by_chars
+
+    try:
+        by_pages, by_chars = asyncio.run(scenario())
+    finally:
+        executor.shutdown()
+
+    assert by_pages.text.splitlines() == [f"Page {index} text" for index in range(1, 11)]
+    assert by_pages.metadata["pages"] == 10 and by_pages.metadata["total_pages"] == 20
+    assert by_pages.warnings == ("pages_truncated",)
+    assert by_chars.metadata["pages"] < 20 and len(by_chars.text) <= 40
+    assert by_chars.warnings == ("chars_truncated",)
+    assert metrics.get_counters()["extraction.pdf_early_stops"] == 1
+
+
+def test_path_extract_honours_limits_and_ocrs_scanned_pages(tmp_path: Path, monkeypatch) -> None:
+    pytest.importorskip("pypdf")
+    from PIL import Image
+
+    text_pdf = tmp_path / "text.pdf"
+    text_pdf.write_bytes(_build_multipage_pdf(["First page", "Second page", "Third page"]))
+    extracted = FileTextExtractor(max_pages=2).extract(path=text_pdf, file_type="pdf")
+    assert extracted.text == "First page\nSecond page"
+    assert extracted.warnings == ("pages_truncated",)
+
+    scan_pdf = tmp_path / "scan.pdf"
+    pages = [Image.new("RGB", (120, 80), color="white") for _ in range(2)]
+    pages[0].save(scan_pdf, save_all=True, append_images=pages[1:])
+    ocr_calls: list[str] = []
+
+    def fake_ocr(image, lang: str) -> str:
+        ocr_calls.append(lang)
+        return f"Скан {len(ocr_calls)}"
+
+    monkeypatch.setattr(file_text_extractor, "image_to_string", fake_ocr)
+    scanned = FileTextExtractor(tesseract_lang="rus").extract(path=scan_pdf, file_type="pdf")
+    assert scanned.text == "Скан 1\nСкан 2"
+    assert scanned.metadata["ocr_pages"] == 2 and ocr_calls == ["rus", "rus"]
+
+    def missing_ocr(image, lang: str) -> str:
+        raise file_text_extractor.TesseractNotFoundError()
+
+    monkeypatch.setattr(file_text_extractor, "image_to_string", missing_ocr)
+    with pytest.raises(OCRNotAvailableError):
+        FileTextExtractor().extract(path=scan_pdf, file_type="pdf")
+
+
+class BlockingPdfExtractor(FileTextExtractor):
+    def __init__(self, release: threading.Event) -> None:
+        super().__init__()
+        self.release = release
+
+    def extract_pdf_pages(self, source: str, start: int, stop: int) -> list[tuple[str, str]]:
+        self.release.wait(5)
+        return [(f"Page {index}", "text") for index in range(start, stop)]
+
+
+class ThreadOnlyExecutor(ExtractionExecutor):
+    def _pool(self, processes: bool):
+        return super()._pool(False)
+
+
+def test_timed_out_pdf_keeps_its_slot_until_running_batches_return(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setattr(extraction_executor, "pdf_page_count", lambda source: 4 * file_text_extractor.PDF_PAGE_BATCH)
+    release = threading.Event()
+    executor = ThreadOnlyExecutor(ExtractionPoolConfig(workers=2, timeout_seconds=0.2))
+
+    try:
+        with pytest.raises(ExtractionTimeoutError):
+            asyncio.run(executor.extract(BlockingPdfExtractor(release), path=tmp_path / "slow.pdf", file_type="pdf"))
+        assert executor.in_flight == 1
+        release.set()
+        for _ in range(50):
+            if executor.in_flight == 0:
+                break
+            time.sleep(0.02)
+        assert executor.in_flight == 0
+    finally:
+        release.set()
+        executor.shutdown()
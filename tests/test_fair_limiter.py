@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from app.core.orchestrator import Orchestrator
+from app.infra.fair_limiter import FairLimiter, FairLimiterRegistry, QueueTimeoutError
+from app.infra.observability.metrics import MetricsCollector
+from app.infra.storage import TaskStorage
+
+
+def test_free_slots_go_round_robin_across_users() -> None:
+    metrics = MetricsCollector()
+    limiter = FairLimiter("test", max_concurrency=2, max_per_user=2, metrics=metrics)
+    order: list[str] = []
+
+    async def job(user: str, gate: asyncio.Event) -> None:
+        async with limiter.slot(user):
+            order.append(user)
+            await gate.wait()
+
+    async def scenario() -> None:
+        gate = asyncio.Event()
+        tasks = [asyncio.create_task(job("a", gate)) for _ in range(5)]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(job("b", gate)))
+        await asyncio.sleep(0)
+        assert limiter.inflight == 2 and limiter.queue_depth == 4
+        assert metrics.get_gauges()["concurrency.test.queue_depth"] == 4
+        gate.set()
+        await asyncio.gather(*tasks)
+
+    asyncio.run(scenario())
+
+    # "b" arrived after the whole burst from "a" but got the first freed slot.
+    assert order[:3] == ["a", "a", "b"]
+    assert limiter.inflight == 0 and limiter.queue_depth == 0
+    assert metrics.get_gauges()["concurrency.test.inflight"] == 0
+
+
+def test_per_user_cap_leaves_room_for_others() -> None:
+    limiter = FairLimiter("test", max_concurrency=3, max_per_user=1, queue_timeout_seconds=0.05)
+
+    async def scenario() -> None:
+        await limiter.acquire("a")
+        with pytest.raises(QueueTimeoutError):
+            await limiter.acquire("a")
+        await limiter.acquire("b")
+        assert limiter.inflight == 2 and limiter.queue_depth == 0
+
+    asyncio.run(scenario())
+
+
+class BlockingLLMClient:
+    def __init__(self) -> None:
+        self.api_key = "fake-key"
+        self.release = asyncio.Event()
+
+    async def create_chat_completion(self, *, model, messages, max_tokens=None, web_search_options=None):
+        return {"content": await self.generate_text(model=model, messages=messages)}
+
+    async def generate_text(self, *, model, messages, max_tokens=None, web_search_options=None) -> str:
+        await self.release.wait()
+        return f"ответ: {messages[-1]['content']}"
+
+
+def test_queue_timeout_is_ratelimited_and_spares_breaker(tmp_path: Path) -> None:
+    metrics = MetricsCollector()
+    client = BlockingLLMClient()
+    orchestrator = Orchestrator(
+        config={},
+        storage=TaskStorage(tmp_path / "bot.db"),
+        llm_client=client,
+        metrics=metrics,
+        concurrency_limits=FairLimiterRegistry(
+            max_concurrency=1, max_per_user=1, queue_timeout_seconds=0.05, metrics=metrics
+        ),
+    )
+
+    async def scenario():
+        first = asyncio.create_task(orchestrator.ask_llm(1, "первый"))
+        await asyncio.sleep(0.01)
+        waiting = await orchestrator.ask_llm(2, "второй")
+        client.release.set()
+        return await first, waiting
+
+    first, waiting = asyncio.run(scenario())
+
+    assert first.status == "success"
+    assert waiting.status == "ratelimited"
+    assert waiting.result == "Слишком много запросов. Попробуйте позже."
+    assert orchestrator._circuit_breakers.get("llm").state == "closed"
+    assert metrics.get_counters()["concurrency.llm.blockingllm.timeouts"] == 1
+    result = orchestrator._build_llm_result(waiting, intent="command.ask", facts_only=False, request_context=None)
+    assert result.status == "ratelimited"
+
+
+def test_coalesced_calls_share_one_slot(tmp_path: Path) -> None:
+    client = BlockingLLMClient()
+    limits = FairLimiterRegistry(max_concurrency=2, max_per_user=2, queue_timeout_seconds=1.0)
+    orchestrator = Orchestrator(
+        config={},
+        storage=TaskStorage(tmp_path / "bot.db"),
+        llm_client=client,
+        concurrency_limits=limits,
+    )
+
+    async def scenario():
+        calls = [asyncio.create_task(orchestrator.ask_llm(1, "одинаковый")) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        inflight = limits.get("llm.blockingllm").inflight
+        client.release.set()
+        return inflight, await asyncio.gather(*calls)
+
+    inflight, results = asyncio.run(scenario())
+
+    assert inflight == 1
+    assert [item.status for item in results] == ["success"] * 3
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+
+from app.core.orchestrator import Orchestrator
+from app.core.tools_llm import llm_check
+from app.infra.llm_cache import LLMResponseCache
+from app.infra.observability.metrics import MetricsCollector
+from app.infra.storage import TaskStorage
+
+
+class CountingLLMClient:
+    def __init__(self) -> None:
+        self.api_key = "fake-key"
+        self.calls: list[list[dict]] = []
+
+    async def create_chat_completion(self, *, model, messages, max_tokens=None, web_search_options=None):
+        return {"content": await self.generate_text(model=model, messages=messages)}
+
+    async def generate_text(self, *, model, messages, max_tokens=None, web_search_options=None) -> str:
+        self.calls.append(messages)
+        return f"ответ {len(self.calls)}"
+
+
+def test_tool_prompts_are_answered_from_cache_but_ask_turns_are_not(tmp_path: Path) -> None:
+    client = CountingLLMClient()
+    metrics = MetricsCollector()
+    cache = LLMResponseCache(metrics=metrics)
+    orchestrator = Orchestrator(
+        config={},
+        storage=TaskStorage(tmp_path / "bot.db"),
+        llm_client=client,
+        llm_history_turns=3,
+        response_cache=cache,
+    )
+    ctx = {"orchestrator": orchestrator, "user_id": 1}
+
+    first = asyncio.run(llm_check("Текст для проверки", ctx))
+    asyncio.run(orchestrator.ask_llm(1, "Как дела?"))
+    # Same text from another user, with different history: still the same prompt.
+    second = asyncio.run(llm_check("Текст для проверки  \r\n", {**ctx, "user_id": 2}))
+
+    assert first.text == second.text == "ответ 1"
+    assert len(client.calls) == 2
+    asyncio.run(orchestrator.ask_llm(1, "Как дела?"))
+    assert len(client.calls) == 3
+    counters = metrics.get_counters()
+    assert counters["llm_cache.hits"] == 1
+    assert counters["llm_cache.misses"] == 1
+    assert counters["llm_cache.saved_tokens"] > 0
+
+
+def test_cache_respects_ttl_and_survives_restart(tmp_path: Path) -> None:
+    clock = {"value": 1000.0}
+    path = tmp_path / "llm_cache.db"
+    messages = [{"role": "system", "content": "Кратко"}, {"role": "user", "content": "Документ"}]
+    calls: list[str] = []
+
+    async def generate() -> str:
+        calls.append("call")
+        return "резюме"
+
+    def make_cache() -> LLMResponseCache:
+        return LLMResponseCache(ttl_seconds=60, persist_path=path, clock=lambda: clock["value"])
+
+    async def ask(cache: LLMResponseCache, *, model: str = "m") -> str:
+        return await cache.get_or_generate(provider="openai", model=model, messages=messages, generate=generate)
+
+    cache = make_cache()
+    assert asyncio.run(ask(cache)) == "резюме"
+    cache.close()
+
+    restarted = make_cache()
+    assert asyncio.run(ask(restarted)) == "резюме"
+    assert len(calls) == 1
+    asyncio.run(ask(restarted, model="other"))
+    assert len(calls) == 2
+
+    clock["value"] += 61
+    asyncio.run(ask(restarted))
+    assert len(calls) == 3
+    restarted.close()
+
+
+class ScriptedLLMClient(CountingLLMClient):
+    def __init__(self, replies: list[str]) -> None:
+        super().__init__()
+        self.replies = replies
+
+    async def generate_text(self, *, model, messages, max_tokens=None, web_search_options=None) -> str:
+        self.calls.append(messages)
+        return self.replies[min(len(self.calls), len(self.replies)) - 1]
+
+
+def test_cache_keeps_regenerated_answer_and_skips_failed_ones(tmp_path: Path) -> None:
+    client = ScriptedLLMClient(
+        ["Коротко.", "Это простое объяснение без терминов. Оно понятно любому человеку без подготовки."]
+    )
+    orchestrator = Orchestrator(
+        config={},
+        storage=TaskStorage(tmp_path / "bot.db"),
+        llm_client=client,
+        response_cache=LLMResponseCache(),
+    )
+
+    def ask(prompt: str):
+        return asyncio.run(orchestrator.ask_llm(1, prompt, mode="summary", cacheable=True))
+
+    first = ask("Объясни, что говорят исследования о сне")
+    again = ask("Объясни, что говорят исследования о сне")
+
+    assert first.result == again.result
+    assert "простое объяснение" in again.result
+    # The original reply needed regeneration; the cached one is the regenerated answer.
+    assert len(client.calls) == 2
+
+    client.replies = ["Источник: example.com. Подробнее на www.example.com и [Тут](http://x.y)"]
+    client.calls.clear()
+    ask("Расскажи про погоду")
+    ask("Расскажи про погоду")
+    assert len(client.calls) == 2
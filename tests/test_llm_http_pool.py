@@ -0,0 +1,48 @@
+import asyncio
+
+import httpx
+
+from app.infra.llm import OpenAIClient, PerplexityClient, SharedHTTPClient
+
+
+def _transport(seen: list[str]) -> httpx.MockTransport:
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request.url.host)
+        return httpx.Response(200, json={"choices": [{"message": {"content": "ok"}}], "citations": []})
+
+    return httpx.MockTransport(handler)
+
+
+def test_llm_clients_share_one_pooled_http_client() -> None:
+    seen: list[str] = []
+    shared = SharedHTTPClient(transport=_transport(seen))
+    openai = OpenAIClient(api_key="k", base_url="https://openai.test/v1", http_client=shared)
+    perplexity = PerplexityClient(api_key="k", base_url="https://pplx.test", http_client=shared)
+
+    async def scenario() -> tuple[httpx.AsyncClient, httpx.AsyncClient]:
+        await openai.create_chat_completion(messages=[{"role": "user", "content": "hi"}])
+        first = shared.get()
+        await perplexity.create_chat_completion(model="sonar", messages=[{"role": "user", "content": "hi"}])
+        await openai.create_chat_completion(messages=[{"role": "user", "content": "again"}])
+        second = shared.get()
+        await openai.aclose()
+        return first, second
+
+    first, second = asyncio.run(scenario())
+
+    assert first is second
+    assert first.is_closed
+    assert seen == ["openai.test", "pplx.test", "openai.test"]
+
+
+def test_shared_http_client_rebinds_to_new_event_loop() -> None:
+    shared = SharedHTTPClient(transport=_transport([]))
+
+    async def grab() -> httpx.AsyncClient:
+        return shared.get()
+
+    first = asyncio.run(grab())
+    second = asyncio.run(grab())
+
+    assert first is not second
+    asyncio.run(shared.aclose())
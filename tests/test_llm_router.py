@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from app.infra.fair_limiter import FairLimiterRegistry, QueueTimeoutError, user_scope
+from app.infra.llm import LLMAPIError, LLMRoute, LLMRouter
+from app.infra.observability.metrics import MetricsCollector
+from app.infra.resilience import CircuitBreakerConfig, CircuitBreakerRegistry
+
+
+class FakeClient:
+    def __init__(self, name: str, *, delay: float = 0.0, fail: bool = False) -> None:
+        self.api_key = f"{name}-key"
+        self.name = name
+        self.delay = delay
+        self.fail = fail
+        self.models: list[str] = []
+
+    async def create_chat_completion(self, *, model, messages, max_tokens=None, web_search_options=None):
+        return {"content": await self.generate_text(model=model, messages=messages)}
+
+    async def generate_text(self, *, model, messages, max_tokens=None, web_search_options=None) -> str:
+        self.models.append(model)
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise LLMAPIError(status_code=503, message=f"{self.name} down")
+        return f"ответ {self.name}"
+
+
+def _breakers(threshold: int = 2) -> CircuitBreakerRegistry:
+    return CircuitBreakerRegistry(
+        config=CircuitBreakerConfig(failure_threshold=threshold, window_seconds=60.0, cooldown_seconds=60.0)
+    )
+
+
+MESSAGES = [{"role": "user", "content": "привет"}]
+
+
+def test_failed_route_falls_back_and_its_breaker_opens() -> None:
+    primary = FakeClient("primary", fail=True)
+    backup = FakeClient("backup")
+    breakers = _breakers(threshold=2)
+    metrics = MetricsCollector()
+    router = LLMRouter(
+        [LLMRoute("primary", primary, "model-a"), LLMRoute("backup", backup, "model-b")],
+        circuit_breakers=breakers,
+        metrics=metrics,
+    )
+
+    async def scenario() -> list[str]:
+        return [await router.generate_text(model="ignored", messages=MESSAGES) for _ in range(3)]
+
+    assert asyncio.run(scenario()) == ["ответ backup"] * 3
+    # The breaker opened after two failures, so the third call skipped the primary.
+    assert len(primary.models) == 2
+    assert primary.models == ["model-a", "model-a"] and backup.models[0] == "model-b"
+    assert breakers.get("llm.primary").state == "open"
+    assert metrics.get_counters()["llm_router.failures.primary"] == 2
+    assert router.stats("primary").error_rate == 1.0
+
+
+def test_all_routes_failing_raises_last_error() -> None:
+    router = LLMRouter(
+        [LLMRoute("a", FakeClient("a", fail=True), "m"), LLMRoute("b", FakeClient("b", fail=True), "m")],
+        circuit_breakers=_breakers(),
+    )
+
+    with pytest.raises(LLMAPIError, match="b down"):
+        asyncio.run(router.generate_text(model="m", messages=MESSAGES))
+
+
+def test_hedged_request_returns_first_answer_and_prefers_faster_route() -> None:
+    slow = FakeClient("slow", delay=0.2)
+    fast = FakeClient("fast", delay=0.01)
+    metrics = MetricsCollector()
+    router = LLMRouter(
+        [LLMRoute("slow", slow, "m"), LLMRoute("fast", fast, "m")],
+        circuit_breakers=_breakers(),
+        hedge=True,
+        hedge_after_seconds=0.05,
+        metrics=metrics,
+    )
+
+    async def scenario() -> str:
+        first = await router.generate_text(model="m", messages=MESSAGES)
+        # The losing call finishes in the background and still feeds the latency stats.
+        await asyncio.sleep(0.25)
+        return first
+
+    assert asyncio.run(scenario()) == "ответ fast"
+    counters = metrics.get_counters()
+    assert counters["llm_router.hedges"] == 1
+    assert counters["llm_router.hedge_wins.fast"] == 1
+    assert len(router.stats("slow").latencies) == 1
+    assert router.stats("slow").error_rate == 0.0
+
+    for _ in range(5):
+        router.stats("slow").record(0.2, True)
+        router.stats("fast").record(0.01, True)
+    assert [route.name for route in router.ordered_routes()] == ["fast", "slow"]
+
+
+def test_busy_route_spills_over_and_full_routes_queue_per_route() -> None:
+    primary = FakeClient("primary", delay=0.1)
+    backup = FakeClient("backup", delay=0.1)
+    limits = FairLimiterRegistry(max_concurrency=1, max_per_user=1, queue_timeout_seconds=0.02)
+    router = LLMRouter(
+        [LLMRoute("primary", primary, "model-a"), LLMRoute("backup", backup, "model-b")],
+        circuit_breakers=_breakers(),
+        concurrency_limits=limits,
+    )
+
+    async def ask(user: int) -> str:
+        with user_scope(user):
+            return await router.generate_text(messages=MESSAGES)
+
+    async def scenario() -> list[object]:
+        return await asyncio.gather(ask(1), ask(2), ask(3), return_exceptions=True)
+
+    first, second, third = asyncio.run(scenario())
+
+    assert router.manages_concurrency
+    assert (first, second) == ("ответ primary", "ответ backup")
+    assert isinstance(third, QueueTimeoutError)
+    assert limits.get("llm.primary").inflight == 0 and limits.get("llm.backup").inflight == 0
+
+
+def test_orchestrator_keys_cache_by_route_models(tmp_path) -> None:
+    from app.core.orchestrator import Orchestrator
+    from app.infra.llm_cache import LLMResponseCache
+    from app.infra.storage import TaskStorage
+
+    class RecordingCache(LLMResponseCache):
+        def __init__(self) -> None:
+            super().__init__(max_entries=10, ttl_seconds=60)
+            self.keyed: list[tuple[str, str]] = []
+
+        def make_key(self, *, provider, model, messages, **kwargs):
+            self.keyed.append((provider, model))
+            return super().make_key(provider=provider, model=model, messages=messages, **kwargs)
+
+    router = LLMRouter(
+        [LLMRoute("primary", FakeClient("primary"), "gpt-4o-mini"), LLMRoute("backup", FakeClient("backup"), "sonar")],
+        circuit_breakers=_breakers(),
+    )
+    cache = RecordingCache()
+    orchestrator = Orchestrator(
+        config={},
+        storage=TaskStorage(tmp_path / "bot.db"),
+        llm_client=router,
+        llm_model="gpt-4o-mini",
+        response_cache=cache,
+    )
+
+    execution = asyncio.run(orchestrator.ask_llm(1, "привет", mode="summary", cacheable=True))
+
+    assert execution.status == "success"
+    assert router.route_models == ["gpt-4o-mini", "sonar"]
+    assert cache.keyed == [("primary+backup", "gpt-4o-mini+sonar")]
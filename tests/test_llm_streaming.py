@@ -0,0 +1,120 @@
+import asyncio
+import json
+from pathlib import Path
+
+import httpx
+
+from app.core.orchestrator import Orchestrator
+from app.infra.llm import OpenAIClient, SharedHTTPClient
+from app.infra.messaging import StreamingReply
+from app.infra.storage import TaskStorage
+
+
+def _sse_body(deltas: list[str]) -> bytes:
+    lines = [": keep-alive"]
+    for delta in deltas:
+        lines.append("data: " + json.dumps({"choices": [{"delta": {"content": delta}}]}, ensure_ascii=False))
+    lines.append("data: [DONE]")
+    return ("\n\n".join(lines) + "\n\n").encode("utf-8")
+
+
+def test_openai_stream_text_yields_sse_deltas() -> None:
+    captured: dict[str, object] = {}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        captured["payload"] = json.loads(request.content)
+        return httpx.Response(200, content=_sse_body(["Прив", "ет", "!"]), headers={"content-type": "text/event-stream"})
+
+    client = OpenAIClient(
+        api_key="k",
+        base_url="https://openai.test/v1",
+        http_client=SharedHTTPClient(transport=httpx.MockTransport(handler)),
+    )
+
+    async def collect() -> list[str]:
+        return [delta async for delta in client.stream_text(model="m", messages=[{"role": "user", "content": "hi"}])]
+
+    assert asyncio.run(collect()) == ["Прив", "ет", "!"]
+    assert captured["payload"]["stream"] is True
+
+
+class FakeStreamingLLMClient:
+    def __init__(self) -> None:
+        self.api_key = "fake-key"
+
+    async def generate_text(self, **kwargs) -> str:
+        raise AssertionError("streaming path expected")
+
+    async def stream_text(self, *, model, messages, max_tokens=None, web_search_options=None):
+        for delta in ["Первая часть. ", "Вторая часть."]:
+            yield delta
+
+
+def test_orchestrator_streams_partials_and_returns_sanitized_answer(tmp_path: Path) -> None:
+    orchestrator = Orchestrator(config={}, storage=TaskStorage(tmp_path / "bot.db"), llm_client=FakeStreamingLLMClient())
+    partials: list[str] = []
+
+    async def on_partial(text: str) -> None:
+        partials.append(text)
+
+    result = asyncio.run(orchestrator.handle("Расскажи что-нибудь", {"user_id": 7}, on_partial=on_partial))
+
+    assert partials == ["", "Первая часть. ", "Первая часть. Вторая часть."]
+    assert result.status == "ok"
+    assert result.text == "Первая часть. Вторая часть."
+
+
+class _FakeMessage:
+    def __init__(self) -> None:
+        self.replies: list[str] = []
+        self.edits: list[str] = []
+        self.deleted = False
+
+    async def reply_text(self, text: str, **kwargs):
+        self.replies.append(text)
+        return self
+
+    async def edit_text(self, text: str, **kwargs):
+        self.edits.append(text)
+
+    async def delete(self) -> None:
+        self.deleted = True
+
+
+class _FakeUpdate:
+    def __init__(self, message: _FakeMessage) -> None:
+        self.effective_message = message
+        self.callback_query = None
+
+
+def test_streaming_reply_posts_placeholder_and_throttles_edits() -> None:
+    message = _FakeMessage()
+    reply = StreamingReply(_FakeUpdate(message), None, interval_seconds=0.0, min_growth=10)
+
+    async def scenario() -> None:
+        await reply.update("")
+        await reply.update("short")
+        await reply.update("long enough to be shown")
+        await reply.update("long enough to be shown!")
+
+    asyncio.run(scenario())
+
+    assert message.replies == ["⏳ Думаю…"]
+    assert message.edits == ["long enough to be shown ▌"]
+    assert reply.message is message
+
+
+def test_streaming_reply_discard_deletes_placeholder() -> None:
+    message = _FakeMessage()
+    reply = StreamingReply(_FakeUpdate(message), None, interval_seconds=0.0)
+
+    async def scenario() -> None:
+        await reply.update("")
+        await reply.discard()
+        await reply.update("late delta after the failure")
+
+    asyncio.run(scenario())
+
+    assert message.deleted
+    assert reply.message is None
+    assert message.replies == ["⏳ Думаю…"] and message.edits == []
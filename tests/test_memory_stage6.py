@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import asyncio
+import json
 from datetime import datetime, timedelta, timezone
 
 from app.core.dialog_memory import DialogMemory
@@ -31,6 +32,44 @@ def test_dialog_memory_ttl_and_clear(tmp_path) -> None:
     assert messages == []
 
 
+def test_dialog_memory_appends_log_and_compacts(tmp_path) -> None:
+    now = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+    def now_provider() -> datetime:
+        return now
+
+    legacy = tmp_path / "dialog.json"
+    legacy.write_text(
+        json.dumps({"users": {"1": {"enabled": True, "chats": {"2": [{"role": "user", "text": "Старое", "ts": now.isoformat()}]}}}}),
+        encoding="utf-8",
+    )
+    memory = DialogMemory(legacy, max_turns=2, ttl_seconds=10, now_provider=now_provider)
+    asyncio.run(memory.load())
+    log_path = tmp_path / "dialog.jsonl"
+    assert asyncio.run(memory.get_status(1, 2)) == (True, 1)
+
+    for index in range(5):
+        asyncio.run(memory.add_user(1, 2, f"Сообщение {index}"))
+    asyncio.run(memory.add_assistant(3, 4, "Другой чат"))
+    # One appended line per change, the ring buffer keeps the last max_turns * 2.
+    assert len(log_path.read_text(encoding="utf-8").splitlines()) == 8
+    assert [m.text for m in asyncio.run(memory.get_context(1, 2))][0] == "Сообщение 1"
+    assert asyncio.run(memory.count_entries()) == 5
+
+    reloaded = DialogMemory(legacy, max_turns=2, ttl_seconds=10, now_provider=now_provider)
+    asyncio.run(reloaded.load())
+    assert asyncio.run(reloaded.get_context(1, 2)) == asyncio.run(memory.get_context(1, 2))
+    assert asyncio.run(reloaded.is_enabled(1)) is True
+    assert asyncio.run(reloaded.count_entries()) == 5
+
+    now += timedelta(seconds=11)
+    asyncio.run(memory.add_user(3, 4, "Свежее"))
+    assert asyncio.run(memory.compact()) == 5
+    assert asyncio.run(memory.count_entries()) == 1
+    assert len(log_path.read_text(encoding="utf-8").splitlines()) == 2
+    asyncio.run(memory.close())
+
+
 def test_user_profile_persistence(tmp_path) -> None:
     store = UserProfileStore(tmp_path / "profiles.db")
     store.update(1, {"language": "en", "timezone": "Europe/London", "facts_mode_default": True})
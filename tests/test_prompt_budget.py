@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timezone
+from pathlib import Path
+
+from app.core.models import TaskExecutionResult
+from app.core.orchestrator import Orchestrator
+from app.core.prompt_budget import (
+    PromptBlock,
+    estimate_messages_tokens,
+    estimate_tokens,
+    plan_prompt,
+    resolve_prompt_budget,
+    split_dialog_lines,
+)
+from app.infra.request_context import RequestContext
+from app.infra.storage import TaskStorage
+
+
+class CaptureLLMClient:
+    def __init__(self) -> None:
+        self.api_key = "fake-key"
+        self.last_messages: list[dict] = []
+
+    async def create_chat_completion(self, *, model, messages, max_tokens=None, web_search_options=None):
+        return {"content": await self.generate_text(model=model, messages=messages)}
+
+    async def generate_text(self, *, model, messages, max_tokens=None, web_search_options=None) -> str:
+        self.last_messages = messages
+        return "ok"
+
+
+def test_estimator_and_model_limits() -> None:
+    assert estimate_tokens("") == 0
+    # Cyrillic costs about twice as much per character as Latin.
+    assert estimate_tokens("привет мир") > estimate_tokens("hello wrld")
+    assert resolve_prompt_budget("gpt-4o-mini") == 8_000
+    assert resolve_prompt_budget("gpt-4") == 8_192 - 1_024
+    assert resolve_prompt_budget("unknown", {"context_tokens": 4_096, "max_prompt_tokens": 100_000}) == 3_072
+
+
+def test_plan_drops_oldest_turns_and_lends_unused_share() -> None:
+    dialog = "\n".join(f"[user] сообщение номер {index} " + "слово " * 20 for index in range(30))
+    parts = split_dialog_lines(dialog)
+    assert len(parts) == 30
+
+    plan = plan_prompt(
+        budget=700,
+        required=["system", "вопрос"],
+        blocks=[PromptBlock("dialog", parts, share=0.4), PromptBlock("memory", [], share=0.6)],
+    )
+
+    kept = plan.kept["dialog"]
+    assert kept and kept[-1] == parts[-1]
+    # The newest turns survive whole; only the oldest kept one may be cut.
+    assert kept[1:] == parts[len(parts) - len(kept) + 1 :]
+    assert plan.dropped["dialog"] > 0
+    # The empty memory block's share went to the dialog.
+    assert 600 < plan.tokens <= 700
+
+
+def test_orchestrator_fits_history_and_dialog_into_budget(tmp_path: Path) -> None:
+    storage = TaskStorage(tmp_path / "bot.db")
+    for index in range(6):
+        storage.record_execution(
+            TaskExecutionResult(
+                task_name="ask",
+                payload=f"вопрос {index} " + "длинно " * 60,
+                result=f"ответ {index} " + "подробно " * 60,
+                status="success",
+                executed_at=datetime(2024, 1, 1, index, tzinfo=timezone.utc),
+                user_id=1,
+            )
+        )
+    client = CaptureLLMClient()
+    orchestrator = Orchestrator(
+        config={"llm": {"max_prompt_tokens": 1_500}},
+        storage=storage,
+        llm_client=client,
+        llm_history_turns=6,
+    )
+    request_context = RequestContext(
+        correlation_id="c1",
+        user_id=1,
+        chat_id=1,
+        message_id=1,
+        timezone=None,
+        ts=datetime.now(timezone.utc),
+        env="test",
+    )
+    dialog = "\n".join(f"[user] реплика {index} " + "текст " * 30 for index in range(20))
+
+    execution = asyncio.run(
+        orchestrator.ask_llm(1, "Новый вопрос", dialog_context=dialog, request_context=request_context)
+    )
+
+    assert execution.status == "success"
+    messages = client.last_messages
+    assert estimate_messages_tokens(messages) <= 1_500
+    history_questions = [m["content"] for m in messages[1:-1] if m["role"] == "user"]
+    assert 0 < len(history_questions) < 6
+    assert history_questions[-1].startswith("вопрос 5")
+    assert "реплика 19" in messages[-1]["content"] and "реплика 0 " not in messages[-1]["content"]
+    assert messages[-1]["content"].endswith("Новый вопрос")
+    assert request_context.meta["prompt_tokens"] == estimate_messages_tokens(messages)
+    assert any(step["step"] == "llm.prompt" for step in request_context.trace)
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from app.core import calendar_store
+from app.core.recurrence_rrule import (
+    OccurrenceCache,
+    compile_rrule,
+    set_rrule_part,
+    strip_rrule_parts,
+)
+
+TZ = ZoneInfo("Europe/Moscow")
+
+
+def test_compiled_rrule_weekly_byday_with_count() -> None:
+    start = datetime(2026, 3, 4, 9, 0, tzinfo=TZ)  # Wednesday
+    rule = compile_rrule("FREQ=WEEKLY;BYDAY=MO,WE,FR;COUNT=4")
+
+    values = list(rule.occurrences(start))
+
+    assert [value.strftime("%a %d") for value in values] == ["Wed 04", "Fri 06", "Mon 09", "Wed 11"]
+    assert all(value.tzinfo is TZ and value.hour == 9 for value in values)
+
+
+def test_compiled_rrule_window_skips_ahead_and_honours_until() -> None:
+    start = datetime(2026, 1, 31, 18, 30, tzinfo=TZ)
+    monthly = compile_rrule("FREQ=MONTHLY;BYMONTHDAY=31")
+    window_start = datetime(2027, 1, 1, tzinfo=TZ)
+    window_end = datetime(2027, 6, 30, tzinfo=TZ)
+
+    values = list(monthly.occurrences(start, start=window_start, end=window_end))
+
+    assert [value.date().isoformat() for value in values] == ["2027-01-31", "2027-03-31", "2027-05-31"]
+    daily = compile_rrule("FREQ=DAILY;INTERVAL=2;UNTIL=20260206T000000Z")
+    assert [value.day for value in daily.occurrences(datetime(2026, 2, 1, 9, 0, tzinfo=TZ))] == [1, 3, 5]
+
+
+def test_rrule_part_helpers_keep_order() -> None:
+    rrule = "FREQ=WEEKLY;BYDAY=MO;COUNT=5"
+
+    assert set_rrule_part(rrule, "UNTIL", "20260301T000000Z") == "FREQ=WEEKLY;BYDAY=MO;COUNT=5;UNTIL=20260301T000000Z"
+    assert set_rrule_part(rrule, "BYDAY", "TU") == "FREQ=WEEKLY;BYDAY=TU;COUNT=5"
+    assert strip_rrule_parts(rrule, {"COUNT", "UNTIL"}) == "FREQ=WEEKLY;BYDAY=MO"
+    assert set_rrule_part(None, "UNTIL", "x") is None
+
+
+def test_occurrence_cache_hits_and_invalidates_per_series() -> None:
+    cache = OccurrenceCache(max_entries=2)
+    start = datetime(2026, 3, 1, 9, 0, tzinfo=TZ)
+    window = (start, start + timedelta(days=6))
+
+    first = cache.expand("s1", start, "FREQ=DAILY", [start + timedelta(days=1)], *window)
+    again = cache.expand("s1", start, "FREQ=DAILY", [start + timedelta(days=1)], *window)
+
+    assert len(first) == 6 and again is first
+    assert (cache.hits, cache.misses) == (1, 1)
+    cache.expand("s2", start, "FREQ=DAILY", None, *window)
+    cache.invalidate("s1")
+    assert len(cache) == 1
+    cache.expand("s3", start, "FREQ=DAILY", None, *window)
+    cache.expand("s4", start, "FREQ=DAILY", None, *window)
+    assert len(cache) == 2
+
+
+def test_list_occurrences_expands_series_with_exdates_and_overrides(tmp_path, monkeypatch) -> None:
+    monkeypatch.setenv("CALENDAR_PATH", str(tmp_path / "calendar.json"))
+    start = datetime(2026, 3, 2, 9, 0, tzinfo=calendar_store.BOT_TZ)
+
+    async def scenario() -> None:
+        created = await calendar_store.add_item(
+            dt=start,
+            title="Йога",
+            chat_id=1,
+            user_id=1,
+            rrule="FREQ=DAILY",
+            exdates=[start + timedelta(days=1)],
+        )
+        await calendar_store.add_item(dt=start + timedelta(hours=3), title="Разовое", chat_id=1, user_id=1)
+        event_id = created["event"]["event_id"]
+        window = (start - timedelta(hours=1), start + timedelta(days=3))
+
+        items = await calendar_store.list_occurrences(*window, user_id=1)
+        assert [(item.dt.day, item.title) for item in items] == [(2, "Йога"), (2, "Разовое"), (4, "Йога"), (5, "Йога")]
+
+        moved = start + timedelta(days=2, hours=2)
+        await calendar_store.update_event_fields(
+            event_id,
+            new_exdates=[start + timedelta(days=1), start + timedelta(days=2)],
+            new_overrides={moved.isoformat(): {"start_at": moved, "title": "Йога вечером"}},
+        )
+        items = await calendar_store.list_occurrences(*window, user_id=1)
+        assert [(item.dt.day, item.dt.hour, item.title) for item in items] == [
+            (2, 9, "Йога"),
+            (2, 12, "Разовое"),
+            (4, 11, "Йога вечером"),
+            (5, 9, "Йога"),
+        ]
+        assert await calendar_store.list_occurrences(*window, user_id=2) == []
+
+    asyncio.run(scenario())
+
+
+def test_calendar_list_offers_one_delete_per_series(tmp_path, monkeypatch) -> None:
+    from app.bot import handlers
+
+    monkeypatch.setenv("CALENDAR_PATH", str(tmp_path / "calendar.json"))
+    start = datetime(2026, 3, 2, 9, 0, tzinfo=calendar_store.BOT_TZ)
+
+    async def scenario():
+        await calendar_store.add_item(dt=start, title="Йога", chat_id=1, user_id=1, rrule="FREQ=DAILY")
+        await calendar_store.add_item(dt=start + timedelta(hours=3), title="Разовое", chat_id=1, user_id=1)
+        return await handlers._build_calendar_list_result(
+            start - timedelta(hours=1),
+            start + timedelta(days=3),
+            user_id=1,
+            chat_id=1,
+            intent="utility_calendar.list",
+        )
+
+    result = asyncio.run(scenario())
+
+    assert len(result.text.splitlines()) == 5
+    deletes = [action.payload for action in result.actions if action.id == "utility_calendar.delete"]
+    assert len(deletes) == 2
+    assert deletes[0]["instance_dt"] == start.isoformat()
+    assert "instance_dt" not in deletes[1]
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from telegram.error import Forbidden
+
+from app.core import calendar_store
+from app.core.reminder_scheduler import ReminderDispatcher
+from app.core.reminders import ReminderScheduler
+from app.infra.observability.metrics import MetricsCollector
+from app.infra.send_queue import OutboundSendQueue
+
+
+class FakeBot:
+    def __init__(self) -> None:
+        self.sent: list[tuple[int, str, float]] = []
+
+    async def send_message(self, chat_id: int, text: str, reply_markup=None) -> None:
+        self.sent.append((chat_id, text, time.monotonic()))
+
+
+def _now() -> datetime:
+    return datetime.now(tz=calendar_store.BOT_TZ)
+
+
+def test_dispatcher_wakes_at_trigger_and_rearms_on_store_changes(tmp_path, monkeypatch) -> None:
+    monkeypatch.setenv("CALENDAR_PATH", str(tmp_path / "calendar.json"))
+    bot = FakeBot()
+    application = SimpleNamespace(bot=bot, bot_data={})
+    metrics = MetricsCollector()
+
+    async def scenario() -> None:
+        dispatcher = ReminderDispatcher(application, metrics=metrics)
+        dispatcher.start()
+        try:
+            started = time.monotonic()
+            await calendar_store.add_reminder(
+                trigger_at=_now() + timedelta(seconds=0.3), text="Скоро", chat_id=7, user_id=7
+            )
+            far = await calendar_store.add_reminder(
+                trigger_at=_now() + timedelta(hours=2), text="Потом", chat_id=7, user_id=7
+            )
+            await asyncio.sleep(0.7)
+            assert len(bot.sent) == 1 and bot.sent[0][1].startswith("⏰ Напоминание: Скоро")
+            assert 0.25 <= bot.sent[0][2] - started < 0.6
+
+            # Moving a far reminder closer re-arms the single timer.
+            await calendar_store.update_reminder_trigger(far.id, _now() + timedelta(seconds=0.1))
+            await asyncio.sleep(0.4)
+            assert "Потом" in bot.sent[-1][1]
+            assert await calendar_store.next_due_at() is None
+        finally:
+            await dispatcher.stop()
+        assert not dispatcher.running
+
+    asyncio.run(scenario())
+    assert "reminders.dispatch_lag_ms" in metrics.get_gauges()
+
+
+def test_dispatcher_drains_burst_in_one_pass_without_jobs(tmp_path, monkeypatch) -> None:
+    monkeypatch.setenv("CALENDAR_PATH", str(tmp_path / "calendar.json"))
+    bot = FakeBot()
+    jobs: list[str] = []
+    application = SimpleNamespace(
+        bot=bot,
+        bot_data={},
+        job_queue=SimpleNamespace(run_once=lambda *args, **kwargs: jobs.append("run_once")),
+    )
+
+    async def scenario() -> None:
+        dispatcher = ReminderDispatcher(application)
+        scheduler = ReminderScheduler(application=application, dispatcher=dispatcher)
+        past = _now() - timedelta(minutes=1)
+        for index in range(25):
+            reminder = await calendar_store.add_reminder(
+                trigger_at=past, text=f"Пачка {index}", chat_id=index + 1, user_id=index + 1
+            )
+            assert await scheduler.schedule_reminder(reminder) == f"reminder:{reminder.id}"
+        assert await scheduler.restore_all() == 0
+
+        await dispatcher.dispatch_due()
+
+        assert len(bot.sent) == 25
+        assert await calendar_store.list_due_reminders(_now()) == []
+
+    asyncio.run(scenario())
+    assert jobs == []
+
+
+def test_reminder_dropped_by_send_queue_is_not_retried(tmp_path, monkeypatch) -> None:
+    monkeypatch.setenv("CALENDAR_PATH", str(tmp_path / "calendar.json"))
+
+    class BlockedBot:
+        def __init__(self) -> None:
+            self.calls = 0
+
+        async def send_message(self, chat_id: int, text: str, reply_markup=None) -> None:
+            self.calls += 1
+            raise Forbidden("bot was blocked by the user")
+
+    bot = BlockedBot()
+
+    async def scenario() -> None:
+        queue = OutboundSendQueue(bot)
+        queue.start()
+        application = SimpleNamespace(bot=bot, bot_data={"send_queue": queue})
+        dispatcher = ReminderDispatcher(application)
+        await calendar_store.add_reminder(trigger_at=_now() - timedelta(minutes=1), text="Никому", chat_id=3, user_id=3)
+        try:
+            await dispatcher.dispatch_due()
+            await asyncio.wait_for(queue.join(), timeout=5)
+            await asyncio.sleep(0.05)
+            assert await calendar_store.list_due_reminders(_now()) == []
+            await dispatcher.dispatch_due()
+        finally:
+            await queue.stop()
+
+    asyncio.run(scenario())
+    assert bot.calls == 1
@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from datetime import timedelta
+from itertools import pairwise
+from pathlib import Path
+
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.error import Forbidden, RetryAfter
+
+from app.infra.observability.metrics import MetricsCollector
+from app.infra.send_queue import OutboundSendQueue
+
+
+class FakeBot:
+    def __init__(self, failures: dict[int, list[Exception]] | None = None) -> None:
+        self.sent: list[tuple[int, str, float, object]] = []
+        self.failures = failures or {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def send_message(self, chat_id: int, text: str, reply_markup=None) -> None:
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.005)
+            pending = self.failures.get(chat_id)
+            if pending:
+                raise pending.pop(0)
+            self.sent.append((chat_id, text, time.monotonic(), reply_markup))
+        finally:
+            self.in_flight -= 1
+
+
+def test_queue_respects_global_and_per_chat_rates_and_keeps_chat_order() -> None:
+    bot = FakeBot()
+    metrics = MetricsCollector()
+
+    async def scenario() -> float:
+        queue = OutboundSendQueue(
+            bot, global_per_second=100, per_chat_per_second=10, per_chat_burst=1, concurrency=4, metrics=metrics
+        )
+        queue.start()
+        started = time.monotonic()
+        for chat_id in range(1, 121):
+            await queue.submit(chat_id, f"digest {chat_id}", kind="digest")
+        for index in range(4):
+            await queue.submit(999, f"reminder {index}", kind="reminder")
+        await asyncio.wait_for(queue.join(), timeout=5)
+        elapsed = time.monotonic() - started
+        await queue.stop()
+        return elapsed
+
+    elapsed = asyncio.run(scenario())
+
+    assert len(bot.sent) == 124
+    # 100 tokens of burst, then 100 msg/s for the remaining 24.
+    assert elapsed >= 0.2
+    assert bot.max_in_flight <= 4
+    own_chat = [(text, at) for chat_id, text, at, _ in bot.sent if chat_id == 999]
+    assert [text for text, _ in own_chat] == [f"reminder {index}" for index in range(4)]
+    assert all(later - earlier >= 0.08 for (_, earlier), (_, later) in pairwise(own_chat))
+    assert metrics.get_counters()["send_queue.sent.digest"] == 120
+    assert metrics.get_gauges()["send_queue.pending"] == 0
+
+
+def test_queue_requeues_on_retry_after_and_drops_blocked_chats() -> None:
+    bot = FakeBot({1: [RetryAfter(timedelta(seconds=0.2))], 2: [Forbidden("bot was blocked by the user")]})
+    metrics = MetricsCollector()
+
+    async def scenario() -> None:
+        queue = OutboundSendQueue(bot, metrics=metrics)
+        queue.start()
+        started = time.monotonic()
+        await queue.submit(1, "после паузы")
+        await queue.submit(2, "заблокирован")
+        await asyncio.wait_for(queue.join(), timeout=5)
+        await queue.stop()
+        assert bot.sent[0][2] - started >= 0.2
+
+    asyncio.run(scenario())
+
+    assert [(chat_id, text) for chat_id, text, _, _ in bot.sent] == [(1, "после паузы")]
+    counters = metrics.get_counters()
+    assert counters["send_queue.retry_after"] == 1
+    assert counters["send_queue.dropped.message"] == 1
+
+
+def test_pending_messages_survive_restart_and_submit_applies_backpressure(tmp_path: Path) -> None:
+    path = tmp_path / "send_queue.db"
+    markup = InlineKeyboardMarkup([[InlineKeyboardButton("Отложить", callback_data="a:1")]])
+
+    async def before_restart() -> None:
+        queue = OutboundSendQueue(FakeBot(), persist_path=path)
+        await queue.submit(5, "первое", reply_markup=markup, kind="reminder")
+        await queue.submit(5, "второе", kind="reminder")
+        await queue.stop()
+
+    asyncio.run(before_restart())
+    bot = FakeBot()
+
+    async def after_restart() -> None:
+        queue = OutboundSendQueue(bot, persist_path=path, max_pending=2)
+        queue.start()
+        assert queue.pending == 2
+        # The third message waits for space instead of growing the queue.
+        await asyncio.wait_for(queue.submit(6, "третье"), timeout=5)
+        assert queue.pending <= 2
+        await asyncio.wait_for(queue.join(), timeout=5)
+        await queue.stop()
+
+    asyncio.run(after_restart())
+
+    assert [text for _, text, _, _ in bot.sent] == ["первое", "второе", "третье"]
+    # Button tokens live in the in-memory ActionStore, so replayed messages come without them.
+    assert bot.sent[0][3] is None
+    restarted = OutboundSendQueue(FakeBot(), persist_path=path)
+    assert restarted.pending == 0
+
+
+def test_on_delivered_runs_only_after_successful_delivery(tmp_path: Path) -> None:
+    bot = FakeBot({2: [Forbidden("bot was blocked by the user")]})
+    delivered: list[str] = []
+    dropped: list[str] = []
+
+    def mark(name: str, into: list[str] = delivered):
+        async def callback() -> None:
+            into.append(name)
+
+        return callback
+
+    async def scenario() -> None:
+        queue = OutboundSendQueue(bot, persist_path=tmp_path / "send_queue.db")
+        queue.start()
+        assert await queue.submit(1, "дошло", key="reminder:a", on_delivered=mark("a"))
+        # A message with the same key is still pending: not queued twice.
+        assert not await queue.submit(1, "дошло", key="reminder:a", on_delivered=mark("a"))
+        assert queue.is_pending("reminder:a")
+        await queue.submit(2, "не дошло", key="reminder:b", on_delivered=mark("b"), on_failed=mark("b", dropped))
+        await asyncio.wait_for(queue.join(), timeout=5)
+        await queue.stop()
+        assert not queue.is_pending("reminder:a") and not queue.is_pending("reminder:b")
+
+    asyncio.run(scenario())
+
+    assert delivered == ["a"] and dropped == ["b"]
+    assert [text for _, text, _, _ in bot.sent] == ["дошло"]
+
+    async def restart() -> int:
+        # Their owners re-send unconfirmed messages, so they are not replayed from disk.
+        queue = OutboundSendQueue(FakeBot(), persist_path=tmp_path / "send_queue.db")
+        queue.start()
+        pending = queue.pending
+        await queue.stop()
+        return pending
+
+    assert asyncio.run(restart()) == 0
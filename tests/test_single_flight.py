@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from app.core.orchestrator import Orchestrator
+from app.infra.observability.metrics import MetricsCollector
+from app.infra.single_flight import SingleFlight
+from app.infra.storage import TaskStorage
+
+
+class SlowLLMClient:
+    def __init__(self) -> None:
+        self.api_key = "fake-key"
+        self.calls = 0
+
+    async def create_chat_completion(self, *, model, messages, max_tokens=None, web_search_options=None):
+        return {"content": await self.generate_text(model=model, messages=messages)}
+
+    async def generate_text(self, *, model, messages, max_tokens=None, web_search_options=None) -> str:
+        self.calls += 1
+        await asyncio.sleep(0.05)
+        return "общий ответ"
+
+
+def test_concurrent_identical_llm_requests_share_one_upstream_call(tmp_path: Path) -> None:
+    client = SlowLLMClient()
+    metrics = MetricsCollector()
+    orchestrator = Orchestrator(
+        config={}, storage=TaskStorage(tmp_path / "bot.db"), llm_client=client, metrics=metrics
+    )
+
+    async def scenario() -> list[str]:
+        executions = await asyncio.gather(
+            *(orchestrator.ask_llm(user_id, "Что такое single-flight?") for user_id in range(1, 6)),
+            orchestrator.ask_llm(9, "Другой вопрос"),
+        )
+        return [execution.result for execution in executions]
+
+    results = asyncio.run(scenario())
+
+    assert results[:5] == ["общий ответ"] * 5
+    assert client.calls == 2
+    counters = metrics.get_counters()
+    assert counters["single_flight.llm.leaders"] == 2
+    assert counters["single_flight.llm.coalesced"] == 4
+    assert metrics.get_gauges()["single_flight.llm.inflight"] == 0
+
+
+def test_waiter_timeout_does_not_cancel_shared_call() -> None:
+    flight: SingleFlight[str] = SingleFlight("test")
+    started: list[str] = []
+    cancelled: list[str] = []
+
+    async def call() -> str:
+        started.append("call")
+        try:
+            await asyncio.sleep(0.1)
+        except asyncio.CancelledError:
+            cancelled.append("call")
+            raise
+        return "done"
+
+    async def scenario() -> None:
+        impatient = asyncio.create_task(asyncio.wait_for(flight.do("key", call), timeout=0.02))
+        patient = asyncio.create_task(flight.do("key", call))
+        with pytest.raises(asyncio.TimeoutError):
+            await impatient
+        assert await patient == "done"
+        assert started == ["call"] and cancelled == []
+        assert len(flight) == 0
+
+        # When every waiter gives up, the shared call is cancelled and forgotten.
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(flight.do("key", call), timeout=0.02)
+        await asyncio.sleep(0)
+        assert cancelled == ["call"]
+        assert len(flight) == 0
+        assert await flight.do("key", call) == "done"
+
+    asyncio.run(scenario())
@@ -2,8 +2,13 @@ from __future__ import annotations
 
 import asyncio
 
+import httpx
+
 from app.core.result import Source
-from app.tools.web_search import PerplexityWebSearchClient
+from app.infra.llm import SharedHTTPClient
+from app.infra.observability.metrics import MetricsCollector
+from app.infra.ttl_cache import TTLCache
+from app.tools.web_search import PerplexityWebSearchClient, WebSearchCache, _fetch_metadata
 
 
 class FakePerplexity:
@@ -35,3 +40,124 @@ def test_web_search_returns_sources() -> None:
 
     assert len(sources) == 2
     assert all(isinstance(item.title, str) and isinstance(item.url, str) and isinstance(item.snippet, str) for item in sources)
+
+
+class SlowWebSearchClient(PerplexityWebSearchClient):
+    def __init__(self, *args, delays: dict[str, float], **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.delays = delays
+        self.active = 0
+        self.peak = 0
+
+    async def _build_source(self, url: str) -> Source:  # type: ignore[override]
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.delays.get(url, 0.01))
+        finally:
+            self.active -= 1
+        return Source(title=f"Title {url}", url=url, snippet="Snippet")
+
+
+def test_web_search_fetches_sources_concurrently_within_deadline() -> None:
+    urls = [f"https://example.com/{index}" for index in range(6)]
+    client = SlowWebSearchClient(
+        FakePerplexity(),
+        delays={urls[4]: 5.0},
+        max_concurrency=3,
+        deadline_seconds=0.3,
+    )
+
+    sources = asyncio.run(client._build_sources(urls))
+
+    assert [source.url for source in sources] == urls
+    assert client.peak == 3
+    assert sources[4].title == urls[4] and sources[4].snippet == ""
+    assert all(source.title == f"Title {source.url}" for index, source in enumerate(sources) if index != 4)
+
+
+def test_fetch_metadata_stops_after_head() -> None:
+    head = (
+        "<html><head><title>Пример\n страницы</title>"
+        '<meta name="description" content="Короткое &amp; ясное описание"></head>'
+    )
+    pulled: list[int] = []
+
+    async def body():
+        yield head.encode("utf-8")
+        for index in range(100):
+            pulled.append(index)
+            yield b"<p>" + b"x" * 4096 + b"</p>"
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, headers={"content-type": "text/html; charset=utf-8"}, content=body())
+
+    async def scenario() -> tuple[str, str]:
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await _fetch_metadata(client, "https://example.com/page", timeout_seconds=1.0)
+
+    title, description = asyncio.run(scenario())
+
+    assert title == "Пример страницы"
+    assert description == "Короткое & ясное описание"
+    assert len(pulled) <= 1
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_ttl_cache_expires_and_evicts_least_recently_used() -> None:
+    clock = _Clock()
+    cache: TTLCache[str] = TTLCache(2, clock=clock)
+    cache.put("a", "A", 10)
+    cache.put("b", "B", 100)
+    assert cache.get("a") == "A"
+    cache.put("c", "C", 100)
+
+    assert cache.get("b") is None
+    clock.now += 50
+    assert cache.get("a") is None
+    assert cache.get("c") == "C"
+
+
+def test_web_search_cache_reuses_metadata_and_queries(tmp_path) -> None:
+    fetched: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        fetched.append(str(request.url))
+        if request.url.path == "/b":
+            return httpx.Response(503)
+        return httpx.Response(200, headers={"content-type": "text/html"}, text="<title>A</title></head>")
+
+    metrics = MetricsCollector()
+    clock = _Clock()
+    cache = WebSearchCache(persist_path=tmp_path / "web_cache.db", metrics=metrics, clock=clock)
+    perplexity = FakePerplexity()
+    client = PerplexityWebSearchClient(
+        perplexity,
+        http_client=SharedHTTPClient(transport=httpx.MockTransport(handler)),
+        cache=cache,
+    )
+
+    first = asyncio.run(client.search("Python  Tips"))
+    second = asyncio.run(client.search("python tips"))
+    asyncio.run(client.search("other query"))
+
+    assert second == first and [source.title for source in first] == ["A", "https://example.com/b"]
+    assert perplexity.calls == 2
+    assert fetched == ["https://example.com/a", "https://example.com/b"]
+    counters = metrics.get_counters()
+    assert counters["web_search_cache.query_hits"] == 1
+    assert counters["web_search_cache.metadata_hits"] == 2
+    cache.close()
+
+    clock.now += 3600
+    restored = WebSearchCache(persist_path=tmp_path / "web_cache.db", clock=clock)
+    assert restored.get_metadata("https://example.com/a") == ("A", "")
+    assert restored.get_metadata("https://example.com/b") is None
+    restored.close()